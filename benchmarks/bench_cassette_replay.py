@@ -0,0 +1,77 @@
+"""Record a trading session once, then replay it offline.
+
+Run with ``python benchmarks/bench_cassette_replay.py [CASSETTE]``. Without a path the
+session is recorded against the stand-in chain with ``LATENCY`` seconds per request and
+written to a temporary file; with one, an earlier recording of the same workload is
+loaded instead, e.g. one captured with a previous SDK version. The workload is then
+replayed with zero and with the recorded latency, and the requests per method and wall
+times of the recording and the replays are printed side by side.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from perpcity_sdk import ClosePositionParams, OpenTakerPositionParams, open_taker_position
+from perpcity_sdk.cassette import CASSETTE_MIDDLEWARE, Cassette, record, replay
+from perpcity_sdk.standin import NetworkConditions, StandInChain
+from perpcity_sdk.utils.module_cache import MODULE_CONSTANTS
+
+LATENCY = 0.03
+ROUND_TRIPS = 5
+KEY = "0x" + "01" * 32
+
+_OPEN = OpenTakerPositionParams(is_long=True, margin=10, leverage=3, unspecified_amount_limit=0)
+_CLOSE = ClosePositionParams(min_amt0_out=0, min_amt1_out=0, max_amt1_in=0)
+
+
+def _workload(ctx, perp_id: str) -> float:
+    MODULE_CONSTANTS.clear()
+    start = time.perf_counter()
+    ctx.get_perp_data(perp_id)
+    for _ in range(ROUND_TRIPS):
+        position = open_taker_position(ctx, perp_id, _OPEN)
+        position.live_details()
+        position.close_position(_CLOSE)
+    ctx.get_user_data(ctx.account.address)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    chain = StandInChain()
+    perp_id = chain.create_perp(price=10.0)
+
+    if len(sys.argv) > 1:
+        path = Path(sys.argv[1])
+        cassette = Cassette.load(path)
+        recorded = cassette.elapsed
+    else:
+        ctx = chain.connect(KEY, NetworkConditions(latency=LATENCY))
+        chain.mint_usdc(ctx.account.address, 1_000)
+        cassette = record(ctx.w3)
+        recorded = _workload(ctx, perp_id)
+        ctx.w3.middleware_onion.remove(CASSETTE_MIDDLEWARE)
+        path = Path(tempfile.mkdtemp()) / "session.jsonl.gz"
+        cassette.save(path)
+
+    print(f"{path}: {len(cassette)} interactions, {path.stat().st_size} bytes")
+    counts = {"recorded": cassette.method_counts()}
+    times = {"recorded": recorded}
+    for label, recorded_latency in [("replay", False), ("replay+latency", True)]:
+        ctx = chain.connect(KEY)
+        player = replay(ctx.w3, Cassette.load(path), recorded_latency=recorded_latency)
+        times[label] = _workload(ctx, perp_id)
+        counts[label] = player.requests
+        if player.misses or player.unused:
+            print(f"  {label}: {sum(player.misses.values())} misses, {player.unused} unused")
+
+    print(f"  {'method':28s}" + "".join(f"{label:>16s}" for label in counts))
+    methods = sorted(set().union(*counts.values()), key=lambda m: -counts["recorded"][m])
+    for method in methods:
+        print(f"  {method:28s}" + "".join(f"{c[method]:16d}" for c in counts.values()))
+    print(f"  {'wall time (s)':28s}" + "".join(f"{t:16.3f}" for t in times.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Wall time of importing the SDK in a fresh interpreter.
+
+Run with ``python benchmarks/bench_import_time.py``. Each statement runs in its own
+subprocess ``RUNS`` times and the median is reported, next to whether web3 ended up
+imported. For a per-module breakdown use
+``python -X importtime -c "import perpcity_sdk"``.
+"""
+
+import statistics
+import subprocess
+import sys
+
+RUNS = 7
+
+STATEMENTS = [
+    "import perpcity_sdk",
+    "from perpcity_sdk.utils.conversions import price_to_tick",
+    "from perpcity_sdk.utils.liquidity import estimate_liquidity",
+    "from perpcity_sdk import PerpData, tick_to_price",
+    "from perpcity_sdk.abis.selectors import PERP_MANAGER_SELECTORS",
+    "from perpcity_sdk import PerpCityContext",
+]
+
+_PROBE = """
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed, "web3" in sys.modules)
+"""
+
+
+def _run(statement: str) -> tuple[float, bool]:
+    times = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        times.append(float(output[0]))
+    return statistics.median(times), output[1] == "True"
+
+
+def main() -> None:
+    print(f"median of {RUNS} fresh interpreters")
+    for statement in STATEMENTS:
+        elapsed, web3 = _run(statement)
+        print(f"  {elapsed * 1e3:8.1f} ms  web3={'yes' if web3 else 'no ':3s}  {statement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Throughput of LiquidationScanner against a local stand-in chain.
+
+Run with ``python benchmarks/bench_liquidation_scan.py``. The stand-in answers every
+JSON-RPC request after ``LATENCY`` seconds, roughly a hosted RPC round trip, so the
+numbers show how batching and concurrent workers hide that latency.
+"""
+
+import time
+
+from eth_abi import encode
+from eth_utils import function_signature_to_4byte_selector
+from web3.providers.base import BaseProvider
+
+from perpcity_sdk import LiquidationScanner, PerpCityContext
+from perpcity_sdk.utils.constants import MULTICALL3_ADDRESS
+
+POSITIONS = 20_000
+LATENCY = 0.02
+PERP_MANAGER = "0x" + "11" * 20
+
+_AGGREGATE3 = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+_POSITIONS = function_signature_to_4byte_selector("positions(uint256)")
+_NEXT_POS_ID = function_signature_to_4byte_selector("nextPosId()")
+
+_POSITION = encode(
+    [
+        "bytes32",
+        "uint256",
+        "int256",
+        "int256",
+        "int256",
+        "uint256",
+        "uint256",
+        "(uint24,uint24,uint24)",
+        "(uint32,int24,int24,uint128,int256,int256,int256)",
+    ],
+    [b"\xab" * 32, 10**8, 2 * 10**6, -(10**8), 0, 0, 0, (10**5, 5 * 10**5, 5 * 10**4), (0,) * 7],
+)
+_CLOSED = encode(["bytes32"], [bytes(32)]) + _POSITION[32:]
+_QUOTE_TYPES = ["bytes", "int256", "int256", "uint256", "bool"]
+_QUOTE = encode(_QUOTE_TYPES, [b"", -(10**6), 0, 5 * 10**7, False])
+_QUOTE_LIQUIDATED = encode(_QUOTE_TYPES, [b"", -(10**8), 0, 0, True])
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def _split_calls(data: bytes) -> list[bytes]:
+    """Calldata of every call in an ``aggregate3`` request, without eth_abi."""
+    body = data[4 + 32 :]  # selector, offset of the array
+    count = int.from_bytes(body[:32], "big")
+    elements = body[32:]
+    calls = []
+    for i in range(count):
+        start = int.from_bytes(elements[32 * i : 32 * i + 32], "big")
+        length = int.from_bytes(elements[start + 96 : start + 128], "big")
+        calls.append(elements[start + 128 : start + 128 + length])
+    return calls
+
+
+def _join_results(results: list[tuple[bool, bytes]]) -> bytes:
+    """ABI encoding of ``(bool,bytes)[]``, without eth_abi."""
+    heads, tails, offset = [], [], 32 * len(results)
+    for success, data in results:
+        tail = _word(success) + _word(64) + _word(len(data)) + data + bytes(-len(data) % 32)
+        heads.append(_word(offset))
+        tails.append(tail)
+        offset += len(tail)
+    return _word(32) + _word(len(results)) + b"".join(heads) + b"".join(tails)
+
+
+class StandInChain(BaseProvider):
+    """Serves a perp manager with ``POSITIONS`` ids: every 10th liquidatable, every 7th
+    closed. Responses are assembled by hand so the chain's own CPU time, which a real
+    node spends elsewhere, stays out of the measurement."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+        self.requests = 0
+
+    def _call(self, data: bytes) -> tuple[bool, bytes]:
+        if data[:4] == _NEXT_POS_ID:
+            return True, _word(POSITIONS + 1)
+        position_id = int.from_bytes(data[4:36], "big")
+        if data[:4] == _POSITIONS:
+            return True, _CLOSED if position_id % 7 == 0 else _POSITION
+        if position_id % 7 == 0:
+            return False, b""
+        return True, _QUOTE_LIQUIDATED if position_id % 10 == 0 else _QUOTE
+
+    def make_request(self, method, params):
+        self.requests += 1
+        time.sleep(self.latency)
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x14a34"}
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(1234)}
+        data = bytes.fromhex(params[0]["data"][2:])
+        if params[0]["to"].lower() == MULTICALL3_ADDRESS.lower() and data[:4] == _AGGREGATE3:
+            result = _join_results([self._call(call) for call in _split_calls(data)])
+        else:
+            result = self._call(data)[1]
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + result.hex()}
+
+
+def _context(chain: StandInChain) -> PerpCityContext:
+    ctx = PerpCityContext(
+        rpc_url="http://localhost:8545",
+        private_key="0x" + "01" * 32,
+        perp_manager_address=PERP_MANAGER,
+        usdc_address="0x" + "22" * 20,
+    )
+    ctx.w3.provider = chain
+    return ctx
+
+
+def main() -> None:
+    print(f"{POSITIONS} positions, {LATENCY * 1e3:.0f} ms per request")
+    for batch_size, max_workers in [(200, 1), (200, 8), (500, 8), (100, 16)]:
+        chain = StandInChain(LATENCY)
+        scanner = LiquidationScanner(
+            _context(chain), batch_size=batch_size, max_workers=max_workers
+        )
+        start = time.perf_counter()
+        found = scanner.scan()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        scanner.scan()
+        warm = time.perf_counter() - start
+        print(
+            f"  batch={batch_size:4d} workers={max_workers:2d}: "
+            f"{POSITIONS / cold:9.0f} positions/s, rescan {POSITIONS / warm:9.0f} positions/s "
+            f"({len(found)} liquidatable, {chain.requests} requests)"
+        )
+
+
+if __name__ == "__main__":
+    main()
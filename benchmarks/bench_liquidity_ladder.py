@@ -0,0 +1,50 @@
+"""Compare build_liquidity_ladder with a loop of calculate_liquidity_for_target_ratio.
+
+Run with ``python benchmarks/bench_liquidity_ladder.py`` (requires the ``numpy`` extra).
+The workload is a maker re-quoting a ladder of adjacent ranges around the mark.
+"""
+
+import time
+
+import numpy as np
+
+from perpcity_sdk.utils.conversions import price_to_sqrt_price_x96
+from perpcity_sdk.utils.liquidity import calculate_liquidity_for_target_ratio
+from perpcity_sdk.vector import build_liquidity_ladder
+
+RUNGS = 100
+TICK_SPACING = 60
+MARGIN = 100.0
+TARGET_RATIO = 0.1
+REPEATS = 2_000
+
+
+def main() -> None:
+    sqrt_price = price_to_sqrt_price_x96(100)
+    first = 46_020 - RUNGS // 2 * TICK_SPACING
+    ranges = np.array(
+        [(t, t + TICK_SPACING) for t in range(first, first + RUNGS * TICK_SPACING, 60)]
+    )
+    pairs = ranges.tolist()
+    margin_scaled = int(MARGIN * 1e6)
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        for lower, upper in pairs:
+            calculate_liquidity_for_target_ratio(
+                margin_scaled, lower, upper, sqrt_price, TARGET_RATIO
+            )
+    scalar = (time.perf_counter() - start) / REPEATS
+
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        build_liquidity_ladder(sqrt_price, ranges, MARGIN, TARGET_RATIO)
+    ladder = (time.perf_counter() - start) / REPEATS
+
+    print(f"{RUNGS} rungs, tick_spacing={TICK_SPACING}")
+    print(f"  scalar loop: {scalar * 1e6:8.1f} us/ladder")
+    print(f"  vectorized:  {ladder * 1e6:8.1f} us/ladder  ({scalar / ladder:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Cost of observing a context's requests with :class:`PerpCityMetrics`.
+
+Run with ``python benchmarks/bench_metrics_overhead.py``. The same open, live details
+and close round trip runs ``ROUND_TRIPS`` times against a zero-latency stand-in chain
+without metrics, with metrics installed but disabled, and enabled, so the differences
+are the SDK-side cost per round trip. The Prometheus rendering of the enabled run is
+timed as well.
+"""
+
+import time
+
+from perpcity_sdk import (
+    ClosePositionParams,
+    OpenTakerPositionParams,
+    PerpCityMetrics,
+    open_taker_position,
+)
+from perpcity_sdk.metrics import prometheus_text
+from perpcity_sdk.standin import StandInChain
+
+ROUND_TRIPS = 50
+KEY = "0x" + "01" * 32
+
+_OPEN = OpenTakerPositionParams(is_long=True, margin=10, leverage=3, unspecified_amount_limit=0)
+_CLOSE = ClosePositionParams(min_amt0_out=0, min_amt1_out=0, max_amt1_in=0)
+
+
+def _round_trips(chain: StandInChain, perp_id: str, metrics: PerpCityMetrics | None) -> float:
+    ctx = chain.connect(KEY, metrics=metrics)
+    chain.mint_usdc(ctx.account.address, 1_000_000)
+    start = time.perf_counter()
+    for _ in range(ROUND_TRIPS):
+        position = open_taker_position(ctx, perp_id, _OPEN)
+        position.live_details()
+        position.close_position(_CLOSE)
+    return (time.perf_counter() - start) / ROUND_TRIPS
+
+
+def main() -> None:
+    chain = StandInChain()
+    perp_id = chain.create_perp(price=10.0)
+    _round_trips(chain, perp_id, None)  # warm the caches shared by every run
+
+    disabled = PerpCityMetrics()
+    disabled.enabled = False
+    enabled = PerpCityMetrics()
+    runs = {
+        "no metrics": _round_trips(chain, perp_id, None),
+        "disabled": _round_trips(chain, perp_id, disabled),
+        "enabled": _round_trips(chain, perp_id, enabled),
+    }
+
+    base = runs["no metrics"]
+    for label, seconds in runs.items():
+        print(f"  {label:12s} {seconds * 1e3:8.3f} ms/round trip  {seconds / base - 1:+7.1%}")
+
+    snapshot = enabled.snapshot()
+    requests = sum(series.count for series in snapshot.rpc_methods.values())
+    start = time.perf_counter()
+    text = prometheus_text(snapshot)
+    elapsed = time.perf_counter() - start
+    print(f"  {requests} requests observed, {len(snapshot.contract_functions)} function series")
+    print(f"  prometheus_text: {len(text.splitlines())} lines in {elapsed * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare PositionTable with a loop of the scalar position calculations.
+
+Run with ``python benchmarks/bench_position_table.py`` (requires the ``numpy`` extra).
+The workload is a risk pass over a book of taker positions: liquidation prices, then
+mark-to-market at a new mark.
+"""
+
+import random
+import time
+
+from perpcity_sdk.functions.position import (
+    calculate_leverage,
+    calculate_liquidation_price,
+    calculate_position_value,
+)
+from perpcity_sdk.types import MarginRatios, PositionRawData
+from perpcity_sdk.vector import PositionTable
+
+POSITIONS = 100_000
+MARK = 101.5
+REPEATS = 5
+
+
+def _positions() -> list[PositionRawData]:
+    rng = random.Random(0)
+    positions = []
+    for position_id in range(POSITIONS):
+        perp_delta = rng.randint(-(10**9), 10**9)
+        positions.append(
+            PositionRawData(
+                perp_id="0x" + "ab" * 32,
+                position_id=position_id,
+                margin=rng.uniform(10, 10_000),
+                entry_perp_delta=perp_delta,
+                entry_usd_delta=-perp_delta * rng.randint(90, 110),
+                margin_ratios=MarginRatios(min=100_000, max=1_000_000, liq=50_000),
+            )
+        )
+    return positions
+
+
+def _best(fn) -> float:
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _scalar_pass(positions: list[PositionRawData]) -> None:
+    for raw in positions:
+        calculate_liquidation_price(raw, raw.entry_perp_delta > 0)
+        calculate_leverage(calculate_position_value(raw, MARK), raw.margin)
+
+
+def main() -> None:
+    positions = _positions()
+    table = PositionTable.from_raw_data(positions)
+
+    scalar = _best(lambda: _scalar_pass(positions))
+    build = _best(lambda: PositionTable.from_raw_data(positions))
+    vectorized = _best(lambda: (table.liquidation_price(), table.mark_to_market(MARK)))
+
+    print(f"{POSITIONS} positions, best of {REPEATS}")
+    print(f"  scalar loop:        {scalar * 1e3:8.1f} ms")
+    print(f"  table build:        {build * 1e3:8.1f} ms")
+    print(f"  table risk pass:    {vectorized * 1e3:8.1f} ms  ({scalar / vectorized:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Compare get_sqrt_ratio_at_tick with the per-tick-spacing lookup table.
+
+Run with ``python benchmarks/bench_sqrt_ratio_table.py``. The workload mimics ladder
+and range-scan code: many lookups of ticks on one ``tick_spacing`` grid.
+"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from perpcity_sdk.utils.tick_math import SqrtRatioTable, get_sqrt_ratio_at_tick
+
+TICK_SPACING = 60
+LOOKUPS = 200_000
+
+
+def _time(fn, ticks) -> float:
+    start = time.perf_counter()
+    for tick in ticks:
+        fn(tick)
+    return (time.perf_counter() - start) / len(ticks)
+
+
+def main() -> None:
+    rng = random.Random(0)
+    table = SqrtRatioTable(TICK_SPACING)
+    ticks = [
+        rng.randrange(table.min_tick, table.max_tick + 1, TICK_SPACING) for _ in range(LOOKUPS)
+    ]
+
+    bit_by_bit = _time(get_sqrt_ratio_at_tick, ticks)
+
+    start = time.perf_counter()
+    for block in range(len(table._blocks)):
+        table._blocks[block] = table._build_block(block)
+    build = time.perf_counter() - start
+    in_memory = _time(table.sqrt_ratio, ticks)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mapped_table = SqrtRatioTable(TICK_SPACING, Path(tmp) / "sqrt.bin")
+        mapped = _time(mapped_table.sqrt_ratio, ticks)
+        mapped_table.close()
+
+    print(f"tick_spacing={TICK_SPACING}, {len(table)} grid ticks, {LOOKUPS} lookups")
+    print(f"  full table build:  {build * 1e3:8.1f} ms")
+    print(f"  bit by bit:        {bit_by_bit * 1e9:8.0f} ns/tick")
+    print(f"  table (memory):    {in_memory * 1e9:8.0f} ns/tick  ({bit_by_bit / in_memory:.1f}x)")
+    print(f"  table (mmap file): {mapped * 1e9:8.0f} ns/tick  ({bit_by_bit / mapped:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Trading-bot load against the stand-in chain, offline.
+
+Run with ``python benchmarks/bench_standin_load.py``. ``TRADERS`` threads, each with
+its own account and context, open and close taker positions in a loop for
+``DURATION`` seconds while every request waits ``LATENCY`` seconds and fails with
+probability ``ERROR_RATE``. Prints round trips per second, the latency percentiles of
+an open-close round trip and the requests per method, the numbers to watch when
+changing how the SDK batches or retries requests.
+"""
+
+import statistics
+import threading
+import time
+from collections import Counter
+
+from perpcity_sdk import (
+    ClosePositionParams,
+    OpenTakerPositionParams,
+    PerpCityError,
+    open_taker_position,
+)
+from perpcity_sdk.standin import NetworkConditions, StandInChain
+
+TRADERS = 8
+DURATION = 10.0
+LATENCY = 0.03
+ERROR_RATE = 0.01
+
+_OPEN = OpenTakerPositionParams(is_long=True, margin=10, leverage=3, unspecified_amount_limit=0)
+_CLOSE = ClosePositionParams(min_amt0_out=0, min_amt1_out=0, max_amt1_in=0)
+
+
+def _trade(chain, perp_id, index, deadline, round_trips, failures, requests) -> None:
+    ctx = chain.connect(
+        "0x" + f"{index + 1:064x}",
+        NetworkConditions(latency=LATENCY, error_rate=ERROR_RATE, seed=index),
+    )
+    chain.mint_usdc(ctx.account.address, 1_000_000)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            open_taker_position(ctx, perp_id, _OPEN).close_position(_CLOSE)
+        except PerpCityError:
+            failures.append(1)
+            continue
+        round_trips.append(time.perf_counter() - start)
+    requests.update(ctx.w3.provider.requests)
+
+
+def main() -> None:
+    chain = StandInChain()
+    perp_id = chain.create_perp(price=10.0)
+    round_trips: list[float] = []
+    failures: list[int] = []
+    requests: Counter[str] = Counter()
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(
+            target=_trade,
+            args=(chain, perp_id, i, start + DURATION, round_trips, failures, requests),
+        )
+        for i in range(TRADERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{TRADERS} traders, {LATENCY * 1e3:.0f} ms per request, "
+        f"{ERROR_RATE:.0%} injected errors, {elapsed:.1f} s"
+    )
+    print(
+        f"  {len(round_trips) / elapsed:.1f} open+close round trips/s "
+        f"({len(round_trips)} ok, {len(failures)} failed)"
+    )
+    if len(round_trips) >= 2:
+        quantiles = statistics.quantiles(round_trips, n=100)
+        print(
+            f"  round trip p50 {quantiles[49] * 1e3:.0f} ms, p90 {quantiles[89] * 1e3:.0f} ms, "
+            f"p99 {quantiles[98] * 1e3:.0f} ms"
+        )
+    total = sum(requests.values())
+    print(f"  {total} requests, {total / max(len(round_trips), 1):.1f} per round trip:")
+    for method, count in requests.most_common():
+        print(f"    {method:28s} {count:6d}")
+
+
+if __name__ == "__main__":
+    main()
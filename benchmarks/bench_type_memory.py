@@ -0,0 +1,108 @@
+"""Per-position memory of portfolio snapshots with slotted and ``__dict__`` types.
+
+Run with ``python benchmarks/bench_type_memory.py``. The "dict" rows rebuild the
+record types as plain frozen dataclasses and give every position its own perp id
+string, which is how snapshots were held before the types gained ``slots=True`` and
+perp ids were interned.
+"""
+
+import dataclasses
+import gc
+import sys
+import tracemalloc
+
+from perpcity_sdk import types
+
+POSITIONS = 50_000
+PERP_ID = "0x" + "ab" * 32
+
+
+def _without_slots(cls: type) -> type:
+    fields = [(f.name, f.type, f) for f in dataclasses.fields(cls)]
+    return dataclasses.make_dataclass(cls.__name__, fields, frozen=True)
+
+
+def _user_data(ns, perp_id) -> object:
+    positions = [
+        ns.OpenPositionData(
+            perp_id=perp_id(),
+            position_id=i,
+            live_details=ns.LiveDetails(
+                pnl=i * 0.5, funding_payment=-0.1, effective_margin=100.0 + i, is_liquidatable=False
+            ),
+            is_long=True,
+            is_maker=False,
+        )
+        for i in range(POSITIONS)
+    ]
+    return ns.UserData(wallet_address="0x" + "01" * 20, usdc_balance=1.0, open_positions=positions)
+
+
+def _raw_data(ns, perp_id) -> list:
+    return [
+        ns.PositionRawData(
+            perp_id=perp_id(),
+            position_id=i,
+            margin=100.0 + i,
+            entry_perp_delta=2_000_000 + i,
+            entry_usd_delta=-100_000_000 - i,
+            margin_ratios=ns.MarginRatios(min=100_000, max=1_000_000, liq=50_000),
+        )
+        for i in range(POSITIONS)
+    ]
+
+
+def _indexed(ns, perp_id) -> list:
+    return [
+        ns.IndexedPosition(
+            position_id=i,
+            perp_id=perp_id(),
+            owner=None,
+            is_maker=False,
+            is_long=True,
+            tick_lower=None,
+            tick_upper=None,
+            opened_block=i,
+        )
+        for i in range(POSITIONS)
+    ]
+
+
+def _measure(build) -> float:
+    gc.collect()
+    tracemalloc.start()
+    snapshot = build()  # noqa: F841 - kept alive while measuring
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / POSITIONS
+
+
+def main() -> None:
+    names = ["OpenPositionData", "LiveDetails", "UserData"]
+    names += ["PositionRawData", "MarginRatios", "IndexedPosition"]
+    plain = type(sys)("plain")
+    for name in names:
+        setattr(plain, name, _without_slots(getattr(types, name)))
+
+    def fresh_perp_id() -> str:
+        return "".join(["0x", "ab" * 32])
+
+    def shared_perp_id() -> str:
+        return sys.intern(PERP_ID)
+
+    print(f"{POSITIONS} positions, bytes per position")
+    for label, build in [
+        ("UserData snapshot", _user_data),
+        ("PositionRawData list", _raw_data),
+        ("IndexedPosition list", _indexed),
+    ]:
+        before = _measure(lambda build=build: build(plain, fresh_perp_id))
+        after = _measure(lambda build=build: build(types, shared_perp_id))
+        print(
+            f"  {label:22s} dict: {before:5.0f} B   slots: {after:5.0f} B"
+            f"   {1 - after / before:4.0%} smaller"
+        )
+
+
+if __name__ == "__main__":
+    main()
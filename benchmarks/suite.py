@@ -0,0 +1,355 @@
+"""Micro-benchmarks of the SDK hot paths, checked against a stored baseline.
+
+Run with ``python benchmarks/suite.py``. Every case calls one function over a fixed
+batch of inputs, drawn from a seeded RNG or from the stored receipt and revert
+messages in ``fixtures/hot_paths.json``; nothing touches the network. A case reports
+the best of ``--repeat`` runs in ns per call::
+
+    python benchmarks/suite.py -k conversions        # only cases matching a substring
+    python benchmarks/suite.py --json results.json   # also write machine-readable results
+    python benchmarks/suite.py --compare             # exit 1 on regressions vs baseline.json
+    python benchmarks/suite.py --save-baseline       # refresh baseline.json
+
+Timings are compared relative to a fixed pure-Python loop timed alongside each case, so a
+baseline saved on one machine stays usable on another of the same Python version. A
+case is flagged when it is more than ``--threshold`` times slower than the baseline;
+refresh the baseline (``make bench-baseline``) when a slowdown is intended.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from perpcity_sdk.functions.position import (
+    calculate_entry_price,
+    calculate_leverage,
+    calculate_liquidation_price,
+    calculate_position_size,
+    calculate_position_value,
+)
+from perpcity_sdk.types import MarginRatios, PositionOpenedEvent, PositionRawData
+from perpcity_sdk.utils import conversions
+from perpcity_sdk.utils.constants import Q96
+from perpcity_sdk.utils.errors import parse_contract_error
+from perpcity_sdk.utils.events import PERP_MANAGER_EVENTS
+from perpcity_sdk.utils.liquidity import calculate_liquidity_for_target_ratio, estimate_liquidity
+from perpcity_sdk.utils.tick_math import MAX_TICK, MIN_TICK, get_sqrt_ratio_at_tick
+
+BENCH_DIR = Path(__file__).parent
+FIXTURES_PATH = BENCH_DIR / "fixtures" / "hot_paths.json"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+
+BATCH = 1_000
+DEFAULT_REPEAT = 7
+DEFAULT_THRESHOLD = 1.3
+# Each timed run repeats the batch until it takes at least this long
+MIN_RUN_SECONDS = 0.01
+
+Inputs = Sequence[tuple[Any, ...]]
+CaseBuilder = Callable[[random.Random, dict[str, Any]], tuple[Callable[..., Any], Inputs]]
+
+CASES: dict[str, CaseBuilder] = {}
+
+
+def case(name: str) -> Callable[[CaseBuilder], CaseBuilder]:
+    """Register a builder returning ``(function, argument tuples)`` for one case."""
+
+    def register(build: CaseBuilder) -> CaseBuilder:
+        CASES[name] = build
+        return build
+
+    return register
+
+
+def _ticks(rng: random.Random, low: int = MIN_TICK, high: int = MAX_TICK) -> list[int]:
+    return [rng.randint(low, high) for _ in range(BATCH)]
+
+
+def _prices(rng: random.Random) -> list[float]:
+    return [rng.uniform(0.5, 5_000.0) for _ in range(BATCH)]
+
+
+def _positions(rng: random.Random) -> list[PositionRawData]:
+    ratios = MarginRatios(min=50_000, max=900_000, liq=25_000)
+    positions = []
+    for position_id in range(1, BATCH + 1):
+        perp_delta = rng.choice((-1, 1)) * rng.randint(10**5, 10**9)
+        price = rng.uniform(1.0, 100.0)
+        positions.append(
+            PositionRawData(
+                perp_id="0x" + "ab" * 32,
+                position_id=position_id,
+                margin=rng.uniform(10.0, 10_000.0),
+                entry_perp_delta=perp_delta,
+                entry_usd_delta=-int(perp_delta * price),
+                margin_ratios=ratios,
+            )
+        )
+    return positions
+
+
+@case("tick_math.get_sqrt_ratio_at_tick")
+def _get_sqrt_ratio_at_tick(rng, fixtures):
+    return get_sqrt_ratio_at_tick, [(tick,) for tick in _ticks(rng)]
+
+
+@case("liquidity.estimate_liquidity")
+def _estimate_liquidity(rng, fixtures):
+    inputs = []
+    for lower in _ticks(rng, -200_000, 199_000):
+        inputs.append((lower, lower + rng.randint(1, 1_000), rng.randint(10**6, 10**12)))
+    return estimate_liquidity, inputs
+
+
+@case("liquidity.calculate_liquidity_for_target_ratio")
+def _calculate_liquidity_for_target_ratio(rng, fixtures):
+    inputs = []
+    for lower in _ticks(rng, -50_000, 49_000):
+        upper = lower + rng.randint(60, 1_000)
+        current = get_sqrt_ratio_at_tick(rng.randint(lower - 500, upper + 500))
+        inputs.append((rng.randint(10**6, 10**12), lower, upper, current, rng.uniform(0.05, 1)))
+    return calculate_liquidity_for_target_ratio, inputs
+
+
+@case("conversions.price_to_sqrt_price_x96")
+def _price_to_sqrt_price_x96(rng, fixtures):
+    return conversions.price_to_sqrt_price_x96, [(price,) for price in _prices(rng)]
+
+
+@case("conversions.scale_6_decimals")
+def _scale_6_decimals(rng, fixtures):
+    return conversions.scale_6_decimals, [(amount,) for amount in _prices(rng)]
+
+
+@case("conversions.scale_from_6_decimals")
+def _scale_from_6_decimals(rng, fixtures):
+    return conversions.scale_from_6_decimals, [(rng.randint(0, 10**15),) for _ in range(BATCH)]
+
+
+@case("conversions.scale_to_x96")
+def _scale_to_x96(rng, fixtures):
+    return conversions.scale_to_x96, [(amount,) for amount in _prices(rng)]
+
+
+@case("conversions.scale_from_x96")
+def _scale_from_x96(rng, fixtures):
+    return conversions.scale_from_x96, [(rng.randint(0, 5_000 * Q96),) for _ in range(BATCH)]
+
+
+@case("conversions.price_to_tick")
+def _price_to_tick(rng, fixtures):
+    return conversions.price_to_tick, [(price, price > 100) for price in _prices(rng)]
+
+
+@case("conversions.sqrt_price_x96_to_tick")
+def _sqrt_price_x96_to_tick(rng, fixtures):
+    inputs = [(get_sqrt_ratio_at_tick(tick) + 1, tick % 2 == 0) for tick in _ticks(rng)]
+    return conversions.sqrt_price_x96_to_tick, inputs
+
+
+@case("conversions.tick_to_price")
+def _tick_to_price(rng, fixtures):
+    return conversions.tick_to_price, [(tick,) for tick in _ticks(rng, -200_000, 200_000)]
+
+
+@case("conversions.sqrt_price_x96_to_price")
+def _sqrt_price_x96_to_price(rng, fixtures):
+    ticks = _ticks(rng, -200_000, 200_000)
+    return conversions.sqrt_price_x96_to_price, [(get_sqrt_ratio_at_tick(t),) for t in ticks]
+
+
+@case("conversions.margin_ratio_to_leverage")
+def _margin_ratio_to_leverage(rng, fixtures):
+    return conversions.margin_ratio_to_leverage, [(rng.randint(1, 10**6),) for _ in range(BATCH)]
+
+
+@case("errors.parse_contract_error")
+def _parse_contract_error(rng, fixtures):
+    messages = fixtures["error_messages"]
+    return parse_contract_error, [(Exception(rng.choice(messages)),) for _ in range(BATCH)]
+
+
+@case("events.decode_receipt")
+def _decode_receipt(rng, fixtures):
+    perp_manager = fixtures["perp_manager"]
+
+    def decode_opened(receipt: dict[str, Any]) -> list[PositionOpenedEvent]:
+        return PERP_MANAGER_EVENTS.decode_receipt(receipt, PositionOpenedEvent, perp_manager)
+
+    # A receipt holds several logs, so fewer calls keep the batch comparable in length
+    return decode_opened, [(fixtures["open_taker_receipt"],)] * (BATCH // 10)
+
+
+@case("position.calculate_entry_price")
+def _calculate_entry_price(rng, fixtures):
+    return calculate_entry_price, [(position,) for position in _positions(rng)]
+
+
+@case("position.calculate_position_size")
+def _calculate_position_size(rng, fixtures):
+    return calculate_position_size, [(position,) for position in _positions(rng)]
+
+
+@case("position.calculate_position_value")
+def _calculate_position_value(rng, fixtures):
+    return calculate_position_value, [(p, rng.uniform(1.0, 100.0)) for p in _positions(rng)]
+
+
+@case("position.calculate_leverage")
+def _calculate_leverage(rng, fixtures):
+    inputs = [(rng.uniform(0, 10**6), rng.uniform(-10.0, 10**4)) for _ in range(BATCH)]
+    return calculate_leverage, inputs
+
+
+@case("position.calculate_liquidation_price")
+def _calculate_liquidation_price(rng, fixtures):
+    positions = _positions(rng)
+    return calculate_liquidation_price, [(p, p.entry_perp_delta > 0) for p in positions]
+
+
+def _run_batch(fn: Callable[..., Any], inputs: Inputs, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for args in inputs:
+            fn(*args)
+    return time.perf_counter() - start
+
+
+def _calibration_loop(value: int) -> int:
+    return (value * value + 7) % 1_000_003
+
+
+_CALIBRATION_INPUTS = [(i,) for i in range(BATCH)]
+
+
+def _rounds(fn: Callable[..., Any], inputs: Inputs) -> int:
+    first = _run_batch(fn, inputs, 1)
+    return max(1, int(MIN_RUN_SECONDS / max(first, 1e-9)))
+
+
+def _measure(fn: Callable[..., Any], inputs: Inputs, repeat: int) -> tuple[float, float, float]:
+    """Time a case ``repeat`` times, each run right after a run of the calibration loop.
+
+    Returns the best ns per call of the case and of the calibration loop, and the median
+    of the paired case / calibration ratios; pairing cancels most of the drift in machine
+    speed between runs. The GC is off while timing, as in timeit.
+    """
+    rounds = _rounds(fn, inputs)
+    calibration_rounds = _rounds(_calibration_loop, _CALIBRATION_INPUTS)
+    calls = rounds * len(inputs)
+    calibration_calls = calibration_rounds * BATCH
+
+    case_ns, calibration_ns = [], []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            elapsed = _run_batch(_calibration_loop, _CALIBRATION_INPUTS, calibration_rounds)
+            calibration_ns.append(elapsed / calibration_calls * 1e9)
+            case_ns.append(_run_batch(fn, inputs, rounds) / calls * 1e9)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    ratios = [a / b for a, b in zip(case_ns, calibration_ns, strict=True)]
+    return min(case_ns), min(calibration_ns), statistics.median(ratios)
+
+
+def run(pattern: str | None = None, repeat: int = DEFAULT_REPEAT) -> dict[str, Any]:
+    """Time every case whose name contains ``pattern`` and return the results document."""
+    with open(FIXTURES_PATH) as f:
+        fixtures = json.load(f)
+
+    results = {}
+    calibration = math.inf
+    for name, build in CASES.items():
+        if pattern is not None and pattern not in name:
+            continue
+        fn, inputs = build(random.Random(name), fixtures)
+        ns, case_calibration, relative = _measure(fn, inputs, repeat)
+        calibration = min(calibration, case_calibration)
+        results[name] = {"ns_per_call": round(ns, 1), "relative": round(relative, 3)}
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "calibration_ns": round(calibration, 2),
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> list[str]:
+    """Print current against baseline timings and return the names of regressed cases."""
+    scale = current["calibration_ns"]
+    regressed = []
+    print(f"{'case':48s} {'ns/call':>10s} {'baseline':>10s} {'change':>8s}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:48s} {result['ns_per_call']:10.1f} {'-':>10s} {'new':>8s}")
+            continue
+        # Baseline timing rescaled to this machine through the calibration loop
+        expected = before["relative"] * scale
+        ratio = result["relative"] / before["relative"]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(
+            f"{name:48s} {result['ns_per_call']:10.1f} {expected:10.1f} "
+            f"{(ratio - 1) * 100:+7.1f}%{flag}"
+        )
+        if ratio > threshold:
+            regressed.append(name)
+    if baseline.get("python") != current["python"]:
+        print(
+            f"note: baseline recorded on Python {baseline.get('python')}, "
+            f"this run is {current['python']}"
+        )
+    return regressed
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="only run cases containing this substring")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--json", type=Path, help="write the results document to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--compare", action="store_true", help="fail on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    current = run(args.pattern, args.repeat)
+    if args.json is not None:
+        args.json.write_text(json.dumps(current, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"wrote {args.baseline}")
+
+    if not args.compare:
+        print(f"calibration loop: {current['calibration_ns']:.1f} ns/call")
+        for name, result in current["results"].items():
+            print(f"{name:48s} {result['ns_per_call']:10.1f} ns/call")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressed = compare(current, baseline, args.threshold)
+    if regressed:
+        print(f"{len(regressed)} case(s) slower than {args.threshold}x baseline:")
+        for name in regressed:
+            print(f"  {name}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
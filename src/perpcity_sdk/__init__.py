@@ -1,84 +1,271 @@
-from .context import PerpCityContext
-from .functions import (
-    OpenPosition,
-    calculate_entry_price,
-    calculate_leverage,
-    calculate_liquidation_price,
-    calculate_position_size,
-    calculate_position_value,
-    close_position,
-    create_perp,
-    get_perp_beacon,
-    get_perp_bounds,
-    get_perp_fees,
-    get_perp_mark,
-    get_perp_tick_spacing,
-    get_position_effective_margin,
-    get_position_funding_payment,
-    get_position_id,
-    get_position_is_liquidatable,
-    get_position_is_long,
-    get_position_is_maker,
-    get_position_live_details,
-    get_position_live_details_from_contract,
-    get_position_perp_id,
-    get_position_pnl,
-    get_user_open_positions,
-    get_user_usdc_balance,
-    get_user_wallet_address,
-    open_maker_position,
-    open_taker_position,
-)
-from .types import (
-    Bounds,
-    ClosePositionParams,
-    ClosePositionResult,
-    CreatePerpParams,
-    Fees,
-    LiveDetails,
-    MarginRatios,
-    OpenMakerPositionParams,
-    OpenPositionData,
-    OpenTakerPositionParams,
-    PerpCityDeployments,
-    PerpConfig,
-    PerpData,
-    PoolKey,
-    PositionRawData,
-    UserData,
-)
-from .utils import (
-    NUMBER_1E6,
-    Q96,
-    ContractError,
-    ErrorCategory,
-    ErrorSource,
-    InsufficientFundsError,
-    PerpCityError,
-    RPCError,
-    TransactionRejectedError,
-    ValidationError,
-    calculate_liquidity_for_target_ratio,
-    estimate_liquidity,
-    get_rpc_url,
-    get_sqrt_ratio_at_tick,
-    margin_ratio_to_leverage,
-    parse_contract_error,
-    price_to_sqrt_price_x96,
-    price_to_tick,
-    scale_6_decimals,
-    scale_from_6_decimals,
-    scale_from_x96,
-    scale_to_x96,
-    sqrt_price_x96_to_price,
-    tick_to_price,
-    with_error_handling,
-)
+"""PerpCity Python SDK.
+
+Exports are resolved on first access (PEP 562), so ``import perpcity_sdk`` and the
+pure helpers such as ``perpcity_sdk.utils.conversions`` do not import web3 or
+eth_account until a context, contract function or other RPC-backed name is used.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .async_context import AsyncPerpCityContext
+    from .book import LiquidityBook
+    from .context import PerpCityContext
+    from .functions import (
+        AsyncOpenPosition,
+        OpenPosition,
+        calculate_entry_price,
+        calculate_leverage,
+        calculate_liquidation_price,
+        calculate_position_size,
+        calculate_position_value,
+        close_position,
+        create_perp,
+        get_perp_beacon,
+        get_perp_bounds,
+        get_perp_fees,
+        get_perp_mark,
+        get_perp_tick_spacing,
+        get_position_effective_margin,
+        get_position_funding_payment,
+        get_position_id,
+        get_position_is_liquidatable,
+        get_position_is_long,
+        get_position_is_maker,
+        get_position_live_details,
+        get_position_live_details_from_contract,
+        get_position_perp_id,
+        get_position_pnl,
+        get_user_open_positions,
+        get_user_usdc_balance,
+        get_user_wallet_address,
+        open_maker_position,
+        open_taker_position,
+        quote_open_taker_position,
+    )
+    from .indexer import PerpCityIndexer
+    from .metrics import InMemoryExporter, PerpCityMetrics, PrometheusExporter
+    from .scanner import LiquidationScanner
+    from .state import PerpStateCache
+    from .stream import PerpEventStream
+    from .types import (
+        Bounds,
+        ClosePositionParams,
+        ClosePositionResult,
+        CreatePerpParams,
+        Fees,
+        IndexedPerp,
+        IndexedPosition,
+        LiquidatablePosition,
+        LiveDetails,
+        MarginAdjustedEvent,
+        MarginRatios,
+        NotionalAdjustedEvent,
+        OpenMakerPositionParams,
+        OpenPositionData,
+        OpenTakerPositionParams,
+        PerpCityDeployments,
+        PerpConfig,
+        PerpCreatedEvent,
+        PerpData,
+        PerpState,
+        PoolKey,
+        PositionClosedEvent,
+        PositionOpenedEvent,
+        PositionRawData,
+        SwapSimulation,
+        TakerQuote,
+        TransferEvent,
+        UserData,
+    )
+    from .utils import (
+        MAX_TICK,
+        MIN_TICK,
+        MODULE_CONSTANTS,
+        MULTICALL3_ADDRESS,
+        NUMBER_1E6,
+        PERP_MANAGER_EVENTS,
+        Q96,
+        AllowanceManager,
+        ApprovalStrategy,
+        CassetteMissError,
+        ContractError,
+        ErrorCategory,
+        ErrorSource,
+        EventDecoder,
+        InsufficientFundsError,
+        ModuleConstantsCache,
+        MulticallResult,
+        NonceManager,
+        PerpCityError,
+        PipelinedTransactionError,
+        RPCError,
+        SqrtRatioTable,
+        TransactionRejectedError,
+        ValidationError,
+        aggregate3,
+        calculate_liquidity_for_target_ratio,
+        estimate_liquidity,
+        get_rpc_url,
+        get_sqrt_ratio_at_tick,
+        get_sqrt_ratio_table,
+        get_tick_at_sqrt_ratio,
+        get_ticks_at_sqrt_ratios,
+        margin_ratio_to_leverage,
+        parse_contract_error,
+        price_to_sqrt_price_x96,
+        price_to_tick,
+        scale_6_decimals,
+        scale_from_6_decimals,
+        scale_from_x96,
+        scale_to_x96,
+        sqrt_price_x96_to_price,
+        sqrt_price_x96_to_tick,
+        sqrt_ratio_at_tick,
+        tick_to_price,
+        with_error_handling,
+    )
+
+_EXPORTS: dict[str, tuple[str, ...]] = {
+    ".async_context": ("AsyncPerpCityContext",),
+    ".book": ("LiquidityBook",),
+    ".context": ("PerpCityContext",),
+    ".functions": (
+        "AsyncOpenPosition",
+        "OpenPosition",
+        "calculate_entry_price",
+        "calculate_leverage",
+        "calculate_liquidation_price",
+        "calculate_position_size",
+        "calculate_position_value",
+        "close_position",
+        "create_perp",
+        "get_perp_beacon",
+        "get_perp_bounds",
+        "get_perp_fees",
+        "get_perp_mark",
+        "get_perp_tick_spacing",
+        "get_position_effective_margin",
+        "get_position_funding_payment",
+        "get_position_id",
+        "get_position_is_liquidatable",
+        "get_position_is_long",
+        "get_position_is_maker",
+        "get_position_live_details",
+        "get_position_live_details_from_contract",
+        "get_position_perp_id",
+        "get_position_pnl",
+        "get_user_open_positions",
+        "get_user_usdc_balance",
+        "get_user_wallet_address",
+        "open_maker_position",
+        "open_taker_position",
+        "quote_open_taker_position",
+    ),
+    ".indexer": ("PerpCityIndexer",),
+    ".metrics": ("InMemoryExporter", "PerpCityMetrics", "PrometheusExporter"),
+    ".scanner": ("LiquidationScanner",),
+    ".state": ("PerpStateCache",),
+    ".stream": ("PerpEventStream",),
+    ".types": (
+        "Bounds",
+        "ClosePositionParams",
+        "ClosePositionResult",
+        "CreatePerpParams",
+        "Fees",
+        "IndexedPerp",
+        "IndexedPosition",
+        "LiquidatablePosition",
+        "LiveDetails",
+        "MarginAdjustedEvent",
+        "MarginRatios",
+        "NotionalAdjustedEvent",
+        "OpenMakerPositionParams",
+        "OpenPositionData",
+        "OpenTakerPositionParams",
+        "PerpCityDeployments",
+        "PerpConfig",
+        "PerpCreatedEvent",
+        "PerpData",
+        "PerpState",
+        "PoolKey",
+        "PositionClosedEvent",
+        "PositionOpenedEvent",
+        "PositionRawData",
+        "SwapSimulation",
+        "TakerQuote",
+        "TransferEvent",
+        "UserData",
+    ),
+    ".utils": (
+        "MAX_TICK",
+        "MIN_TICK",
+        "MODULE_CONSTANTS",
+        "MULTICALL3_ADDRESS",
+        "NUMBER_1E6",
+        "PERP_MANAGER_EVENTS",
+        "Q96",
+        "AllowanceManager",
+        "ApprovalStrategy",
+        "CassetteMissError",
+        "ContractError",
+        "ErrorCategory",
+        "ErrorSource",
+        "EventDecoder",
+        "InsufficientFundsError",
+        "ModuleConstantsCache",
+        "MulticallResult",
+        "NonceManager",
+        "PerpCityError",
+        "PipelinedTransactionError",
+        "RPCError",
+        "SqrtRatioTable",
+        "TransactionRejectedError",
+        "ValidationError",
+        "aggregate3",
+        "calculate_liquidity_for_target_ratio",
+        "estimate_liquidity",
+        "get_rpc_url",
+        "get_sqrt_ratio_at_tick",
+        "get_sqrt_ratio_table",
+        "get_tick_at_sqrt_ratio",
+        "get_ticks_at_sqrt_ratios",
+        "margin_ratio_to_leverage",
+        "parse_contract_error",
+        "price_to_sqrt_price_x96",
+        "price_to_tick",
+        "scale_6_decimals",
+        "scale_from_6_decimals",
+        "scale_from_x96",
+        "scale_to_x96",
+        "sqrt_price_x96_to_price",
+        "sqrt_price_x96_to_tick",
+        "sqrt_ratio_at_tick",
+        "tick_to_price",
+        "with_error_handling",
+    ),
+}
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     # Context
+    "AsyncPerpCityContext",
+    "LiquidationScanner",
+    "LiquidityBook",
     "PerpCityContext",
+    "PerpCityIndexer",
+    "PerpEventStream",
+    "PerpStateCache",
+    # Metrics
+    "InMemoryExporter",
+    "PerpCityMetrics",
+    "PrometheusExporter",
     # Functions
+    "AsyncOpenPosition",
     "OpenPosition",
     "calculate_entry_price",
     "calculate_leverage",
@@ -107,38 +294,69 @@ __all__ = [
     "get_user_wallet_address",
     "open_maker_position",
     "open_taker_position",
+    "quote_open_taker_position",
     # Types
     "Bounds",
     "ClosePositionParams",
     "ClosePositionResult",
     "CreatePerpParams",
     "Fees",
+    "IndexedPerp",
+    "IndexedPosition",
+    "LiquidatablePosition",
     "LiveDetails",
+    "MarginAdjustedEvent",
     "MarginRatios",
+    "NotionalAdjustedEvent",
     "OpenMakerPositionParams",
     "OpenPositionData",
     "OpenTakerPositionParams",
     "PerpCityDeployments",
     "PerpConfig",
+    "PerpCreatedEvent",
     "PerpData",
+    "PerpState",
     "PoolKey",
+    "PositionClosedEvent",
+    "PositionOpenedEvent",
     "PositionRawData",
+    "SwapSimulation",
+    "TakerQuote",
+    "TransferEvent",
     "UserData",
     # Utils
+    "MAX_TICK",
+    "MIN_TICK",
+    "MODULE_CONSTANTS",
+    "MULTICALL3_ADDRESS",
     "NUMBER_1E6",
+    "PERP_MANAGER_EVENTS",
     "Q96",
+    "AllowanceManager",
+    "ApprovalStrategy",
+    "CassetteMissError",
     "ContractError",
     "ErrorCategory",
     "ErrorSource",
+    "EventDecoder",
     "InsufficientFundsError",
+    "ModuleConstantsCache",
+    "MulticallResult",
+    "NonceManager",
     "PerpCityError",
+    "PipelinedTransactionError",
     "RPCError",
+    "SqrtRatioTable",
     "TransactionRejectedError",
     "ValidationError",
+    "aggregate3",
     "calculate_liquidity_for_target_ratio",
     "estimate_liquidity",
     "get_rpc_url",
     "get_sqrt_ratio_at_tick",
+    "get_sqrt_ratio_table",
+    "get_tick_at_sqrt_ratio",
+    "get_ticks_at_sqrt_ratios",
     "margin_ratio_to_leverage",
     "parse_contract_error",
     "price_to_sqrt_price_x96",
@@ -148,6 +366,8 @@ __all__ = [
     "scale_from_x96",
     "scale_to_x96",
     "sqrt_price_x96_to_price",
+    "sqrt_price_x96_to_tick",
+    "sqrt_ratio_at_tick",
     "tick_to_price",
     "with_error_handling",
 ]
@@ -0,0 +1,39 @@
+"""PEP 562 lazy exports for the package ``__init__`` modules."""
+
+from __future__ import annotations
+
+import importlib
+import sys
+from collections.abc import Callable, Mapping
+from typing import Any
+
+
+def lazy_exports(
+    package: str, exports: Mapping[str, tuple[str, ...]]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """Module ``__getattr__`` and ``__dir__`` for ``package``.
+
+    ``exports`` maps a module, relative to ``package``, to the names it provides. A name
+    is imported on first access and cached in the package namespace, so later lookups
+    are plain attribute reads. Other attributes resolve to submodules, as they did when
+    the package imported everything eagerly.
+    """
+    modules = {name: module for module, names in exports.items() for name in names}
+
+    def getattr_(name: str) -> Any:
+        module_name = modules.get(name)
+        if module_name is None:
+            try:
+                return importlib.import_module(f".{name}", package)
+            except ModuleNotFoundError as e:
+                if e.name != f"{package}.{name}":
+                    raise
+                raise AttributeError(f"module {package!r} has no attribute {name!r}") from None
+        value = getattr(importlib.import_module(module_name, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def dir_() -> list[str]:
+        return sorted({*vars(sys.modules[package]), *modules})
+
+    return getattr_, dir_
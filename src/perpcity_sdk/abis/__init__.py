@@ -1,16 +1,42 @@
+"""Contract ABIs, parsed from the bundled JSON files on first access.
+
+``from perpcity_sdk.abis import PERP_MANAGER_ABI`` works as before, but a file is only
+read when one of its names is first used. Function selectors, custom error selectors
+and event topics are precomputed in :mod:`perpcity_sdk.abis.selectors`, so the hot
+paths that only need those never parse an ABI.
+"""
+
 import json
 from pathlib import Path
+from typing import Any
 
 _ABI_DIR = Path(__file__).parent
 
+_ABI_FILES = {
+    "PERP_MANAGER_ABI": "perp_manager.json",
+    "BEACON_ABI": "beacon.json",
+    "FEES_ABI": "fees.json",
+    "MARGIN_RATIOS_ABI": "margin_ratios.json",
+    "ERC20_ABI": "erc20.json",
+    "MULTICALL3_ABI": "multicall3.json",
+}
+
+__all__ = list(_ABI_FILES)
 
-def _load_abi(filename: str) -> list:
+
+def _load_abi(filename: str) -> list[Any]:
     with open(_ABI_DIR / filename) as f:
-        return json.load(f)
+        abi: list[Any] = json.load(f)
+    return abi
+
+
+def __getattr__(name: str) -> list[Any]:
+    filename = _ABI_FILES.get(name)
+    if filename is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    abi = globals()[name] = _load_abi(filename)
+    return abi
 
 
-PERP_MANAGER_ABI = _load_abi("perp_manager.json")
-BEACON_ABI = _load_abi("beacon.json")
-FEES_ABI = _load_abi("fees.json")
-MARGIN_RATIOS_ABI = _load_abi("margin_ratios.json")
-ERC20_ABI = _load_abi("erc20.json")
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_ABI_FILES])
@@ -0,0 +1,76 @@
+"""Regenerate :mod:`perpcity_sdk.abis.selectors` from the bundled ABI files.
+
+Run ``python -m perpcity_sdk.abis._generate`` (or ``make abis``) after changing a JSON
+ABI; a unit test fails while the generated module is out of date.
+"""
+
+import json
+from pathlib import Path
+
+from eth_typing import ABIError, ABIFunction
+from eth_utils.abi import (
+    event_abi_to_log_topic,
+    function_signature_to_4byte_selector,
+    get_abi_input_types,
+)
+
+_ABI_DIR = Path(__file__).parent
+SELECTORS_PATH = _ABI_DIR / "selectors.py"
+
+_HEADER = '''"""Function selectors, custom error selectors and event topics of the bundled ABIs.
+
+Generated by ``python -m perpcity_sdk.abis._generate``; do not edit.
+"""
+'''
+
+
+def _bytes_literal(value: bytes) -> str:
+    return 'b"' + "".join(f"\\x{byte:02x}" for byte in value) + '"'
+
+
+def _signature(entry: ABIFunction | ABIError) -> str:
+    return f"{entry['name']}({','.join(get_abi_input_types(entry))})"
+
+
+def _section(name: str, lines: list[str]) -> list[str]:
+    if not lines:
+        return []
+    return ["", f"{name} = {{", *(f"    {line}," for line in lines), "}"]
+
+
+def render() -> str:
+    out = [_HEADER.rstrip("\n")]
+    for path in sorted(_ABI_DIR.glob("*.json")):
+        with open(path) as f:
+            abi = json.load(f)
+        prefix = path.stem.upper()
+
+        functions, errors, events = [], [], []
+        for entry in abi:
+            kind = entry.get("type")
+            if kind == "function":
+                signature = _signature(entry)
+                selector = function_signature_to_4byte_selector(signature)
+                functions.append(f'"{signature}": {_bytes_literal(selector)}')
+            elif kind == "error":
+                types = get_abi_input_types(entry)
+                selector = function_signature_to_4byte_selector(_signature(entry))
+                args = "".join(f'"{t}", ' for t in types).rstrip(" ")
+                errors.append(f'{_bytes_literal(selector)}: ("{entry["name"]}", ({args}))')
+            elif kind == "event":
+                topic = "0x" + event_abi_to_log_topic(entry).hex()
+                events.append(f'"{entry["name"]}": "{topic}"')
+
+        out += _section(f"{prefix}_SELECTORS", functions)
+        out += _section(f"{prefix}_ERRORS", errors)
+        out += _section(f"{prefix}_TOPICS", events)
+    return "\n".join(out) + "\n"
+
+
+def main() -> None:
+    SELECTORS_PATH.write_text(render())
+    print(f"wrote {SELECTORS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""Function selectors, custom error selectors and event topics of the bundled ABIs.
+
+Generated by ``python -m perpcity_sdk.abis._generate``; do not edit.
+"""
+
+BEACON_SELECTORS = {
+    "cancelOwnershipHandover()": b"\x54\xd1\xf1\x3d",
+    "completeOwnershipHandover(address)": b"\xf0\x4e\x28\x3e",
+    "increaseCardinalityCap(uint16)": b"\x9f\x2f\x93\x99",
+    "index()": b"\x29\x86\xc0\xe5",
+    "indexEngine()": b"\x40\x6b\x5a\x55",
+    "owner()": b"\x8d\xa5\xcb\x5b",
+    "ownershipHandoverExpiresAt(address)": b"\xfe\xe8\x1c\xf4",
+    "renounceOwnership()": b"\x71\x50\x18\xa6",
+    "requestOwnershipHandover()": b"\x25\x69\x29\x62",
+    "setIndexEngine(address)": b"\x40\xcf\x05\x72",
+    "setVerifierAdapter(address)": b"\x9c\x27\x27\x92",
+    "transferOwnership(address)": b"\xf2\xfd\xe3\x8b",
+    "twAvg(uint32)": b"\x46\x86\xce\xf7",
+    "twAvgState()": b"\x3f\x1d\x90\x42",
+    "updateIndex(bytes,bytes)": b"\x4b\x49\xb3\x90",
+    "verifierAdapter()": b"\x5a\x25\xbb\xb1",
+}
+
+BEACON_ERRORS = {
+    b"\x0d\xc1\x49\xf0": ("AlreadyInitialized", ()),
+    b"\x74\x48\xfb\xae": ("NewOwnerIsZeroAddress", ()),
+    b"\x6f\x5e\x88\x18": ("NoHandoverRequest", ()),
+    b"\x82\xb4\x29\x00": ("Unauthorized", ()),
+}
+
+BEACON_TOPICS = {
+    "IndexUpdated": "0xacfc085c9be45d2b3f9e5c09a19d4a95749cc16939519c13e090de3a4cb192c6",
+    "OwnershipHandoverCanceled": "0xfa7b8eab7da67f412cc9575ed43464468f9bfbae89d1675917346ca6d8fe3c92",
+    "OwnershipHandoverRequested": "0xdbf36a107da19e49527a7176a1babf963b4b0ff8cde35ee35d6cd8f1f9ac7e1d",
+    "OwnershipTransferred": "0x8be0079c531659141344cd1fd0a4f28419497f9722a3daafe3b4186f6b6457e0",
+}
+
+ERC20_SELECTORS = {
+    "name()": b"\x06\xfd\xde\x03",
+    "symbol()": b"\x95\xd8\x9b\x41",
+    "decimals()": b"\x31\x3c\xe5\x67",
+    "totalSupply()": b"\x18\x16\x0d\xdd",
+    "balanceOf(address)": b"\x70\xa0\x82\x31",
+    "transfer(address,uint256)": b"\xa9\x05\x9c\xbb",
+    "approve(address,uint256)": b"\x09\x5e\xa7\xb3",
+    "allowance(address,address)": b"\xdd\x62\xed\x3e",
+    "transferFrom(address,address,uint256)": b"\x23\xb8\x72\xdd",
+}
+
+ERC20_TOPICS = {
+    "Transfer": "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef",
+    "Approval": "0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925",
+}
+
+FEES_SELECTORS = {
+    "CREATOR_FEE()": b"\x1a\x7d\xfa\x9f",
+    "INSURANCE_FEE()": b"\x15\x73\xb5\x77",
+    "LP_FEE()": b"\x5e\x3f\x27\x27",
+    "LIQUIDATION_FEE()": b"\xb1\x82\x73\x30",
+}
+
+MARGIN_RATIOS_SELECTORS = {
+    "MIN_MAKER_RATIO()": b"\x37\x26\xff\x02",
+    "MAX_MAKER_RATIO()": b"\xb1\x7e\x1d\x8e",
+    "LIQUIDATION_MAKER_RATIO()": b"\xb8\xa1\x96\x7e",
+    "MIN_TAKER_RATIO()": b"\x86\x21\xf0\xf1",
+    "MAX_TAKER_RATIO()": b"\xf5\x47\x27\x4f",
+    "LIQUIDATION_TAKER_RATIO()": b"\x3f\x9f\xad\xd1",
+}
+
+MULTICALL3_SELECTORS = {
+    "aggregate3((address,bool,bytes)[])": b"\x82\xad\x56\xcb",
+    "getBlockNumber()": b"\x42\xcb\xb1\x5c",
+}
+
+PERP_MANAGER_SELECTORS = {
+    "BEACON_REGISTRY()": b"\x09\xba\xc8\xf6",
+    "ERC721_NAME()": b"\x99\x70\xc0\x48",
+    "ERC721_SYMBOL()": b"\x1d\xe9\xb2\x1f",
+    "ERC721_URI()": b"\x4b\xfa\xcc\x44",
+    "MAX_PROTOCOL_FEE()": b"\xb8\xca\x3b\x83",
+    "adjustMargin((uint256,int256))": b"\x4d\x26\xe0\xc3",
+    "adjustNotional((uint256,int256,uint128))": b"\x03\x49\x7a\x66",
+    "approve(address,uint256)": b"\x09\x5e\xa7\xb3",
+    "balanceOf(address)": b"\x70\xa0\x82\x31",
+    "cancelOwnershipHandover()": b"\x54\xd1\xf1\x3d",
+    "cardinalityCap(bytes32)": b"\xbb\xb3\xfb\xa9",
+    "cfgs(bytes32)": b"\x64\x65\x44\xa0",
+    "closePosition((uint256,uint128,uint128,uint128))": b"\x32\xad\x0e\x8d",
+    "collectProtocolFees(address)": b"\x2a\x54\xdb\x01",
+    "completeOwnershipHandover(address)": b"\xf0\x4e\x28\x3e",
+    "createPerp((address,address,address,address,address,uint160))": b"\x16\xbf\xda\x36",
+    "fundingPerSecondX96(bytes32)": b"\x22\x32\x7b\x2c",
+    "getApproved(uint256)": b"\x08\x18\x12\xfc",
+    "increaseCardinalityCap(bytes32,uint16)": b"\x6b\xb0\x0f\xf2",
+    "insurance(bytes32)": b"\x5c\xa5\x99\x4d",
+    "isApprovedForAll(address,address)": b"\xe9\x85\xe9\xc5",
+    "isFeesRegistered(address)": b"\xc3\xc7\xcc\xbb",
+    "isLockupPeriodRegistered(address)": b"\xca\xfa\xf1\x8e",
+    "isMarginRatiosRegistered(address)": b"\xc1\xa7\xf2\x98",
+    "isSqrtPriceImpactLimitRegistered(address)": b"\xf7\x19\xa0\x4a",
+    "name()": b"\x06\xfd\xde\x03",
+    "nextPosId()": b"\xcf\x95\x06\x1a",
+    "openMakerPos(bytes32,(address,uint128,uint120,int24,int24,uint128,uint128))": b"\x36\xbf\x4a\xe9",
+    "openTakerPos(bytes32,(address,bool,uint128,uint24,uint128))": b"\x17\x22\xbf\x15",
+    "owner()": b"\x8d\xa5\xcb\x5b",
+    "ownerOf(uint256)": b"\x63\x52\x21\x1e",
+    "ownershipHandoverExpiresAt(address)": b"\xfe\xe8\x1c\xf4",
+    "positions(uint256)": b"\x99\xfb\xab\x88",
+    "protocolFee()": b"\xb0\xe2\x1e\x8a",
+    "quoteClosePosition(uint256)": b"\x0c\x84\x9b\x70",
+    "quoteOpenMakerPosition(bytes32,(address,uint128,uint120,int24,int24,uint128,uint128))": b"\xec\xc7\x5c\xdc",
+    "quoteOpenTakerPosition(bytes32,(address,bool,uint128,uint24,uint128))": b"\x1d\x49\x00\x77",
+    "registerFeesModule(address)": b"\xa6\xa6\x38\xbd",
+    "registerLockupPeriodModule(address)": b"\xdd\x77\x27\x81",
+    "registerMarginRatiosModule(address)": b"\x54\x0a\x3e\xb4",
+    "registerSqrtPriceImpactLimitModule(address)": b"\x4e\xb0\x45\x5e",
+    "renounceOwnership()": b"\x71\x50\x18\xa6",
+    "requestOwnershipHandover()": b"\x25\x69\x29\x62",
+    "safeTransferFrom(address,address,uint256)": b"\x42\x84\x2e\x0e",
+    "safeTransferFrom(address,address,uint256,bytes)": b"\xb8\x8d\x4f\xde",
+    "setApprovalForAll(address,bool)": b"\xa2\x2c\xb4\x65",
+    "setProtocolFee(uint24)": b"\x7f\xee\xda\xa1",
+    "supportsInterface(bytes4)": b"\x01\xff\xc9\xa7",
+    "symbol()": b"\x95\xd8\x9b\x41",
+    "takerOpenInterest(bytes32)": b"\x77\xd3\xb2\x82",
+    "timeWeightedAvgSqrtPriceX96(bytes32,uint32)": b"\x57\x60\x6c\xa0",
+    "tokenURI(uint256)": b"\xc8\x7b\x56\xdd",
+    "transferFrom(address,address,uint256)": b"\x23\xb8\x72\xdd",
+    "transferOwnership(address)": b"\xf2\xfd\xe3\x8b",
+    "unlockCallback(bytes)": b"\x91\xdd\x73\x46",
+    "utilFeePerSecX96(bytes32)": b"\x3a\x7c\xa4\xca",
+}
+
+PERP_MANAGER_ERRORS = {
+    b"\x01\x33\x6c\xea": ("AccountBalanceOverflow", ()),
+    b"\x0d\xc1\x49\xf0": ("AlreadyInitialized", ()),
+    b"\x8f\x4e\xb6\x04": ("BalanceQueryForZeroAddress", ()),
+    b"\x78\x84\xe2\xa9": ("BeaconNotRegistered", ()),
+    b"\x67\xcf\x2e\xaa": ("CouldNotFullyFill", ()),
+    b"\xfc\x5b\xee\x12": ("FeeTooLarge", ()),
+    b"\x28\x72\xed\x04": ("FeesNotRegistered", ()),
+    b"\x2f\x29\x38\xce": ("InvalidAction", ("uint8",)),
+    b"\x48\xf5\xc3\xed": ("InvalidCaller", ()),
+    b"\x3a\x29\xe6\x5e": ("InvalidMargin", ()),
+    b"\xbc\xff\xc8\x3f": ("InvalidMarginRatio", ()),
+    b"\xd9\xf0\xae\xaf": ("LockupPeriodNotRegistered", ()),
+    b"\xc3\xf6\xbb\x4e": ("MakerNotAllowed", ()),
+    b"\x3e\xea\x58\x9d": ("MarginRatiosNotRegistered", ()),
+    b"\xe3\x77\x98\x3c": ("MaximumAmountExceeded", ()),
+    b"\x9a\xd5\xea\x69": ("MinimumAmountInsufficient", ()),
+    b"\x74\x48\xfb\xae": ("NewOwnerIsZeroAddress", ()),
+    b"\x6f\x5e\x88\x18": ("NoHandoverRequest", ()),
+    b"\x4b\x6e\x7f\x18": ("NotOwnerNorApproved", ()),
+    b"\xae\x18\x21\x0a": ("NotPoolManager", ()),
+    b"\x23\x2a\xd1\x52": ("PerpDoesNotExist", ()),
+    b"\xc7\xd2\x6d\x72": ("PositionLocked", ()),
+    b"\x51\x40\x20\x9c": ("SqrtPriceImpactLimitNotRegistered", ()),
+    b"\x09\x47\xcb\x52": ("StartingSqrtPriceTooHigh", ()),
+    b"\x1d\x86\x48\xbc": ("StartingSqrtPriceTooLow", ()),
+    b"\xd6\xac\xf9\x10": ("TicksOutOfBounds", ()),
+    b"\xc9\x91\xcb\xb1": ("TokenAlreadyExists", ()),
+    b"\xce\xea\x21\xb6": ("TokenDoesNotExist", ()),
+    b"\xa1\x14\x81\x00": ("TransferFromIncorrectOwner", ()),
+    b"\xd1\xa5\x7e\xd6": ("TransferToNonERC721ReceiverImplementer", ()),
+    b"\xea\x55\x3b\x34": ("TransferToZeroAddress", ()),
+    b"\x82\xb4\x29\x00": ("Unauthorized", ()),
+    b"\x6f\x0f\x58\x99": ("ZeroDelta", ()),
+    b"\x10\x07\x45\x48": ("ZeroLiquidity", ()),
+    b"\x96\xba\xfb\xfd": ("ZeroNotional", ()),
+}
+
+PERP_MANAGER_TOPICS = {
+    "Approval": "0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925",
+    "ApprovalForAll": "0x17307eab39ab6107e8899845ad3d59bd9653f200f220920489ca2b5937696c31",
+    "FeesModuleRegistered": "0x397ecf6c96a0c11d6a412e48dba0ef070772319b59ae9374aabd388540bea055",
+    "LockupPeriodModuleRegistered": "0x6973eece21e44b3bab76c656780fbfacfefaa6ac32379b914866307f74ce21be",
+    "MarginAdjusted": "0x039bd6c99763691d84a0f16f89a05020769027df8dfb43c999eec52377e7e0bd",
+    "MarginRatiosModuleRegistered": "0xb1ec7bcca6ae3bd09f16c3fd0075cac31eb288bf126167e1633f67752f0cf4db",
+    "NotionalAdjusted": "0x97d0757991a0e6ad9d7fff22fc2ae8a0bd2ab130dc3a440defde061dca39d4f3",
+    "OwnershipHandoverCanceled": "0xfa7b8eab7da67f412cc9575ed43464468f9bfbae89d1675917346ca6d8fe3c92",
+    "OwnershipHandoverRequested": "0xdbf36a107da19e49527a7176a1babf963b4b0ff8cde35ee35d6cd8f1f9ac7e1d",
+    "OwnershipTransferred": "0x8be0079c531659141344cd1fd0a4f28419497f9722a3daafe3b4186f6b6457e0",
+    "PerpCreated": "0xdcd936079b1594821c5562b33a56804c86f234a036d9316a6cf1f6e3ee298914",
+    "PositionClosed": "0xabf51aea8c550a072948bb4613eda402b59b193112d829eabdb8db19d2155e89",
+    "PositionOpened": "0x539406433da82f2f8d907db1339f4c27bcde03e8c95053bda5aca4ea7533b8b0",
+    "SqrtPriceImpactLimitModuleRegistered": "0xe294204a7a011073afb126617e0ce681fdf840f32002fc4f2a829a646a200c17",
+    "Transfer": "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef",
+}
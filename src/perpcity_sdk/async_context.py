@@ -0,0 +1,595 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterable, Sequence
+from functools import partial
+from types import TracebackType
+from typing import Any
+
+from aiohttp import ClientSession, TCPConnector
+from cachetools import TTLCache
+from eth_account import Account
+from eth_account.signers.local import LocalAccount
+from hexbytes import HexBytes
+from web3 import AsyncHTTPProvider, AsyncWeb3, Web3
+from web3.contract.async_contract import AsyncContract, AsyncContractFunction
+from web3.types import BlockIdentifier, Nonce
+
+from .abis import ERC20_ABI, MULTICALL3_ABI, PERP_MANAGER_ABI
+from .context import (
+    _NONCE_RETRIES,
+    DEFAULT_CHAIN_ID,
+    DEFAULT_MULTICALL_CHUNK_SIZE,
+    DEFAULT_POLL_LATENCY,
+    DEFAULT_TX_TIMEOUT,
+    _parse_perp_config,
+    _parse_position_raw_data,
+    _parse_quote_result,
+    _PerpDataReads,
+)
+from .functions.open_position import AsyncOpenPosition
+from .functions.perp_manager import (
+    _PIPELINED_CONFIRMATIONS,
+    OPEN_MAKER_GAS_LIMIT,
+    OPEN_TAKER_GAS_LIMIT,
+    _allowance_reads,
+    _find_opened_position_id,
+    _maker_open_args,
+    _pipelined_receipts,
+    _sync_allowance,
+    _taker_open_args,
+    _validate_maker_params,
+    _validate_taker_params,
+)
+from .functions.position import _close_contract_params, _find_reopened_position_id
+from .metrics import PerpCityMetrics, entry_point
+from .stream import DEFAULT_POLL_INTERVAL, PerpEventStream
+from .types import (
+    ClosePositionParams,
+    ClosePositionResult,
+    LiveDetails,
+    OpenMakerPositionParams,
+    OpenPositionData,
+    OpenTakerPositionParams,
+    PerpCityDeployments,
+    PerpConfig,
+    PerpData,
+    PositionRawData,
+    UserData,
+)
+from .utils.approve import (
+    DEFAULT_BUFFER_MULTIPLE,
+    AllowanceManager,
+    ApprovalStrategy,
+    async_approve_usdc,
+)
+from .utils.constants import MULTICALL3_ADDRESS
+from .utils.conversions import sqrt_price_x96_to_price
+from .utils.errors import (
+    PerpCityError,
+    PipelinedTransactionError,
+    async_with_error_handling,
+    parse_contract_error,
+    with_error_handling,
+)
+from .utils.multicall import MulticallResult, async_aggregate3, async_aggregate3_chunked
+from .utils.nonce import AsyncNonceManager, is_nonce_error, is_rejected_transaction
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class AsyncPerpCityContext:
+    """asyncio counterpart of :class:`PerpCityContext` built on ``AsyncWeb3``.
+
+    All requests share one aiohttp session whose connection pool is capped at
+    ``max_connections``, so many reads can be in flight on a single event loop.
+    Use it as an async context manager, or call :meth:`close` when done::
+
+        async with AsyncPerpCityContext(rpc_url, private_key, pm, usdc) as ctx:
+            perps = await asyncio.gather(*(ctx.get_perp_data(p) for p in perp_ids))
+    """
+
+    def __init__(
+        self,
+        rpc_url: str,
+        private_key: str,
+        perp_manager_address: str,
+        usdc_address: str,
+        chain_id: int = DEFAULT_CHAIN_ID,
+        multicall_address: str | None = MULTICALL3_ADDRESS,
+        multicall_chunk_size: int = DEFAULT_MULTICALL_CHUNK_SIZE,
+        approval_strategy: ApprovalStrategy = ApprovalStrategy.EXACT,
+        approval_buffer_multiple: int = DEFAULT_BUFFER_MULTIPLE,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        session: ClientSession | None = None,
+        metrics: PerpCityMetrics | None = None,
+        deployment_block: int = 0,
+    ) -> None:
+        self._provider = AsyncHTTPProvider(rpc_url)
+        self.w3 = AsyncWeb3(self._provider)
+        self.account: LocalAccount = Account.from_key(private_key)
+        self._deployments = PerpCityDeployments(
+            perp_manager=Web3.to_checksum_address(perp_manager_address),
+            usdc=Web3.to_checksum_address(usdc_address),
+            deployment_block=deployment_block,
+        )
+        self._chain_id = chain_id
+        self._config_cache: TTLCache[str, PerpConfig] = TTLCache(maxsize=256, ttl=300)
+
+        self._perp_manager: AsyncContract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(perp_manager_address),
+            abi=PERP_MANAGER_ABI,
+        )
+        self._usdc: AsyncContract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(usdc_address),
+            abi=ERC20_ABI,
+        )
+        self._multicall: AsyncContract | None = (
+            self.w3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI
+            )
+            if multicall_address is not None
+            else None
+        )
+        self._multicall_chunk_size = multicall_chunk_size
+        self.allowances = AllowanceManager(approval_strategy, approval_buffer_multiple)
+        self._nonces = AsyncNonceManager(self._fetch_pending_nonce)
+
+        self._max_connections = max_connections
+        self._session = session
+        self._owns_session = session is None
+        self._connecting: asyncio.Task[None] | None = None
+
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.install(self.w3)
+
+    # Session lifecycle
+
+    async def _connect(self) -> None:
+        if self._session is None:
+            self._session = ClientSession(connector=TCPConnector(limit=self._max_connections))
+        await self._provider.cache_async_session(self._session)
+
+    async def connect(self) -> None:
+        # Concurrent first calls all wait on the same task, so only one session is made
+        if self._connecting is None:
+            self._connecting = asyncio.ensure_future(self._connect())
+        await self._connecting
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+        self._connecting = None
+
+    async def __aenter__(self) -> AsyncPerpCityContext:
+        await self.connect()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    # Reads
+
+    def deployments(self) -> PerpCityDeployments:
+        return self._deployments
+
+    async def validate_chain_id(self) -> None:
+        await self.connect()
+        rpc_chain_id = await self.w3.eth.chain_id
+        if rpc_chain_id != self._chain_id:
+            raise PerpCityError(
+                f"RPC chain mismatch. RPC returned chain ID {rpc_chain_id}, "
+                f"but expected chain ID {self._chain_id}. "
+                f"Ensure rpc_url corresponds to the correct network."
+            )
+
+    async def multicall(
+        self,
+        calls: Sequence[AsyncContractFunction],
+        block_identifier: BlockIdentifier = "latest",
+    ) -> list[MulticallResult]:
+        await self.connect()
+        return await async_aggregate3(self._multicall, calls, block_identifier)
+
+    def event_stream(
+        self,
+        perp_ids: Iterable[str] | None = None,
+        from_block: int | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> PerpEventStream:
+        """Stream mark and open-interest events of the perp manager.
+
+        The context's HTTP provider is polled; build a :class:`PerpEventStream` on a
+        ``WebSocketProvider`` for pushed logs. Use it inside ``async with ctx``.
+        """
+        return PerpEventStream(
+            self.w3,
+            self._deployments.perp_manager,
+            perp_ids=perp_ids,
+            from_block=from_block,
+            poll_interval=poll_interval,
+        )
+
+    @entry_point("get_perp_config")
+    async def get_perp_config(self, perp_id: str) -> PerpConfig:
+        return (await self._get_perp_config_pinned(perp_id))[0]
+
+    async def _get_perp_config_pinned(self, perp_id: str) -> tuple[PerpConfig, BlockIdentifier]:
+        cached = self._config_cache.get(perp_id)
+        if cached is not None:
+            return cached, "latest"
+
+        await self.connect()
+        if self._multicall is None:
+            block: BlockIdentifier = await self.w3.eth.block_number
+            result = await self._perp_manager.functions.cfgs(perp_id).call(block_identifier=block)
+        else:
+            cfgs_result, block_result = await self.multicall(
+                [
+                    self._perp_manager.functions.cfgs(perp_id),
+                    self._multicall.functions.getBlockNumber(),
+                ]
+            )
+            result = cfgs_result.unwrap()
+            block = int(block_result.unwrap())
+
+        cfg = _parse_perp_config(perp_id, result)
+        self._config_cache[perp_id] = cfg
+        return cfg, block
+
+    async def _fetch_perp_data(
+        self, perp_id: str, extra_calls: Sequence[AsyncContractFunction] = ()
+    ) -> tuple[PerpData, list[Any]]:
+        async def _fetch() -> tuple[PerpData, list[Any]]:
+            cfg, block = await self._get_perp_config_pinned(perp_id)
+
+            reads = _PerpDataReads(
+                self.w3, self._perp_manager, perp_id, cfg, self._chain_id, extra_calls
+            )
+            results = await self.multicall(reads.calls, block_identifier=block)
+            sqrt_price_x96, bounds, fees, extra = reads.parse(results)
+
+            perp_data = PerpData(
+                id=perp_id,
+                tick_spacing=cfg.key.tick_spacing,
+                mark=sqrt_price_x96_to_price(sqrt_price_x96),
+                beacon=cfg.beacon,
+                bounds=bounds,
+                fees=fees,
+            )
+            return perp_data, extra
+
+        return await async_with_error_handling(
+            _fetch, f"fetch_perp_contract_data for perp {perp_id}"
+        )
+
+    @entry_point("get_perp_data")
+    async def get_perp_data(self, perp_id: str) -> PerpData:
+        return (await self._fetch_perp_data(perp_id))[0]
+
+    async def _quote_positions(
+        self,
+        position_ids: Sequence[int],
+        extra_calls: Sequence[AsyncContractFunction] = (),
+        chunk_size: int | None = None,
+    ) -> tuple[dict[int, LiveDetails | PerpCityError], list[MulticallResult]]:
+        await self.connect()
+        quote_calls = [
+            self._perp_manager.functions.quoteClosePosition(position_id)
+            for position_id in position_ids
+        ]
+        results = await async_aggregate3_chunked(
+            self._multicall,
+            [*extra_calls, *quote_calls],
+            chunk_size or self._multicall_chunk_size,
+        )
+
+        details: dict[int, LiveDetails | PerpCityError] = {}
+        for position_id, result in zip(position_ids, results[len(extra_calls) :], strict=True):
+            try:
+                details[position_id] = with_error_handling(
+                    partial(_parse_quote_result, position_id, result),
+                    f"fetch_position_live_details for position {position_id}",
+                )
+            except PerpCityError as e:
+                details[position_id] = e
+
+        return details, results[: len(extra_calls)]
+
+    @entry_point("get_positions_live_details")
+    async def get_positions_live_details(
+        self, position_ids: Sequence[int], chunk_size: int | None = None
+    ) -> dict[int, LiveDetails | PerpCityError]:
+        return (await self._quote_positions(position_ids, chunk_size=chunk_size))[0]
+
+    async def _fetch_position_live_details(self, position_id: int) -> LiveDetails:
+        live_details = (await self._quote_positions([position_id]))[0][position_id]
+        if isinstance(live_details, PerpCityError):
+            raise live_details
+        return live_details
+
+    @entry_point("get_user_data")
+    async def get_user_data(
+        self,
+        user_address: str,
+        positions: list[dict[str, object]],
+        chunk_size: int | None = None,
+    ) -> UserData:
+        checksum_addr = Web3.to_checksum_address(user_address)
+        position_ids = [int(pos["position_id"]) for pos in positions]  # type: ignore[call-overload]
+
+        details, (balance_result,) = await self._quote_positions(
+            position_ids,
+            extra_calls=[self._usdc.functions.balanceOf(checksum_addr)],
+            chunk_size=chunk_size,
+        )
+        usdc_balance_raw: int = with_error_handling(
+            balance_result.unwrap, f"fetch USDC balance for {checksum_addr}"
+        )
+
+        open_positions: list[OpenPositionData] = []
+        failed_positions: dict[int, PerpCityError] = {}
+        for pos, position_id in zip(positions, position_ids, strict=True):
+            live_details = details[position_id]
+            if isinstance(live_details, PerpCityError):
+                failed_positions[position_id] = live_details
+                continue
+            open_positions.append(
+                OpenPositionData(
+                    perp_id=str(pos["perp_id"]),
+                    position_id=position_id,
+                    is_long=bool(pos.get("is_long")),
+                    is_maker=bool(pos.get("is_maker")),
+                    live_details=live_details,
+                )
+            )
+
+        return UserData(
+            wallet_address=user_address,
+            usdc_balance=int(usdc_balance_raw) / 1e6,
+            open_positions=open_positions,
+            failed_positions=failed_positions,
+        )
+
+    @entry_point("get_position_raw_data")
+    async def get_position_raw_data(self, position_id: int) -> PositionRawData:
+        async def _fetch() -> PositionRawData:
+            await self.connect()
+            result = await self._perp_manager.functions.positions(position_id).call()
+            return _parse_position_raw_data(position_id, result)
+
+        return await async_with_error_handling(
+            _fetch, f"get_position_raw_data for position {position_id}"
+        )
+
+    # Writes
+
+    async def _fetch_pending_nonce(self) -> int:
+        return await self.w3.eth.get_transaction_count(self.account.address, "pending")
+
+    @entry_point("send_transaction")
+    async def send_transaction(
+        self, contract_fn: AsyncContractFunction, gas: int | None = None
+    ) -> HexBytes:
+        """Async counterpart of :meth:`PerpCityContext.send_transaction`."""
+        await self.connect()
+        tx_params: dict[str, Any] = {
+            "from": self.account.address,
+            "chainId": self._chain_id,
+        }
+        if gas is not None:
+            tx_params["gas"] = gas
+
+        # build_transaction estimates gas itself when it is not given
+        tx = await contract_fn.build_transaction(tx_params)  # type: ignore[arg-type]
+
+        for attempt in range(_NONCE_RETRIES + 1):
+            tx["nonce"] = Nonce(await self._nonces.allocate())
+            signed = self.account.sign_transaction(tx)  # type: ignore[arg-type]
+            try:
+                return await self.w3.eth.send_raw_transaction(signed.raw_transaction)
+            except Exception as e:
+                if not is_nonce_error(e):
+                    if is_rejected_transaction(e):
+                        self._nonces.release(tx["nonce"])
+                    else:
+                        self._nonces.resync()
+                    raise
+                self._nonces.resync()
+                if attempt == _NONCE_RETRIES:
+                    raise
+
+        raise AssertionError("unreachable")
+
+    @entry_point("wait_for_transaction")
+    async def wait_for_transaction(
+        self,
+        tx_hash: HexBytes,
+        confirmations: int = 1,
+        timeout: float = DEFAULT_TX_TIMEOUT,
+        poll_latency: float = DEFAULT_POLL_LATENCY,
+    ) -> dict[str, Any]:
+        await self.connect()
+        receipt = await self.w3.eth.wait_for_transaction_receipt(
+            tx_hash, timeout=timeout, poll_latency=poll_latency
+        )
+
+        if receipt["status"] == 0:
+            raise PerpCityError(f"Transaction reverted. Hash: {tx_hash.hex()}")
+
+        target_block = receipt["blockNumber"] + confirmations - 1
+        deadline = time.monotonic() + timeout
+        while await self.w3.eth.block_number < target_block:
+            if time.monotonic() > deadline:
+                raise PerpCityError(
+                    f"Timed out waiting for {confirmations} confirmations. Hash: {tx_hash.hex()}"
+                )
+            await asyncio.sleep(poll_latency)
+
+        return dict(receipt)
+
+    @entry_point("execute_transaction")
+    async def execute_transaction(
+        self,
+        contract_fn: AsyncContractFunction,
+        gas: int | None = None,
+        confirmations: int = 1,
+    ) -> dict[str, Any]:
+        tx_hash = await self.send_transaction(contract_fn, gas)
+        return await self.wait_for_transaction(tx_hash, confirmations)
+
+    async def _submit_open(
+        self,
+        approval: int,
+        contract_fn: AsyncContractFunction,
+        gas_limit: int,
+        pipelined: bool,
+    ) -> dict[str, Any]:
+        """Async counterpart of ``perp_manager._submit_open``; receipts are awaited together."""
+        if not pipelined:
+            await async_approve_usdc(self, approval)
+            try:
+                return await self.execute_transaction(contract_fn)
+            except Exception:
+                self.allowances.invalidate()
+                raise
+
+        target = self.allowances.reserve(approval)
+        if target is None:
+            try:
+                return await self.execute_transaction(contract_fn)
+            except Exception:
+                self.allowances.invalidate()
+                raise
+
+        approve_fn = self._usdc.functions.approve(self._deployments.perp_manager, target)
+        try:
+            tx_hashes = {
+                "approve": await self.send_transaction(approve_fn),
+                "open": await self.send_transaction(contract_fn, gas=gas_limit),
+            }
+        except Exception:
+            self.allowances.invalidate()
+            raise
+
+        outcomes = await asyncio.gather(
+            *(
+                self.wait_for_transaction(tx_hash, _PIPELINED_CONFIRMATIONS[label])
+                for label, tx_hash in tx_hashes.items()
+            ),
+            return_exceptions=True,
+        )
+        results: dict[str, dict[str, Any] | PerpCityError] = {}
+        for label, outcome in zip(tx_hashes, outcomes, strict=True):
+            if isinstance(outcome, Exception):
+                results[label] = parse_contract_error(outcome)
+            elif isinstance(outcome, BaseException):
+                raise outcome  # cancellation is not a transaction outcome
+            else:
+                results[label] = outcome
+
+        try:
+            receipts = _pipelined_receipts(results)
+        except PipelinedTransactionError:
+            self.allowances.invalidate()
+            raise
+        self.allowances.approved(target, approval)
+        return receipts["open"]
+
+    @entry_point("open_taker_position")
+    async def open_taker_position(
+        self, perp_id: str, params: OpenTakerPositionParams, pipelined: bool = False
+    ) -> AsyncOpenPosition:
+        async def _open() -> AsyncOpenPosition:
+            _validate_taker_params(params)
+
+            perp_data, (protocol_fee_raw, *allowance) = await self._fetch_perp_data(
+                perp_id, [self._perp_manager.functions.protocolFee(), *_allowance_reads(self)]
+            )
+            _sync_allowance(self, allowance)
+            approval, contract_params = _taker_open_args(
+                self.account.address, perp_data, protocol_fee_raw, params
+            )
+
+            contract_fn = self._perp_manager.functions.openTakerPos(perp_id, contract_params)
+            receipt = await self._submit_open(
+                approval, contract_fn, OPEN_TAKER_GAS_LIMIT, pipelined
+            )
+
+            tx_hash = receipt["transactionHash"].hex()
+            taker_pos_id = _find_opened_position_id(
+                self._perp_manager, receipt, perp_id, is_maker=False
+            )
+
+            return AsyncOpenPosition(self, perp_id, taker_pos_id, params.is_long, False, tx_hash)
+
+        return await async_with_error_handling(_open, "open_taker_position")
+
+    @entry_point("open_maker_position")
+    async def open_maker_position(
+        self, perp_id: str, params: OpenMakerPositionParams, pipelined: bool = False
+    ) -> AsyncOpenPosition:
+        async def _open() -> AsyncOpenPosition:
+            _validate_maker_params(params)
+
+            perp_data, allowance = await self._fetch_perp_data(perp_id, _allowance_reads(self))
+            _sync_allowance(self, allowance)
+            approval, contract_params = _maker_open_args(self.account.address, perp_data, params)
+
+            contract_fn = self._perp_manager.functions.openMakerPos(perp_id, contract_params)
+            receipt = await self._submit_open(
+                approval, contract_fn, OPEN_MAKER_GAS_LIMIT, pipelined
+            )
+
+            tx_hash = receipt["transactionHash"].hex()
+            maker_pos_id = _find_opened_position_id(
+                self._perp_manager, receipt, perp_id, is_maker=True
+            )
+
+            return AsyncOpenPosition(self, perp_id, maker_pos_id, None, True, tx_hash)
+
+        return await async_with_error_handling(_open, "open_maker_position")
+
+    async def _close(
+        self, perp_id: str, position_id: int, params: ClosePositionParams
+    ) -> tuple[str, int | None]:
+        contract_params = _close_contract_params(position_id, params)
+
+        contract_fn = self._perp_manager.functions.closePosition(contract_params)
+        receipt = await self.execute_transaction(contract_fn, gas=500000)
+
+        tx_hash = receipt["transactionHash"].hex()
+        new_position_id = _find_reopened_position_id(
+            self._perp_manager, receipt, perp_id, position_id
+        )
+        return tx_hash, new_position_id
+
+    @entry_point("close_position")
+    async def close_position(
+        self, perp_id: str, position_id: int, params: ClosePositionParams
+    ) -> ClosePositionResult:
+        async def _close() -> ClosePositionResult:
+            tx_hash, new_position_id = await self._close(perp_id, position_id, params)
+
+            if new_position_id is None:
+                return ClosePositionResult(position=None, tx_hash=tx_hash)
+
+            live_details = await self._fetch_position_live_details(new_position_id)
+            return ClosePositionResult(
+                position=OpenPositionData(
+                    perp_id=perp_id,
+                    position_id=new_position_id,
+                    live_details=live_details,
+                ),
+                tx_hash=tx_hash,
+            )
+
+        return await async_with_error_handling(_close, f"close_position for position {position_id}")
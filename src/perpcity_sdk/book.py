@@ -0,0 +1,363 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING, Any
+
+from .functions.perp_manager import _taker_margin
+from .stream import STREAMED_EVENTS, PerpMarketEvent
+from .types import PositionClosedEvent, PositionOpenedEvent, SwapSimulation
+from .utils.constants import MAX_SQRT_PRICE, MAX_TICK, MIN_SQRT_PRICE, MIN_TICK, NUMBER_1E6
+from .utils.events import PERP_MANAGER_EVENTS
+from .utils.logs import DEFAULT_BLOCK_RANGE, iter_log_chunks
+from .utils.multicall import aggregate3_chunked
+from .utils.swap_math import MAX_SWAP_FEE, compute_swap_step
+from .utils.tick_math import get_tick_at_sqrt_ratio, sqrt_ratio_at_tick
+
+if TYPE_CHECKING:
+    from web3.types import BlockIdentifier
+
+    from .context import PerpCityContext
+
+_WORD_BITS = 8
+
+
+def _order(event: PerpMarketEvent) -> tuple[int, int]:
+    return event.block_number or 0, event.log_index or 0
+
+
+class LiquidityBook:
+    """Tick liquidity of one perp's maker positions, for simulating taker fills locally.
+
+    Each maker position adds its liquidity between its ticks, as in the perp's Uniswap
+    v4 pool, and :meth:`simulate_swap` walks the initialized ticks with the integer
+    ``SwapMath`` port, so price impact for a whole sizing grid is computed without RPC.
+    ``quote_open_taker_position`` remains the final check before sending.
+
+    :meth:`from_chain` builds the book from ``PositionOpened`` / ``PositionClosed`` logs.
+    The events carry a maker's ticks but not its liquidity, which is read once per new
+    maker with a batched ``positions()`` multicall. Events also move the book's price;
+    later :meth:`sync` calls only fetch new blocks::
+
+        book = LiquidityBook.from_chain(ctx, perp_id, from_block=deploy_block)
+        fills = [book.simulate_taker(True, margin, 5) for margin in (100, 1_000, 10_000)]
+        impacts = [fill.price_impact for fill in fills]
+
+    ``fee`` is the swap fee rate taken from the input, like a pool LP fee.
+    """
+
+    def __init__(
+        self, perp_id: str, tick_spacing: int, sqrt_price_x96: int, fee: float = 0.0
+    ) -> None:
+        if tick_spacing <= 0:
+            raise ValueError(f"Invalid tick spacing: {tick_spacing} must be positive")
+        if not 0 <= fee < 1:
+            raise ValueError(f"Invalid fee: {fee} must be in [0, 1)")
+        self.perp_id = perp_id.lower()
+        self.tick_spacing = tick_spacing
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.fee_pips = round(fee * MAX_SWAP_FEE)
+        #: Every event up to this block has been applied by :meth:`sync`
+        self.synced_block: int | None = None
+        self._positions: dict[int, tuple[int, int, int]] = {}
+        # Initialized ticks, sorted, with their [liquidity gross, liquidity net]
+        self._ticks: list[int] = []
+        self._tick_liquidity: dict[int, list[int]] = {}
+        # Makers whose liquidity still has to be read with load_positions
+        self._pending: set[int] = set()
+        self._price_order = (-1, -1)
+
+    @classmethod
+    def from_chain(
+        cls,
+        context: PerpCityContext,
+        perp_id: str,
+        from_block: int | None = None,
+        to_block: int | None = None,
+        fee: float | None = None,
+        block_range: int = DEFAULT_BLOCK_RANGE,
+    ) -> LiquidityBook:
+        """Build the book of ``perp_id`` from the maker events since ``from_block``.
+
+        ``from_block`` defaults to the context's deployment block. Tick spacing, the
+        starting price and, unless ``fee`` is given, the LP fee come from one perp-data
+        multicall.
+        """
+        tick_spacing, sqrt_price_x96, _, fees, _ = context._fetch_perp_contract_data(perp_id)
+        book = cls(perp_id, tick_spacing, sqrt_price_x96, fees.lp_fee if fee is None else fee)
+        if from_block is None:
+            from_block = context.deployments().deployment_block
+        book.synced_block = from_block - 1
+        book.sync(context, to_block, block_range)
+        return book
+
+    @property
+    def positions(self) -> Mapping[int, tuple[int, int, int]]:
+        """``(tick_lower, tick_upper, liquidity)`` of every maker position in the book."""
+        return self._positions
+
+    @property
+    def tick(self) -> int:
+        return get_tick_at_sqrt_ratio(self.sqrt_price_x96)
+
+    @property
+    def liquidity(self) -> int:
+        """Liquidity in range at the current price."""
+        return self._liquidity_at(self.tick)
+
+    @property
+    def pending(self) -> frozenset[int]:
+        """Makers seen in events whose liquidity :meth:`load_positions` has not read yet."""
+        return frozenset(self._pending)
+
+    def add_position(
+        self, position_id: int, tick_lower: int, tick_upper: int, liquidity: int
+    ) -> None:
+        if tick_lower >= tick_upper:
+            raise ValueError(
+                f"Invalid tick range: tick_lower ({tick_lower}) "
+                f"must be less than tick_upper ({tick_upper})"
+            )
+        if tick_lower % self.tick_spacing or tick_upper % self.tick_spacing:
+            raise ValueError(
+                f"Ticks {tick_lower} and {tick_upper} must be on the tick spacing "
+                f"{self.tick_spacing} grid"
+            )
+        self.remove_position(position_id)
+        self._positions[position_id] = (tick_lower, tick_upper, liquidity)
+        self._update_tick(tick_lower, liquidity, liquidity)
+        self._update_tick(tick_upper, liquidity, -liquidity)
+        self._pending.discard(position_id)
+
+    def remove_position(self, position_id: int) -> bool:
+        self._pending.discard(position_id)
+        position = self._positions.pop(position_id, None)
+        if position is None:
+            return False
+        tick_lower, tick_upper, liquidity = position
+        self._update_tick(tick_lower, -liquidity, -liquidity)
+        self._update_tick(tick_upper, -liquidity, liquidity)
+        return True
+
+    def apply(self, event: PerpMarketEvent, liquidity: int | None = None) -> bool:
+        """Update the price and maker ranges from an event of this perp.
+
+        A maker ``PositionOpened`` is added with ``liquidity`` when given, and otherwise
+        left pending until :meth:`load_positions`. Partial maker closes are re-read too.
+        """
+        if not isinstance(event, STREAMED_EVENTS) or event.perp_id != self.perp_id:
+            return False
+
+        order = _order(event)
+        if order > self._price_order:
+            self.sqrt_price_x96 = event.sqrt_price_x96
+            self._price_order = order
+
+        if isinstance(event, PositionOpenedEvent) and event.is_maker:
+            if liquidity is None:
+                self._pending.add(event.position_id)
+            else:
+                self.add_position(event.position_id, event.tick_lower, event.tick_upper, liquidity)
+        elif isinstance(event, PositionClosedEvent) and event.was_maker:
+            if event.was_partial_close:
+                self._pending.add(event.position_id)
+            else:
+                self.remove_position(event.position_id)
+        return True
+
+    def apply_logs(self, logs: Iterable[Mapping[str, Any]], address: str | None = None) -> int:
+        """Decode and apply perp manager logs; returns the number of events of this perp."""
+        events = PERP_MANAGER_EVENTS.decode_logs(logs, address=address)
+        return sum(self.apply(event) for event in events)
+
+    def sync(
+        self,
+        context: PerpCityContext,
+        to_block: int | None = None,
+        block_range: int = DEFAULT_BLOCK_RANGE,
+    ) -> int:
+        """Apply the events since the last sync up to ``to_block`` and read new makers.
+
+        The first sync of a book that was not built by :meth:`from_chain` only records
+        ``to_block``.
+        """
+        if to_block is None:
+            to_block = context.w3.eth.block_number
+        from_block = to_block + 1 if self.synced_block is None else self.synced_block + 1
+
+        address = context.deployments().perp_manager
+        topics = [[PERP_MANAGER_EVENTS.topic(record) for record in STREAMED_EVENTS]]
+        applied = 0
+        for _, _, logs in iter_log_chunks(
+            context.w3, address, topics, from_block, to_block, block_range
+        ):
+            applied += self.apply_logs(logs, address)
+
+        if self.synced_block is None or to_block > self.synced_block:
+            self.synced_block = to_block
+        self.load_positions(context, self._pending, block_identifier=to_block)
+        return applied
+
+    def load_positions(
+        self,
+        context: PerpCityContext,
+        position_ids: Iterable[int],
+        block_identifier: BlockIdentifier = "latest",
+    ) -> int:
+        """Read the ticks and liquidity of ``position_ids`` with batched ``positions()``.
+
+        Makers of this perp are added or updated, and everything else (closed positions,
+        takers, other perps) is removed. Works with ids from
+        :meth:`PerpCityIndexer.open_positions`. Returns the number of makers loaded.
+        """
+        position_ids = list(position_ids)
+        results = aggregate3_chunked(
+            context._multicall,
+            [context._perp_manager.functions.positions(i) for i in position_ids],
+            context._multicall_chunk_size,
+            block_identifier=block_identifier,
+        )
+
+        loaded = 0
+        for position_id, result in zip(position_ids, results, strict=True):
+            if not result.success:
+                continue
+            perp_id = "0x" + bytes(result.value[0]).hex()
+            _, tick_lower, tick_upper, liquidity, *_ = result.value[8]  # makerDetails
+            if perp_id == self.perp_id and liquidity > 0:
+                self.add_position(position_id, tick_lower, tick_upper, liquidity)
+                loaded += 1
+            else:
+                self.remove_position(position_id)
+        return loaded
+
+    def simulate_swap(
+        self,
+        zero_for_one: bool,
+        amount: int,
+        exact_input: bool = True,
+        sqrt_price_limit_x96: int | None = None,
+    ) -> SwapSimulation:
+        """Swap ``amount`` against the book, as ``Pool.swap`` would, without changing it.
+
+        ``zero_for_one`` sells perp for USDC. ``amount`` is the input, or with
+        ``exact_input=False`` the output, in 6-decimal units.
+        """
+        if amount <= 0:
+            raise ValueError(f"Invalid amount: {amount} must be positive")
+
+        start = sqrt_price = self.sqrt_price_x96
+        if sqrt_price_limit_x96 is None:
+            sqrt_price_limit_x96 = MIN_SQRT_PRICE + 1 if zero_for_one else MAX_SQRT_PRICE - 1
+        elif (
+            not MIN_SQRT_PRICE < sqrt_price_limit_x96 < start
+            if zero_for_one
+            else not start < sqrt_price_limit_x96 < MAX_SQRT_PRICE
+        ):
+            raise ValueError(f"Invalid price limit: {sqrt_price_limit_x96}")
+
+        tick = get_tick_at_sqrt_ratio(sqrt_price)
+        liquidity = self._liquidity_at(tick)
+        # Same sign convention as the contract: negative is an exact input
+        remaining = -amount if exact_input else amount
+        amount_in = amount_out = fees = crossed = 0
+
+        while remaining != 0 and sqrt_price != sqrt_price_limit_x96:
+            step_start = sqrt_price
+            tick_next, initialized = self._next_initialized_tick(tick, zero_for_one)
+            tick_next = min(max(tick_next, MIN_TICK), MAX_TICK)
+            sqrt_price_next = sqrt_ratio_at_tick(tick_next, self.tick_spacing)
+
+            if (
+                sqrt_price_next < sqrt_price_limit_x96
+                if zero_for_one
+                else sqrt_price_next > sqrt_price_limit_x96
+            ):
+                target = sqrt_price_limit_x96
+            else:
+                target = sqrt_price_next
+            sqrt_price, step_in, step_out, step_fee = compute_swap_step(
+                sqrt_price, target, liquidity, remaining, self.fee_pips
+            )
+
+            amount_in += step_in + step_fee
+            amount_out += step_out
+            fees += step_fee
+            remaining += step_in + step_fee if exact_input else -step_out
+
+            if sqrt_price == sqrt_price_next:
+                if initialized:
+                    net = self._tick_liquidity[tick_next][1]
+                    liquidity += -net if zero_for_one else net
+                    crossed += 1
+                    if liquidity < 0:
+                        raise ValueError(
+                            f"Negative liquidity after crossing tick {tick_next}: the book "
+                            "is missing maker positions"
+                        )
+                tick = tick_next - 1 if zero_for_one else tick_next
+            elif sqrt_price != step_start:
+                tick = get_tick_at_sqrt_ratio(sqrt_price)
+
+        return SwapSimulation(
+            zero_for_one=zero_for_one,
+            amount_in=amount_in,
+            amount_out=amount_out,
+            fee_amount=fees,
+            sqrt_price_start_x96=start,
+            sqrt_price_x96=sqrt_price,
+            tick=tick,
+            liquidity=liquidity,
+            ticks_crossed=crossed,
+            filled=remaining == 0,
+        )
+
+    def simulate_taker(self, is_long: bool, margin: float, leverage: float) -> SwapSimulation:
+        """Simulate the swap of a taker open of ``margin`` USDC at ``leverage``.
+
+        The notional is computed as ``open_taker_position`` sends it. Longs swap it in
+        as USDC and shorts sell perp until it comes out as USDC.
+        """
+        margin_scaled, margin_ratio = _taker_margin(margin, leverage)
+        notional = margin_scaled * NUMBER_1E6 // margin_ratio
+        return self.simulate_swap(not is_long, notional, exact_input=is_long)
+
+    def _liquidity_at(self, tick: int) -> int:
+        ticks = self._ticks
+        tick_liquidity = self._tick_liquidity
+        return sum(tick_liquidity[t][1] for t in ticks[: bisect_right(ticks, tick)])
+
+    def _update_tick(self, tick: int, gross_delta: int, net_delta: int) -> None:
+        entry = self._tick_liquidity.get(tick)
+        if entry is None:
+            self._tick_liquidity[tick] = [gross_delta, net_delta]
+            insort(self._ticks, tick)
+            return
+        entry[0] += gross_delta
+        entry[1] += net_delta
+        if entry[0] == 0:
+            del self._tick_liquidity[tick]
+            del self._ticks[bisect_left(self._ticks, tick)]
+
+    def _next_initialized_tick(self, tick: int, lte: bool) -> tuple[int, bool]:
+        """``TickBitmap.nextInitializedTickWithinOneWord`` over the sorted tick list.
+
+        Steps stop at bitmap word boundaries like on chain, so the per-step rounding, and
+        with it the simulated amounts, match the pool exactly.
+        """
+        spacing = self.tick_spacing
+        ticks = self._ticks
+        compressed = tick // spacing
+        if lte:
+            word_start = compressed >> _WORD_BITS << _WORD_BITS
+            index = bisect_right(ticks, compressed * spacing) - 1
+            if index >= 0 and ticks[index] >= word_start * spacing:
+                return ticks[index], True
+            return word_start * spacing, False
+
+        compressed += 1
+        word_end = (compressed >> _WORD_BITS << _WORD_BITS) + (1 << _WORD_BITS) - 1
+        index = bisect_left(ticks, compressed * spacing)
+        if index < len(ticks) and ticks[index] <= word_end * spacing:
+            return ticks[index], True
+        return word_end * spacing, False
@@ -0,0 +1,396 @@
+"""Record and replay the JSON-RPC traffic of a web3 instance.
+
+:func:`record` installs a middleware on ``w3`` (a context's ``ctx.w3``, sync or async)
+that stores every request and raw provider response, batches included, together with
+the time each took, in a :class:`Cassette`. :meth:`Cassette.save` writes it as JSON
+lines, gzipped when the path ends in ``.gz``. :func:`replay` installs a middleware that
+answers from a cassette instead of the provider, with the recorded or zero latency, so
+a session captured once against a real node can be re-run offline to compare request
+counts and wall time between SDK versions::
+
+    cassette = record(ctx.w3)
+    run_workload(ctx)
+    cassette.save("session.jsonl.gz")
+
+    player = replay(ctx.w3, Cassette.load("session.jsonl.gz"))
+    run_workload(ctx)
+    print(player.requests, cassette.method_counts())
+
+Both middlewares sit innermost, next to the provider, so they see the requests web3's
+own middleware issues and responses before any formatting. Requests that failed in the
+transport, with no JSON-RPC response, are not recorded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import gzip
+import json
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from web3.middleware.base import Web3Middleware
+
+from .utils.errors import CassetteMissError
+
+if TYPE_CHECKING:
+    from web3 import AsyncWeb3, Web3
+    from web3.types import MakeBatchRequestFn, MakeRequestFn
+
+CASSETTE_VERSION = 1
+#: Name the recording and replaying middlewares are installed under
+CASSETTE_MIDDLEWARE = "cassette"
+#: ``Interaction.method`` of a batch request; its params are ``[method, params]`` pairs
+BATCH = "batch"
+
+# Requests whose params never repeat between runs (signatures change with the gas
+# price or calldata); on a miss they replay the next unused recording in order
+_ORDERED_METHODS = frozenset({"eth_sendRawTransaction"})
+
+
+@dataclass(slots=True)
+class Interaction:
+    """One recorded request: method, params, raw response and seconds it took."""
+
+    method: str
+    params: Any
+    response: Any
+    elapsed: float
+
+
+def _jsonable(value: Any) -> Any:
+    """``value`` with bytes as ``0x`` hex and tuples as lists, as JSON can hold it."""
+    if isinstance(value, bytes | bytearray):
+        return "0x" + bytes(value).hex()
+    if isinstance(value, Mapping):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if isinstance(value, list | tuple):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+def _normalize(value: Any) -> Any:
+    # Hex strings compare case-insensitively, so checksummed addresses match
+    if isinstance(value, str):
+        return value.lower() if value.startswith("0x") else value
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def request_key(method: str, params: Any) -> str:
+    """Key a request is matched on: the method and its params, normalized.
+
+    Bytes become hex, hex strings are lower-cased and object keys sorted, so requests
+    that differ only in encoding or address checksums share a key.
+    """
+    normalized = _normalize(_jsonable(params))
+    return method + json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+class Cassette:
+    """Recorded JSON-RPC interactions, in the order they completed.
+
+    ``metadata`` is free-form JSON saved with the interactions, e.g. the SDK version or
+    the workload a session ran.
+    """
+
+    def __init__(
+        self,
+        interactions: Iterable[Interaction] = (),
+        metadata: Mapping[str, Any] | None = None,
+    ) -> None:
+        self.interactions = list(interactions)
+        self.metadata = dict(metadata or {})
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def add(self, method: str, params: Any, response: Any, elapsed: float) -> Interaction:
+        """Append an interaction; params and response are copied into JSON form."""
+        interaction = Interaction(method, _jsonable(params), _jsonable(response), elapsed)
+        with self._lock:
+            self.interactions.append(interaction)
+        return interaction
+
+    def method_counts(self) -> Counter[str]:
+        """Requests per method, counting each element of a batch."""
+        counts: Counter[str] = Counter()
+        for interaction in self.interactions:
+            if interaction.method == BATCH:
+                counts.update(method for method, _params in interaction.params)
+            else:
+                counts[interaction.method] += 1
+        return counts
+
+    @property
+    def elapsed(self) -> float:
+        """Total recorded request time in seconds."""
+        return sum(interaction.elapsed for interaction in self.interactions)
+
+    def save(self, path: str | Path) -> None:
+        """Write a header line, then one ``[method, params, response, elapsed]`` per line."""
+        path = Path(path)
+        header = {"version": CASSETTE_VERSION, "metadata": self.metadata}
+        lines = [json.dumps(header, separators=(",", ":"))]
+        lines += [
+            json.dumps([i.method, i.params, i.response, round(i.elapsed, 6)], separators=(",", ":"))
+            for i in self.interactions
+        ]
+        data = ("\n".join(lines) + "\n").encode()
+        path.write_bytes(gzip.compress(data) if path.suffix == ".gz" else data)
+
+    @classmethod
+    def load(cls, path: str | Path) -> Cassette:
+        """Read a cassette written by :meth:`save`."""
+        path = Path(path)
+        data = path.read_bytes()
+        if path.suffix == ".gz":
+            data = gzip.decompress(data)
+        header, *rows = data.decode().splitlines()
+        meta = json.loads(header)
+        if meta.get("version") != CASSETTE_VERSION:
+            raise ValueError(
+                f"Unsupported cassette version {meta.get('version')!r} in {path}, "
+                f"expected {CASSETTE_VERSION}"
+            )
+        interactions = [Interaction(*json.loads(row)) for row in rows if row]
+        return cls(interactions, meta.get("metadata"))
+
+
+class CassettePlayer:
+    """Answers requests from a cassette; see :func:`replay`.
+
+    Each request takes the next unused interaction recorded under its :func:`request_key`,
+    so repeated polls such as ``eth_blockNumber`` replay their recorded sequence. A
+    request that was only recorded inside a batch takes that element's response, and a
+    batch that matches no recorded batch is answered element by element.
+    ``eth_sendRawTransaction`` requests that match nothing take the next unused recorded
+    transaction. Once a key's responses are used up, the last one answers again unless
+    ``strict``. Anything else raises :class:`CassetteMissError`.
+
+    ``requests`` counts the replayed requests per method, batch elements included, and
+    ``misses`` those that found no response.
+    """
+
+    def __init__(
+        self, cassette: Cassette, recorded_latency: bool = False, strict: bool = False
+    ) -> None:
+        self.cassette = cassette
+        self.recorded_latency = recorded_latency
+        self.strict = strict
+        self.requests: Counter[str] = Counter()
+        self.misses: Counter[str] = Counter()
+        # Entries are (interaction index, position in its batch or -1 for the whole)
+        self._pending: dict[str, deque[tuple[int, int]]] = {}
+        self._elements: dict[str, deque[tuple[int, int]]] = {}
+        self._ordered: dict[str, deque[tuple[int, int]]] = {}
+        self._last: dict[str, tuple[int, int]] = {}
+        self._used: set[tuple[int, int]] = set()
+        self._touched: set[int] = set()
+        self._lock = threading.Lock()
+        for index, interaction in enumerate(cassette.interactions):
+            method = interaction.method
+            self._pending.setdefault(request_key(method, interaction.params), deque()).append(
+                (index, -1)
+            )
+            if method in _ORDERED_METHODS:
+                self._ordered.setdefault(method, deque()).append((index, -1))
+            if method == BATCH and isinstance(interaction.response, list):
+                for position, (element, params) in enumerate(interaction.params):
+                    self._elements.setdefault(request_key(element, params), deque()).append(
+                        (index, position)
+                    )
+
+    @property
+    def unused(self) -> int:
+        """Interactions of the cassette no request has replayed any part of."""
+        return len(self.cassette) - len(self._touched)
+
+    def _take(self, queue: deque[tuple[int, int]] | None) -> tuple[int, int] | None:
+        while queue:
+            entry = queue.popleft()
+            index, position = entry
+            if position < 0:
+                available = index not in self._touched
+            else:
+                available = (index, -1) not in self._used and entry not in self._used
+            if available:
+                self._used.add(entry)
+                self._touched.add(index)
+                return entry
+        return None
+
+    def _find(self, method: str, params: Any) -> tuple[Any, float] | None:
+        key = request_key(method, params)
+        with self._lock:
+            if method != BATCH:
+                self.requests[method] += 1
+            entry = self._take(self._pending.get(key))
+            if entry is None and method != BATCH:
+                entry = self._take(self._elements.get(key))
+            if entry is None and method in _ORDERED_METHODS:
+                entry = self._take(self._ordered.get(method))
+            if entry is None and not self.strict:
+                entry = self._last.get(key)
+            if entry is None:
+                if method != BATCH:
+                    self.misses[method] += 1
+                return None
+            self._last[key] = entry
+            index, position = entry
+            interaction = self.cassette.interactions[index]
+            if method == BATCH and isinstance(interaction.response, list):
+                for element, (element_method, element_params) in enumerate(params):
+                    self._last[request_key(element_method, element_params)] = (index, element)
+
+        response = interaction.response if position < 0 else interaction.response[position]
+        delay = interaction.elapsed if self.recorded_latency else 0.0
+        return copy.deepcopy(response), delay
+
+    def answer(self, method: str, params: Any) -> tuple[Any, float]:
+        """The response to a request and the latency to replay it with."""
+        found = self._find(method, params)
+        if found is None:
+            raise CassetteMissError(method, _jsonable(params))
+        return found
+
+    def answer_batch(self, requests: list[tuple[str, Any]]) -> tuple[Any, float]:
+        """The response to a batch request and the latency to replay it with."""
+        params = [[method, item] for method, item in requests]
+        found = self._find(BATCH, params)
+        if found is not None:
+            with self._lock:
+                self.requests.update(method for method, _item in requests)
+            return found
+        answers = [self.answer(method, item) for method, item in requests]
+        delay = max((delay for _response, delay in answers), default=0.0)
+        return [response for response, _delay in answers], delay
+
+
+class _RecordMiddleware(Web3Middleware):
+    def __init__(self, w3: Web3 | AsyncWeb3[Any], cassette: Cassette) -> None:
+        super().__init__(w3)
+        self.cassette = cassette
+
+    def wrap_make_request(self, make_request: MakeRequestFn) -> MakeRequestFn:
+        def middleware(method: Any, params: Any) -> Any:
+            start = time.perf_counter()
+            response = make_request(method, params)
+            self.cassette.add(method, params, response, time.perf_counter() - start)
+            return response
+
+        return middleware
+
+    def wrap_make_batch_request(self, make_batch_request: MakeBatchRequestFn) -> Any:
+        def middleware(requests_info: list[tuple[Any, Any]]) -> Any:
+            start = time.perf_counter()
+            response = make_batch_request(requests_info)
+            params = [[method, params] for method, params in requests_info]
+            self.cassette.add(BATCH, params, response, time.perf_counter() - start)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_request(self, make_request: Any) -> Any:
+        async def middleware(method: Any, params: Any) -> Any:
+            start = time.perf_counter()
+            response = await make_request(method, params)
+            self.cassette.add(method, params, response, time.perf_counter() - start)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_batch_request(self, make_batch_request: Any) -> Any:
+        async def middleware(requests_info: list[tuple[Any, Any]]) -> Any:
+            start = time.perf_counter()
+            response = await make_batch_request(requests_info)
+            params = [[method, params] for method, params in requests_info]
+            self.cassette.add(BATCH, params, response, time.perf_counter() - start)
+            return response
+
+        return middleware
+
+
+class _ReplayMiddleware(Web3Middleware):
+    def __init__(self, w3: Web3 | AsyncWeb3[Any], player: CassettePlayer) -> None:
+        super().__init__(w3)
+        self.player = player
+
+    def wrap_make_request(self, make_request: MakeRequestFn) -> MakeRequestFn:
+        def middleware(method: Any, params: Any) -> Any:
+            response, delay = self.player.answer(method, params)
+            if delay:
+                time.sleep(delay)
+            return response
+
+        return middleware
+
+    def wrap_make_batch_request(self, make_batch_request: MakeBatchRequestFn) -> Any:
+        def middleware(requests_info: list[tuple[Any, Any]]) -> Any:
+            response, delay = self.player.answer_batch(requests_info)
+            if delay:
+                time.sleep(delay)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_request(self, make_request: Any) -> Any:
+        async def middleware(method: Any, params: Any) -> Any:
+            response, delay = self.player.answer(method, params)
+            if delay:
+                await asyncio.sleep(delay)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_batch_request(self, make_batch_request: Any) -> Any:
+        async def middleware(requests_info: list[tuple[Any, Any]]) -> Any:
+            response, delay = self.player.answer_batch(requests_info)
+            if delay:
+                await asyncio.sleep(delay)
+            return response
+
+        return middleware
+
+
+def _install(w3: Web3 | AsyncWeb3[Any], build: Callable[[Any], Web3Middleware]) -> None:
+    # Layer 0 is the innermost, wrapping the provider's own request function. web3 types
+    # middleware as classes, but any callable building one from ``w3`` is accepted.
+    w3.middleware_onion.inject(build, name=CASSETTE_MIDDLEWARE, layer=0)  # type: ignore[arg-type]
+
+
+def record(w3: Web3 | AsyncWeb3[Any], cassette: Cassette | None = None) -> Cassette:
+    """Record the requests of ``w3`` into ``cassette`` (a new one by default) and return it.
+
+    Stop with ``w3.middleware_onion.remove(CASSETTE_MIDDLEWARE)``.
+    """
+    cassette = cassette if cassette is not None else Cassette()
+    _install(w3, lambda w3: _RecordMiddleware(w3, cassette))
+    return cassette
+
+
+def replay(
+    w3: Web3 | AsyncWeb3[Any],
+    cassette: Cassette,
+    recorded_latency: bool = False,
+    strict: bool = False,
+) -> CassettePlayer:
+    """Answer the requests of ``w3`` from ``cassette`` without reaching its provider.
+
+    With ``recorded_latency`` each response waits as long as it took when recorded,
+    otherwise it returns at once. Returns the :class:`CassettePlayer`, whose counters
+    show what the replayed workload requested.
+    """
+    player = CassettePlayer(cassette, recorded_latency, strict)
+    _install(w3, lambda w3: _ReplayMiddleware(w3, player))
+    return player
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import sys
+import time
+from collections.abc import Sequence
+from functools import partial
+from typing import Any
+
 from cachetools import TTLCache
 from eth_account import Account
 from eth_account.signers.local import LocalAccount
+from hexbytes import HexBytes
 from web3 import Web3
 from web3.contract import Contract
+from web3.contract.contract import ContractFunction
+from web3.types import BlockIdentifier, Nonce, TxParams
 
-from .abis import ERC20_ABI, FEES_ABI, MARGIN_RATIOS_ABI, PERP_MANAGER_ABI
+from .abis import ERC20_ABI, FEES_ABI, MARGIN_RATIOS_ABI, MULTICALL3_ABI, PERP_MANAGER_ABI
+from .metrics import PerpCityMetrics, entry_point
 from .types import (
     Bounds,
     Fees,
@@ -18,12 +28,229 @@ from .types import (
     PerpData,
     PoolKey,
     PositionRawData,
+    TransferEvent,
     UserData,
 )
+from .utils.approve import DEFAULT_BUFFER_MULTIPLE, AllowanceManager, ApprovalStrategy
+from .utils.constants import MULTICALL3_ADDRESS
 from .utils.conversions import margin_ratio_to_leverage, sqrt_price_x96_to_price
 from .utils.errors import PerpCityError, with_error_handling
+from .utils.events import PERP_MANAGER_EVENTS
+from .utils.logs import iter_log_chunks
+from .utils.module_cache import MODULE_CONSTANTS
+from .utils.multicall import MulticallResult, aggregate3, aggregate3_chunked
+from .utils.nonce import NonceManager, is_nonce_error, is_rejected_transaction
 
 DEFAULT_CHAIN_ID = 84532  # Base Sepolia
+DEFAULT_MULTICALL_CHUNK_SIZE = 100
+DEFAULT_TX_TIMEOUT = 120.0
+DEFAULT_POLL_LATENCY = 0.1
+_NONCE_RETRIES = 2
+
+
+def _parse_perp_config(perp_id: str, result: Any) -> PerpConfig:
+    key_data = result[0]
+    if not key_data or key_data[3] == 0 or key_data[0] == "0x" + "0" * 40:
+        raise PerpCityError(f"Perp ID {perp_id} not found or invalid")
+
+    return PerpConfig(
+        key=PoolKey(
+            currency0=key_data[0],
+            currency1=key_data[1],
+            fee=int(key_data[2]),
+            tick_spacing=int(key_data[3]),
+            hooks=key_data[4],
+        ),
+        creator=result[1],
+        vault=result[2],
+        beacon=result[3],
+        fees=result[4],
+        margin_ratios=result[5],
+        lockup_period=result[6],
+        sqrt_price_impact_limit=result[7],
+    )
+
+
+def _scale_ratio(value: Any) -> float:
+    return int(value) / 1e6
+
+
+class _PerpDataReads:
+    """Plans the multicall batch behind ``get_perp_data`` and parses its results.
+
+    Only the mark price is read every time. Fee and margin-ratio constants are read
+    the first time a module is seen and then served from ``MODULE_CONSTANTS``.
+    Works with both ``Web3`` and ``AsyncWeb3`` contracts.
+    """
+
+    def __init__(
+        self,
+        w3: Any,
+        perp_manager: Any,
+        perp_id: str,
+        cfg: PerpConfig,
+        chain_id: int,
+        extra_calls: Sequence[Any] = (),
+    ) -> None:
+        self._chain_id = chain_id
+        self._cfg = cfg
+        self._fees = MODULE_CONSTANTS.get_fees(chain_id, cfg.fees)
+        self._bounds = MODULE_CONSTANTS.get_bounds(chain_id, cfg.margin_ratios)
+
+        calls: list[Any] = [perp_manager.functions.timeWeightedAvgSqrtPriceX96(perp_id, 1)]
+        if self._fees is None:
+            fees_contract = w3.eth.contract(
+                address=Web3.to_checksum_address(cfg.fees), abi=FEES_ABI
+            ).functions
+            calls += [
+                fees_contract.CREATOR_FEE(),
+                fees_contract.INSURANCE_FEE(),
+                fees_contract.LP_FEE(),
+                fees_contract.LIQUIDATION_FEE(),
+            ]
+        if self._bounds is None:
+            margin_contract = w3.eth.contract(
+                address=Web3.to_checksum_address(cfg.margin_ratios), abi=MARGIN_RATIOS_ABI
+            ).functions
+            calls += [
+                margin_contract.MIN_TAKER_RATIO(),
+                margin_contract.MAX_TAKER_RATIO(),
+                margin_contract.LIQUIDATION_TAKER_RATIO(),
+                margin_contract.MIN_MAKER_RATIO(),
+                margin_contract.MAX_MAKER_RATIO(),
+                margin_contract.LIQUIDATION_MAKER_RATIO(),
+            ]
+        self.calls = calls + list(extra_calls)
+
+    def parse(self, results: Sequence[MulticallResult]) -> tuple[int, Bounds, Fees, list[Any]]:
+        sqrt_price_x96 = int(results[0].unwrap())
+        i = 1
+
+        fees = self._fees
+        if fees is None:
+            creator_fee, insurance_fee, lp_fee, liquidation_fee = (
+                r.unwrap() for r in results[i : i + 4]
+            )
+            i += 4
+            fees = Fees(
+                creator_fee=_scale_ratio(creator_fee),
+                insurance_fee=_scale_ratio(insurance_fee),
+                lp_fee=_scale_ratio(lp_fee),
+                liquidation_fee=_scale_ratio(liquidation_fee),
+            )
+            MODULE_CONSTANTS.set_fees(self._chain_id, self._cfg.fees, fees)
+
+        bounds = self._bounds
+        if bounds is None:
+            min_taker_ratio, max_taker_ratio, liquidation_taker_ratio = (
+                r.unwrap() for r in results[i : i + 3]
+            )
+            # Older margin-ratio modules have no maker constants; leave those bounds unset
+            maker = results[i + 3 : i + 6]
+            min_maker_ratio, max_maker_ratio, liquidation_maker_ratio = (
+                (r.value for r in maker) if all(r.success for r in maker) else (None,) * 3
+            )
+            i += 6
+            bounds = Bounds(
+                min_margin=10,
+                min_taker_leverage=margin_ratio_to_leverage(int(max_taker_ratio)),
+                max_taker_leverage=margin_ratio_to_leverage(int(min_taker_ratio)),
+                liquidation_taker_ratio=_scale_ratio(liquidation_taker_ratio),
+                min_maker_leverage=(
+                    margin_ratio_to_leverage(int(max_maker_ratio))
+                    if max_maker_ratio is not None
+                    else None
+                ),
+                max_maker_leverage=(
+                    margin_ratio_to_leverage(int(min_maker_ratio))
+                    if min_maker_ratio is not None
+                    else None
+                ),
+                liquidation_maker_ratio=(
+                    _scale_ratio(liquidation_maker_ratio)
+                    if liquidation_maker_ratio is not None
+                    else None
+                ),
+            )
+            MODULE_CONSTANTS.set_bounds(self._chain_id, self._cfg.margin_ratios, bounds)
+
+        return sqrt_price_x96, bounds, fees, [r.unwrap() for r in results[i:]]
+
+
+def _parse_live_details(position_id: int, result: Any) -> LiveDetails:
+    unexpected_reason, pnl, funding, net_margin, was_liquidated = result
+
+    if unexpected_reason != b"" and unexpected_reason != "0x":
+        raise PerpCityError(
+            f"Failed to quote position {position_id} - position may be invalid or already closed"
+        )
+
+    return LiveDetails(
+        pnl=int(pnl) / 1e6,
+        funding_payment=int(funding) / 1e6,
+        effective_margin=int(net_margin) / 1e6,
+        is_liquidatable=bool(was_liquidated),
+    )
+
+
+def _parse_quote_result(position_id: int, result: MulticallResult) -> LiveDetails:
+    return _parse_live_details(position_id, result.unwrap())
+
+
+def _perp_id_hex(perp_id: Any) -> str:
+    # Interned: a portfolio holds many positions but only a handful of perp ids
+    return sys.intern("0x" + perp_id.hex() if isinstance(perp_id, bytes) else str(perp_id))
+
+
+def _parse_position_raw_data(position_id: int, result: Any) -> PositionRawData:
+    perp_id = result[0]
+    margin = result[1]
+    entry_perp_delta = result[2]
+    entry_usd_delta = result[3]
+    margin_ratios_raw = result[7]
+
+    zero_perp_id = "0x" + "0" * 64
+    if perp_id == zero_perp_id or perp_id == bytes(32):
+        raise PerpCityError(f"Position {position_id} does not exist")
+
+    return PositionRawData(
+        perp_id=_perp_id_hex(perp_id),
+        position_id=position_id,
+        margin=int(margin) / 1e6,
+        entry_perp_delta=int(entry_perp_delta),
+        entry_usd_delta=int(entry_usd_delta),
+        margin_ratios=MarginRatios(
+            min=int(margin_ratios_raw[0]),
+            max=int(margin_ratios_raw[1]),
+            liq=int(margin_ratios_raw[2]),
+        ),
+    )
+
+
+def _parse_discovered_position(position_id: int, result: Any) -> dict[str, object] | None:
+    """Turn a ``positions()`` result into a ``get_user_data`` position entry."""
+    perp_id = result[0]
+    if perp_id == bytes(32):
+        return None
+    is_maker = int(result[8][3]) > 0  # makerDetails.liquidity
+    return {
+        "perp_id": _perp_id_hex(perp_id),
+        "position_id": position_id,
+        "is_long": None if is_maker else int(result[2]) > 0,
+        "is_maker": is_maker,
+    }
+
+
+class _PositionDiscovery:
+    """Incremental position-NFT ownership state for one address."""
+
+    __slots__ = ("block", "owned", "positions")
+
+    def __init__(self, block: int) -> None:
+        self.block = block
+        self.owned: set[int] = set()
+        # perp id and side never change for a position id, so entries are kept forever
+        self.positions: dict[int, dict[str, object] | None] = {}
 
 
 class PerpCityContext:
@@ -34,12 +261,19 @@ class PerpCityContext:
         perp_manager_address: str,
         usdc_address: str,
         chain_id: int = DEFAULT_CHAIN_ID,
+        multicall_address: str | None = MULTICALL3_ADDRESS,
+        multicall_chunk_size: int = DEFAULT_MULTICALL_CHUNK_SIZE,
+        approval_strategy: ApprovalStrategy = ApprovalStrategy.EXACT,
+        approval_buffer_multiple: int = DEFAULT_BUFFER_MULTIPLE,
+        metrics: PerpCityMetrics | None = None,
+        deployment_block: int = 0,
     ) -> None:
         self.w3 = Web3(Web3.HTTPProvider(rpc_url))
         self.account: LocalAccount = Account.from_key(private_key)
         self._deployments = PerpCityDeployments(
             perp_manager=Web3.to_checksum_address(perp_manager_address),
             usdc=Web3.to_checksum_address(usdc_address),
+            deployment_block=deployment_block,
         )
         self._chain_id = chain_id
         self._config_cache: TTLCache[str, PerpConfig] = TTLCache(maxsize=256, ttl=300)
@@ -52,6 +286,25 @@ class PerpCityContext:
             address=Web3.to_checksum_address(usdc_address),
             abi=ERC20_ABI,
         )
+        # Set multicall_address=None on chains without Multicall3 to fall back to
+        # sequential eth_calls.
+        self._multicall: Contract | None = (
+            self.w3.eth.contract(
+                address=Web3.to_checksum_address(multicall_address), abi=MULTICALL3_ABI
+            )
+            if multicall_address is not None
+            else None
+        )
+        self._multicall_chunk_size = multicall_chunk_size
+        self.allowances = AllowanceManager(approval_strategy, approval_buffer_multiple)
+        self._discovery: dict[str, _PositionDiscovery] = {}
+        self._nonces = NonceManager(
+            lambda: self.w3.eth.get_transaction_count(self.account.address, "pending")
+        )
+        # Left None, no middleware is installed and entry points skip timing
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.install(self.w3)
 
     def deployments(self) -> PerpCityDeployments:
         return self._deployments
@@ -65,121 +318,212 @@ class PerpCityContext:
                 f"Ensure rpc_url corresponds to the correct network."
             )
 
+    def multicall(
+        self,
+        calls: Sequence[ContractFunction],
+        block_identifier: BlockIdentifier = "latest",
+    ) -> list[MulticallResult]:
+        return aggregate3(self._multicall, calls, block_identifier)
+
+    @entry_point("get_perp_config")
     def get_perp_config(self, perp_id: str) -> PerpConfig:
         cached = self._config_cache.get(perp_id)
         if cached is not None:
             return cached
 
         result = self._perp_manager.functions.cfgs(perp_id).call()
-
-        key_data = result[0]
-        if not key_data or key_data[3] == 0 or key_data[0] == "0x" + "0" * 40:
-            raise PerpCityError(f"Perp ID {perp_id} not found or invalid")
-
-        cfg = PerpConfig(
-            key=PoolKey(
-                currency0=key_data[0],
-                currency1=key_data[1],
-                fee=int(key_data[2]),
-                tick_spacing=int(key_data[3]),
-                hooks=key_data[4],
-            ),
-            creator=result[1],
-            vault=result[2],
-            beacon=result[3],
-            fees=result[4],
-            margin_ratios=result[5],
-            lockup_period=result[6],
-            sqrt_price_impact_limit=result[7],
-        )
+        cfg = _parse_perp_config(perp_id, result)
 
         self._config_cache[perp_id] = cfg
         return cfg
 
-    def _fetch_perp_contract_data(self, perp_id: str) -> tuple[int, int, Bounds, Fees]:
-        def _fetch() -> tuple[int, int, Bounds, Fees]:
-            cfg = self.get_perp_config(perp_id)
-            tick_spacing = cfg.key.tick_spacing
-
-            sqrt_price_x96: int = self._perp_manager.functions.timeWeightedAvgSqrtPriceX96(
-                perp_id, 1
-            ).call()
-
-            fees_contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(cfg.fees), abi=FEES_ABI
-            )
-            margin_contract = self.w3.eth.contract(
-                address=Web3.to_checksum_address(cfg.margin_ratios), abi=MARGIN_RATIOS_ABI
+    def _get_perp_config_pinned(self, perp_id: str) -> tuple[PerpConfig, BlockIdentifier]:
+        cached = self._config_cache.get(perp_id)
+        if cached is not None:
+            return cached, "latest"
+
+        # The module reads depend on the addresses in cfgs, so a cache miss costs one
+        # extra round trip. Pin the follow-up batch to the block cfgs was read at.
+        if self._multicall is None:
+            block: BlockIdentifier = self.w3.eth.block_number
+            result = self._perp_manager.functions.cfgs(perp_id).call(block_identifier=block)
+        else:
+            cfgs_result, block_result = self.multicall(
+                [
+                    self._perp_manager.functions.cfgs(perp_id),
+                    self._multicall.functions.getBlockNumber(),
+                ]
             )
+            result = cfgs_result.unwrap()
+            block = int(block_result.unwrap())
 
-            min_taker_ratio = margin_contract.functions.MIN_TAKER_RATIO().call()
-            max_taker_ratio = margin_contract.functions.MAX_TAKER_RATIO().call()
-            liquidation_taker_ratio = margin_contract.functions.LIQUIDATION_TAKER_RATIO().call()
-
-            creator_fee = fees_contract.functions.CREATOR_FEE().call()
-            insurance_fee = fees_contract.functions.INSURANCE_FEE().call()
-            lp_fee = fees_contract.functions.LP_FEE().call()
-            liquidation_fee = fees_contract.functions.LIQUIDATION_FEE().call()
-
-            min_taker_leverage = margin_ratio_to_leverage(int(max_taker_ratio))
-            max_taker_leverage = margin_ratio_to_leverage(int(min_taker_ratio))
+        cfg = _parse_perp_config(perp_id, result)
+        self._config_cache[perp_id] = cfg
+        return cfg, block
 
-            def scale_fee(fee: object) -> float:
-                return int(fee) / 1e6
+    def _fetch_perp_contract_data(
+        self, perp_id: str, extra_calls: Sequence[ContractFunction] = ()
+    ) -> tuple[int, int, Bounds, Fees, list[Any]]:
+        def _fetch() -> tuple[int, int, Bounds, Fees, list[Any]]:
+            cfg, block = self._get_perp_config_pinned(perp_id)
+            tick_spacing = cfg.key.tick_spacing
 
-            bounds = Bounds(
-                min_margin=10,
-                min_taker_leverage=min_taker_leverage,
-                max_taker_leverage=max_taker_leverage,
-                liquidation_taker_ratio=int(liquidation_taker_ratio) / 1e6,
-            )
-            fees = Fees(
-                creator_fee=scale_fee(creator_fee),
-                insurance_fee=scale_fee(insurance_fee),
-                lp_fee=scale_fee(lp_fee),
-                liquidation_fee=scale_fee(liquidation_fee),
+            reads = _PerpDataReads(
+                self.w3, self._perp_manager, perp_id, cfg, self._chain_id, extra_calls
             )
+            results = self.multicall(reads.calls, block_identifier=block)
+            sqrt_price_x96, bounds, fees, extra = reads.parse(results)
 
-            return (tick_spacing, sqrt_price_x96, bounds, fees)
+            return (tick_spacing, sqrt_price_x96, bounds, fees, extra)
 
         return with_error_handling(_fetch, f"fetch_perp_contract_data for perp {perp_id}")
 
-    def get_perp_data(self, perp_id: str) -> PerpData:
-        tick_spacing, sqrt_price_x96, bounds, fees = self._fetch_perp_contract_data(perp_id)
-        cfg = self.get_perp_config(perp_id)
+    def _fetch_perp_data(
+        self, perp_id: str, extra_calls: Sequence[ContractFunction] = ()
+    ) -> tuple[PerpData, list[Any]]:
+        tick_spacing, sqrt_price_x96, bounds, fees, extra = self._fetch_perp_contract_data(
+            perp_id, extra_calls
+        )
+        return self._build_perp_data(perp_id, tick_spacing, sqrt_price_x96, bounds, fees), extra
 
+    def _build_perp_data(
+        self, perp_id: str, tick_spacing: int, sqrt_price_x96: int, bounds: Bounds, fees: Fees
+    ) -> PerpData:
         return PerpData(
             id=perp_id,
             tick_spacing=tick_spacing,
             mark=sqrt_price_x96_to_price(sqrt_price_x96),
-            beacon=cfg.beacon,
+            beacon=self.get_perp_config(perp_id).beacon,
             bounds=bounds,
             fees=fees,
         )
 
+    @entry_point("get_perp_data")
+    def get_perp_data(self, perp_id: str) -> PerpData:
+        return self._fetch_perp_data(perp_id)[0]
+
     def _fetch_position_live_details(self, perp_id: str, position_id: int) -> LiveDetails:
         def _fetch() -> LiveDetails:
             result = self._perp_manager.functions.quoteClosePosition(position_id).call()
+            return _parse_live_details(position_id, result)
+
+        return with_error_handling(
+            _fetch, f"fetch_position_live_details for position {position_id}"
+        )
 
-            unexpected_reason, pnl, funding, net_margin, was_liquidated = result
+    def _quote_positions(
+        self,
+        position_ids: Sequence[int],
+        extra_calls: Sequence[ContractFunction] = (),
+        chunk_size: int | None = None,
+    ) -> tuple[dict[int, LiveDetails | PerpCityError], list[MulticallResult]]:
+        quote_calls = [
+            self._perp_manager.functions.quoteClosePosition(position_id)
+            for position_id in position_ids
+        ]
+        results = aggregate3_chunked(
+            self._multicall,
+            [*extra_calls, *quote_calls],
+            chunk_size or self._multicall_chunk_size,
+        )
 
-            if unexpected_reason != b"" and unexpected_reason != "0x":
-                raise PerpCityError(
-                    f"Failed to quote position {position_id} - "
-                    "position may be invalid or already closed"
+        details: dict[int, LiveDetails | PerpCityError] = {}
+        for position_id, result in zip(position_ids, results[len(extra_calls) :], strict=True):
+            try:
+                details[position_id] = with_error_handling(
+                    partial(_parse_quote_result, position_id, result),
+                    f"fetch_position_live_details for position {position_id}",
                 )
+            except PerpCityError as e:
+                details[position_id] = e
 
-            return LiveDetails(
-                pnl=int(pnl) / 1e6,
-                funding_payment=int(funding) / 1e6,
-                effective_margin=int(net_margin) / 1e6,
-                is_liquidatable=bool(was_liquidated),
-            )
+        return details, results[: len(extra_calls)]
 
-        return with_error_handling(
-            _fetch, f"fetch_position_live_details for position {position_id}"
+    @entry_point("get_positions_live_details")
+    def get_positions_live_details(
+        self, position_ids: Sequence[int], chunk_size: int | None = None
+    ) -> dict[int, LiveDetails | PerpCityError]:
+        """Quote many positions in chunked multicalls.
+
+        Each position is decoded on its own: a closed or invalid position maps to the
+        ``PerpCityError`` describing its failure instead of failing the whole batch.
+        """
+        return self._quote_positions(position_ids, chunk_size=chunk_size)[0]
+
+    @entry_point("discover_user_positions")
+    def discover_user_positions(
+        self,
+        user_address: str,
+        from_block: int | None = None,
+        chunk_size: int | None = None,
+    ) -> list[dict[str, object]]:
+        """Find the positions ``user_address`` owns, in the format ``get_user_data`` takes.
+
+        Positions are ERC721 tokens of the perp manager. Ownership is rebuilt from the
+        ``Transfer`` logs to and from the address (scanned from ``from_block``, by default
+        the deployment block, on the first call), confirmed with a batched ``ownerOf``,
+        and perp id and side come from a batched ``positions()`` read. State is cached per
+        address, so later calls only fetch the logs of new blocks and read ``positions()``
+        for new ids.
+        """
+        checksum_addr = Web3.to_checksum_address(user_address)
+        perp_manager = self._deployments.perp_manager
+        latest = self.w3.eth.block_number
+
+        state = self._discovery.get(checksum_addr)
+        if state is None:
+            if from_block is None:
+                from_block = self._deployments.deployment_block
+            state = self._discovery[checksum_addr] = _PositionDiscovery(from_block - 1)
+
+        if latest > state.block:
+            transfer_topic = PERP_MANAGER_EVENTS.topic(TransferEvent)
+            address_topic = "0x" + "00" * 12 + checksum_addr[2:].lower()
+            transfers: list[TransferEvent] = []
+            for topics in ([transfer_topic, None, address_topic], [transfer_topic, address_topic]):
+                for _, _, logs in iter_log_chunks(
+                    self.w3, perp_manager, topics, state.block + 1, latest
+                ):
+                    transfers += PERP_MANAGER_EVENTS.decode_logs(logs, TransferEvent, perp_manager)
+
+            transfers.sort(key=lambda t: (t.block_number or 0, t.log_index or 0))
+            for transfer in transfers:
+                if transfer.to_address == checksum_addr:
+                    state.owned.add(transfer.token_id)
+                else:
+                    state.owned.discard(transfer.token_id)
+            state.block = latest
+
+        position_ids = sorted(state.owned)
+        unknown = [
+            position_id for position_id in position_ids if position_id not in state.positions
+        ]
+        results = aggregate3_chunked(
+            self._multicall,
+            [
+                *(self._perp_manager.functions.ownerOf(i) for i in position_ids),
+                *(self._perp_manager.functions.positions(i) for i in unknown),
+            ],
+            chunk_size or self._multicall_chunk_size,
+            block_identifier=latest,
         )
 
+        for position_id, result in zip(unknown, results[len(position_ids) :], strict=True):
+            if result.success:
+                state.positions[position_id] = _parse_discovered_position(position_id, result.value)
+
+        discovered: list[dict[str, object]] = []
+        for position_id, owner in zip(position_ids, results[: len(position_ids)], strict=True):
+            # ownerOf reverts for burned (closed) positions
+            if not owner.success or owner.value != checksum_addr:
+                state.owned.discard(position_id)
+                continue
+            position = state.positions.get(position_id)
+            if position is not None:
+                discovered.append(position)
+        return discovered
+
+    @entry_point("get_open_position_data")
     def get_open_position_data(
         self, perp_id: str, position_id: int, is_long: bool, is_maker: bool
     ) -> OpenPositionData:
@@ -192,24 +536,49 @@ class PerpCityContext:
             live_details=live_details,
         )
 
+    @entry_point("get_user_data")
     def get_user_data(
         self,
         user_address: str,
-        positions: list[dict[str, object]],
+        positions: list[dict[str, object]] | None = None,
+        chunk_size: int | None = None,
+        from_block: int | None = None,
     ) -> UserData:
+        """Fetch the USDC balance and live details of ``positions`` in chunked multicalls.
+
+        When ``positions`` is omitted they are found with :meth:`discover_user_positions`,
+        scanning from ``from_block`` on the first call.
+        Positions that can no longer be quoted (closed or liquidated since the caller
+        last saw them, or a reverted quote) are left out of ``open_positions`` and
+        reported in ``failed_positions`` with the ``PerpCityError`` for each id.
+        """
         checksum_addr = Web3.to_checksum_address(user_address)
-        usdc_balance_raw: int = self._usdc.functions.balanceOf(checksum_addr).call()
+        if positions is None:
+            positions = self.discover_user_positions(
+                checksum_addr, from_block=from_block, chunk_size=chunk_size
+            )
+        position_ids = [int(pos["position_id"]) for pos in positions]  # type: ignore[call-overload]
+
+        details, (balance_result,) = self._quote_positions(
+            position_ids,
+            extra_calls=[self._usdc.functions.balanceOf(checksum_addr)],
+            chunk_size=chunk_size,
+        )
+        usdc_balance_raw: int = with_error_handling(
+            balance_result.unwrap, f"fetch USDC balance for {checksum_addr}"
+        )
 
         open_positions: list[OpenPositionData] = []
-        for pos in positions:
-            live_details = self._fetch_position_live_details(
-                str(pos["perp_id"]),
-                int(pos["position_id"]),  # type: ignore[arg-type]
-            )
+        failed_positions: dict[int, PerpCityError] = {}
+        for pos, position_id in zip(positions, position_ids, strict=True):
+            live_details = details[position_id]
+            if isinstance(live_details, PerpCityError):
+                failed_positions[position_id] = live_details
+                continue
             open_positions.append(
                 OpenPositionData(
                     perp_id=str(pos["perp_id"]),
-                    position_id=int(pos["position_id"]),  # type: ignore[arg-type]
+                    position_id=position_id,
                     is_long=bool(pos.get("is_long")),
                     is_maker=bool(pos.get("is_maker")),
                     live_details=live_details,
@@ -220,58 +589,93 @@ class PerpCityContext:
             wallet_address=user_address,
             usdc_balance=int(usdc_balance_raw) / 1e6,
             open_positions=open_positions,
+            failed_positions=failed_positions,
         )
 
+    @entry_point("get_position_raw_data")
     def get_position_raw_data(self, position_id: int) -> PositionRawData:
         def _fetch() -> PositionRawData:
             result = self._perp_manager.functions.positions(position_id).call()
-
-            perp_id = result[0]
-            margin = result[1]
-            entry_perp_delta = result[2]
-            entry_usd_delta = result[3]
-            margin_ratios_raw = result[7]
-
-            zero_perp_id = "0x" + "0" * 64
-            if perp_id == zero_perp_id or perp_id == bytes(32):
-                raise PerpCityError(f"Position {position_id} does not exist")
-
-            perp_id_hex = "0x" + perp_id.hex() if isinstance(perp_id, bytes) else str(perp_id)
-
-            return PositionRawData(
-                perp_id=perp_id_hex,
-                position_id=position_id,
-                margin=int(margin) / 1e6,
-                entry_perp_delta=int(entry_perp_delta),
-                entry_usd_delta=int(entry_usd_delta),
-                margin_ratios=MarginRatios(
-                    min=int(margin_ratios_raw[0]),
-                    max=int(margin_ratios_raw[1]),
-                    liq=int(margin_ratios_raw[2]),
-                ),
-            )
+            return _parse_position_raw_data(position_id, result)
 
         return with_error_handling(_fetch, f"get_position_raw_data for position {position_id}")
 
-    def execute_transaction(self, contract_fn: object, gas: int | None = None) -> dict:
-        tx_params: dict = {
+    @entry_point("send_transaction")
+    def send_transaction(self, contract_fn: ContractFunction, gas: int | None = None) -> HexBytes:
+        """Sign and broadcast ``contract_fn`` without waiting for it to be mined.
+
+        Nonces come from the context's local :class:`NonceManager`, so several
+        transactions can be sent back-to-back. If the node rejects the nonce as too low
+        or as an underpriced replacement, the manager resyncs and the send is retried.
+        When the node rejects the transaction for another reason, the nonce is handed back
+        if no later one has been allocated. After a timeout or transport error the node may
+        still have accepted it, so the manager resyncs instead of reusing the nonce.
+        """
+        tx_params: TxParams = {
             "from": self.account.address,
-            "nonce": self.w3.eth.get_transaction_count(self.account.address, "pending"),
             "chainId": self._chain_id,
         }
         if gas is not None:
             tx_params["gas"] = gas
 
-        tx = contract_fn.build_transaction(tx_params)  # type: ignore[union-attr]
-
-        if gas is None:
-            tx["gas"] = self.w3.eth.estimate_gas(tx)
-
-        signed = self.account.sign_transaction(tx)
-        tx_hash = self.w3.eth.send_raw_transaction(signed.raw_transaction)
-        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        # build_transaction estimates gas itself when it is not given
+        tx = contract_fn.build_transaction(tx_params)
+
+        for attempt in range(_NONCE_RETRIES + 1):
+            tx["nonce"] = Nonce(self._nonces.allocate())
+            signed = self.account.sign_transaction(tx)  # type: ignore[arg-type]
+            try:
+                return self.w3.eth.send_raw_transaction(signed.raw_transaction)
+            except Exception as e:
+                if not is_nonce_error(e):
+                    if is_rejected_transaction(e):
+                        # Reading the pending nonce now would hand out nonces still in
+                        # flight from other threads; only the latest one can be given back
+                        self._nonces.release(tx["nonce"])
+                    else:
+                        # The node may have accepted it, so its nonce must not be reused
+                        self._nonces.resync()
+                    raise
+                self._nonces.resync()
+                if attempt == _NONCE_RETRIES:
+                    raise
+
+        raise AssertionError("unreachable")
+
+    @entry_point("wait_for_transaction")
+    def wait_for_transaction(
+        self,
+        tx_hash: HexBytes,
+        confirmations: int = 1,
+        timeout: float = DEFAULT_TX_TIMEOUT,
+        poll_latency: float = DEFAULT_POLL_LATENCY,
+    ) -> dict[str, Any]:
+        """Wait until ``tx_hash`` is mined and ``confirmations`` blocks deep.
+
+        One confirmation means the block that includes the transaction; each additional
+        confirmation waits for one more block on top of it.
+        """
+        receipt = self.w3.eth.wait_for_transaction_receipt(
+            tx_hash, timeout=timeout, poll_latency=poll_latency
+        )
 
         if receipt["status"] == 0:
             raise PerpCityError(f"Transaction reverted. Hash: {tx_hash.hex()}")
 
+        target_block = receipt["blockNumber"] + confirmations - 1
+        deadline = time.monotonic() + timeout
+        while self.w3.eth.block_number < target_block:
+            if time.monotonic() > deadline:
+                raise PerpCityError(
+                    f"Timed out waiting for {confirmations} confirmations. Hash: {tx_hash.hex()}"
+                )
+            time.sleep(poll_latency)
+
         return dict(receipt)
+
+    @entry_point("execute_transaction")
+    def execute_transaction(
+        self, contract_fn: ContractFunction, gas: int | None = None, confirmations: int = 1
+    ) -> dict[str, Any]:
+        tx_hash = self.send_transaction(contract_fn, gas)
+        return self.wait_for_transaction(tx_hash, confirmations)
@@ -1,4 +1,4 @@
-from .open_position import OpenPosition
+from .open_position import AsyncOpenPosition, OpenPosition
 from .perp import (
     get_perp_beacon,
     get_perp_bounds,
@@ -6,7 +6,12 @@ from .perp import (
     get_perp_mark,
     get_perp_tick_spacing,
 )
-from .perp_manager import create_perp, open_maker_position, open_taker_position
+from .perp_manager import (
+    create_perp,
+    open_maker_position,
+    open_taker_position,
+    quote_open_taker_position,
+)
 from .position import (
     calculate_entry_price,
     calculate_leverage,
@@ -28,6 +33,7 @@ from .position import (
 from .user import get_user_open_positions, get_user_usdc_balance, get_user_wallet_address
 
 __all__ = [
+    "AsyncOpenPosition",
     "OpenPosition",
     "get_perp_beacon",
     "get_perp_bounds",
@@ -37,6 +43,7 @@ __all__ = [
     "create_perp",
     "open_maker_position",
     "open_taker_position",
+    "quote_open_taker_position",
     "calculate_entry_price",
     "calculate_leverage",
     "calculate_liquidation_price",
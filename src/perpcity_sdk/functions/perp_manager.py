@@ -1,190 +1,353 @@
 from __future__ import annotations
 
 import math
-from typing import TYPE_CHECKING
-
-from ..types import CreatePerpParams, OpenMakerPositionParams, OpenTakerPositionParams
-from ..utils.approve import approve_usdc
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Any
+
+from ..metrics import entry_point
+from ..types import (
+    CreatePerpParams,
+    OpenMakerPositionParams,
+    OpenTakerPositionParams,
+    PerpCityDeployments,
+    PerpCreatedEvent,
+    PerpData,
+    PositionOpenedEvent,
+    TakerQuote,
+)
+from ..utils.approve import DEFAULT_CONFIRMATIONS, approve_usdc
 from ..utils.constants import NUMBER_1E6
 from ..utils.conversions import price_to_sqrt_price_x96, price_to_tick, scale_6_decimals
-from ..utils.errors import PerpCityError, with_error_handling
+from ..utils.errors import (
+    PerpCityError,
+    PipelinedTransactionError,
+    parse_contract_error,
+    with_error_handling,
+)
+from ..utils.events import PERP_MANAGER_EVENTS
+from ..utils.multicall import decode_revert_data
 from .open_position import OpenPosition
 
+# Gas limits for opens sent in a pipelined submission, where the open cannot be estimated
+# because its approval has not been mined yet. Both leave headroom over typical usage.
+OPEN_TAKER_GAS_LIMIT = 1_000_000
+OPEN_MAKER_GAS_LIMIT = 1_500_000
+
 if TYPE_CHECKING:
+    from ..async_context import AsyncPerpCityContext
     from ..context import PerpCityContext
 
 
-def create_perp(context: PerpCityContext, params: CreatePerpParams) -> str:
-    def _create() -> str:
-        sqrt_price_x96 = price_to_sqrt_price_x96(params.starting_price)
-        deployments = context.deployments()
-
-        fees_addr = params.fees or deployments.fees_module
-        margin_ratios_addr = params.margin_ratios or deployments.margin_ratios_module
-        lockup_period_addr = params.lockup_period or deployments.lockup_period_module
-        sqrt_price_impact_addr = (
-            params.sqrt_price_impact_limit or deployments.sqrt_price_impact_limit_module
+# Argument builders and receipt parsers shared with AsyncPerpCityContext
+
+
+def _create_perp_args(
+    deployments: PerpCityDeployments, params: CreatePerpParams
+) -> tuple[Any, ...]:
+    sqrt_price_x96 = price_to_sqrt_price_x96(params.starting_price)
+
+    fees_addr = params.fees or deployments.fees_module
+    margin_ratios_addr = params.margin_ratios or deployments.margin_ratios_module
+    lockup_period_addr = params.lockup_period or deployments.lockup_period_module
+    sqrt_price_impact_addr = (
+        params.sqrt_price_impact_limit or deployments.sqrt_price_impact_limit_module
+    )
+
+    if not all([fees_addr, margin_ratios_addr, lockup_period_addr, sqrt_price_impact_addr]):
+        raise PerpCityError(
+            "Module addresses must be provided either in params or deployment config"
         )
 
-        if not all([fees_addr, margin_ratios_addr, lockup_period_addr, sqrt_price_impact_addr]):
-            raise PerpCityError(
-                "Module addresses must be provided either in params or deployment config"
-            )
-
-        contract_params = (
-            params.beacon,
-            fees_addr,
-            margin_ratios_addr,
-            lockup_period_addr,
-            sqrt_price_impact_addr,
-            sqrt_price_x96,
+    return (
+        params.beacon,
+        fees_addr,
+        margin_ratios_addr,
+        lockup_period_addr,
+        sqrt_price_impact_addr,
+        sqrt_price_x96,
+    )
+
+
+def _find_perp_created(perp_manager: Any, receipt: dict[str, Any]) -> str:
+    events = PERP_MANAGER_EVENTS.decode_receipt(receipt, PerpCreatedEvent, perp_manager.address)
+    if not events:
+        raise PerpCityError("PerpCreated event not found in transaction receipt")
+    return events[0].perp_id
+
+
+def _validate_taker_params(params: OpenTakerPositionParams) -> None:
+    if params.margin <= 0:
+        raise PerpCityError("Margin must be greater than 0")
+    if params.leverage <= 0:
+        raise PerpCityError("Leverage must be greater than 0")
+
+
+def _taker_margin(margin: float, leverage: float) -> tuple[int, int]:
+    """Return the scaled margin and the margin ratio a taker open is sent with."""
+    return scale_6_decimals(margin), math.floor(NUMBER_1E6 / leverage)
+
+
+def _taker_contract_params(
+    holder: str, margin_scaled: int, margin_ratio: int, params: OpenTakerPositionParams
+) -> tuple[Any, ...]:
+    return (
+        holder,
+        params.is_long,
+        margin_scaled,
+        margin_ratio,
+        params.unspecified_amount_limit,
+    )
+
+
+def _taker_open_args(
+    holder: str,
+    perp_data: PerpData,
+    protocol_fee_raw: int,
+    params: OpenTakerPositionParams,
+) -> tuple[int, tuple[Any, ...]]:
+    """Return the USDC amount to approve (margin + fees) and the openTakerPos params."""
+    margin_scaled, margin_ratio = _taker_margin(params.margin, params.leverage)
+
+    creator_fee = perp_data.fees.creator_fee
+    insurance_fee = perp_data.fees.insurance_fee
+    lp_fee = perp_data.fees.lp_fee
+    protocol_fee_rate = int(protocol_fee_raw) / NUMBER_1E6
+
+    notional = (margin_scaled * NUMBER_1E6) // margin_ratio
+    total_fee_rate = creator_fee + insurance_fee + lp_fee + protocol_fee_rate
+    total_fees = math.ceil(int(notional) * total_fee_rate)
+
+    contract_params = _taker_contract_params(holder, margin_scaled, margin_ratio, params)
+    return margin_scaled + total_fees, contract_params
+
+
+def _validate_maker_params(params: OpenMakerPositionParams) -> None:
+    if params.margin <= 0:
+        raise PerpCityError("Margin must be greater than 0")
+    if params.price_lower >= params.price_upper:
+        raise PerpCityError("price_lower must be less than price_upper")
+
+
+def _maker_open_args(
+    holder: str, perp_data: PerpData, params: OpenMakerPositionParams
+) -> tuple[int, tuple[Any, ...]]:
+    """Return the USDC amount to approve (margin) and the openMakerPos params."""
+    margin_scaled = scale_6_decimals(params.margin)
+
+    tick_lower = price_to_tick(params.price_lower, True)
+    tick_upper = price_to_tick(params.price_upper, False)
+
+    tick_spacing = perp_data.tick_spacing
+    aligned_tick_lower = math.floor(tick_lower / tick_spacing) * tick_spacing
+    aligned_tick_upper = math.ceil(tick_upper / tick_spacing) * tick_spacing
+
+    contract_params = (
+        holder,
+        margin_scaled,
+        params.liquidity,
+        aligned_tick_lower,
+        aligned_tick_upper,
+        params.max_amt0_in,
+        params.max_amt1_in,
+    )
+    return margin_scaled, contract_params
+
+
+def _allowance_reads(context: PerpCityContext | AsyncPerpCityContext) -> list[Any]:
+    """The USDC allowance read to batch with the perp data, if the budget is not known yet."""
+    if context.allowances.synced:
+        return []
+    perp_manager = context.deployments().perp_manager
+    return [context._usdc.functions.allowance(context.account.address, perp_manager)]
+
+
+def _sync_allowance(
+    context: PerpCityContext | AsyncPerpCityContext, allowance: Sequence[Any]
+) -> None:
+    if allowance:
+        context.allowances.sync(allowance[0])
+
+
+def _pipelined_receipts(
+    results: dict[str, dict[str, Any] | PerpCityError],
+) -> dict[str, dict[str, Any]]:
+    """Return the receipts of a pipelined submission, or raise if any transaction failed."""
+    failures = {label: r for label, r in results.items() if isinstance(r, PerpCityError)}
+    if failures:
+        detail = "; ".join(f"{label}: {error}" for label, error in failures.items())
+        raise PipelinedTransactionError(
+            f"Pipelined submission failed. {detail}",
+            results,
+            cause=next(iter(failures.values())),
         )
+    return results  # type: ignore[return-value]
+
+
+def _find_opened_position_id(
+    perp_manager: Any, receipt: dict[str, Any], perp_id: str, is_maker: bool
+) -> int:
+    perp_id = perp_id.lower()
+    for event in PERP_MANAGER_EVENTS.decode_receipt(
+        receipt, PositionOpenedEvent, perp_manager.address
+    ):
+        if event.perp_id == perp_id and event.is_maker == is_maker:
+            return event.position_id
+
+    tx_hash = receipt["transactionHash"].hex()
+    raise PerpCityError(f"PositionOpened event not found in transaction receipt. Hash: {tx_hash}")
+
+
+# The approve is waited on as deep as approve_usdc waits, so the allowance budget is
+# recorded after the same number of confirmations with or without pipelining
+_PIPELINED_CONFIRMATIONS = {"approve": DEFAULT_CONFIRMATIONS, "open": 1}
+
+
+def _submit_open(
+    context: PerpCityContext,
+    approval: int,
+    contract_fn: Any,
+    gas_limit: int,
+    pipelined: bool,
+) -> dict[str, Any]:
+    """Approve USDC if the allowance budget requires it, send the open and return its receipt.
+
+    With ``pipelined`` set, a needed approve and the open are signed with consecutive
+    nonces and broadcast together instead of waiting for the approve receipt first. The
+    open then uses ``gas_limit``, since it cannot be estimated before the approval lands.
+    """
+    if not pipelined:
+        approve_usdc(context, approval)
+        try:
+            return context.execute_transaction(contract_fn)
+        except Exception:
+            # The reserved allowance may not have been spent
+            context.allowances.invalidate()
+            raise
+
+    target = context.allowances.reserve(approval)
+    if target is None:
+        try:
+            return context.execute_transaction(contract_fn)
+        except Exception:
+            context.allowances.invalidate()
+            raise
+
+    approve_fn = context._usdc.functions.approve(context.deployments().perp_manager, target)
+    try:
+        tx_hashes = {
+            "approve": context.send_transaction(approve_fn),
+            "open": context.send_transaction(contract_fn, gas=gas_limit),
+        }
+    except Exception:
+        context.allowances.invalidate()
+        raise
+
+    results: dict[str, dict[str, Any] | PerpCityError] = {}
+    for label, tx_hash in tx_hashes.items():
+        try:
+            results[label] = context.wait_for_transaction(tx_hash, _PIPELINED_CONFIRMATIONS[label])
+        except Exception as e:
+            results[label] = parse_contract_error(e)
+
+    try:
+        receipts = _pipelined_receipts(results)
+    except PipelinedTransactionError:
+        context.allowances.invalidate()
+        raise
+    context.allowances.approved(target, approval)
+    return receipts["open"]
+
+
+@entry_point("create_perp")
+def create_perp(context: PerpCityContext, params: CreatePerpParams) -> str:
+    def _create() -> str:
+        contract_params = _create_perp_args(context.deployments(), params)
 
         contract_fn = context._perp_manager.functions.createPerp(contract_params)
         receipt = context.execute_transaction(contract_fn)
 
-        for log in receipt.get("logs", []):
-            try:
-                event = context._perp_manager.events.PerpCreated().process_log(log)
-                perp_id = event["args"]["perpId"]
-                if isinstance(perp_id, bytes):
-                    return "0x" + perp_id.hex()
-                return str(perp_id)
-            except Exception:
-                continue
-
-        raise PerpCityError("PerpCreated event not found in transaction receipt")
+        return _find_perp_created(context._perp_manager, receipt)
 
     return with_error_handling(_create, "create_perp")
 
 
+@entry_point("open_taker_position")
 def open_taker_position(
     context: PerpCityContext,
     perp_id: str,
     params: OpenTakerPositionParams,
+    pipelined: bool = False,
 ) -> OpenPosition:
     def _open() -> OpenPosition:
-        if params.margin <= 0:
-            raise PerpCityError("Margin must be greater than 0")
-        if params.leverage <= 0:
-            raise PerpCityError("Leverage must be greater than 0")
-
-        margin_scaled = scale_6_decimals(params.margin)
-        margin_ratio = math.floor(NUMBER_1E6 / params.leverage)
-
-        # Calculate total approval: margin + fees
-        perp_data = context.get_perp_data(perp_id)
-        creator_fee = perp_data.fees.creator_fee
-        insurance_fee = perp_data.fees.insurance_fee
-        lp_fee = perp_data.fees.lp_fee
-
-        protocol_fee_raw = context._perp_manager.functions.protocolFee().call()
-        protocol_fee_rate = int(protocol_fee_raw) / NUMBER_1E6
-
-        notional = (margin_scaled * NUMBER_1E6) // margin_ratio
-        total_fee_rate = creator_fee + insurance_fee + lp_fee + protocol_fee_rate
-        total_fees = math.ceil(int(notional) * total_fee_rate)
-
-        approve_usdc(context, margin_scaled + total_fees)
-
-        contract_params = (
-            context.account.address,  # holder
-            params.is_long,
-            margin_scaled,
-            margin_ratio,
-            params.unspecified_amount_limit,
+        _validate_taker_params(params)
+
+        perp_data, (protocol_fee_raw, *allowance) = context._fetch_perp_data(
+            perp_id, [context._perp_manager.functions.protocolFee(), *_allowance_reads(context)]
+        )
+        _sync_allowance(context, allowance)
+        approval, contract_params = _taker_open_args(
+            context.account.address, perp_data, protocol_fee_raw, params
         )
 
         contract_fn = context._perp_manager.functions.openTakerPos(perp_id, contract_params)
-        receipt = context.execute_transaction(contract_fn)
+        receipt = _submit_open(context, approval, contract_fn, OPEN_TAKER_GAS_LIMIT, pipelined)
 
         tx_hash = receipt["transactionHash"].hex()
-
-        taker_pos_id: int | None = None
-        for log in receipt.get("logs", []):
-            try:
-                event = context._perp_manager.events.PositionOpened().process_log(log)
-                event_perp_id = event["args"]["perpId"]
-                event_perp_hex = (
-                    "0x" + event_perp_id.hex()
-                    if isinstance(event_perp_id, bytes)
-                    else str(event_perp_id)
-                )
-                if event_perp_hex.lower() == perp_id.lower() and not event["args"]["isMaker"]:
-                    taker_pos_id = int(event["args"]["posId"])
-                    break
-            except Exception:
-                continue
-
-        if taker_pos_id is None:
-            raise PerpCityError(
-                f"PositionOpened event not found in transaction receipt. Hash: {tx_hash}"
-            )
+        taker_pos_id = _find_opened_position_id(
+            context._perp_manager, receipt, perp_id, is_maker=False
+        )
 
         return OpenPosition(context, perp_id, taker_pos_id, params.is_long, False, tx_hash)
 
     return with_error_handling(_open, "open_taker_position")
 
 
+@entry_point("quote_open_taker_position")
+def quote_open_taker_position(
+    context: PerpCityContext, perp_id: str, params: OpenTakerPositionParams
+) -> TakerQuote:
+    """Quote a taker open with ``quoteOpenTakerPosition``, without sending it.
+
+    Use it as the final check of fills simulated with :class:`LiquidityBook`.
+    """
+
+    def _quote() -> TakerQuote:
+        _validate_taker_params(params)
+        margin_scaled, margin_ratio = _taker_margin(params.margin, params.leverage)
+        contract_params = _taker_contract_params(
+            context.account.address, margin_scaled, margin_ratio, params
+        )
+        reason, perp_delta, usd_delta = context._perp_manager.functions.quoteOpenTakerPosition(
+            perp_id, contract_params
+        ).call()
+        if reason:
+            raise decode_revert_data(bytes(reason))
+        return TakerQuote(perp_delta=int(perp_delta), usd_delta=int(usd_delta))
+
+    return with_error_handling(_quote, "quote_open_taker_position")
+
+
+@entry_point("open_maker_position")
 def open_maker_position(
     context: PerpCityContext,
     perp_id: str,
     params: OpenMakerPositionParams,
+    pipelined: bool = False,
 ) -> OpenPosition:
     def _open() -> OpenPosition:
-        if params.margin <= 0:
-            raise PerpCityError("Margin must be greater than 0")
-        if params.price_lower >= params.price_upper:
-            raise PerpCityError("price_lower must be less than price_upper")
-
-        margin_scaled = scale_6_decimals(params.margin)
-
-        approve_usdc(context, margin_scaled)
-
-        perp_data = context.get_perp_data(perp_id)
+        _validate_maker_params(params)
 
-        tick_lower = price_to_tick(params.price_lower, True)
-        tick_upper = price_to_tick(params.price_upper, False)
-
-        tick_spacing = perp_data.tick_spacing
-        aligned_tick_lower = math.floor(tick_lower / tick_spacing) * tick_spacing
-        aligned_tick_upper = math.ceil(tick_upper / tick_spacing) * tick_spacing
-
-        contract_params = (
-            context.account.address,  # holder
-            margin_scaled,
-            params.liquidity,
-            aligned_tick_lower,
-            aligned_tick_upper,
-            params.max_amt0_in,
-            params.max_amt1_in,
-        )
+        perp_data, allowance = context._fetch_perp_data(perp_id, _allowance_reads(context))
+        _sync_allowance(context, allowance)
+        approval, contract_params = _maker_open_args(context.account.address, perp_data, params)
 
         contract_fn = context._perp_manager.functions.openMakerPos(perp_id, contract_params)
-        receipt = context.execute_transaction(contract_fn)
+        receipt = _submit_open(context, approval, contract_fn, OPEN_MAKER_GAS_LIMIT, pipelined)
 
         tx_hash = receipt["transactionHash"].hex()
-
-        maker_pos_id: int | None = None
-        for log in receipt.get("logs", []):
-            try:
-                event = context._perp_manager.events.PositionOpened().process_log(log)
-                event_perp_id = event["args"]["perpId"]
-                event_perp_hex = (
-                    "0x" + event_perp_id.hex()
-                    if isinstance(event_perp_id, bytes)
-                    else str(event_perp_id)
-                )
-                if event_perp_hex.lower() == perp_id.lower() and event["args"]["isMaker"]:
-                    maker_pos_id = int(event["args"]["posId"])
-                    break
-            except Exception:
-                continue
-
-        if maker_pos_id is None:
-            raise PerpCityError(
-                f"PositionOpened event not found in transaction receipt. Hash: {tx_hash}"
-            )
+        maker_pos_id = _find_opened_position_id(
+            context._perp_manager, receipt, perp_id, is_maker=True
+        )
 
         return OpenPosition(context, perp_id, maker_pos_id, None, True, tx_hash)
 
@@ -1,17 +1,20 @@
 from __future__ import annotations
 
 import math
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
+from ..metrics import entry_point
 from ..types import (
     ClosePositionParams,
     ClosePositionResult,
     LiveDetails,
     OpenPositionData,
+    PositionOpenedEvent,
     PositionRawData,
 )
 from ..utils.conversions import scale_6_decimals
 from ..utils.errors import with_error_handling
+from ..utils.events import PERP_MANAGER_EVENTS
 
 if TYPE_CHECKING:
     from ..context import PerpCityContext
@@ -59,6 +62,29 @@ def get_position_is_liquidatable(position_data: OpenPositionData) -> bool:
 # Functions that require context
 
 
+def _close_contract_params(position_id: int, params: ClosePositionParams) -> dict[str, int]:
+    return {
+        "posId": position_id,
+        "minAmt0Out": scale_6_decimals(params.min_amt0_out),
+        "minAmt1Out": scale_6_decimals(params.min_amt1_out),
+        "maxAmt1In": scale_6_decimals(params.max_amt1_in),
+    }
+
+
+def _find_reopened_position_id(
+    perp_manager: Any, receipt: dict[str, Any], perp_id: str, position_id: int
+) -> int | None:
+    # A partial close opens a new position for the remainder
+    perp_id = perp_id.lower()
+    for event in PERP_MANAGER_EVENTS.decode_receipt(
+        receipt, PositionOpenedEvent, perp_manager.address
+    ):
+        if event.perp_id == perp_id and event.position_id != position_id:
+            return event.position_id
+    return None
+
+
+@entry_point("close_position")
 def close_position(
     context: PerpCityContext,
     perp_id: str,
@@ -66,35 +92,16 @@ def close_position(
     params: ClosePositionParams,
 ) -> ClosePositionResult:
     def _close() -> ClosePositionResult:
-        contract_params = {
-            "posId": position_id,
-            "minAmt0Out": scale_6_decimals(params.min_amt0_out),
-            "minAmt1Out": scale_6_decimals(params.min_amt1_out),
-            "maxAmt1In": scale_6_decimals(params.max_amt1_in),
-        }
+        contract_params = _close_contract_params(position_id, params)
 
         contract_fn = context._perp_manager.functions.closePosition(contract_params)
         receipt = context.execute_transaction(contract_fn, gas=500000)
 
         tx_hash = receipt["transactionHash"].hex()
 
-        # Look for PositionOpened event (partial close creates new position)
-        new_position_id: int | None = None
-        for log in receipt.get("logs", []):
-            try:
-                events = context._perp_manager.events.PositionOpened().process_log(log)
-                event_perp_id = events["args"]["perpId"]
-                event_pos_id = events["args"]["posId"]
-                event_perp_hex = (
-                    "0x" + event_perp_id.hex()
-                    if isinstance(event_perp_id, bytes)
-                    else str(event_perp_id)
-                )
-                if event_perp_hex.lower() == perp_id.lower() and event_pos_id != position_id:
-                    new_position_id = int(event_pos_id)
-                    break
-            except Exception:
-                continue
+        new_position_id = _find_reopened_position_id(
+            context._perp_manager, receipt, perp_id, position_id
+        )
 
         if new_position_id is None:
             return ClosePositionResult(position=None, tx_hash=tx_hash)
@@ -112,6 +119,7 @@ def close_position(
     return with_error_handling(_close, f"close_position for position {position_id}")
 
 
+@entry_point("get_position_live_details_from_contract")
 def get_position_live_details_from_contract(
     context: PerpCityContext, perp_id: str, position_id: int
 ) -> LiveDetails:
@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+from .metrics import entry_point
+from .types import (
+    IndexedPerp,
+    IndexedPosition,
+    MarginAdjustedEvent,
+    NotionalAdjustedEvent,
+    PerpCreatedEvent,
+    PositionClosedEvent,
+    PositionOpenedEvent,
+    TransferEvent,
+)
+from .utils.events import PERP_MANAGER_EVENTS
+from .utils.logs import DEFAULT_BLOCK_RANGE, MAX_BLOCK_RANGE, iter_log_chunks
+
+if TYPE_CHECKING:
+    from .context import PerpCityContext
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+# Indexed events are stored permanently, so only blocks this deep are indexed by default
+DEFAULT_INDEX_CONFIRMATIONS = 12
+
+INDEXED_EVENTS = (
+    PerpCreatedEvent,
+    PositionOpenedEvent,
+    PositionClosedEvent,
+    MarginAdjustedEvent,
+    NotionalAdjustedEvent,
+    TransferEvent,
+)
+
+# uint256/int256 values do not fit SQLite's 64-bit INTEGER and are stored as TEXT
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    address TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS perps (
+    perp_id TEXT PRIMARY KEY,
+    beacon TEXT NOT NULL,
+    sqrt_price_x96 TEXT NOT NULL,
+    index_price_x96 TEXT NOT NULL,
+    created_block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    position_id INTEGER PRIMARY KEY,
+    perp_id TEXT,
+    owner TEXT,
+    is_maker INTEGER,
+    is_long INTEGER,
+    tick_lower INTEGER,
+    tick_upper INTEGER,
+    opened_block INTEGER,
+    closed_block INTEGER,
+    was_liquidated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS positions_owner ON positions (owner, closed_block);
+CREATE INDEX IF NOT EXISTS positions_perp ON positions (perp_id, closed_block);
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    perp_id TEXT,
+    position_id INTEGER,
+    sqrt_price_x96 TEXT,
+    long_oi TEXT,
+    short_oi TEXT,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_position ON events (position_id);
+CREATE INDEX IF NOT EXISTS events_perp ON events (perp_id, block_number);
+"""
+
+_UPSERT_OPENED = """
+INSERT INTO positions (
+    position_id, perp_id, is_maker, is_long, tick_lower, tick_upper, opened_block
+) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (position_id) DO UPDATE SET
+    perp_id = excluded.perp_id,
+    is_maker = excluded.is_maker,
+    is_long = excluded.is_long,
+    tick_lower = excluded.tick_lower,
+    tick_upper = excluded.tick_upper,
+    opened_block = excluded.opened_block
+"""
+
+_UPSERT_OWNER = """
+INSERT INTO positions (position_id, owner) VALUES (?, ?)
+ON CONFLICT (position_id) DO UPDATE SET owner = excluded.owner
+"""
+
+_POSITION_COLUMNS = (
+    "position_id, perp_id, owner, is_maker, is_long, tick_lower, tick_upper, "
+    "opened_block, closed_block, was_liquidated"
+)
+
+
+def _position_from_row(row: tuple[Any, ...]) -> IndexedPosition:
+    return IndexedPosition(
+        position_id=row[0],
+        perp_id=row[1],
+        owner=row[2],
+        is_maker=bool(row[3]),
+        is_long=None if row[4] is None else bool(row[4]),
+        tick_lower=row[5],
+        tick_upper=row[6],
+        opened_block=row[7],
+        closed_block=row[8],
+        was_liquidated=bool(row[9]),
+    )
+
+
+class PerpCityIndexer:
+    """Indexes PerpManager events into a local SQLite database.
+
+    :meth:`sync` pulls ``PerpCreated``, ``PositionOpened``, ``PositionClosed``,
+    ``MarginAdjusted``, ``NotionalAdjusted`` and the position NFT ``Transfer`` logs with
+    chunked ``eth_getLogs`` requests, and commits each chunk together with its checkpoint,
+    so an interrupted sync resumes where it stopped. Stored events are not rolled back on
+    a reorg, so blocks are only indexed once ``confirmations`` deep. Queries such as
+    "open positions of an owner" or "all perps" then run against the local tables::
+
+        with PerpCityIndexer(ctx, "perpcity.db") as indexer:  # from the deployment block
+            indexer.sync()
+            positions = indexer.open_positions(owner=ctx.account.address)
+    """
+
+    def __init__(
+        self,
+        context: PerpCityContext,
+        db_path: str | Path = ":memory:",
+        start_block: int | None = None,
+        block_range: int = DEFAULT_BLOCK_RANGE,
+        max_block_range: int = MAX_BLOCK_RANGE,
+        confirmations: int = DEFAULT_INDEX_CONFIRMATIONS,
+    ) -> None:
+        self._context = context
+        self._address = context.deployments().perp_manager
+        self._start_block = (
+            context.deployments().deployment_block if start_block is None else start_block
+        )
+        self._block_range = block_range
+        self._max_block_range = max_block_range
+        self._confirmations = confirmations
+        self._db = sqlite3.connect(str(db_path))
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> PerpCityIndexer:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def checkpoint(self) -> int | None:
+        """The last block that has been fully indexed, or ``None`` before the first sync."""
+        row = self._db.execute(
+            "SELECT block_number FROM checkpoints WHERE address = ?", (self._address.lower(),)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    @entry_point("index_sync", context=lambda indexer: indexer._context)
+    def sync(self, to_block: int | None = None) -> int:
+        """Index new blocks up to ``to_block`` and return the number of events stored.
+
+        By default this indexes up to the latest block with ``confirmations``
+        confirmations.
+        """
+        if to_block is None:
+            to_block = self._context.w3.eth.block_number - self._confirmations + 1
+
+        checkpoint = self.checkpoint
+        from_block = self._start_block if checkpoint is None else checkpoint + 1
+        topics = [[PERP_MANAGER_EVENTS.topic(record) for record in INDEXED_EVENTS]]
+
+        stored = 0
+        for _, end, logs in iter_log_chunks(
+            self._context.w3,
+            self._address,
+            topics,
+            from_block,
+            to_block,
+            self._block_range,
+            self._max_block_range,
+        ):
+            events = PERP_MANAGER_EVENTS.decode_logs(logs, address=self._address)
+            with self._db:
+                for event in events:
+                    self._apply(event)
+                self._db.execute(
+                    "INSERT INTO checkpoints (address, block_number) VALUES (?, ?) "
+                    "ON CONFLICT (address) DO UPDATE SET block_number = excluded.block_number",
+                    (self._address.lower(), end),
+                )
+            stored += len(events)
+        return stored
+
+    def _apply(self, event: Any) -> None:
+        db = self._db
+        if isinstance(event, TransferEvent):
+            owner = None if event.to_address == ZERO_ADDRESS else event.to_address
+            db.execute(_UPSERT_OWNER, (event.token_id, owner))
+            return
+
+        if isinstance(event, PerpCreatedEvent):
+            db.execute(
+                "INSERT OR IGNORE INTO perps VALUES (?, ?, ?, ?, ?)",
+                (
+                    event.perp_id,
+                    event.beacon,
+                    str(event.sqrt_price_x96),
+                    str(event.index_price_x96),
+                    event.block_number,
+                ),
+            )
+        elif isinstance(event, PositionOpenedEvent):
+            db.execute(
+                _UPSERT_OPENED,
+                (
+                    event.position_id,
+                    event.perp_id,
+                    event.is_maker,
+                    None if event.is_maker else event.perp_delta > 0,
+                    event.tick_lower if event.is_maker else None,
+                    event.tick_upper if event.is_maker else None,
+                    event.block_number,
+                ),
+            )
+        elif isinstance(event, NotionalAdjustedEvent):
+            # A taker adjusted through zero has switched sides
+            if event.new_perp_delta != 0:
+                db.execute(
+                    "UPDATE positions SET is_long = ? WHERE position_id = ? AND is_maker = 0",
+                    (event.new_perp_delta > 0, event.position_id),
+                )
+        elif isinstance(event, PositionClosedEvent):
+            db.execute(
+                "UPDATE positions SET closed_block = ?, was_liquidated = ? WHERE position_id = ?",
+                (event.block_number, event.was_liquidated, event.position_id),
+            )
+
+        db.execute(
+            "INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                event.block_number,
+                event.log_index,
+                event.transaction_hash,
+                type(event).__name__.removesuffix("Event"),
+                event.perp_id,
+                getattr(event, "position_id", None),
+                _text(getattr(event, "sqrt_price_x96", None)),
+                _text(getattr(event, "long_oi", None)),
+                _text(getattr(event, "short_oi", None)),
+            ),
+        )
+
+    # Queries
+
+    def perps(self) -> list[IndexedPerp]:
+        rows = self._db.execute(
+            "SELECT perp_id, beacon, created_block FROM perps ORDER BY created_block"
+        )
+        return [IndexedPerp(*row) for row in rows]
+
+    def open_positions(
+        self, owner: str | None = None, perp_id: str | None = None
+    ) -> list[IndexedPosition]:
+        query = (
+            f"SELECT {_POSITION_COLUMNS} FROM positions "
+            "WHERE closed_block IS NULL AND perp_id IS NOT NULL"
+        )
+        params: list[Any] = []
+        if owner is not None:
+            query += " AND owner = ?"
+            params.append(self._context.w3.to_checksum_address(owner))
+        if perp_id is not None:
+            query += " AND perp_id = ?"
+            params.append(perp_id.lower())
+        rows = self._db.execute(query + " ORDER BY position_id", params)
+        return [_position_from_row(row) for row in rows]
+
+    def closed_position_ids(self) -> set[int]:
+        rows = self._db.execute("SELECT position_id FROM positions WHERE closed_block IS NOT NULL")
+        return {row[0] for row in rows}
+
+    def position(self, position_id: int) -> IndexedPosition | None:
+        row = self._db.execute(
+            f"SELECT {_POSITION_COLUMNS} FROM positions "
+            "WHERE position_id = ? AND perp_id IS NOT NULL",
+            (position_id,),
+        ).fetchone()
+        return None if row is None else _position_from_row(row)
+
+
+def _text(value: int | None) -> str | None:
+    return None if value is None else str(value)
@@ -0,0 +1,519 @@
+"""Request counts, errors and latency histograms for a context's RPC traffic.
+
+Pass a :class:`PerpCityMetrics` as ``metrics=`` to :class:`PerpCityContext` or
+:class:`AsyncPerpCityContext` and it observes three families of series:
+
+- every JSON-RPC request, by method (``eth_call``, ``eth_estimateGas``, ...);
+- every contract function those requests carry, by function and method, decoded from
+  the calldata, so ``cfgs`` read inside a Multicall3 ``aggregate3`` or an
+  ``openTakerPos`` gas estimate show up under their own names;
+- every SDK entry point (``get_perp_data``, ``open_taker_position``, ...), with the
+  requests issued while it ran, by method.
+
+:meth:`PerpCityMetrics.snapshot` returns the current values and
+:meth:`PerpCityMetrics.export` hands one to each exporter, e.g. :class:`InMemoryExporter`
+or :class:`PrometheusExporter` for the Prometheus text format::
+
+    metrics = PerpCityMetrics()
+    ctx = PerpCityContext(rpc_url, private_key, pm, usdc, metrics=metrics)
+    ctx.get_perp_data(perp_id)
+    print(prometheus_text(metrics.snapshot()))
+
+Without ``metrics`` no middleware is installed and entry points only check
+``ctx.metrics is None``.
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterable, Sequence
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ParamSpec, Protocol, TypeVar, cast
+
+import rlp  # type: ignore[import-untyped]
+from hexbytes import HexBytes
+from web3.middleware.base import Web3Middleware
+
+from .abis.selectors import (
+    BEACON_SELECTORS,
+    ERC20_SELECTORS,
+    FEES_SELECTORS,
+    MARGIN_RATIOS_SELECTORS,
+    MULTICALL3_SELECTORS,
+    PERP_MANAGER_SELECTORS,
+)
+
+if TYPE_CHECKING:
+    from web3 import AsyncWeb3, Web3
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+#: Upper bounds in seconds of the latency histogram buckets, as Prometheus' defaults
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+#: Name the metrics middleware is installed under
+METRICS_MIDDLEWARE = "metrics"
+
+_FUNCTION_NAMES = {
+    selector: signature.partition("(")[0]
+    for table in (
+        BEACON_SELECTORS,
+        ERC20_SELECTORS,
+        FEES_SELECTORS,
+        MARGIN_RATIOS_SELECTORS,
+        MULTICALL3_SELECTORS,
+        PERP_MANAGER_SELECTORS,
+    )
+    for signature, selector in table.items()
+}
+_AGGREGATE3 = MULTICALL3_SELECTORS["aggregate3((address,bool,bytes)[])"]
+_CALL_METHODS = frozenset({"eth_call", "eth_estimateGas"})
+# Position of the calldata in the RLP list of legacy, EIP-2930 and EIP-1559 transactions
+_TX_DATA_INDEX = {None: 5, 1: 6, 2: 7}
+
+# Entry point the running code was called through; None outside of one
+_entry_point: ContextVar[str | None] = ContextVar("perpcity_entry_point", default=None)
+
+
+# Series
+
+
+class _Series:
+    __slots__ = ("count", "errors", "total", "buckets")
+
+    def __init__(self, size: int) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * size
+
+    def observe(self, bounds: Sequence[float], seconds: float, error: bool) -> None:
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        index = bisect_left(bounds, seconds)
+        if index < len(bounds):
+            self.buckets[index] += 1
+
+    def snapshot(self) -> SeriesSnapshot:
+        cumulative = []
+        running = 0
+        for count in self.buckets:
+            running += count
+            cumulative.append(running)
+        return SeriesSnapshot(self.count, self.errors, self.total, tuple(cumulative))
+
+
+@dataclass(frozen=True, slots=True)
+class SeriesSnapshot:
+    """Observations of one series.
+
+    ``bucket_counts[i]`` counts observations of at most ``buckets[i]`` seconds of the
+    snapshot, cumulatively as in Prometheus; ``count`` is the ``+Inf`` bucket.
+    """
+
+    count: int
+    errors: int
+    total_seconds: float
+    bucket_counts: tuple[int, ...]
+
+    @property
+    def mean_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class MetricsSnapshot:
+    """Values of every series at one point in time.
+
+    ``contract_functions`` is keyed by ``(function, rpc_method)`` and
+    ``entry_point_requests`` by ``(entry_point, rpc_method)``.
+    """
+
+    buckets: tuple[float, ...]
+    rpc_methods: dict[str, SeriesSnapshot]
+    contract_functions: dict[tuple[str, str], SeriesSnapshot]
+    entry_points: dict[str, SeriesSnapshot]
+    entry_point_requests: dict[tuple[str, str], int]
+
+
+# Exporters
+
+
+class MetricsExporter(Protocol):
+    def export(self, snapshot: MetricsSnapshot) -> None: ...
+
+
+class InMemoryExporter:
+    """Keeps the last ``keep`` exported snapshots, newest last."""
+
+    def __init__(self, keep: int = 1) -> None:
+        if keep <= 0:
+            raise ValueError(f"Invalid snapshot count: {keep} must be positive")
+        self.snapshots: deque[MetricsSnapshot] = deque(maxlen=keep)
+
+    @property
+    def latest(self) -> MetricsSnapshot | None:
+        return self.snapshots[-1] if self.snapshots else None
+
+    def export(self, snapshot: MetricsSnapshot) -> None:
+        self.snapshots.append(snapshot)
+
+
+def _labels(names: Sequence[str], key: Any, **extra: str) -> str:
+    values = key if isinstance(key, tuple) else (key,)
+    pairs = [*zip(names, values, strict=True), *extra.items()]
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+# (name prefix, snapshot field, label names, help text subject) of each series family
+_FAMILIES = (
+    ("rpc_request", "rpc_methods", ("method",), "JSON-RPC requests by method"),
+    (
+        "contract_call",
+        "contract_functions",
+        ("function", "method"),
+        "contract function calls by function and JSON-RPC method",
+    ),
+    ("entry_point_call", "entry_points", ("entry_point",), "SDK entry point calls"),
+)
+
+
+def prometheus_text(snapshot: MetricsSnapshot, namespace: str = "perpcity") -> str:
+    """``snapshot`` in the Prometheus text exposition format (version 0.0.4).
+
+    Each family has a ``<prefix>s_total`` and a ``<prefix>_errors_total`` counter and a
+    ``<prefix>_duration_seconds`` histogram; contract call latency is that of the request
+    carrying the call. ``entry_point_rpc_requests_total`` counts the requests of each
+    entry point by method.
+    """
+    lines: list[str] = []
+
+    def family(name: str, kind: str, help_text: str) -> str:
+        lines.append(f"# HELP {namespace}_{name} {help_text}")
+        lines.append(f"# TYPE {namespace}_{name} {kind}")
+        return f"{namespace}_{name}"
+
+    bounds = [repr(float(bound)) for bound in snapshot.buckets]
+    for prefix, field, names, subject in _FAMILIES:
+        series = sorted(getattr(snapshot, field).items())
+        name = family(f"{prefix}s_total", "counter", f"Number of {subject}.")
+        lines += [f"{name}{_labels(names, key)} {values.count}" for key, values in series]
+        name = family(f"{prefix}_errors_total", "counter", f"Number of {subject} that failed.")
+        lines += [f"{name}{_labels(names, key)} {values.errors}" for key, values in series]
+        name = family(f"{prefix}_duration_seconds", "histogram", f"Latency of {subject}.")
+        for key, values in series:
+            for bound, count in zip(bounds, values.bucket_counts, strict=True):
+                lines.append(f"{name}_bucket{_labels(names, key, le=bound)} {count}")
+            lines.append(f"{name}_bucket{_labels(names, key, le='+Inf')} {values.count}")
+            lines.append(f"{name}_sum{_labels(names, key)} {values.total_seconds!r}")
+            lines.append(f"{name}_count{_labels(names, key)} {values.count}")
+
+    name = family(
+        "entry_point_rpc_requests_total",
+        "counter",
+        "Number of JSON-RPC requests issued by SDK entry points by method.",
+    )
+    for key, count in sorted(snapshot.entry_point_requests.items()):
+        lines.append(f"{name}{_labels(('entry_point', 'method'), key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """Renders snapshots in the Prometheus text format.
+
+    The latest rendering is kept in :attr:`text`. With ``path`` it is also written
+    there, replacing the file atomically, for node_exporter's textfile collector.
+    """
+
+    def __init__(self, path: str | Path | None = None, namespace: str = "perpcity") -> None:
+        self.path = Path(path) if path is not None else None
+        self.namespace = namespace
+        self.text = ""
+
+    def export(self, snapshot: MetricsSnapshot) -> None:
+        self.text = prometheus_text(snapshot, self.namespace)
+        if self.path is not None:
+            partial = self.path.with_name(self.path.name + ".tmp")
+            partial.write_text(self.text)
+            os.replace(partial, self.path)
+
+
+# Calldata decoding
+
+
+def _function_names(data: bytes) -> list[str]:
+    """Contract functions a call's calldata invokes; the calls of an ``aggregate3`` too."""
+    name = _FUNCTION_NAMES.get(data[:4])
+    if name is None:
+        return []
+    if data[:4] != _AGGREGATE3:
+        return [name]
+    names = [name]
+    try:
+        # aggregate3((address,bool,bytes)[]): array offset, length, then offsets of
+        # each (target, allowFailure, callData) relative to the first offset
+        elements = data[4 + 64 :]
+        for i in range(int.from_bytes(data[36:68], "big")):
+            start = int.from_bytes(elements[32 * i : 32 * i + 32], "big")
+            inner = _FUNCTION_NAMES.get(elements[start + 128 : start + 132])
+            if inner is not None:
+                names.append(inner)
+    except (IndexError, ValueError):
+        pass
+    return names
+
+
+def _transaction_data(raw: bytes) -> bytes:
+    """Calldata of a signed raw transaction, or ``b""`` if it cannot be decoded."""
+    try:
+        if raw[0] >= 0xC0:
+            return bytes(rlp.decode(raw)[_TX_DATA_INDEX[None]])
+        return bytes(rlp.decode(raw[1:])[_TX_DATA_INDEX[raw[0]]])
+    except (IndexError, KeyError, rlp.DecodingError):
+        return b""
+
+
+def _request_functions(method: str, params: Any) -> list[str]:
+    try:
+        if method in _CALL_METHODS:
+            transaction = params[0]
+            data = transaction.get("data", transaction.get("input")) or b""
+        elif method == "eth_sendRawTransaction":
+            data = _transaction_data(bytes(HexBytes(params[0])))
+        else:
+            return []
+        return _function_names(bytes(HexBytes(data)))
+    except (IndexError, TypeError, AttributeError, ValueError):
+        return []
+
+
+def _failed(response: Any) -> bool:
+    return not isinstance(response, dict) or "error" in response
+
+
+# Registry
+
+
+class PerpCityMetrics:
+    """Thread-safe registry of the RPC, contract function and entry point series.
+
+    ``buckets`` are the upper bounds in seconds of the latency histograms. Set
+    ``enabled`` to ``False`` to stop observing without uninstalling anything.
+    """
+
+    def __init__(
+        self,
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS,
+        exporters: Iterable[MetricsExporter] = (),
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.exporters = list(exporters)
+        self.enabled = True
+        self._rpc: dict[str, _Series] = {}
+        self._contract: dict[tuple[str, str], _Series] = {}
+        self._entry: dict[str, _Series] = {}
+        self._entry_requests: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _series(self, table: dict[Any, _Series], key: Any) -> _Series:
+        series = table.get(key)
+        if series is None:
+            series = table[key] = _Series(len(self.buckets))
+        return series
+
+    def observe_request(self, method: str, params: Any, seconds: float, error: bool) -> None:
+        """Record one JSON-RPC request and the contract functions it carries."""
+        if not self.enabled:
+            return
+        functions = _request_functions(method, params)
+        entry = _entry_point.get()
+        with self._lock:
+            self._series(self._rpc, method).observe(self.buckets, seconds, error)
+            for function in functions:
+                self._series(self._contract, (function, method)).observe(
+                    self.buckets, seconds, error
+                )
+            if entry is not None:
+                key = (entry, method)
+                self._entry_requests[key] = self._entry_requests.get(key, 0) + 1
+
+    def observe_entry_point(self, name: str, seconds: float, error: bool) -> None:
+        """Record one call of an SDK entry point."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._series(self._entry, name).observe(self.buckets, seconds, error)
+
+    def snapshot(self) -> MetricsSnapshot:
+        with self._lock:
+            return MetricsSnapshot(
+                buckets=self.buckets,
+                rpc_methods={key: s.snapshot() for key, s in self._rpc.items()},
+                contract_functions={key: s.snapshot() for key, s in self._contract.items()},
+                entry_points={key: s.snapshot() for key, s in self._entry.items()},
+                entry_point_requests=dict(self._entry_requests),
+            )
+
+    def export(self) -> MetricsSnapshot:
+        """Hand a fresh snapshot to every exporter and return it."""
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            exporter.export(snapshot)
+        return snapshot
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rpc.clear()
+            self._contract.clear()
+            self._entry.clear()
+            self._entry_requests.clear()
+
+    def install(self, w3: Web3 | AsyncWeb3[Any]) -> None:
+        """Observe the requests of ``w3``; contexts call this for their ``metrics``."""
+        # Layer 0 is the innermost, so latency is the provider's own. web3 types middleware
+        # as classes, but any callable building one from ``w3`` is accepted.
+        w3.middleware_onion.inject(
+            lambda w3: _MetricsMiddleware(w3, self),  # type: ignore[arg-type]
+            name=METRICS_MIDDLEWARE,
+            layer=0,
+        )
+
+
+class _MetricsMiddleware(Web3Middleware):
+    def __init__(self, w3: Web3 | AsyncWeb3[Any], metrics: PerpCityMetrics) -> None:
+        super().__init__(w3)
+        self.metrics = metrics
+
+    def _observe_batch(
+        self, requests_info: list[tuple[Any, Any]], response: Any, seconds: float
+    ) -> None:
+        responses = response if isinstance(response, list) else [response] * len(requests_info)
+        for (method, params), item in zip(requests_info, responses, strict=False):
+            self.metrics.observe_request(method, params, seconds, _failed(item))
+
+    def wrap_make_request(self, make_request: Any) -> Any:
+        def middleware(method: Any, params: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                response = make_request(method, params)
+            except Exception:
+                self.metrics.observe_request(method, params, time.perf_counter() - start, True)
+                raise
+            self.metrics.observe_request(
+                method, params, time.perf_counter() - start, _failed(response)
+            )
+            return response
+
+        return middleware
+
+    def wrap_make_batch_request(self, make_batch_request: Any) -> Any:
+        def middleware(requests_info: list[tuple[Any, Any]]) -> Any:
+            start = time.perf_counter()
+            try:
+                response = make_batch_request(requests_info)
+            except Exception:
+                self._observe_batch(requests_info, None, time.perf_counter() - start)
+                raise
+            self._observe_batch(requests_info, response, time.perf_counter() - start)
+            return response
+
+        return middleware
+
+    async def async_wrap_make_request(self, make_request: Any) -> Any:
+        async def middleware(method: Any, params: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                response = await make_request(method, params)
+            except Exception:
+                self.metrics.observe_request(method, params, time.perf_counter() - start, True)
+                raise
+            self.metrics.observe_request(
+                method, params, time.perf_counter() - start, _failed(response)
+            )
+            return response
+
+        return middleware
+
+    async def async_wrap_make_batch_request(self, make_batch_request: Any) -> Any:
+        async def middleware(requests_info: list[tuple[Any, Any]]) -> Any:
+            start = time.perf_counter()
+            try:
+                response = await make_batch_request(requests_info)
+            except Exception:
+                self._observe_batch(requests_info, None, time.perf_counter() - start)
+                raise
+            self._observe_batch(requests_info, response, time.perf_counter() - start)
+            return response
+
+        return middleware
+
+
+# Entry points
+
+
+def entry_point(
+    name: str, context: Callable[[Any], Any] | None = None
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Observe calls of the decorated SDK function as entry point ``name``.
+
+    The context is the first argument, or ``context(first_argument)``. Calls made while
+    another entry point runs, e.g. the ``get_perp_data`` inside an open, are not
+    observed separately; their requests count towards the outer entry point.
+    """
+
+    def decorate(fn: Callable[P, R]) -> Callable[P, R]:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> Any:
+                owner = args[0] if context is None else context(args[0])
+                metrics = getattr(owner, "metrics", None)
+                if metrics is None or _entry_point.get() is not None:
+                    return await fn(*args, **kwargs)
+                token = _entry_point.set(name)
+                start = time.perf_counter()
+                failed = True
+                try:
+                    result = await fn(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    _entry_point.reset(token)
+                    metrics.observe_entry_point(name, time.perf_counter() - start, failed)
+
+            # Calling the wrapper returns the same awaitable type as calling ``fn``
+            return cast("Callable[P, R]", async_wrapper)
+
+        @functools.wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            owner = args[0] if context is None else context(args[0])
+            metrics = getattr(owner, "metrics", None)
+            if metrics is None or _entry_point.get() is not None:
+                return fn(*args, **kwargs)
+            token = _entry_point.set(name)
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                _entry_point.reset(token)
+                metrics.observe_entry_point(name, time.perf_counter() - start, failed)
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import contextvars
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+from eth_abi.abi import decode as abi_decode
+from eth_utils.abi import get_abi_output_types
+
+from . import abis
+from .abis.selectors import PERP_MANAGER_SELECTORS
+from .context import _parse_discovered_position, _parse_live_details
+from .metrics import entry_point
+from .types import LiquidatablePosition
+from .utils.errors import PerpCityError, with_error_handling
+from .utils.multicall import aggregate3, aggregate3_encoded
+
+if TYPE_CHECKING:
+    from web3.contract.contract import ContractFunction
+
+    from .context import PerpCityContext
+    from .indexer import PerpCityIndexer
+
+DEFAULT_SCAN_BATCH_SIZE = 200
+DEFAULT_SCAN_WORKERS = 8
+
+_POSITIONS_SELECTOR = PERP_MANAGER_SELECTORS["positions(uint256)"]
+_QUOTE_CLOSE_SELECTOR = PERP_MANAGER_SELECTORS["quoteClosePosition(uint256)"]
+_ZERO_WORD = bytes(32)
+
+
+@cache
+def _output_types(name: str) -> list[str]:
+    (entry,) = (
+        e for e in abis.PERP_MANAGER_ABI if e.get("type") == "function" and e["name"] == name
+    )
+    return get_abi_output_types(entry)
+
+
+class LiquidationScanner:
+    """Finds every liquidatable position of the perp manager.
+
+    :meth:`scan` walks position ids ``1`` to ``nextPosId() - 1`` in batches of
+    ``batch_size`` ids. Each batch is one ``aggregate3`` eth_call holding ``positions()``
+    and ``quoteClosePosition`` for every id, and up to ``max_workers`` batches are in
+    flight at once. All batches read the same block. Calldata is encoded and return
+    data decoded directly with eth_abi, and only for ids that turn out closed or
+    liquidated; web3's contract function machinery would cost more per id than the
+    round trip.
+
+    Ids found closed are remembered and skipped by later scans, as are ids an
+    ``indexer`` has seen closed::
+
+        scanner = LiquidationScanner(ctx, indexer=indexer)
+        for position in scanner.scan():
+            print(position.position_id, position.live_details.effective_margin)
+    """
+
+    def __init__(
+        self,
+        context: PerpCityContext,
+        batch_size: int = DEFAULT_SCAN_BATCH_SIZE,
+        max_workers: int = DEFAULT_SCAN_WORKERS,
+        indexer: PerpCityIndexer | None = None,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError(f"Invalid batch size: {batch_size} must be positive")
+        if max_workers <= 0:
+            raise ValueError(f"Invalid worker count: {max_workers} must be positive")
+        self._context = context
+        self._batch_size = batch_size
+        self._max_workers = max_workers
+        self._indexer = indexer
+        #: Position ids known to be closed (burned), skipped by every scan
+        self.closed: set[int] = set()
+
+    @entry_point("scan_liquidatable_positions", context=lambda scanner: scanner._context)
+    def scan(self, start_id: int = 1, end_id: int | None = None) -> list[LiquidatablePosition]:
+        """Return the liquidatable positions among ids ``start_id`` to ``end_id``.
+
+        ``end_id`` defaults to the last position id minted. Results are sorted by id.
+        """
+
+        def _scan() -> list[LiquidatablePosition]:
+            ctx = self._context
+            block = ctx.w3.eth.block_number
+            last_id = end_id
+            if last_id is None:
+                last_id = ctx._perp_manager.functions.nextPosId().call(block_identifier=block) - 1
+
+            skip = self.closed
+            if self._indexer is not None:
+                skip = skip | self._indexer.closed_position_ids()
+            ids = [i for i in range(start_id, last_id + 1) if i not in skip]
+            batches = [
+                ids[start : start + self._batch_size]
+                for start in range(0, len(ids), self._batch_size)
+            ]
+
+            found: list[LiquidatablePosition] = []
+            # Workers run in copies of this context so their requests count towards the scan
+            caller = contextvars.copy_context()
+            with ThreadPoolExecutor(min(self._max_workers, len(batches) or 1)) as pool:
+                for liquidatable, closed in pool.map(
+                    lambda batch: caller.copy().run(self._scan_batch, batch, block), batches
+                ):
+                    found += liquidatable
+                    self.closed.update(closed)
+            return found
+
+        return with_error_handling(_scan, "scan_liquidatable_positions")
+
+    def _read_batch(self, position_ids: Sequence[int], block: int) -> list[tuple[int, Any, Any]]:
+        """Decoded ``(position_id, positions(), quoteClosePosition)`` of the ids in a batch.
+
+        Ids whose ``positions()`` read reverted are left out and a reverted quote is
+        ``None``. With Multicall3, ids that are neither closed nor liquidated are dropped
+        before decoding, which is most of them.
+        """
+        ctx = self._context
+        if ctx._multicall is None:
+            functions = ctx._perp_manager.functions
+            calls: list[ContractFunction] = []
+            for position_id in position_ids:
+                calls += (
+                    functions.positions(position_id),
+                    functions.quoteClosePosition(position_id),
+                )
+            results = aggregate3(None, calls, block)
+            return [
+                (position_id, position.value, quote.value if quote.success else None)
+                for position_id, position, quote in zip(
+                    position_ids, results[::2], results[1::2], strict=True
+                )
+                if position.success
+            ]
+
+        target = ctx._perp_manager.address
+        encoded = []
+        for position_id in position_ids:
+            argument = position_id.to_bytes(32, "big")
+            encoded.append((target, _POSITIONS_SELECTOR + argument))
+            encoded.append((target, _QUOTE_CLOSE_SELECTOR + argument))
+        raw = aggregate3_encoded(ctx._multicall, encoded, block)
+
+        position_types = _output_types("positions")
+        quote_types = _output_types("quoteClosePosition")
+        rows = []
+        for position_id, (position_ok, position), (quote_ok, quote) in zip(
+            position_ids, raw[::2], raw[1::2], strict=True
+        ):
+            if not position_ok:
+                continue
+            # Both are static head words: positions().perpId and the wasLiquidated flag
+            closed = position[:32] == _ZERO_WORD
+            liquidated = quote_ok and quote[128:160] != _ZERO_WORD
+            if closed or liquidated:
+                rows.append(
+                    (
+                        position_id,
+                        abi_decode(position_types, position),
+                        abi_decode(quote_types, quote) if quote_ok else None,
+                    )
+                )
+        return rows
+
+    def _scan_batch(
+        self, position_ids: Sequence[int], block: int
+    ) -> tuple[list[LiquidatablePosition], list[int]]:
+        liquidatable: list[LiquidatablePosition] = []
+        closed: list[int] = []
+        for position_id, position, quote in self._read_batch(position_ids, block):
+            parsed = _parse_discovered_position(position_id, position)
+            if parsed is None:
+                closed.append(position_id)
+                continue
+            if quote is None:
+                continue
+            try:
+                live_details = _parse_live_details(position_id, quote)
+            except PerpCityError:
+                continue
+            if live_details.is_liquidatable:
+                liquidatable.append(
+                    LiquidatablePosition(
+                        position_id=position_id,
+                        perp_id=str(parsed["perp_id"]),
+                        is_maker=bool(parsed["is_maker"]),
+                        live_details=live_details,
+                    )
+                )
+        return liquidatable, closed
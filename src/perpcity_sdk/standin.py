@@ -0,0 +1,1084 @@
+"""In-process stand-in chain for running the SDK without a node.
+
+:class:`StandInChain` emulates the PerpManager, a USDC token, the fees and margin-ratios
+modules and Multicall3 as far as the SDK uses them, and answers JSON-RPC requests
+against that state: reads through ``eth_call`` (Multicall3 included), signed
+transactions through ``eth_sendRawTransaction``, receipts with the real ABI events and
+``eth_getLogs``. Connect a context through :class:`StandInProvider` /
+:class:`AsyncStandInProvider`, or serve it over HTTP with :class:`StandInServer` for
+bots that only take an RPC URL. :class:`NetworkConditions` adds per-request latency and
+injected errors from a seeded RNG, so load tests run offline and reproducibly::
+
+    chain = StandInChain()
+    perp_id = chain.create_perp(price=10.0)
+    ctx = chain.connect(private_key, NetworkConditions(latency=0.05, error_rate=0.01))
+    chain.mint_usdc(ctx.account.address, 10_000)
+    position = open_taker_position(ctx, perp_id, params)
+
+The economics are deliberately simple: takers fill at the mark, funding is zero, maker
+positions carry no PnL and partial closes are not emulated. Reads at any block see the
+latest state.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+from eth_abi.abi import decode as abi_decode
+from eth_abi.abi import encode as abi_encode
+from eth_account import Account
+from eth_account.typed_transactions.typed_transaction import TypedTransaction
+from eth_utils.abi import (
+    event_abi_to_log_topic,
+    function_abi_to_4byte_selector,
+    get_abi_input_types,
+    get_abi_output_types,
+)
+from eth_utils.address import to_checksum_address
+from eth_utils.crypto import keccak
+from hexbytes import HexBytes
+from web3.providers.async_base import AsyncBaseProvider
+from web3.providers.base import BaseProvider
+
+from . import abis
+from .abis.selectors import PERP_MANAGER_ERRORS
+from .utils.constants import MULTICALL3_ADDRESS, NUMBER_1E6
+from .utils.conversions import price_to_sqrt_price_x96, scale_6_decimals, sqrt_price_x96_to_price
+
+if TYPE_CHECKING:
+    from .async_context import AsyncPerpCityContext
+    from .context import PerpCityContext
+
+STANDIN_CHAIN_ID = 84532  # Base Sepolia, the contexts' default
+STANDIN_PERP_MANAGER = to_checksum_address("0x" + "51" * 19 + "01")
+STANDIN_USDC = to_checksum_address("0x" + "51" * 19 + "02")
+STANDIN_FEES = to_checksum_address("0x" + "51" * 19 + "03")
+STANDIN_MARGIN_RATIOS = to_checksum_address("0x" + "51" * 19 + "04")
+STANDIN_BEACON = to_checksum_address("0x" + "51" * 19 + "05")
+
+GENESIS_TIMESTAMP = 1_700_000_000
+BLOCK_TIME = 2
+GAS_PRICE = 10**9
+
+# Module constants in pips (millionths), as the deployed modules return them
+DEFAULT_MODULE_CONSTANTS = {
+    "CREATOR_FEE": 1_000,
+    "INSURANCE_FEE": 500,
+    "LP_FEE": 3_000,
+    "LIQUIDATION_FEE": 10_000,
+    "MIN_TAKER_RATIO": 50_000,
+    "MAX_TAKER_RATIO": 1_000_000,
+    "LIQUIDATION_TAKER_RATIO": 25_000,
+    "MIN_MAKER_RATIO": 100_000,
+    "MAX_MAKER_RATIO": 1_000_000,
+    "LIQUIDATION_MAKER_RATIO": 50_000,
+}
+DEFAULT_PROTOCOL_FEE = 200
+
+# Gas reported by eth_estimateGas and receipts, by function name
+_GAS_USED = {
+    "approve": 46_000,
+    "transfer": 52_000,
+    "createPerp": 2_400_000,
+    "openTakerPos": 420_000,
+    "openMakerPos": 560_000,
+    "closePosition": 310_000,
+}
+_DEFAULT_GAS = 100_000
+
+_ZERO_ADDRESS = "0x" + "00" * 20
+_ERROR_STRING_SELECTOR = bytes.fromhex("08c379a0")
+_CUSTOM_ERRORS = {name: selector for selector, (name, _types) in PERP_MANAGER_ERRORS.items()}
+
+
+class _RevertError(Exception):
+    def __init__(self, data: bytes, reason: str | None = None) -> None:
+        super().__init__(reason or "0x" + data.hex())
+        self.data = data
+        self.reason = reason
+
+
+def _custom_error(name: str) -> _RevertError:
+    return _RevertError(_CUSTOM_ERRORS[name])
+
+
+def _error_string(reason: str) -> _RevertError:
+    return _RevertError(_ERROR_STRING_SELECTOR + abi_encode(["string"], [reason]), reason)
+
+
+def _rpc_result(request_id: Any, result: Any) -> dict[str, Any]:
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def _rpc_error(request_id: Any, code: int, message: str, data: str | None = None) -> dict[str, Any]:
+    error: dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": request_id, "error": error}
+
+
+class _Frame:
+    """One transaction or call: its sender, whether state changes are kept, its logs."""
+
+    __slots__ = ("sender", "dry", "logs")
+
+    def __init__(self, sender: str, dry: bool) -> None:
+        self.sender = sender
+        self.dry = dry
+        self.logs: list[dict[str, Any]] = []
+
+
+class _Contract:
+    """Dispatches calldata to the handler named after the ABI function, if any."""
+
+    def __init__(self, chain: StandInChain, address: str, abi: list[Any]) -> None:
+        self.chain = chain
+        self.address = address.lower()
+        self.functions: dict[bytes, tuple[str, list[str], list[str]]] = {}
+        self.events: dict[str, tuple[str, list[dict[str, Any]]]] = {}
+        for entry in abi:
+            if entry.get("type") == "function":
+                self.functions[function_abi_to_4byte_selector(entry)] = (
+                    entry["name"],
+                    get_abi_input_types(entry),
+                    get_abi_output_types(entry),
+                )
+            elif entry.get("type") == "event":
+                topic = "0x" + event_abi_to_log_topic(entry).hex()
+                self.events[entry["name"]] = (topic, entry["inputs"])
+        self.handlers: dict[str, Callable[..., Any]] = {}
+
+    def function_name(self, data: bytes) -> str | None:
+        function = self.functions.get(data[:4])
+        return function[0] if function is not None else None
+
+    def call(self, frame: _Frame, data: bytes) -> bytes:
+        function = self.functions.get(data[:4])
+        handler = self.handlers.get(function[0]) if function is not None else None
+        if function is None or handler is None:
+            raise _RevertError(b"")
+        _name, input_types, output_types = function
+        result = handler(frame, *abi_decode(input_types, data[4:]))
+        if not output_types:
+            return b""
+        if len(output_types) == 1:
+            result = (result,)
+        return abi_encode(output_types, result)
+
+    def emit(self, frame: _Frame, name: str, *args: Any) -> None:
+        topic, inputs = self.events[name]
+        topics = [topic]
+        data_types, data_values = [], []
+        for spec, value in zip(inputs, args, strict=True):
+            if spec["indexed"]:
+                topics.append("0x" + abi_encode([spec["type"]], [value]).hex())
+            else:
+                data_types.append(spec["type"])
+                data_values.append(value)
+        frame.logs.append(
+            {
+                "address": to_checksum_address(self.address),
+                "topics": topics,
+                "data": "0x" + abi_encode(data_types, data_values).hex(),
+            }
+        )
+
+
+class _ModuleConstants(_Contract):
+    """Fees or margin-ratios module: every function returns one of the chain's constants."""
+
+    def __init__(self, chain: StandInChain, address: str, abi: list[Any]) -> None:
+        super().__init__(chain, address, abi)
+        for name, _inputs, _outputs in self.functions.values():
+            self.handlers[name] = lambda frame, _name=name: self.chain.constants[_name]
+
+
+class _Usdc(_Contract):
+    def __init__(self, chain: StandInChain, address: str) -> None:
+        super().__init__(chain, address, abis.ERC20_ABI)
+        self.balances: Counter[str] = Counter()
+        self.allowances: Counter[tuple[str, str]] = Counter()
+        self.handlers.update(
+            name=lambda frame: "USD Coin",
+            symbol=lambda frame: "USDC",
+            decimals=lambda frame: 6,
+            totalSupply=lambda frame: sum(self.balances.values()),
+            balanceOf=lambda frame, owner: self.balances[owner.lower()],
+            allowance=lambda frame, owner, spender: self.allowances[owner.lower(), spender.lower()],
+            approve=self._approve,
+            transfer=self._transfer,
+            transferFrom=self._transfer_from,
+        )
+
+    def _approve(self, frame: _Frame, spender: str, amount: int) -> bool:
+        if not frame.dry:
+            self.allowances[frame.sender, spender.lower()] = amount
+        self.emit(frame, "Approval", frame.sender, spender, amount)
+        return True
+
+    def _transfer(self, frame: _Frame, to: str, amount: int) -> bool:
+        self.move(frame, frame.sender, to.lower(), amount)
+        return True
+
+    def _transfer_from(self, frame: _Frame, owner: str, to: str, amount: int) -> bool:
+        self.pull(frame, owner.lower(), frame.sender, amount, to.lower())
+        return True
+
+    def check_pull(self, owner: str, spender: str, amount: int) -> None:
+        if self.allowances[owner, spender] < amount:
+            raise _error_string("ERC20: transfer amount exceeds allowance")
+        if self.balances[owner] < amount:
+            raise _error_string("ERC20: transfer amount exceeds balance")
+
+    def pull(self, frame: _Frame, owner: str, spender: str, amount: int, to: str) -> None:
+        """``transferFrom`` by ``spender``; validate with :meth:`check_pull` first."""
+        self.check_pull(owner, spender, amount)
+        if not frame.dry:
+            self.allowances[owner, spender] -= amount
+        self.move(frame, owner, to, amount)
+
+    def move(self, frame: _Frame, source: str, to: str, amount: int) -> None:
+        # The perp manager's vault is bottomless, so payouts never fail
+        if source != self.chain.perp_manager.address and self.balances[source] < amount:
+            raise _error_string("ERC20: transfer amount exceeds balance")
+        if not frame.dry:
+            self.balances[source] -= amount
+            self.balances[to] += amount
+        self.emit(frame, "Transfer", source, to, amount)
+
+
+class _Multicall(_Contract):
+    def __init__(self, chain: StandInChain) -> None:
+        super().__init__(chain, MULTICALL3_ADDRESS, abis.MULTICALL3_ABI)
+        self.handlers.update(
+            aggregate3=self._aggregate3,
+            getBlockNumber=lambda frame: self.chain.block_number,
+        )
+
+    def _aggregate3(self, frame: _Frame, calls: Sequence[tuple[str, bool, bytes]]) -> list[Any]:
+        inner = _Frame(self.address, frame.dry)
+        results = []
+        for target, allow_failure, data in calls:
+            try:
+                results.append((True, self.chain.dispatch(inner, target, data)))
+            except _RevertError as e:
+                if not allow_failure:
+                    raise _error_string("Multicall3: call failed") from e
+                results.append((False, e.data))
+        frame.logs += inner.logs
+        return results
+
+
+@dataclass(slots=True)
+class _Perp:
+    perp_id: bytes
+    sqrt_price_x96: int
+    tick_spacing: int
+    beacon: str
+    creator: str
+    long_oi: int = 0
+    short_oi: int = 0
+
+
+@dataclass(slots=True)
+class _Position:
+    perp_id: bytes
+    owner: str
+    margin: int
+    perp_delta: int
+    usd_delta: int
+    margin_ratios: tuple[int, int, int]
+    tick_lower: int = 0
+    tick_upper: int = 0
+    liquidity: int = 0
+
+
+class _PerpManager(_Contract):
+    def __init__(self, chain: StandInChain, address: str) -> None:
+        super().__init__(chain, address, abis.PERP_MANAGER_ABI)
+        self.perps: dict[bytes, _Perp] = {}
+        self.positions: dict[int, _Position] = {}
+        self.next_position_id = 1
+        self.handlers.update(
+            cfgs=self._cfgs,
+            timeWeightedAvgSqrtPriceX96=lambda frame, perp_id, _secs: (
+                self._perp(perp_id).sqrt_price_x96
+            ),
+            takerOpenInterest=self._taker_open_interest,
+            protocolFee=lambda frame: self.chain.protocol_fee,
+            nextPosId=lambda frame: self.next_position_id,
+            ownerOf=self._owner_of,
+            balanceOf=lambda frame, owner: sum(
+                p.owner == owner.lower() for p in self.positions.values()
+            ),
+            positions=self._positions,
+            quoteClosePosition=self._quote_close_position,
+            quoteOpenTakerPosition=self._quote_open_taker_position,
+            quoteOpenMakerPosition=self._quote_open_maker_position,
+            createPerp=self._create_perp,
+            openTakerPos=self._open_taker_pos,
+            openMakerPos=self._open_maker_pos,
+            closePosition=self._close_position,
+        )
+
+    def _perp(self, perp_id: bytes) -> _Perp:
+        perp = self.perps.get(perp_id)
+        if perp is None:
+            raise _custom_error("PerpDoesNotExist")
+        return perp
+
+    def _position(self, position_id: int) -> _Position:
+        position = self.positions.get(position_id)
+        if position is None:
+            raise _custom_error("TokenDoesNotExist")
+        return position
+
+    def _cfgs(self, frame: _Frame, perp_id: bytes) -> tuple[Any, ...]:
+        perp = self.perps.get(perp_id)
+        if perp is None:
+            return ((_ZERO_ADDRESS, _ZERO_ADDRESS, 0, 0, _ZERO_ADDRESS), *[_ZERO_ADDRESS] * 7)
+        chain = self.chain
+        key = (chain.usdc.address, "0x" + perp_id[:20].hex(), 0, perp.tick_spacing, self.address)
+        return (
+            key,
+            perp.creator,
+            self.address,
+            perp.beacon,
+            chain.fees.address,
+            chain.margin_ratios.address,
+            _ZERO_ADDRESS,
+            _ZERO_ADDRESS,
+        )
+
+    def _taker_open_interest(self, frame: _Frame, perp_id: bytes) -> tuple[int, int]:
+        perp = self._perp(perp_id)
+        return perp.long_oi, perp.short_oi
+
+    def _owner_of(self, frame: _Frame, position_id: int) -> str:
+        return self._position(position_id).owner
+
+    def _positions(self, frame: _Frame, position_id: int) -> tuple[Any, ...]:
+        position = self.positions.get(position_id)
+        if position is None:
+            return (bytes(32), 0, 0, 0, 0, 0, 0, (0, 0, 0), (0, 0, 0, 0, 0, 0, 0))
+        maker = (0, position.tick_lower, position.tick_upper, position.liquidity, 0, 0, 0)
+        return (
+            position.perp_id,
+            position.margin,
+            position.perp_delta,
+            position.usd_delta,
+            0,
+            0,
+            0,
+            position.margin_ratios,
+            maker,
+        )
+
+    def _live(self, position: _Position) -> tuple[int, int, bool]:
+        """``(pnl, net_margin, is_liquidatable)`` of a position at the current mark."""
+        if position.liquidity:
+            return 0, position.margin, False
+        price = sqrt_price_x96_to_price(self.perps[position.perp_id].sqrt_price_x96)
+        value = position.perp_delta * price
+        pnl = round(value + position.usd_delta)
+        net_margin = max(position.margin + pnl, 0)
+        maintenance = abs(value) * position.margin_ratios[2] / NUMBER_1E6
+        return pnl, net_margin, net_margin < maintenance
+
+    def _quote_close_position(self, frame: _Frame, position_id: int) -> tuple[Any, ...]:
+        pnl, net_margin, liquidatable = self._live(self._position(position_id))
+        return b"", pnl, 0, net_margin, liquidatable
+
+    def _quote_open_taker_position(
+        self, frame: _Frame, perp_id: bytes, params: tuple[Any, ...]
+    ) -> tuple[bytes, int, int]:
+        try:
+            _perp, _margin, perp_delta, usd_delta, _fees = self._taker_fill(perp_id, params)
+        except _RevertError as e:
+            return e.data, 0, 0
+        return b"", perp_delta, usd_delta
+
+    def _quote_open_maker_position(
+        self, frame: _Frame, perp_id: bytes, params: tuple[Any, ...]
+    ) -> tuple[bytes, int, int]:
+        try:
+            self._check_maker(perp_id, params)
+        except _RevertError as e:
+            return e.data, 0, 0
+        return b"", 0, 0
+
+    def _create_perp(self, frame: _Frame, params: tuple[Any, ...]) -> bytes:
+        beacon, fees, margin_ratios, _lockup, _impact, sqrt_price_x96 = params
+        if fees.lower() != self.chain.fees.address:
+            raise _custom_error("FeesNotRegistered")
+        if margin_ratios.lower() != self.chain.margin_ratios.address:
+            raise _custom_error("MarginRatiosNotRegistered")
+        perp_id = keccak(abi_encode(["address", "uint256"], [beacon, len(self.perps)]))
+        if not frame.dry:
+            self.perps[perp_id] = _Perp(
+                perp_id, sqrt_price_x96, self.chain.tick_spacing, beacon.lower(), frame.sender
+            )
+        self.emit(frame, "PerpCreated", perp_id, beacon, sqrt_price_x96, sqrt_price_x96)
+        return perp_id
+
+    def _taker_fill(
+        self, perp_id: bytes, params: tuple[Any, ...]
+    ) -> tuple[_Perp, int, int, int, int]:
+        """Validate a taker open; return the perp, margin, deltas and fees it would pay."""
+        _holder, is_long, margin, margin_ratio, _limit = params
+        perp = self._perp(perp_id)
+        constants = self.chain.constants
+        if margin == 0:
+            raise _custom_error("InvalidMargin")
+        if not constants["MIN_TAKER_RATIO"] <= margin_ratio <= constants["MAX_TAKER_RATIO"]:
+            raise _custom_error("InvalidMarginRatio")
+        notional = margin * NUMBER_1E6 // margin_ratio
+        size = round(notional / sqrt_price_x96_to_price(perp.sqrt_price_x96))
+        if size == 0:
+            raise _custom_error("ZeroNotional")
+        fee_pips = (
+            constants["CREATOR_FEE"]
+            + constants["INSURANCE_FEE"]
+            + constants["LP_FEE"]
+            + self.chain.protocol_fee
+        )
+        fees = -(-notional * fee_pips // NUMBER_1E6)
+        if is_long:
+            return perp, margin, size, -notional, fees
+        return perp, margin, -size, notional, fees
+
+    def _open_taker_pos(self, frame: _Frame, perp_id: bytes, params: tuple[Any, ...]) -> int:
+        perp, margin, perp_delta, usd_delta, fees = self._taker_fill(perp_id, params)
+        usdc = self.chain.usdc
+        position_id = self.next_position_id
+        long_oi = perp.long_oi + max(perp_delta, 0)
+        short_oi = perp.short_oi + max(-perp_delta, 0)
+        usdc.pull(frame, frame.sender, self.address, margin + fees, self.address)
+        if not frame.dry:
+            constants = self.chain.constants
+            ratios = (
+                constants["MIN_TAKER_RATIO"],
+                constants["MAX_TAKER_RATIO"],
+                constants["LIQUIDATION_TAKER_RATIO"],
+            )
+            self.positions[position_id] = _Position(
+                perp_id, params[0].lower(), margin, perp_delta, usd_delta, ratios
+            )
+            self.next_position_id += 1
+            perp.long_oi, perp.short_oi = long_oi, short_oi
+        self.emit(frame, "Transfer", _ZERO_ADDRESS, params[0], position_id)
+        self.emit(
+            frame,
+            "PositionOpened",
+            perp_id,
+            perp.sqrt_price_x96,
+            long_oi,
+            short_oi,
+            position_id,
+            False,
+            perp_delta,
+            usd_delta,
+            0,
+            0,
+        )
+        return position_id
+
+    def _check_maker(self, perp_id: bytes, params: tuple[Any, ...]) -> _Perp:
+        _holder, margin, liquidity, tick_lower, tick_upper, _max0, _max1 = params
+        perp = self._perp(perp_id)
+        if margin == 0:
+            raise _custom_error("InvalidMargin")
+        if liquidity == 0:
+            raise _custom_error("ZeroLiquidity")
+        spacing = perp.tick_spacing
+        if tick_lower >= tick_upper or tick_lower % spacing or tick_upper % spacing:
+            raise _custom_error("TicksOutOfBounds")
+        return perp
+
+    def _open_maker_pos(self, frame: _Frame, perp_id: bytes, params: tuple[Any, ...]) -> int:
+        perp = self._check_maker(perp_id, params)
+        holder, margin, liquidity, tick_lower, tick_upper, _max0, _max1 = params
+        usdc = self.chain.usdc
+        position_id = self.next_position_id
+        usdc.pull(frame, frame.sender, self.address, margin, self.address)
+        if not frame.dry:
+            constants = self.chain.constants
+            ratios = (
+                constants["MIN_MAKER_RATIO"],
+                constants["MAX_MAKER_RATIO"],
+                constants["LIQUIDATION_MAKER_RATIO"],
+            )
+            self.positions[position_id] = _Position(
+                perp_id, holder.lower(), margin, 0, 0, ratios, tick_lower, tick_upper, liquidity
+            )
+            self.next_position_id += 1
+        self.emit(frame, "Transfer", _ZERO_ADDRESS, holder, position_id)
+        self.emit(
+            frame,
+            "PositionOpened",
+            perp_id,
+            perp.sqrt_price_x96,
+            perp.long_oi,
+            perp.short_oi,
+            position_id,
+            True,
+            0,
+            0,
+            tick_lower,
+            tick_upper,
+        )
+        return position_id
+
+    def _close_position(self, frame: _Frame, params: tuple[Any, ...]) -> None:
+        position_id = params[0]
+        position = self._position(position_id)
+        pnl, net_margin, liquidated = self._live(position)
+        if frame.sender != position.owner and not liquidated:
+            raise _custom_error("InvalidCaller")
+
+        perp = self.perps[position.perp_id]
+        long_oi = perp.long_oi - max(position.perp_delta, 0)
+        short_oi = perp.short_oi - max(-position.perp_delta, 0)
+        usdc = self.chain.usdc
+        if liquidated:
+            notional = abs(position.usd_delta)
+            reward = min(net_margin, notional * self.chain.constants["LIQUIDATION_FEE"] // 10**6)
+            usdc.move(frame, self.address, frame.sender, reward)
+        else:
+            usdc.move(frame, self.address, position.owner, net_margin)
+        if not frame.dry:
+            del self.positions[position_id]
+            perp.long_oi, perp.short_oi = long_oi, short_oi
+        self.emit(frame, "Transfer", position.owner, _ZERO_ADDRESS, position_id)
+        self.emit(
+            frame,
+            "PositionClosed",
+            position.perp_id,
+            perp.sqrt_price_x96,
+            long_oi,
+            short_oi,
+            position_id,
+            position.liquidity > 0,
+            liquidated,
+            False,
+            position.perp_delta,
+            position.usd_delta,
+            position.tick_lower,
+            position.tick_upper,
+        )
+
+
+class StandInChain:
+    """Emulated PerpCity deployment answering JSON-RPC requests; see the module docs.
+
+    Contracts live at the ``STANDIN_*`` addresses and Multicall3 at its canonical
+    address. ``constants`` holds the fee and margin-ratio module values in pips and can
+    be edited before contexts first read them. ``max_log_block_range`` makes
+    ``eth_getLogs`` reject wider ranges like hosted providers do.
+
+    There is no block clock: each transaction is mined into a block of its own, and
+    with ``mine_on_poll`` every ``eth_blockNumber`` request mines one empty block, so
+    waits for several confirmations finish. All methods are thread-safe.
+    """
+
+    def __init__(
+        self,
+        chain_id: int = STANDIN_CHAIN_ID,
+        tick_spacing: int = 60,
+        max_log_block_range: int | None = None,
+        mine_on_poll: bool = True,
+    ) -> None:
+        self.chain_id = chain_id
+        self.tick_spacing = tick_spacing
+        self.max_log_block_range = max_log_block_range
+        self.mine_on_poll = mine_on_poll
+        self.constants = dict(DEFAULT_MODULE_CONSTANTS)
+        self.protocol_fee = DEFAULT_PROTOCOL_FEE
+        self.block_number = 0
+        self.nonces: Counter[str] = Counter()
+        self.logs: list[dict[str, Any]] = []
+        self.receipts: dict[str, dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+        self.perp_manager = _PerpManager(self, STANDIN_PERP_MANAGER)
+        self.usdc = _Usdc(self, STANDIN_USDC)
+        self.fees = _ModuleConstants(self, STANDIN_FEES, abis.FEES_ABI)
+        self.margin_ratios = _ModuleConstants(self, STANDIN_MARGIN_RATIOS, abis.MARGIN_RATIOS_ABI)
+        self.multicall = _Multicall(self)
+        self._contracts: dict[str, _Contract] = {
+            contract.address: contract
+            for contract in (
+                self.perp_manager,
+                self.usdc,
+                self.fees,
+                self.margin_ratios,
+                self.multicall,
+            )
+        }
+
+    # Setup, applied directly and mined as their own blocks
+
+    def create_perp(self, price: float, beacon: str = STANDIN_BEACON) -> str:
+        """Create a perp with mark ``price`` and return its id."""
+        params = (
+            beacon,
+            self.fees.address,
+            self.margin_ratios.address,
+            _ZERO_ADDRESS,
+            _ZERO_ADDRESS,
+            price_to_sqrt_price_x96(price),
+        )
+        with self._lock:
+            frame = _Frame(_ZERO_ADDRESS, dry=False)
+            perp_id = self.perp_manager._create_perp(frame, params)
+            self._mine(frame, "createPerp")
+        return "0x" + perp_id.hex()
+
+    def set_mark(self, perp_id: str, price: float) -> None:
+        """Move the mark of ``perp_id`` to ``price``, e.g. to make positions liquidatable."""
+        with self._lock:
+            perp = self.perp_manager._perp(bytes.fromhex(perp_id.removeprefix("0x")))
+            perp.sqrt_price_x96 = price_to_sqrt_price_x96(price)
+
+    def mint_usdc(self, address: str, amount: float) -> None:
+        """Credit ``amount`` USDC to ``address``."""
+        with self._lock:
+            frame = _Frame(_ZERO_ADDRESS, dry=False)
+            scaled = scale_6_decimals(amount)
+            self.usdc.balances[address.lower()] += scaled
+            self.usdc.emit(frame, "Transfer", _ZERO_ADDRESS, address, scaled)
+            self._mine(frame, "mint")
+
+    def mine(self, blocks: int = 1) -> None:
+        """Mine empty blocks."""
+        with self._lock:
+            self.block_number += blocks
+
+    # Connecting contexts
+
+    def connect(
+        self, private_key: str, conditions: NetworkConditions | None = None, **kwargs: Any
+    ) -> PerpCityContext:
+        """A :class:`PerpCityContext` for ``private_key`` talking to this chain."""
+        from .context import PerpCityContext
+
+        ctx = PerpCityContext(
+            rpc_url="http://stand-in.invalid",
+            private_key=private_key,
+            perp_manager_address=STANDIN_PERP_MANAGER,
+            usdc_address=STANDIN_USDC,
+            chain_id=self.chain_id,
+            **kwargs,
+        )
+        ctx.w3.provider = StandInProvider(self, conditions)
+        return ctx
+
+    def connect_async(
+        self, private_key: str, conditions: NetworkConditions | None = None, **kwargs: Any
+    ) -> AsyncPerpCityContext:
+        """An :class:`AsyncPerpCityContext` for ``private_key`` talking to this chain."""
+        from .async_context import AsyncPerpCityContext
+
+        ctx = AsyncPerpCityContext(
+            rpc_url="http://stand-in.invalid",
+            private_key=private_key,
+            perp_manager_address=STANDIN_PERP_MANAGER,
+            usdc_address=STANDIN_USDC,
+            chain_id=self.chain_id,
+            **kwargs,
+        )
+        provider = AsyncStandInProvider(self, conditions)
+        ctx.w3.provider = provider  # type: ignore[assignment]
+        ctx._provider = provider  # type: ignore[assignment]
+        return ctx
+
+    # JSON-RPC
+
+    def request(self, method: str, params: Sequence[Any], request_id: Any = 1) -> dict[str, Any]:
+        """Answer one JSON-RPC request with a response object."""
+        handler = self._methods.get(method)
+        if handler is None:
+            return _rpc_error(request_id, -32601, f"the method {method} does not exist")
+        try:
+            with self._lock:
+                return _rpc_result(request_id, handler(self, *params))
+        except _RevertError as e:
+            message = "execution reverted" + (f": {e.reason}" if e.reason else "")
+            return _rpc_error(request_id, 3, message, "0x" + e.data.hex())
+        except _RpcError as e:
+            return _rpc_error(request_id, e.code, str(e))
+        except Exception as e:
+            # Malformed params, as a node would answer them
+            return _rpc_error(request_id, -32602, f"invalid params: {e}")
+
+    def dispatch(self, frame: _Frame, to: str, data: bytes) -> bytes:
+        contract = self._contracts.get(to.lower())
+        if contract is None:
+            return b""  # calls to accounts without code succeed and return nothing
+        return contract.call(frame, data)
+
+    def _block_number_param(self, tag: Any) -> int:
+        if isinstance(tag, int):
+            return tag
+        if tag == "earliest":
+            return 0
+        if tag in ("latest", "pending", "safe", "finalized", None):
+            return self.block_number
+        return int(tag, 16)
+
+    def _block(self, number: int) -> dict[str, Any]:
+        return {
+            "number": hex(number),
+            "hash": "0x" + keccak(number.to_bytes(32, "big")).hex(),
+            "parentHash": "0x" + keccak(max(number - 1, 0).to_bytes(32, "big")).hex(),
+            "timestamp": hex(GENESIS_TIMESTAMP + number * BLOCK_TIME),
+            "baseFeePerGas": hex(GAS_PRICE),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0",
+            "miner": _ZERO_ADDRESS,
+            "transactions": [],
+        }
+
+    def _mine(self, frame: _Frame, label: str, tx: Mapping[str, Any] | None = None) -> str:
+        """Mine ``frame``'s logs into a new block and store its receipt."""
+        self.block_number += 1
+        block = self._block(self.block_number)
+        tx_hash = "0x" + keccak(text=f"{label}:{self.block_number}").hex()
+        if tx is not None:
+            tx_hash = tx["hash"]
+        logs = [
+            {
+                **log,
+                "blockNumber": block["number"],
+                "blockHash": block["hash"],
+                "transactionHash": tx_hash,
+                "transactionIndex": "0x0",
+                "logIndex": hex(i),
+                "removed": False,
+            }
+            for i, log in enumerate(frame.logs)
+        ]
+        self.logs += logs
+        self.receipts[tx_hash] = {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": block["hash"],
+            "blockNumber": block["number"],
+            "from": to_checksum_address(frame.sender),
+            "to": tx["to"] if tx is not None else None,
+            "cumulativeGasUsed": hex(tx["gas_used"] if tx is not None else 0),
+            "gasUsed": hex(tx["gas_used"] if tx is not None else 0),
+            "effectiveGasPrice": hex(GAS_PRICE),
+            "contractAddress": None,
+            "logs": logs,
+            "logsBloom": "0x" + "00" * 256,
+            "status": "0x1" if tx is None or tx["success"] else "0x0",
+            "type": "0x2",
+        }
+        return tx_hash
+
+    def _gas(self, to: str, data: bytes) -> int:
+        contract = self._contracts.get(to.lower())
+        name = contract.function_name(data) if contract is not None else None
+        return _GAS_USED.get(name or "", _DEFAULT_GAS)
+
+    def _eth_block_number(self) -> str:
+        if self.mine_on_poll:
+            self.block_number += 1
+        return hex(self.block_number)
+
+    def _eth_call(self, tx: Mapping[str, Any], block: Any = "latest") -> str:
+        frame = _Frame(str(tx.get("from") or _ZERO_ADDRESS).lower(), dry=True)
+        data = bytes.fromhex(str(tx.get("data") or tx.get("input") or "0x")[2:])
+        return "0x" + self.dispatch(frame, tx["to"], data).hex()
+
+    def _eth_estimate_gas(self, tx: Mapping[str, Any], block: Any = "latest") -> str:
+        self._eth_call(tx)
+        data = bytes.fromhex(str(tx.get("data") or tx.get("input") or "0x")[2:])
+        return hex(self._gas(tx["to"], data))
+
+    def _eth_send_raw_transaction(self, raw: str) -> str:
+        raw_bytes = bytes.fromhex(raw.removeprefix("0x"))
+        if not raw_bytes or raw_bytes[0] > 0x7F:
+            raise _RpcError(-32000, "stand-in chain only accepts typed transactions")
+        fields = TypedTransaction.from_bytes(HexBytes(raw_bytes)).as_dict()
+        sender = Account.recover_transaction(raw_bytes).lower()
+        if fields["chainId"] != self.chain_id:
+            raise _RpcError(-32000, f"invalid chain id {fields['chainId']}")
+        expected = self.nonces[sender]
+        if fields["nonce"] < expected:
+            raise _RpcError(
+                -32000, f"nonce too low: next nonce {expected}, tx nonce {fields['nonce']}"
+            )
+        if fields["nonce"] > expected:
+            raise _RpcError(
+                -32000, f"nonce too high: next nonce {expected}, tx nonce {fields['nonce']}"
+            )
+        self.nonces[sender] += 1
+
+        to = to_checksum_address(fields["to"])
+        data = bytes(fields["data"])
+        frame = _Frame(sender, dry=False)
+        try:
+            self.dispatch(frame, to, data)
+            success = True
+        except _RevertError:
+            # Handlers validate before changing state, so a revert left nothing behind
+            frame.logs.clear()
+            success = False
+        tx = {
+            "hash": "0x" + keccak(raw_bytes).hex(),
+            "to": to,
+            "gas_used": min(self._gas(to, data), fields["gas"]),
+            "success": success,
+        }
+        return self._mine(frame, "tx", tx)
+
+    def _eth_get_logs(self, log_filter: Mapping[str, Any]) -> list[dict[str, Any]]:
+        from_block = self._block_number_param(log_filter.get("fromBlock", "latest"))
+        to_block = self._block_number_param(log_filter.get("toBlock", "latest"))
+        limit = self.max_log_block_range
+        if limit is not None and to_block - from_block + 1 > limit:
+            raise _RpcError(-32005, f"block range too large, limit is {limit} blocks")
+
+        addresses = log_filter.get("address") or []
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        address_set = {a.lower() for a in addresses}
+        topic_sets = [
+            None if t is None else {x.lower() for x in ([t] if isinstance(t, str) else t)}
+            for t in log_filter.get("topics") or []
+        ]
+        return [
+            log
+            for log in self.logs
+            if from_block <= int(log["blockNumber"], 16) <= to_block
+            and (not address_set or log["address"].lower() in address_set)
+            and len(log["topics"]) >= len(topic_sets)
+            and all(t is None or log["topics"][i] in t for i, t in enumerate(topic_sets))
+        ]
+
+    _methods: dict[str, Callable[..., Any]] = {
+        "eth_chainId": lambda self: hex(self.chain_id),
+        "net_version": lambda self: str(self.chain_id),
+        "eth_blockNumber": _eth_block_number,
+        "eth_getBlockByNumber": lambda self, tag, _full=False: self._block(
+            self._block_number_param(tag)
+        ),
+        "eth_gasPrice": lambda self: hex(GAS_PRICE),
+        "eth_maxPriorityFeePerGas": lambda self: hex(GAS_PRICE),
+        "eth_getBalance": lambda self, _address, _block="latest": hex(10**21),
+        "eth_getCode": lambda self, address, _block="latest": (
+            "0x00" if address.lower() in self._contracts else "0x"
+        ),
+        "eth_getTransactionCount": lambda self, address, _block="latest": hex(
+            self.nonces[address.lower()]
+        ),
+        "eth_call": _eth_call,
+        "eth_estimateGas": _eth_estimate_gas,
+        "eth_sendRawTransaction": _eth_send_raw_transaction,
+        "eth_getTransactionReceipt": lambda self, tx_hash: self.receipts.get(tx_hash),
+        "eth_getLogs": _eth_get_logs,
+    }
+
+
+class _RpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class NetworkConditions:
+    """Latency and errors added to every request a provider or server forwards.
+
+    Each request waits ``latency`` seconds (``method_latency`` overrides it per method)
+    plus up to ``jitter`` more. With probability ``error_rate`` it fails instead with
+    ``error`` before reaching the chain. Random draws come from a RNG seeded with
+    ``seed``. :meth:`fail_next` queues scripted errors for a method.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        method_latency: Mapping[str, float] | None = None,
+        error_rate: float = 0.0,
+        error: Mapping[str, Any] | None = None,
+        seed: int = 0,
+    ) -> None:
+        if not 0.0 <= error_rate <= 1.0:
+            raise ValueError(f"Invalid error rate: {error_rate} must be in [0, 1]")
+        self.latency = latency
+        self.jitter = jitter
+        self.method_latency = dict(method_latency or {})
+        self.error_rate = error_rate
+        self.error = dict(error or {"code": -32005, "message": "request rate exceeded"})
+        self._rng = random.Random(seed)
+        self._scripted: dict[str, list[dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def fail_next(self, method: str, message: str, code: int = -32000, count: int = 1) -> None:
+        """Fail the next ``count`` requests of ``method`` with ``message``."""
+        with self._lock:
+            self._scripted.setdefault(method, []).extend(
+                {"code": code, "message": message} for _ in range(count)
+            )
+
+    def delay(self, method: str) -> float:
+        """Seconds to wait before answering a ``method`` request."""
+        latency = self.method_latency.get(method, self.latency)
+        if self.jitter:
+            with self._lock:
+                latency += self._rng.random() * self.jitter
+        return latency
+
+    def fault(self, method: str) -> dict[str, Any] | None:
+        """The error object to fail a ``method`` request with, if any."""
+        with self._lock:
+            scripted = self._scripted.get(method)
+            if scripted:
+                return scripted.pop(0)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return dict(self.error)
+        return None
+
+
+class StandInProvider(BaseProvider):
+    """web3 provider answering from a :class:`StandInChain`, under ``conditions``.
+
+    Latency is slept in the calling thread, so concurrent requests overlap as they
+    would against a remote node. ``requests`` counts requests per method.
+    """
+
+    def __init__(self, chain: StandInChain, conditions: NetworkConditions | None = None) -> None:
+        super().__init__()
+        self.chain = chain
+        self.conditions = conditions or NetworkConditions()
+        self.requests: Counter[str] = Counter()
+
+    def make_request(self, method: Any, params: Any) -> Any:
+        self.requests[method] += 1
+        delay = self.conditions.delay(method)
+        if delay:
+            time.sleep(delay)
+        error = self.conditions.fault(method)
+        if error is not None:
+            return {"jsonrpc": "2.0", "id": 1, "error": error}
+        return self.chain.request(method, params)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class AsyncStandInProvider(AsyncBaseProvider):
+    """Async counterpart of :class:`StandInProvider`; latency is an ``asyncio.sleep``."""
+
+    def __init__(self, chain: StandInChain, conditions: NetworkConditions | None = None) -> None:
+        super().__init__()
+        self.chain = chain
+        self.conditions = conditions or NetworkConditions()
+        self.requests: Counter[str] = Counter()
+
+    async def make_request(self, method: Any, params: Any) -> Any:
+        self.requests[method] += 1
+        delay = self.conditions.delay(method)
+        if delay:
+            await asyncio.sleep(delay)
+        error = self.conditions.fault(method)
+        if error is not None:
+            return {"jsonrpc": "2.0", "id": 1, "error": error}
+        return self.chain.request(method, params)
+
+    async def cache_async_session(self, session: Any) -> Any:
+        return session
+
+    async def is_connected(self, show_traceback: bool = False) -> bool:
+        return True
+
+
+class StandInServer:
+    """Serves a :class:`StandInChain` as an HTTP JSON-RPC endpoint on a local port.
+
+    ``port=0`` picks a free port; the endpoint is :attr:`url`. Each connection is
+    handled on its own thread, so latency from ``conditions`` overlaps across clients.
+    Batch requests are answered element by element::
+
+        with StandInServer(chain, NetworkConditions(latency=0.03)) as server:
+            ctx = PerpCityContext(rpc_url=server.url, ...)
+    """
+
+    def __init__(
+        self,
+        chain: StandInChain,
+        conditions: NetworkConditions | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.chain = chain
+        self.conditions = conditions or NetworkConditions()
+        self._server = ThreadingHTTPServer((host, port), _handler_class(self))
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> StandInServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> StandInServer:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def answer(self, request: Mapping[str, Any]) -> dict[str, Any]:
+        method = request.get("method", "")
+        request_id = request.get("id")
+        delay = self.conditions.delay(method)
+        if delay:
+            time.sleep(delay)
+        error = self.conditions.fault(method)
+        if error is not None:
+            return {"jsonrpc": "2.0", "id": request_id, "error": error}
+        return self.chain.request(method, request.get("params") or [], request_id)
+
+
+def _handler_class(server: StandInServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:  # noqa: N802
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(body, list):
+                response: Any = [server.answer(request) for request in body]
+            else:
+                response = server.answer(body)
+            payload = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
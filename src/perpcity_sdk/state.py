@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import dataclasses
+import math
+import time
+from collections.abc import Iterable, Mapping
+from typing import TYPE_CHECKING, Any
+
+from .stream import STREAMED_EVENTS, PerpMarketEvent
+from .types import PerpData, PerpState
+from .utils.conversions import sqrt_price_x96_to_price
+from .utils.events import PERP_MANAGER_EVENTS
+from .utils.logs import DEFAULT_BLOCK_RANGE, iter_log_chunks
+
+if TYPE_CHECKING:
+    from .context import PerpCityContext
+
+DEFAULT_MAX_STALENESS_BLOCKS = 5
+DEFAULT_MAX_FEED_AGE = 30.0
+
+
+def _order(block_number: int, log_index: int | None) -> tuple[int, float]:
+    # An RPC read reflects the end of its block, after every log in it
+    return block_number, math.inf if log_index is None else log_index
+
+
+class PerpStateCache:
+    """Local replica of every perp's mark and taker open interest.
+
+    ``PositionOpened``, ``PositionClosed`` and ``NotionalAdjusted`` all carry the perp's
+    ``sqrtPriceX96``, ``longOI`` and ``shortOI`` after the change, so each event replaces
+    the perp's :class:`PerpState` in O(1). Feed it with :meth:`sync` (one chunked
+    ``eth_getLogs`` per refresh), or register :meth:`apply` on a :class:`PerpEventStream`.
+
+    :meth:`get_perp_data` serves from memory while the perp's state is within
+    ``max_staleness_blocks`` of the newest block the cache has seen, and otherwise reads
+    it over RPC and reseeds the state. The newest block only moves while the cache is
+    fed, so when no sync or event has arrived for ``max_feed_age`` seconds (``None``
+    for no limit) every call is an RPC read again, as it is before the first feed::
+
+        cache = PerpStateCache(ctx)
+        while True:
+            cache.sync()
+            perps = [cache.get_perp_data(perp_id) for perp_id in perp_ids]
+
+    Event marks are spot prices, while RPC reads use a one-second TWAP.
+    """
+
+    def __init__(
+        self,
+        context: PerpCityContext,
+        max_staleness_blocks: int = DEFAULT_MAX_STALENESS_BLOCKS,
+        block_range: int = DEFAULT_BLOCK_RANGE,
+        max_feed_age: float | None = DEFAULT_MAX_FEED_AGE,
+    ) -> None:
+        if max_staleness_blocks < 0:
+            raise ValueError(
+                f"Invalid max staleness: {max_staleness_blocks} blocks must not be negative"
+            )
+        if max_feed_age is not None and max_feed_age < 0:
+            raise ValueError(f"Invalid max feed age: {max_feed_age} must not be negative")
+        self._context = context
+        self._address = context.deployments().perp_manager
+        self._max_staleness_blocks = max_staleness_blocks
+        self._block_range = block_range
+        self._max_feed_age = max_feed_age
+        self._topics = [[PERP_MANAGER_EVENTS.topic(record) for record in STREAMED_EVENTS]]
+        self._states: dict[str, PerpState] = {}
+        # Config, bounds and fees from the last RPC read; only the mark changes with events
+        self._perp_data: dict[str, PerpData] = {}
+        #: Every event up to this block has been applied by :meth:`sync`
+        self.synced_block: int | None = None
+        #: The newest block seen in an event, a sync or an RPC read
+        self.head = -1
+        # Without events or syncs the head never moves, so nothing can be judged fresh
+        self._fed_at: float | None = None
+
+    @property
+    def states(self) -> Mapping[str, PerpState]:
+        return self._states
+
+    def state(self, perp_id: str) -> PerpState | None:
+        return self._states.get(perp_id.lower())
+
+    def apply(self, event: PerpMarketEvent) -> bool:
+        """Update the perp's state from ``event``; returns ``False`` for older events."""
+        if not isinstance(event, STREAMED_EVENTS) or event.block_number is None:
+            return False
+
+        current = self._states.get(event.perp_id)
+        if current is not None and _order(current.block_number, current.log_index) >= _order(
+            event.block_number, event.log_index
+        ):
+            return False
+
+        self._states[event.perp_id] = PerpState(
+            perp_id=event.perp_id,
+            sqrt_price_x96=event.sqrt_price_x96,
+            mark=sqrt_price_x96_to_price(event.sqrt_price_x96),
+            long_oi=event.long_oi,
+            short_oi=event.short_oi,
+            block_number=event.block_number,
+            log_index=event.log_index,
+        )
+        if event.block_number > self.head:
+            self.head = event.block_number
+        self._fed_at = time.monotonic()
+        return True
+
+    def apply_logs(self, logs: Iterable[Mapping[str, Any]]) -> int:
+        """Decode and apply perp manager logs; returns the number of states updated."""
+        events = PERP_MANAGER_EVENTS.decode_logs(logs, address=self._address)
+        return sum(self.apply(event) for event in events)
+
+    def sync(self, to_block: int | None = None) -> int:
+        """Apply every event since the last sync up to ``to_block`` (default: latest).
+
+        The first sync starts after the oldest state already held, or only records
+        ``to_block`` when the cache is empty.
+        """
+        if to_block is None:
+            to_block = self._context.w3.eth.block_number
+
+        if self.synced_block is not None:
+            from_block = self.synced_block + 1
+        elif self._states:
+            from_block = min(state.block_number for state in self._states.values()) + 1
+        else:
+            from_block = to_block + 1
+
+        applied = 0
+        for _, end, logs in iter_log_chunks(
+            self._context.w3, self._address, self._topics, from_block, to_block, self._block_range
+        ):
+            applied += self.apply_logs(logs)
+            self.synced_block = end
+
+        if self.synced_block is None or to_block > self.synced_block:
+            self.synced_block = to_block
+        if to_block > self.head:
+            self.head = to_block
+        self._fed_at = time.monotonic()
+        return applied
+
+    def _is_fed(self) -> bool:
+        if self._fed_at is None:
+            return False
+        return self._max_feed_age is None or time.monotonic() - self._fed_at <= self._max_feed_age
+
+    def get_perp_data(self, perp_id: str, max_staleness_blocks: int | None = None) -> PerpData:
+        """Serve ``perp_id`` from memory when fresh, otherwise read it with :meth:`refresh`."""
+        if max_staleness_blocks is None:
+            max_staleness_blocks = self._max_staleness_blocks
+
+        key = perp_id.lower()
+        state = self._states.get(key)
+        perp_data = self._perp_data.get(key)
+        if state is None or perp_data is None or not self._is_fed():
+            return self.refresh(perp_id)
+
+        # With a complete event feed, a perp without events is unchanged since the sync
+        current = state.block_number
+        if self.synced_block is not None and self.synced_block > current:
+            current = self.synced_block
+        if self.head - current > max_staleness_blocks:
+            return self.refresh(perp_id)
+
+        if perp_data.mark != state.mark:
+            perp_data = self._perp_data[key] = dataclasses.replace(perp_data, mark=state.mark)
+        return perp_data
+
+    def refresh(self, perp_id: str) -> PerpData:
+        """Read ``perp_id`` over RPC, together with its open interest, and reseed its state."""
+        ctx = self._context
+        calls = [ctx._perp_manager.functions.takerOpenInterest(perp_id)]
+        block: int | None = None
+        if ctx._multicall is not None:
+            calls.append(ctx._multicall.functions.getBlockNumber())
+        else:
+            # Without Multicall3 the reads are not pinned; the block is a lower bound
+            block = ctx.w3.eth.block_number
+
+        tick_spacing, sqrt_price_x96, bounds, fees, extra = ctx._fetch_perp_contract_data(
+            perp_id, calls
+        )
+        long_oi, short_oi = extra[0]
+        if block is None:
+            block = int(extra[1])
+
+        perp_data = ctx._build_perp_data(perp_id, tick_spacing, sqrt_price_x96, bounds, fees)
+        key = perp_id.lower()
+        current = self._states.get(key)
+        if current is None or _order(current.block_number, current.log_index) < _order(block, None):
+            self._states[key] = PerpState(
+                perp_id=key,
+                sqrt_price_x96=sqrt_price_x96,
+                mark=perp_data.mark,
+                long_oi=int(long_oi),
+                short_oi=int(short_oi),
+                block_number=block,
+            )
+        self._perp_data[key] = perp_data
+        if block > self.head:
+            self.head = block
+        return perp_data
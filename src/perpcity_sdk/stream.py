@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from typing import Any
+
+from web3 import AsyncWeb3, Web3
+from web3.providers.persistent import PersistentConnectionProvider
+
+from .types import NotionalAdjustedEvent, PositionClosedEvent, PositionOpenedEvent
+from .utils.events import PERP_MANAGER_EVENTS, _to_int
+from .utils.logs import DEFAULT_BLOCK_RANGE, async_iter_log_chunks
+
+DEFAULT_POLL_INTERVAL = 2.0
+
+PerpMarketEvent = PositionOpenedEvent | PositionClosedEvent | NotionalAdjustedEvent
+
+# Each of these carries the perp's mark (sqrtPriceX96) and open interest after the change
+STREAMED_EVENTS = (PositionOpenedEvent, PositionClosedEvent, NotionalAdjustedEvent)
+
+EventCallback = Callable[[PerpMarketEvent], Awaitable[None] | None]
+
+
+class PerpEventStream:
+    """Streams decoded ``PositionOpened``, ``PositionClosed`` and ``NotionalAdjusted`` events.
+
+    On a persistent-connection provider (``WebSocketProvider``) logs are pushed with
+    ``eth_subscribe("logs")``; on HTTP providers new blocks are polled every
+    ``poll_interval`` seconds with ``eth_getLogs``. Events are yielded by ``async for``,
+    passed to the callbacks registered with :meth:`on_event` (plain or async), and the
+    last one of each perp is kept in :attr:`latest`::
+
+        async with AsyncWeb3(WebSocketProvider(ws_url)) as w3:
+            stream = PerpEventStream(w3, perp_manager, perp_ids=[perp_id])
+            async for event in stream:
+                print(event.perp_id, event.sqrt_price_x96, event.long_oi, event.short_oi)
+
+    ``perp_id`` is not an indexed argument of these events, so ``perp_ids`` is applied
+    to decoded events rather than to the log filter.
+    """
+
+    def __init__(
+        self,
+        w3: AsyncWeb3[Any],
+        perp_manager_address: str,
+        perp_ids: Iterable[str] | None = None,
+        from_block: int | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        block_range: int = DEFAULT_BLOCK_RANGE,
+        subscribe: bool | None = None,
+    ) -> None:
+        if poll_interval <= 0:
+            raise ValueError(f"Invalid poll interval: {poll_interval} must be positive")
+
+        self.w3 = w3
+        self._address = Web3.to_checksum_address(perp_manager_address)
+        self._perp_ids = None if perp_ids is None else {p.lower() for p in perp_ids}
+        self._from_block = from_block
+        self._poll_interval = poll_interval
+        self._block_range = block_range
+        if subscribe is None:
+            subscribe = isinstance(w3.provider, PersistentConnectionProvider)
+        self._subscribe = subscribe
+        self._topics = [[PERP_MANAGER_EVENTS.topic(record) for record in STREAMED_EVENTS]]
+        self._callbacks: list[EventCallback] = []
+        self.latest: dict[str, PerpMarketEvent] = {}
+
+    @property
+    def uses_subscription(self) -> bool:
+        return self._subscribe
+
+    def on_event(self, callback: EventCallback) -> EventCallback:
+        """Register ``callback`` for every streamed event; usable as a decorator."""
+        self._callbacks.append(callback)
+        return callback
+
+    async def run(self) -> None:
+        """Deliver events to the registered callbacks until cancelled."""
+        async for _ in self:
+            pass
+
+    def __aiter__(self) -> AsyncIterator[PerpMarketEvent]:
+        return self._events()
+
+    async def _events(self) -> AsyncIterator[PerpMarketEvent]:
+        source = self._subscription_logs() if self._subscribe else self._polled_logs()
+        async for logs in source:
+            for event in PERP_MANAGER_EVENTS.decode_logs(logs, address=self._address):
+                if self._perp_ids is not None and event.perp_id not in self._perp_ids:
+                    continue
+                self.latest[event.perp_id] = event
+                for callback in self._callbacks:
+                    result = callback(event)
+                    if inspect.isawaitable(result):
+                        await result
+                yield event
+
+    async def _subscription_logs(self) -> AsyncIterator[list[Any]]:
+        subscription_id = await self.w3.eth.subscribe(
+            "logs",
+            {"address": self._address, "topics": self._topics},
+        )
+        try:
+            # Catch up on past blocks after subscribing, so no block falls in between;
+            # pushed logs the catch-up already covered are dropped
+            caught_up = -1
+            if self._from_block is not None:
+                caught_up = await self.w3.eth.block_number
+                async for logs in self._logs_between(self._from_block, caught_up):
+                    yield logs
+
+            async for message in self.w3.socket.process_subscriptions():
+                if message["subscription"] != subscription_id:
+                    continue
+                log: Any = message["result"]
+                block_number = _to_int(log["blockNumber"])
+                # Logs of reorged-out blocks are re-sent with removed=True
+                if log.get("removed") or block_number is None or block_number <= caught_up:
+                    continue
+                yield [log]
+        finally:
+            await self.w3.eth.unsubscribe(subscription_id)
+
+    async def _polled_logs(self) -> AsyncIterator[list[Any]]:
+        next_block = self._from_block
+        if next_block is None:
+            next_block = await self.w3.eth.block_number + 1
+        while True:
+            latest = await self.w3.eth.block_number
+            if latest >= next_block:
+                async for logs in self._logs_between(next_block, latest):
+                    yield logs
+                next_block = latest + 1
+            await asyncio.sleep(self._poll_interval)
+
+    async def _logs_between(self, from_block: int, to_block: int) -> AsyncIterator[list[Any]]:
+        async for _, _, logs in async_iter_log_chunks(
+            self.w3, self._address, self._topics, from_block, to_block, self._block_range
+        ):
+            if logs:
+                yield logs
@@ -1,17 +1,24 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from .utils.errors import PerpCityError
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Bounds:
     min_margin: float
     min_taker_leverage: float
     max_taker_leverage: float
     liquidation_taker_ratio: float
+    min_maker_leverage: float | None = None
+    max_maker_leverage: float | None = None
+    liquidation_maker_ratio: float | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Fees:
     creator_fee: float
     insurance_fee: float
@@ -19,7 +26,7 @@ class Fees:
     liquidation_fee: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class LiveDetails:
     pnl: float
     funding_payment: float
@@ -27,7 +34,7 @@ class LiveDetails:
     is_liquidatable: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PerpData:
     id: str
     tick_spacing: int
@@ -37,7 +44,15 @@ class PerpData:
     fees: Fees
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
+class LiquidatablePosition:
+    position_id: int
+    perp_id: str
+    is_maker: bool
+    live_details: LiveDetails
+
+
+@dataclass(frozen=True, slots=True)
 class OpenPositionData:
     perp_id: str
     position_id: int
@@ -46,14 +61,14 @@ class OpenPositionData:
     is_maker: bool | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MarginRatios:
     min: int
     max: int
     liq: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PositionRawData:
     perp_id: str
     position_id: int
@@ -63,14 +78,16 @@ class PositionRawData:
     margin_ratios: MarginRatios
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UserData:
     wallet_address: str
     usdc_balance: float
     open_positions: list[OpenPositionData] = field(default_factory=list)
+    #: Positions whose quote failed, by id, with the error describing why
+    failed_positions: dict[int, PerpCityError] = field(default_factory=dict)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PoolKey:
     currency0: str
     currency1: str
@@ -79,7 +96,7 @@ class PoolKey:
     hooks: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PerpConfig:
     key: PoolKey
     creator: str
@@ -91,7 +108,7 @@ class PerpConfig:
     sqrt_price_impact_limit: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PerpCityDeployments:
     perp_manager: str
     usdc: str
@@ -99,9 +116,11 @@ class PerpCityDeployments:
     margin_ratios_module: str | None = None
     lockup_period_module: str | None = None
     sqrt_price_impact_limit_module: str | None = None
+    #: Block the perp manager was deployed in; log scans start here by default
+    deployment_block: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenTakerPositionParams:
     is_long: bool
     margin: float
@@ -109,7 +128,7 @@ class OpenTakerPositionParams:
     unspecified_amount_limit: int
 
 
-@dataclass
+@dataclass(slots=True)
 class OpenMakerPositionParams:
     margin: float
     price_lower: float
@@ -119,20 +138,20 @@ class OpenMakerPositionParams:
     max_amt1_in: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ClosePositionParams:
     min_amt0_out: float
     min_amt1_out: float
     max_amt1_in: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ClosePositionResult:
     position: object | None
     tx_hash: str
 
 
-@dataclass
+@dataclass(slots=True)
 class CreatePerpParams:
     starting_price: float
     beacon: str
@@ -140,3 +159,183 @@ class CreatePerpParams:
     margin_ratios: str | None = None
     lockup_period: str | None = None
     sqrt_price_impact_limit: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedPerp:
+    perp_id: str
+    beacon: str
+    created_block: int
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedPosition:
+    position_id: int
+    perp_id: str
+    owner: str | None
+    is_maker: bool
+    is_long: bool | None
+    tick_lower: int | None
+    tick_upper: int | None
+    opened_block: int
+    closed_block: int | None = None
+    was_liquidated: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class PerpState:
+    """Mark and taker open interest of a perp as of ``block_number``.
+
+    ``log_index`` is the event the state was taken from, or ``None`` for an RPC read,
+    which reflects the end of its block.
+    """
+
+    perp_id: str
+    sqrt_price_x96: int
+    mark: float
+    long_oi: int
+    short_oi: int
+    block_number: int
+    log_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class SwapSimulation:
+    """A swap simulated against a :class:`~perpcity_sdk.book.LiquidityBook`.
+
+    Token 0 is the perp and token 1 USDC, both 6-decimal scaled. ``amount_in`` includes
+    ``fee_amount``. ``filled`` is ``False`` when the price limit or the end of the
+    book's liquidity was reached before the whole amount was swapped.
+    """
+
+    zero_for_one: bool
+    amount_in: int
+    amount_out: int
+    fee_amount: int
+    sqrt_price_start_x96: int
+    sqrt_price_x96: int
+    tick: int
+    liquidity: int
+    ticks_crossed: int
+    filled: bool
+
+    @property
+    def perp_delta(self) -> int:
+        """Perp received (positive) or paid (negative) by the swapper."""
+        return -self.amount_in if self.zero_for_one else self.amount_out
+
+    @property
+    def usd_delta(self) -> int:
+        """USDC received (positive) or paid (negative) by the swapper."""
+        return self.amount_out if self.zero_for_one else -self.amount_in
+
+    @property
+    def average_price(self) -> float:
+        """USDC per perp across the whole fill, fee included."""
+        if self.perp_delta == 0:
+            return 0.0
+        return abs(self.usd_delta) / abs(self.perp_delta)
+
+    @property
+    def price_impact(self) -> float:
+        """Relative difference between :attr:`average_price` and the starting price."""
+        start = self.sqrt_price_start_x96 * self.sqrt_price_start_x96 / (1 << 192)
+        return self.average_price / start - 1 if self.perp_delta else 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class TakerQuote:
+    """``quoteOpenTakerPosition`` result: the taker's perp and USDC deltas, 6-decimal scaled."""
+
+    perp_delta: int
+    usd_delta: int
+
+
+# Decoded event records. Fields follow the event's ABI inputs in order, followed by the
+# location of the log they were decoded from.
+
+
+@dataclass(frozen=True, slots=True)
+class PerpCreatedEvent:
+    perp_id: str
+    beacon: str
+    sqrt_price_x96: int
+    index_price_x96: int
+    address: str = ""
+    block_number: int | None = None
+    transaction_hash: str | None = None
+    log_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class PositionOpenedEvent:
+    perp_id: str
+    sqrt_price_x96: int
+    long_oi: int
+    short_oi: int
+    position_id: int
+    is_maker: bool
+    perp_delta: int
+    usd_delta: int
+    tick_lower: int
+    tick_upper: int
+    address: str = ""
+    block_number: int | None = None
+    transaction_hash: str | None = None
+    log_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class PositionClosedEvent:
+    perp_id: str
+    sqrt_price_x96: int
+    long_oi: int
+    short_oi: int
+    position_id: int
+    was_maker: bool
+    was_liquidated: bool
+    was_partial_close: bool
+    perp_delta: int
+    usd_delta: int
+    tick_lower: int
+    tick_upper: int
+    address: str = ""
+    block_number: int | None = None
+    transaction_hash: str | None = None
+    log_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class MarginAdjustedEvent:
+    perp_id: str
+    position_id: int
+    new_margin: int
+    address: str = ""
+    block_number: int | None = None
+    transaction_hash: str | None = None
+    log_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class NotionalAdjustedEvent:
+    perp_id: str
+    sqrt_price_x96: int
+    long_oi: int
+    short_oi: int
+    position_id: int
+    new_perp_delta: int
+    address: str = ""
+    block_number: int | None = None
+    transaction_hash: str | None = None
+    log_index: int | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class TransferEvent:
+    from_address: str
+    to_address: str
+    token_id: int
+    address: str = ""
+    block_number: int | None = None
+    transaction_hash: str | None = None
+    log_index: int | None = None
@@ -1,35 +1,173 @@
-from .constants import NUMBER_1E6, Q96
-from .conversions import (
-    margin_ratio_to_leverage,
-    price_to_sqrt_price_x96,
-    price_to_tick,
-    scale_6_decimals,
-    scale_from_6_decimals,
-    scale_from_x96,
-    scale_to_x96,
-    sqrt_price_x96_to_price,
-    tick_to_price,
-)
-from .errors import (
-    ContractError,
-    ErrorCategory,
-    ErrorSource,
-    InsufficientFundsError,
-    PerpCityError,
-    RPCError,
-    TransactionRejectedError,
-    ValidationError,
-    parse_contract_error,
-    with_error_handling,
-)
-from .liquidity import (
-    calculate_liquidity_for_target_ratio,
-    estimate_liquidity,
-    get_sqrt_ratio_at_tick,
-)
-from .rpc import get_rpc_url
+"""Helpers shared by the SDK; exports are resolved on first access like the top-level package."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from .approve import AllowanceManager, ApprovalStrategy
+    from .constants import (
+        MAX_SQRT_PRICE,
+        MAX_TICK,
+        MIN_SQRT_PRICE,
+        MIN_TICK,
+        MULTICALL3_ADDRESS,
+        NUMBER_1E6,
+        Q96,
+    )
+    from .conversions import (
+        margin_ratio_to_leverage,
+        price_to_sqrt_price_x96,
+        price_to_tick,
+        scale_6_decimals,
+        scale_from_6_decimals,
+        scale_from_x96,
+        scale_to_x96,
+        sqrt_price_x96_to_price,
+        sqrt_price_x96_to_tick,
+        tick_to_price,
+    )
+    from .errors import (
+        CassetteMissError,
+        ContractError,
+        ErrorCategory,
+        ErrorSource,
+        InsufficientFundsError,
+        PerpCityError,
+        PipelinedTransactionError,
+        RPCError,
+        TransactionRejectedError,
+        ValidationError,
+        async_with_error_handling,
+        parse_contract_error,
+        with_error_handling,
+    )
+    from .events import PERP_MANAGER_EVENTS, EventDecoder
+    from .liquidity import calculate_liquidity_for_target_ratio, estimate_liquidity
+    from .logs import async_iter_log_chunks, is_range_error, iter_log_chunks
+    from .module_cache import MODULE_CONSTANTS, ModuleConstantsCache
+    from .multicall import (
+        MulticallResult,
+        aggregate3,
+        aggregate3_chunked,
+        aggregate3_encoded,
+        async_aggregate3,
+        async_aggregate3_chunked,
+        decode_revert_data,
+    )
+    from .nonce import AsyncNonceManager, NonceManager, is_nonce_error, is_rejected_transaction
+    from .rpc import get_rpc_url
+    from .swap_math import MAX_SWAP_FEE, compute_swap_step
+    from .tick_math import (
+        SqrtRatioTable,
+        clear_sqrt_ratio_tables,
+        get_sqrt_ratio_at_tick,
+        get_sqrt_ratio_table,
+        get_tick_at_sqrt_ratio,
+        get_ticks_at_sqrt_ratios,
+        sqrt_ratio_at_tick,
+    )
+
+_EXPORTS: dict[str, tuple[str, ...]] = {
+    ".approve": (
+        "AllowanceManager",
+        "ApprovalStrategy",
+    ),
+    ".constants": (
+        "MAX_SQRT_PRICE",
+        "MAX_TICK",
+        "MIN_SQRT_PRICE",
+        "MIN_TICK",
+        "MULTICALL3_ADDRESS",
+        "NUMBER_1E6",
+        "Q96",
+    ),
+    ".conversions": (
+        "margin_ratio_to_leverage",
+        "price_to_sqrt_price_x96",
+        "price_to_tick",
+        "scale_6_decimals",
+        "scale_from_6_decimals",
+        "scale_from_x96",
+        "scale_to_x96",
+        "sqrt_price_x96_to_price",
+        "sqrt_price_x96_to_tick",
+        "tick_to_price",
+    ),
+    ".errors": (
+        "CassetteMissError",
+        "ContractError",
+        "ErrorCategory",
+        "ErrorSource",
+        "InsufficientFundsError",
+        "PerpCityError",
+        "PipelinedTransactionError",
+        "RPCError",
+        "TransactionRejectedError",
+        "ValidationError",
+        "async_with_error_handling",
+        "parse_contract_error",
+        "with_error_handling",
+    ),
+    ".events": (
+        "PERP_MANAGER_EVENTS",
+        "EventDecoder",
+    ),
+    ".liquidity": (
+        "calculate_liquidity_for_target_ratio",
+        "estimate_liquidity",
+    ),
+    ".logs": (
+        "async_iter_log_chunks",
+        "is_range_error",
+        "iter_log_chunks",
+    ),
+    ".module_cache": (
+        "MODULE_CONSTANTS",
+        "ModuleConstantsCache",
+    ),
+    ".multicall": (
+        "MulticallResult",
+        "aggregate3",
+        "aggregate3_chunked",
+        "aggregate3_encoded",
+        "async_aggregate3",
+        "async_aggregate3_chunked",
+        "decode_revert_data",
+    ),
+    ".nonce": (
+        "AsyncNonceManager",
+        "NonceManager",
+        "is_nonce_error",
+        "is_rejected_transaction",
+    ),
+    ".rpc": ("get_rpc_url",),
+    ".swap_math": (
+        "MAX_SWAP_FEE",
+        "compute_swap_step",
+    ),
+    ".tick_math": (
+        "SqrtRatioTable",
+        "clear_sqrt_ratio_tables",
+        "get_sqrt_ratio_at_tick",
+        "get_sqrt_ratio_table",
+        "get_tick_at_sqrt_ratio",
+        "get_ticks_at_sqrt_ratios",
+        "sqrt_ratio_at_tick",
+    ),
+}
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
+    "AllowanceManager",
+    "ApprovalStrategy",
+    "MAX_SQRT_PRICE",
+    "MAX_TICK",
+    "MIN_SQRT_PRICE",
+    "MIN_TICK",
+    "MULTICALL3_ADDRESS",
     "NUMBER_1E6",
     "Q96",
     "margin_ratio_to_leverage",
@@ -40,19 +178,49 @@ __all__ = [
     "scale_from_x96",
     "scale_to_x96",
     "sqrt_price_x96_to_price",
+    "sqrt_price_x96_to_tick",
     "tick_to_price",
+    "CassetteMissError",
     "ContractError",
     "ErrorCategory",
     "ErrorSource",
     "InsufficientFundsError",
     "PerpCityError",
+    "PipelinedTransactionError",
     "RPCError",
     "TransactionRejectedError",
     "ValidationError",
+    "async_with_error_handling",
     "parse_contract_error",
     "with_error_handling",
+    "PERP_MANAGER_EVENTS",
+    "EventDecoder",
     "calculate_liquidity_for_target_ratio",
     "estimate_liquidity",
-    "get_sqrt_ratio_at_tick",
+    "async_iter_log_chunks",
+    "is_range_error",
+    "iter_log_chunks",
+    "MODULE_CONSTANTS",
+    "ModuleConstantsCache",
+    "MulticallResult",
+    "aggregate3",
+    "aggregate3_chunked",
+    "aggregate3_encoded",
+    "async_aggregate3",
+    "async_aggregate3_chunked",
+    "decode_revert_data",
+    "AsyncNonceManager",
+    "NonceManager",
+    "is_nonce_error",
+    "is_rejected_transaction",
     "get_rpc_url",
+    "MAX_SWAP_FEE",
+    "compute_swap_step",
+    "SqrtRatioTable",
+    "clear_sqrt_ratio_tables",
+    "get_sqrt_ratio_at_tick",
+    "get_sqrt_ratio_table",
+    "get_tick_at_sqrt_ratio",
+    "get_ticks_at_sqrt_ratios",
+    "sqrt_ratio_at_tick",
 ]
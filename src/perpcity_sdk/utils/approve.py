@@ -1,11 +1,81 @@
 from __future__ import annotations
 
+import threading
+from enum import Enum
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from ..async_context import AsyncPerpCityContext
     from ..context import PerpCityContext
 
 DEFAULT_CONFIRMATIONS = 2
+DEFAULT_BUFFER_MULTIPLE = 10
+MAX_UINT256 = 2**256 - 1
+
+
+class ApprovalStrategy(str, Enum):
+    EXACT = "exact"
+    BUFFERED = "buffered"
+    MAX = "max"
+
+
+class AllowanceManager:
+    """Local view of the USDC allowance granted to the perp manager.
+
+    The on-chain allowance is read once, then decremented locally as opens spend it, so
+    an ``approve`` is only sent when the remaining budget cannot cover an open. The
+    strategy decides how much a top-up approves: exactly the amount needed, a multiple
+    of it (``BUFFERED``), or the maximum uint256 (``MAX``). USDC decrements even a
+    maximum allowance, so ``MAX`` is tracked as a large budget like any other. Call
+    :meth:`invalidate` after anything that may have left the local budget wrong, such as
+    a failed open, so it is re-read from the chain.
+    """
+
+    def __init__(
+        self,
+        strategy: ApprovalStrategy = ApprovalStrategy.EXACT,
+        buffer_multiple: int = DEFAULT_BUFFER_MULTIPLE,
+    ) -> None:
+        if buffer_multiple < 1:
+            raise ValueError(f"Invalid buffer multiple: {buffer_multiple} must be at least 1")
+        self.strategy = ApprovalStrategy(strategy)
+        self.buffer_multiple = buffer_multiple
+        self._lock = threading.Lock()
+        self._budget: int | None = None
+
+    @property
+    def synced(self) -> bool:
+        return self._budget is not None
+
+    def sync(self, allowance: int) -> None:
+        with self._lock:
+            self._budget = int(allowance)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._budget = None
+
+    def approval_amount(self, required: int) -> int:
+        if self.strategy == ApprovalStrategy.MAX:
+            return MAX_UINT256
+        if self.strategy == ApprovalStrategy.BUFFERED:
+            return required * self.buffer_multiple
+        return required
+
+    def reserve(self, required: int) -> int | None:
+        """Spend ``required`` from the budget, or return the amount to approve first."""
+        with self._lock:
+            if self._budget is None:
+                raise ValueError("Allowance must be synced before reserving")
+            if self._budget >= required:
+                self._budget -= required
+                return None
+            return self.approval_amount(required)
+
+    def approved(self, amount: int, reserved: int) -> None:
+        """Record an ``approve(amount)`` that was sent to cover a ``reserved`` spend."""
+        with self._lock:
+            self._budget = amount - reserved
 
 
 def approve_usdc(
@@ -13,7 +83,57 @@ def approve_usdc(
     amount: int,
     confirmations: int = DEFAULT_CONFIRMATIONS,
 ) -> None:
+    """Make sure the perp manager may spend ``amount`` USDC, approving only if needed.
+
+    Waits for ``confirmations`` blocks on the approval before returning.
+    """
+    deployments = context.deployments()
+    allowances = context.allowances
+
+    if not allowances.synced:
+        allowances.sync(
+            context._usdc.functions.allowance(
+                context.account.address, deployments.perp_manager
+            ).call()
+        )
+
+    target = allowances.reserve(amount)
+    if target is None:
+        return
+
+    contract_fn = context._usdc.functions.approve(deployments.perp_manager, target)
+    try:
+        context.execute_transaction(contract_fn, confirmations=confirmations)
+    except Exception:
+        allowances.invalidate()
+        raise
+    allowances.approved(target, amount)
+
+
+async def async_approve_usdc(
+    context: AsyncPerpCityContext,
+    amount: int,
+    confirmations: int = DEFAULT_CONFIRMATIONS,
+) -> None:
+    """Async counterpart of :func:`approve_usdc`."""
     deployments = context.deployments()
+    allowances = context.allowances
+
+    if not allowances.synced:
+        allowances.sync(
+            await context._usdc.functions.allowance(
+                context.account.address, deployments.perp_manager
+            ).call()
+        )
+
+    target = allowances.reserve(amount)
+    if target is None:
+        return
 
-    contract_fn = context._usdc.functions.approve(deployments.perp_manager, amount)
-    context.execute_transaction(contract_fn)
+    contract_fn = context._usdc.functions.approve(deployments.perp_manager, target)
+    try:
+        await context.execute_transaction(contract_fn, confirmations=confirmations)
+    except Exception:
+        allowances.invalidate()
+        raise
+    allowances.approved(target, amount)
@@ -1,2 +1,12 @@
 NUMBER_1E6: int = 1_000_000
 Q96: int = 2**96  # 79228162514264337593543950336
+
+# Multicall3 is deployed at the same address on Base, Base Sepolia and most EVM chains.
+MULTICALL3_ADDRESS: str = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+# Tick range of Uniswap v4 pools (TickMath.MIN_TICK / MAX_TICK)
+MIN_TICK: int = -887272
+MAX_TICK: int = 887272
+# Sqrt prices at MIN_TICK and MAX_TICK (TickMath.MIN_SQRT_PRICE / MAX_SQRT_PRICE)
+MIN_SQRT_PRICE: int = 4295128739
+MAX_SQRT_PRICE: int = 1461446703485210103287273052203988822378723970342
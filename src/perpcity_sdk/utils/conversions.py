@@ -1,6 +1,7 @@
 import math
 
 from .constants import NUMBER_1E6, Q96
+from .tick_math import get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
 
 
 def price_to_sqrt_price_x96(price: float) -> int:
@@ -35,6 +36,14 @@ def price_to_tick(price: float, round_down: bool) -> int:
     return math.floor(log_price) if round_down else math.ceil(log_price)
 
 
+def sqrt_price_x96_to_tick(sqrt_price_x96: int, round_down: bool) -> int:
+    """Exact tick of a ``sqrtPriceX96``, without the float error of :func:`price_to_tick`."""
+    tick = get_tick_at_sqrt_ratio(sqrt_price_x96)
+    if round_down or get_sqrt_ratio_at_tick(tick) == sqrt_price_x96:
+        return tick
+    return tick + 1
+
+
 def tick_to_price(tick: int) -> float:
     return 1.0001**tick
 
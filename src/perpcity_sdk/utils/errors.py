@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, TypeVar
@@ -78,6 +78,35 @@ class ValidationError(PerpCityError):
         super().__init__(message, cause)
 
 
+class CassetteMissError(RPCError):
+    """A replayed cassette holds no response for a request.
+
+    ``method`` and ``params`` are the request as it reached the provider.
+    """
+
+    def __init__(self, method: str, params: Any, cause: Exception | None = None) -> None:
+        super().__init__(f"No recorded response for {method} with params {params!r}", cause)
+        self.method = method
+        self.params = params
+
+
+class PipelinedTransactionError(PerpCityError):
+    """One or more transactions of a pipelined submission failed.
+
+    ``results`` maps each transaction's label to its receipt, or to the error it failed
+    with, so callers can tell e.g. a mined approval from a reverted open.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        results: dict[str, dict[str, Any] | PerpCityError],
+        cause: Exception | None = None,
+    ) -> None:
+        super().__init__(message, cause)
+        self.results = results
+
+
 _POOL_MANAGER_ERRORS = {
     "CurrencyNotSettled",
     "PoolNotInitialized",
@@ -506,3 +535,13 @@ def with_error_handling(fn: Callable[[], T], context: str) -> T:
     except Exception as e:
         parsed = parse_contract_error(e)
         raise PerpCityError(f"{context}: {parsed}", cause=e) from e
+
+
+async def async_with_error_handling(fn: Callable[[], Awaitable[T]], context: str) -> T:
+    try:
+        return await fn()
+    except PerpCityError:
+        raise
+    except Exception as e:
+        parsed = parse_contract_error(e)
+        raise PerpCityError(f"{context}: {parsed}", cause=e) from e
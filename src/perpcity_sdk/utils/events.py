@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import sys
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any, TypeVar, overload
+
+from eth_abi.abi import decode as abi_decode
+from eth_abi.grammar import parse as parse_abi_type
+from eth_utils.abi import event_abi_to_log_topic
+from eth_utils.address import to_checksum_address
+from hexbytes import HexBytes
+
+from ..abis import PERP_MANAGER_ABI
+from ..abis.selectors import PERP_MANAGER_TOPICS
+from ..types import (
+    MarginAdjustedEvent,
+    NotionalAdjustedEvent,
+    PerpCreatedEvent,
+    PositionClosedEvent,
+    PositionOpenedEvent,
+    TransferEvent,
+)
+
+R = TypeVar("R")
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _bytes_to_hex(value: bytes) -> str:
+    # Fixed-size bytes in PerpManager events are perp ids, repeated across many records
+    return sys.intern("0x" + value.hex())
+
+
+def _converter(abi_type: str) -> Callable[[Any], Any]:
+    if abi_type == "address":
+        return to_checksum_address
+    if abi_type.startswith("bytes") and abi_type != "bytes" and "[" not in abi_type:
+        return _bytes_to_hex
+    return _identity
+
+
+def _to_int(value: Any) -> int | None:
+    if value is None or isinstance(value, int):
+        return value
+    return int(value, 16)
+
+
+def _to_hex(value: Any) -> str | None:
+    if value is None:
+        return None
+    return HexBytes(value).to_0x_hex()
+
+
+class _EventSpec:
+    __slots__ = ("record", "topic_types", "topic_count", "data_types", "slots", "converters")
+
+    def __init__(self, event_abi: dict[str, Any], record: type) -> None:
+        inputs = event_abi["inputs"]
+        self.record = record
+        # Indexed dynamic values are only present as their keccak hash, kept as hex
+        self.topic_types = [
+            None if parse_abi_type(i["type"]).is_dynamic else i["type"]
+            for i in inputs
+            if i["indexed"]
+        ]
+        self.topic_count = len(self.topic_types) + 1
+        self.data_types = [i["type"] for i in inputs if not i["indexed"]]
+        # Position of each decoded value in ABI input order: topics first, then data
+        indexed = [n for n, i in enumerate(inputs) if i["indexed"]]
+        not_indexed = [n for n, i in enumerate(inputs) if not i["indexed"]]
+        self.slots = indexed + not_indexed
+        self.converters = [_converter(i["type"]) for i in inputs]
+
+    def decode(self, topics: list[Any], data: Any) -> list[Any]:
+        values: list[Any] = []
+        for abi_type, topic in zip(self.topic_types, topics[1:], strict=True):
+            raw = bytes(HexBytes(topic))
+            values.append(raw if abi_type is None else abi_decode([abi_type], raw)[0])
+        if self.data_types:
+            values.extend(abi_decode(self.data_types, bytes(HexBytes(data))))
+
+        args: list[Any] = [None] * len(values)
+        for slot, value in zip(self.slots, values, strict=True):
+            args[slot] = self.converters[slot](value)
+        return args
+
+
+class EventDecoder:
+    """Decodes logs into typed event records.
+
+    Event topic hashes are computed once from the ABI, or taken from ``topics`` (event
+    name to ``0x`` hex, see :mod:`perpcity_sdk.abis.selectors`), so each log costs a
+    dict lookup on ``topics[0]``; logs from other contracts or unknown events are
+    skipped without decoding. Logs may be web3 receipt entries or raw ``eth_getLogs``
+    results.
+    """
+
+    def __init__(
+        self,
+        abi: list[Any],
+        records: Mapping[str, type],
+        topics: Mapping[str, str] | None = None,
+    ) -> None:
+        self._specs: dict[bytes, _EventSpec] = {}
+        self._topics: dict[type, str] = {}
+        for entry in abi:
+            if entry.get("type") != "event" or entry["name"] not in records:
+                continue
+            record = records[entry["name"]]
+            if topics is not None and entry["name"] in topics:
+                topic = bytes.fromhex(topics[entry["name"]][2:])
+            else:
+                topic = event_abi_to_log_topic(entry)
+            self._specs[topic] = _EventSpec(entry, record)
+            self._topics[record] = "0x" + topic.hex()
+
+    def topic(self, record: type) -> str:
+        """The ``topics[0]`` hash of the event decoded into ``record``, for log filters."""
+        return self._topics[record]
+
+    def decode_log(self, log: Mapping[str, Any]) -> Any | None:
+        topics = log["topics"]
+        if not topics:
+            return None
+        spec = self._specs.get(bytes(HexBytes(topics[0])))
+        # An event with the same signature but different indexing (e.g. an ERC20 rather
+        # than ERC721 Transfer) has a different topic count
+        if spec is None or len(topics) != spec.topic_count:
+            return None
+        return self._build(spec, log)
+
+    @overload
+    def decode_logs(
+        self, logs: Iterable[Mapping[str, Any]], record: type[R], address: str | None = None
+    ) -> list[R]: ...
+
+    @overload
+    def decode_logs(
+        self, logs: Iterable[Mapping[str, Any]], record: None = None, address: str | None = None
+    ) -> list[Any]: ...
+
+    def decode_logs(
+        self,
+        logs: Iterable[Mapping[str, Any]],
+        record: type[Any] | None = None,
+        address: str | None = None,
+    ) -> list[Any]:
+        """Decode every log in ``logs``, keeping only ``record`` events emitted by ``address``."""
+        address_lower = address.lower() if address is not None else None
+        decoded: list[Any] = []
+        for log in logs:
+            if address_lower is not None and log["address"].lower() != address_lower:
+                continue
+            topics = log["topics"]
+            if not topics:
+                continue
+            spec = self._specs.get(bytes(HexBytes(topics[0])))
+            if spec is None or (record is not None and spec.record is not record):
+                continue
+            if len(topics) != spec.topic_count:
+                continue
+            decoded.append(self._build(spec, log))
+        return decoded
+
+    @overload
+    def decode_receipt(
+        self, receipt: Mapping[str, Any], record: type[R], address: str | None = None
+    ) -> list[R]: ...
+
+    @overload
+    def decode_receipt(
+        self, receipt: Mapping[str, Any], record: None = None, address: str | None = None
+    ) -> list[Any]: ...
+
+    def decode_receipt(
+        self,
+        receipt: Mapping[str, Any],
+        record: type[Any] | None = None,
+        address: str | None = None,
+    ) -> list[Any]:
+        return self.decode_logs(receipt.get("logs", []), record, address)
+
+    @staticmethod
+    def _build(spec: _EventSpec, log: Mapping[str, Any]) -> Any:
+        return spec.record(
+            *spec.decode(log["topics"], log["data"]),
+            address=to_checksum_address(log["address"]),
+            block_number=_to_int(log.get("blockNumber")),
+            transaction_hash=_to_hex(log.get("transactionHash")),
+            log_index=_to_int(log.get("logIndex")),
+        )
+
+
+PERP_MANAGER_EVENTS = EventDecoder(
+    PERP_MANAGER_ABI,
+    {
+        "PerpCreated": PerpCreatedEvent,
+        "PositionOpened": PositionOpenedEvent,
+        "PositionClosed": PositionClosedEvent,
+        "MarginAdjusted": MarginAdjustedEvent,
+        "NotionalAdjusted": NotionalAdjustedEvent,
+        "Transfer": TransferEvent,
+    },
+    PERP_MANAGER_TOPICS,
+)
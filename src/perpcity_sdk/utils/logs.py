@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from web3 import AsyncWeb3, Web3
+
+DEFAULT_BLOCK_RANGE = 2_000
+MAX_BLOCK_RANGE = 10_000
+
+# Substrings of the errors providers return when a getLogs request spans too many blocks
+# or matches too many logs (Alchemy, Infura, QuickNode, public Base nodes, ...). Rate
+# limits ("too many requests", -32005 "limit exceeded", HTTP 429) must not match:
+# splitting the range would only send more requests to a throttled endpoint.
+_RANGE_ERROR_PATTERNS = (
+    "block range",
+    "blocks range",
+    "range too large",
+    "range is too large",
+    "range exceeds",
+    "query returned more than",
+    "too many results",
+    "response size",
+    "query timeout",
+)
+
+
+def is_range_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(pattern in message for pattern in _RANGE_ERROR_PATTERNS)
+
+
+def iter_log_chunks(
+    w3: Web3,
+    address: str | Sequence[str],
+    topics: Sequence[Any],
+    from_block: int,
+    to_block: int,
+    block_range: int = DEFAULT_BLOCK_RANGE,
+    max_block_range: int = MAX_BLOCK_RANGE,
+) -> Iterator[tuple[int, int, list[Any]]]:
+    """Fetch logs for ``[from_block, to_block]`` as consecutive ``(start, end, logs)`` chunks.
+
+    The range starts at ``block_range`` blocks. When the provider rejects a request as
+    too large, the chunk is halved and retried; after each success the range grows
+    again, up to ``max_block_range``. Chunks are yielded in block order, so a caller can
+    checkpoint after each one and resume from ``end + 1``.
+    """
+    if block_range <= 0:
+        raise ValueError(f"Invalid block range: {block_range} must be positive")
+
+    span = min(block_range, max_block_range)
+    start = from_block
+    while start <= to_block:
+        end = min(start + span - 1, to_block)
+        try:
+            logs = w3.eth.get_logs(
+                {
+                    "address": address,  # type: ignore[typeddict-item]
+                    "topics": list(topics),
+                    "fromBlock": start,
+                    "toBlock": end,
+                }
+            )
+        except Exception as e:
+            if end == start or not is_range_error(e):
+                raise
+            span = max(1, (end - start + 1) // 2)
+            continue
+
+        yield start, end, list(logs)
+        start = end + 1
+        span = min(span * 2, max_block_range)
+
+
+async def async_iter_log_chunks(
+    w3: AsyncWeb3[Any],
+    address: str | Sequence[str],
+    topics: Sequence[Any],
+    from_block: int,
+    to_block: int,
+    block_range: int = DEFAULT_BLOCK_RANGE,
+    max_block_range: int = MAX_BLOCK_RANGE,
+) -> AsyncIterator[tuple[int, int, list[Any]]]:
+    """Async variant of :func:`iter_log_chunks`."""
+    if block_range <= 0:
+        raise ValueError(f"Invalid block range: {block_range} must be positive")
+
+    span = min(block_range, max_block_range)
+    start = from_block
+    while start <= to_block:
+        end = min(start + span - 1, to_block)
+        try:
+            logs = await w3.eth.get_logs(
+                {
+                    "address": address,  # type: ignore[typeddict-item]
+                    "topics": list(topics),
+                    "fromBlock": start,
+                    "toBlock": end,
+                }
+            )
+        except Exception as e:
+            if end == start or not is_range_error(e):
+                raise
+            span = max(1, (end - start + 1) // 2)
+            continue
+
+        yield start, end, list(logs)
+        start = end + 1
+        span = min(span * 2, max_block_range)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import threading
+
+from ..types import Bounds, Fees
+
+
+class ModuleConstantsCache:
+    """Process-wide cache of fee and margin-ratio module constants.
+
+    ``CREATOR_FEE``, ``MIN_TAKER_RATIO`` and the other values read from the modules at
+    ``cfg.fees`` and ``cfg.margin_ratios`` are compile-time constants, and many perps
+    share the same modules. Entries are keyed by ``(chain_id, module address)`` and
+    never expire.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._fees: dict[tuple[int, str], Fees] = {}
+        self._bounds: dict[tuple[int, str], Bounds] = {}
+
+    def get_fees(self, chain_id: int, fees_module: str) -> Fees | None:
+        return self._fees.get((chain_id, fees_module.lower()))
+
+    def set_fees(self, chain_id: int, fees_module: str, fees: Fees) -> None:
+        with self._lock:
+            self._fees[(chain_id, fees_module.lower())] = fees
+
+    def get_bounds(self, chain_id: int, margin_ratios_module: str) -> Bounds | None:
+        return self._bounds.get((chain_id, margin_ratios_module.lower()))
+
+    def set_bounds(self, chain_id: int, margin_ratios_module: str, bounds: Bounds) -> None:
+        with self._lock:
+            self._bounds[(chain_id, margin_ratios_module.lower())] = bounds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fees.clear()
+            self._bounds.clear()
+
+
+MODULE_CONSTANTS = ModuleConstantsCache()
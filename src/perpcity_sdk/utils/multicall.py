@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from eth_abi.abi import decode as abi_decode
+from eth_abi.abi import encode as abi_encode
+from eth_utils.abi import get_abi_output_types
+from web3._utils.abi import map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.contract.async_contract import AsyncContract, AsyncContractFunction
+from web3.contract.contract import Contract, ContractFunction
+from web3.exceptions import ContractLogicError
+from web3.types import BlockIdentifier
+
+from ..abis.selectors import MULTICALL3_SELECTORS, PERP_MANAGER_ERRORS
+
+_ERROR_STRING_SELECTOR = bytes.fromhex("08c379a0")  # Error(string)
+_PANIC_SELECTOR = bytes.fromhex("4e487b71")  # Panic(uint256)
+_AGGREGATE3_SELECTOR = MULTICALL3_SELECTORS["aggregate3((address,bool,bytes)[])"]
+
+
+def decode_revert_data(data: bytes) -> ContractLogicError:
+    """Turn raw revert bytes into the same exception web3.py raises for a reverted eth_call."""
+    data_hex = "0x" + data.hex()
+
+    if len(data) < 4:
+        return ContractLogicError("execution reverted", data=data_hex)
+
+    selector, payload = data[:4], data[4:]
+    try:
+        if selector == _ERROR_STRING_SELECTOR:
+            (reason,) = abi_decode(["string"], payload)
+            return ContractLogicError(f"execution reverted: {reason}", data=data_hex)
+        if selector == _PANIC_SELECTOR:
+            (code,) = abi_decode(["uint256"], payload)
+            return ContractLogicError(f"execution reverted: Panic({code:#x})", data=data_hex)
+        if selector in PERP_MANAGER_ERRORS:
+            name, input_types = PERP_MANAGER_ERRORS[selector]
+            args = abi_decode(input_types, payload)
+            args_str = ", ".join(str(a) for a in args)
+            return ContractLogicError(f"execution reverted: {name}({args_str})", data=data_hex)
+    except Exception:
+        pass
+
+    return ContractLogicError(f"execution reverted: {data_hex}", data=data_hex)
+
+
+@dataclass(frozen=True)
+class MulticallResult:
+    success: bool
+    value: Any = None
+    error: Exception | None = None
+
+    def unwrap(self) -> Any:
+        if not self.success:
+            assert self.error is not None
+            raise self.error
+        return self.value
+
+
+def _decode_return_data(fn: ContractFunction | AsyncContractFunction, data: bytes) -> Any:
+    output_types = get_abi_output_types(fn.abi)
+    decoded = abi_decode(output_types, data)
+    normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, decoded)
+    # Match ContractFunction.call(): single outputs are unwrapped, multiple stay a list
+    if len(normalized) == 1:
+        return normalized[0]
+    return list(normalized)
+
+
+def _call_structs(calls: Sequence[Any]) -> list[tuple[str, bool, str]]:
+    return [(fn.address, True, fn._encode_transaction_data()) for fn in calls]
+
+
+def _decode_results(
+    calls: Sequence[Any], raw_results: Sequence[tuple[bool, bytes]]
+) -> list[MulticallResult]:
+    results: list[MulticallResult] = []
+    for fn, (success, return_data) in zip(calls, raw_results, strict=True):
+        if not success:
+            results.append(MulticallResult(False, error=decode_revert_data(return_data)))
+            continue
+        try:
+            results.append(MulticallResult(True, _decode_return_data(fn, return_data)))
+        except Exception as e:
+            results.append(MulticallResult(False, error=e))
+    return results
+
+
+def aggregate3(
+    multicall: Contract | None,
+    calls: Sequence[ContractFunction],
+    block_identifier: BlockIdentifier = "latest",
+) -> list[MulticallResult]:
+    """Execute ``calls`` in a single Multicall3 ``aggregate3`` eth_call.
+
+    Every call is sent with ``allowFailure`` set, so one revert does not discard the
+    other results. Each result is decoded against its own function ABI, and failures
+    carry a ``ContractLogicError`` built from the revert data.
+
+    When ``multicall`` is ``None`` (chains without Multicall3) the calls are made one
+    by one against the same ``block_identifier`` and the results have the same shape.
+    """
+    if not calls:
+        return []
+
+    if multicall is None:
+        results: list[MulticallResult] = []
+        for fn in calls:
+            try:
+                results.append(MulticallResult(True, fn.call(block_identifier=block_identifier)))
+            except Exception as e:
+                results.append(MulticallResult(False, error=e))
+        return results
+
+    raw_results = multicall.functions.aggregate3(_call_structs(calls)).call(
+        block_identifier=block_identifier
+    )
+    return _decode_results(calls, raw_results)
+
+
+def aggregate3_encoded(
+    multicall: Contract,
+    calls: Sequence[tuple[str, bytes]],
+    block_identifier: BlockIdentifier = "latest",
+) -> list[tuple[bool, bytes]]:
+    """:func:`aggregate3` for pre-encoded ``(target, calldata)`` pairs.
+
+    Returns the raw ``(success, return_data)`` of every call for the caller to decode.
+    This skips web3's per-call ABI encoding and result normalization, which cost far
+    more than the eth_call itself in batches of hundreds of calls.
+    """
+    if not calls:
+        return []
+    data = _AGGREGATE3_SELECTOR + abi_encode(
+        ["(address,bool,bytes)[]"], [[(target, True, call_data) for target, call_data in calls]]
+    )
+    raw = multicall.w3.eth.call({"to": multicall.address, "data": data}, block_identifier)
+    (results,) = abi_decode(["(bool,bytes)[]"], raw)
+    return list(results)
+
+
+def aggregate3_chunked(
+    multicall: Contract | None,
+    calls: Sequence[ContractFunction],
+    chunk_size: int,
+    block_identifier: BlockIdentifier = "latest",
+) -> list[MulticallResult]:
+    """Split ``calls`` into ``aggregate3`` requests of at most ``chunk_size`` calls.
+
+    Providers cap eth_call gas and response size, so large batches have to be split.
+    When reading at ``"latest"``, the first chunk also reads the block number, in place
+    of one of its calls, and every later chunk is pinned to it, so the combined result is
+    a single-block snapshot.
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size} must be positive")
+
+    if multicall is None or len(calls) <= chunk_size or block_identifier != "latest":
+        results: list[MulticallResult] = []
+        for start in range(0, len(calls), chunk_size):
+            chunk = calls[start : start + chunk_size]
+            results.extend(aggregate3(multicall, chunk, block_identifier))
+        return results
+
+    # The block number read counts towards the first chunk's cap
+    head = chunk_size - 1
+    first = aggregate3(
+        multicall, [*calls[:head], multicall.functions.getBlockNumber()], block_identifier
+    )
+    block = int(first[-1].unwrap())
+    results = first[:-1]
+    for start in range(head, len(calls), chunk_size):
+        results.extend(aggregate3(multicall, calls[start : start + chunk_size], block))
+    return results
+
+
+async def async_aggregate3(
+    multicall: AsyncContract | None,
+    calls: Sequence[AsyncContractFunction],
+    block_identifier: BlockIdentifier = "latest",
+) -> list[MulticallResult]:
+    """Async counterpart of :func:`aggregate3`.
+
+    Without Multicall3 the calls are issued concurrently rather than one by one.
+    """
+    if not calls:
+        return []
+
+    if multicall is None:
+
+        async def _call(fn: AsyncContractFunction) -> MulticallResult:
+            try:
+                return MulticallResult(True, await fn.call(block_identifier=block_identifier))
+            except Exception as e:
+                return MulticallResult(False, error=e)
+
+        return list(await asyncio.gather(*(_call(fn) for fn in calls)))
+
+    raw_results = await multicall.functions.aggregate3(_call_structs(calls)).call(
+        block_identifier=block_identifier
+    )
+    return _decode_results(calls, raw_results)
+
+
+async def async_aggregate3_chunked(
+    multicall: AsyncContract | None,
+    calls: Sequence[AsyncContractFunction],
+    chunk_size: int,
+    block_identifier: BlockIdentifier = "latest",
+) -> list[MulticallResult]:
+    """Async counterpart of :func:`aggregate3_chunked`; chunks after the first run concurrently."""
+    if chunk_size <= 0:
+        raise ValueError(f"Invalid chunk size: {chunk_size} must be positive")
+
+    if multicall is not None and len(calls) > chunk_size and block_identifier == "latest":
+        first = await async_aggregate3(
+            multicall,
+            [*calls[: chunk_size - 1], multicall.functions.getBlockNumber()],
+            block_identifier,
+        )
+        block_identifier = int(first[-1].unwrap())
+        head, rest = first[:-1], calls[chunk_size - 1 :]
+    else:
+        head, rest = [], calls
+
+    chunks = await asyncio.gather(
+        *(
+            async_aggregate3(multicall, rest[start : start + chunk_size], block_identifier)
+            for start in range(0, len(rest), chunk_size)
+        )
+    )
+    return head + [result for chunk in chunks for result in chunk]
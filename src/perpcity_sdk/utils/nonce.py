@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+
+from web3.exceptions import Web3RPCError
+
+_NONCE_ERROR_PATTERNS = (
+    "nonce too low",
+    "replacement transaction underpriced",
+    "replacement underpriced",
+    "invalid nonce",
+)
+
+# Gateways answer some timeouts with a JSON-RPC error, after the node may have accepted
+# the transaction
+_UNKNOWN_OUTCOME_PATTERNS = (
+    "timeout",
+    "timed out",
+)
+
+
+def is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(pattern in message for pattern in _NONCE_ERROR_PATTERNS)
+
+
+def is_rejected_transaction(error: Exception) -> bool:
+    """Whether the node answered a send with an error, so the transaction was not accepted.
+
+    Transport errors and timeouts leave the outcome unknown: the node may have accepted
+    the transaction before the connection failed.
+    """
+    if not isinstance(error, Web3RPCError):
+        return False
+    message = str(error).lower()
+    return not any(pattern in message for pattern in _UNKNOWN_OUTCOME_PATTERNS)
+
+
+class NonceManager:
+    """Thread-safe local nonce allocator.
+
+    The first allocation syncs with the chain's pending nonce; later allocations are
+    handed out locally, so several transactions can be sent back-to-back without a
+    ``get_transaction_count`` round trip each. Call :meth:`resync` when the node
+    rejects a nonce or a send's outcome is unknown, so the next allocation re-reads the
+    pending nonce, and :meth:`release` when the node rejects the transaction.
+    """
+
+    def __init__(self, fetch_pending_nonce: Callable[[], int]) -> None:
+        self._fetch = fetch_pending_nonce
+        self._lock = threading.Lock()
+        self._next: int | None = None
+
+    def allocate(self) -> int:
+        with self._lock:
+            if self._next is None:
+                self._next = int(self._fetch())
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def resync(self) -> None:
+        with self._lock:
+            self._next = None
+
+    def release(self, nonce: int) -> bool:
+        """Hand back an unused ``nonce`` if it is still the latest one allocated.
+
+        A nonce allocated before another send's cannot be reused without handing out
+        duplicates, so it is kept and ``False`` is returned.
+        """
+        with self._lock:
+            if self._next != nonce + 1:
+                return False
+            self._next = nonce
+            return True
+
+
+class AsyncNonceManager:
+    """asyncio counterpart of :class:`NonceManager`."""
+
+    def __init__(self, fetch_pending_nonce: Callable[[], Awaitable[int]]) -> None:
+        self._fetch = fetch_pending_nonce
+        self._lock = asyncio.Lock()
+        self._next: int | None = None
+
+    async def allocate(self) -> int:
+        async with self._lock:
+            if self._next is None:
+                self._next = int(await self._fetch())
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def resync(self) -> None:
+        self._next = None
+
+    def release(self, nonce: int) -> bool:
+        """Async counterpart of :meth:`NonceManager.release`."""
+        if self._next != nonce + 1:
+            return False
+        self._next = nonce
+        return True
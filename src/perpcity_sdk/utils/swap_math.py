@@ -0,0 +1,168 @@
+"""Integer ports of Uniswap v4 ``SqrtPriceMath`` and ``SwapMath``.
+
+Amounts are token units, prices Q64.96 sqrt prices and fees pips (millionths), as
+in the contracts. Python ints do not overflow, so ``FullMath`` reduces to ``//`` and
+the overflow branches are only kept where they change the rounded result.
+"""
+
+from .constants import Q96
+
+MAX_SWAP_FEE = 1_000_000
+
+_UINT256_LIMIT = 1 << 256
+
+
+def _div_rounding_up(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def _mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    return -(-(a * b) // denominator)
+
+
+def get_next_sqrt_price_from_amount0_rounding_up(
+    sqrt_price_x96: int, liquidity: int, amount: int, add: bool
+) -> int:
+    if amount == 0:
+        return sqrt_price_x96
+    numerator1 = liquidity << 96
+    product = amount * sqrt_price_x96
+
+    if add:
+        if product < _UINT256_LIMIT and numerator1 + product < _UINT256_LIMIT:
+            return _mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 + product)
+        return _div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount)
+
+    if product >= _UINT256_LIMIT or numerator1 <= product:
+        raise ValueError("Price overflow: not enough liquidity for the output amount")
+    return _mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 - product)
+
+
+def get_next_sqrt_price_from_amount1_rounding_down(
+    sqrt_price_x96: int, liquidity: int, amount: int, add: bool
+) -> int:
+    if add:
+        return sqrt_price_x96 + (amount << 96) // liquidity
+
+    quotient = _div_rounding_up(amount << 96, liquidity)
+    if sqrt_price_x96 <= quotient:
+        raise ValueError("Not enough liquidity for the output amount")
+    return sqrt_price_x96 - quotient
+
+
+def get_next_sqrt_price_from_input(
+    sqrt_price_x96: int, liquidity: int, amount_in: int, zero_for_one: bool
+) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount0_rounding_up(
+            sqrt_price_x96, liquidity, amount_in, True
+        )
+    return get_next_sqrt_price_from_amount1_rounding_down(
+        sqrt_price_x96, liquidity, amount_in, True
+    )
+
+
+def get_next_sqrt_price_from_output(
+    sqrt_price_x96: int, liquidity: int, amount_out: int, zero_for_one: bool
+) -> int:
+    if zero_for_one:
+        return get_next_sqrt_price_from_amount1_rounding_down(
+            sqrt_price_x96, liquidity, amount_out, False
+        )
+    return get_next_sqrt_price_from_amount0_rounding_up(
+        sqrt_price_x96, liquidity, amount_out, False
+    )
+
+
+def get_amount0_delta(
+    sqrt_price_a_x96: int, sqrt_price_b_x96: int, liquidity: int, round_up: bool
+) -> int:
+    lower, upper = sorted((sqrt_price_a_x96, sqrt_price_b_x96))
+    numerator1 = liquidity << 96
+    numerator2 = upper - lower
+    if round_up:
+        return _div_rounding_up(_mul_div_rounding_up(numerator1, numerator2, upper), lower)
+    return numerator1 * numerator2 // upper // lower
+
+
+def get_amount1_delta(
+    sqrt_price_a_x96: int, sqrt_price_b_x96: int, liquidity: int, round_up: bool
+) -> int:
+    difference = abs(sqrt_price_a_x96 - sqrt_price_b_x96)
+    if round_up:
+        return _mul_div_rounding_up(liquidity, difference, Q96)
+    return liquidity * difference // Q96
+
+
+def compute_swap_step(
+    sqrt_price_current_x96: int,
+    sqrt_price_target_x96: int,
+    liquidity: int,
+    amount_remaining: int,
+    fee_pips: int,
+) -> tuple[int, int, int, int]:
+    """One swap step within a single liquidity range, as ``SwapMath.computeSwapStep``.
+
+    A negative ``amount_remaining`` is an exact input, a positive one an exact output.
+    Returns ``(sqrt_price_next_x96, amount_in, amount_out, fee_amount)``.
+    """
+    zero_for_one = sqrt_price_current_x96 >= sqrt_price_target_x96
+
+    if amount_remaining < 0:
+        remaining_less_fee = -amount_remaining * (MAX_SWAP_FEE - fee_pips) // MAX_SWAP_FEE
+        if zero_for_one:
+            amount_in = get_amount0_delta(
+                sqrt_price_target_x96, sqrt_price_current_x96, liquidity, True
+            )
+        else:
+            amount_in = get_amount1_delta(
+                sqrt_price_current_x96, sqrt_price_target_x96, liquidity, True
+            )
+
+        if remaining_less_fee >= amount_in:
+            sqrt_price_next_x96 = sqrt_price_target_x96
+            fee_amount = (
+                amount_in
+                if fee_pips == MAX_SWAP_FEE
+                else _mul_div_rounding_up(amount_in, fee_pips, MAX_SWAP_FEE - fee_pips)
+            )
+        else:
+            amount_in = remaining_less_fee
+            sqrt_price_next_x96 = get_next_sqrt_price_from_input(
+                sqrt_price_current_x96, liquidity, remaining_less_fee, zero_for_one
+            )
+            fee_amount = -amount_remaining - amount_in
+
+        if zero_for_one:
+            amount_out = get_amount1_delta(
+                sqrt_price_next_x96, sqrt_price_current_x96, liquidity, False
+            )
+        else:
+            amount_out = get_amount0_delta(
+                sqrt_price_current_x96, sqrt_price_next_x96, liquidity, False
+            )
+        return sqrt_price_next_x96, amount_in, amount_out, fee_amount
+
+    if zero_for_one:
+        amount_out = get_amount1_delta(
+            sqrt_price_target_x96, sqrt_price_current_x96, liquidity, False
+        )
+    else:
+        amount_out = get_amount0_delta(
+            sqrt_price_current_x96, sqrt_price_target_x96, liquidity, False
+        )
+
+    if amount_remaining >= amount_out:
+        sqrt_price_next_x96 = sqrt_price_target_x96
+    else:
+        amount_out = amount_remaining
+        sqrt_price_next_x96 = get_next_sqrt_price_from_output(
+            sqrt_price_current_x96, liquidity, amount_out, zero_for_one
+        )
+
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_price_next_x96, sqrt_price_current_x96, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_price_current_x96, sqrt_price_next_x96, liquidity, True)
+    fee_amount = _mul_div_rounding_up(amount_in, fee_pips, MAX_SWAP_FEE - fee_pips)
+    return sqrt_price_next_x96, amount_in, amount_out, fee_amount
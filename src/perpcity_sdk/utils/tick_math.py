@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_right
+from collections.abc import Iterable
+from pathlib import Path
+
+from .constants import MAX_SQRT_PRICE, MAX_TICK, MIN_SQRT_PRICE, MIN_TICK
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """``sqrtPriceX96`` at ``tick``, as Uniswap v4 ``TickMath.getSqrtPriceAtTick``."""
+    abs_tick = abs(tick)
+    if abs_tick > MAX_TICK:
+        raise ValueError(f"Invalid tick: {tick} is outside [{MIN_TICK}, {MAX_TICK}]")
+
+    ratio = (
+        0xFFFCB933BD6FAD37AA2D162D1A594001
+        if abs_tick & 0x1
+        else 0x100000000000000000000000000000000
+    )
+    if abs_tick & 0x2:
+        ratio = (ratio * 0xFFF97272373D413259A46990580E213A) >> 128
+    if abs_tick & 0x4:
+        ratio = (ratio * 0xFFF2E50F5F656932EF12357CF3C7FDCC) >> 128
+    if abs_tick & 0x8:
+        ratio = (ratio * 0xFFE5CACA7E10E4E61C3624EAA0941CD0) >> 128
+    if abs_tick & 0x10:
+        ratio = (ratio * 0xFFCB9843D60F6159C9DB58835C926644) >> 128
+    if abs_tick & 0x20:
+        ratio = (ratio * 0xFF973B41FA98C081472E6896DFB254C0) >> 128
+    if abs_tick & 0x40:
+        ratio = (ratio * 0xFF2EA16466C96A3843EC78B326B52861) >> 128
+    if abs_tick & 0x80:
+        ratio = (ratio * 0xFE5DEE046A99A2A811C461F1969C3053) >> 128
+    if abs_tick & 0x100:
+        ratio = (ratio * 0xFCBE86C7900A88AEDCFFC83B479AA3A4) >> 128
+    if abs_tick & 0x200:
+        ratio = (ratio * 0xF987A7253AC413176F2B074CF7815E54) >> 128
+    if abs_tick & 0x400:
+        ratio = (ratio * 0xF3392B0822B70005940C7A398E4B70F3) >> 128
+    if abs_tick & 0x800:
+        ratio = (ratio * 0xE7159475A2C29B7443B29C7FA6E889D9) >> 128
+    if abs_tick & 0x1000:
+        ratio = (ratio * 0xD097F3BDFD2022B8845AD8F792AA5825) >> 128
+    if abs_tick & 0x2000:
+        ratio = (ratio * 0xA9F746462D870FDF8A65DC1F90E061E5) >> 128
+    if abs_tick & 0x4000:
+        ratio = (ratio * 0x70D869A156D2A1B890BB3DF62BAF32F7) >> 128
+    if abs_tick & 0x8000:
+        ratio = (ratio * 0x31BE135F97D08FD981231505542FCFA6) >> 128
+    if abs_tick & 0x10000:
+        ratio = (ratio * 0x9AA508B5B7A84E1C677DE54F3E99BC9) >> 128
+    if abs_tick & 0x20000:
+        ratio = (ratio * 0x5D6AF8DEDB81196699C329225EE604) >> 128
+    if abs_tick & 0x40000:
+        ratio = (ratio * 0x2216E584F5FA1EA926041BEDFE98) >> 128
+    if abs_tick & 0x80000:
+        ratio = (ratio * 0x48A170391F7DC42444E8FA2) >> 128
+
+    if tick > 0:
+        ratio = ((1 << 256) - 1) // ratio
+
+    # Q128.128 to Q64.96, rounding up so that get_tick_at_sqrt_ratio inverts it exactly
+    return (ratio + (1 << 32) - 1) >> 32
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """The greatest tick whose sqrt ratio is at most ``sqrt_price_x96``.
+
+    Integer port of Uniswap v4 ``TickMath.getTickAtSqrtPrice``: a fixed-point log2 with
+    14 bits of fraction, narrowed to one of two candidate ticks and settled with
+    :func:`get_sqrt_ratio_at_tick`.
+    """
+    if not MIN_SQRT_PRICE <= sqrt_price_x96 < MAX_SQRT_PRICE:
+        raise ValueError(
+            f"Invalid sqrt price: {sqrt_price_x96} is outside [{MIN_SQRT_PRICE}, {MAX_SQRT_PRICE})"
+        )
+
+    ratio = sqrt_price_x96 << 32
+    msb = ratio.bit_length() - 1
+    r = ratio >> (msb - 127) if msb >= 128 else ratio << (127 - msb)
+
+    log_2 = (msb - 128) << 64
+    for shift in range(63, 49, -1):
+        r = (r * r) >> 127
+        f = r >> 128
+        log_2 |= f << shift
+        r >>= f
+
+    log_sqrt10001 = log_2 * 255738958999603826347141  # 128.128 number
+    tick_low = (log_sqrt10001 - 3402992956809132418596140100660247210) >> 128
+    tick_high = (log_sqrt10001 + 291339464771989622907027621153398088495) >> 128
+
+    if tick_low == tick_high:
+        return tick_low
+    return tick_high if get_sqrt_ratio_at_tick(tick_high) <= sqrt_price_x96 else tick_low
+
+
+# Table files: a header, then each sqrt ratio (< 2**160) as 20 big-endian bytes
+_TABLE_MAGIC = b"PCSQRT02"
+_TABLE_HEADER = struct.Struct(">8sII")  # magic, tick_spacing, entry count
+_ENTRY_SIZE = 20
+_BLOCK_BITS = 10
+_BLOCK_SIZE = 1 << _BLOCK_BITS
+_BLOCK_MASK = _BLOCK_SIZE - 1
+
+
+class SqrtRatioTable:
+    """:func:`get_sqrt_ratio_at_tick` for every tick on one ``tick_spacing`` grid.
+
+    The grid covers ``MIN_TICK`` to ``MAX_TICK``. In memory, entries are computed in
+    blocks of 1024 ticks the first time a block is used, so a table only costs what is
+    looked up. With ``path``, the full table is written to that file once and then
+    memory-mapped, so later processes share it without recomputing.
+    """
+
+    def __init__(self, tick_spacing: int, path: str | os.PathLike[str] | None = None) -> None:
+        if tick_spacing <= 0:
+            raise ValueError(f"Invalid tick spacing: {tick_spacing} must be positive")
+
+        self.tick_spacing = tick_spacing
+        self.min_tick = -(-MIN_TICK // tick_spacing) * tick_spacing
+        self.max_tick = MAX_TICK // tick_spacing * tick_spacing
+        self._size = (self.max_tick - self.min_tick) // tick_spacing + 1
+        self._blocks: list[list[int] | None] = [None] * -(-self._size // _BLOCK_SIZE)
+        self._mmap: mmap.mmap | None = None
+        # Every entry in one list, built on the first reverse lookup
+        self._values: list[int] | None = None
+        if path is not None:
+            self._mmap = self._open_file(Path(path))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, tick: object) -> bool:
+        return isinstance(tick, int) and self._index(tick) is not None
+
+    def sqrt_ratio(self, tick: int) -> int:
+        value = self.get(tick)
+        if value is None:
+            raise ValueError(
+                f"Tick {tick} is not on the tick spacing {self.tick_spacing} grid "
+                f"between {self.min_tick} and {self.max_tick}"
+            )
+        return value
+
+    def sqrt_ratios(self, ticks: Iterable[int]) -> list[int]:
+        return [self.sqrt_ratio(tick) for tick in ticks]
+
+    def values(self) -> list[int]:
+        """Every sqrt ratio on the grid in tick order; builds the whole table."""
+        if self._values is None:
+            if self._mmap is not None:
+                mm = self._mmap
+                start = _TABLE_HEADER.size
+                end = start + self._size * _ENTRY_SIZE
+                self._values = [
+                    int.from_bytes(mm[offset : offset + _ENTRY_SIZE], "big")
+                    for offset in range(start, end, _ENTRY_SIZE)
+                ]
+            else:
+                values: list[int] = []
+                for block_index, block in enumerate(self._blocks):
+                    if block is None:
+                        block = self._blocks[block_index] = self._build_block(block_index)
+                    values += block
+                self._values = values
+        return self._values
+
+    def tick_at(self, sqrt_price_x96: int) -> int:
+        """The greatest grid tick whose sqrt ratio is at most ``sqrt_price_x96``.
+
+        With a tick spacing of 1 this equals :func:`get_tick_at_sqrt_ratio`; otherwise it
+        is that tick rounded down to the grid. Found by binary search over
+        :meth:`values`.
+        """
+        return self.ticks_at((sqrt_price_x96,))[0]
+
+    def ticks_at(self, sqrt_prices_x96: Iterable[int]) -> list[int]:
+        values = self.values()
+        min_tick, spacing = self.min_tick, self.tick_spacing
+        ticks: list[int] = []
+        for sqrt_price in sqrt_prices_x96:
+            if not MIN_SQRT_PRICE <= sqrt_price < MAX_SQRT_PRICE:
+                raise ValueError(
+                    f"Invalid sqrt price: {sqrt_price} is outside "
+                    f"[{MIN_SQRT_PRICE}, {MAX_SQRT_PRICE})"
+                )
+            index = bisect_right(values, sqrt_price) - 1
+            if index < 0:
+                raise ValueError(
+                    f"Sqrt price {sqrt_price} is below tick {min_tick}, the lowest on the "
+                    f"tick spacing {spacing} grid"
+                )
+            ticks.append(min_tick + index * spacing)
+        return ticks
+
+    def get(self, tick: int) -> int | None:
+        """The sqrt ratio at ``tick``, or ``None`` when it is off the grid."""
+        # Inlined rather than via _index: this is the hot path of bulk range code
+        index, remainder = divmod(tick - self.min_tick, self.tick_spacing)
+        if remainder or index < 0 or index >= self._size:
+            return None
+        if self._mmap is not None:
+            offset = _TABLE_HEADER.size + index * _ENTRY_SIZE
+            return int.from_bytes(self._mmap[offset : offset + _ENTRY_SIZE], "big")
+
+        block = self._blocks[index >> _BLOCK_BITS]
+        if block is None:
+            # Concurrent builds of the same block compute identical values, so no lock
+            block_index = index >> _BLOCK_BITS
+            block = self._blocks[block_index] = self._build_block(block_index)
+        return block[index & _BLOCK_MASK]
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _index(self, tick: int) -> int | None:
+        index, remainder = divmod(tick - self.min_tick, self.tick_spacing)
+        if remainder or not 0 <= index < self._size:
+            return None
+        return index
+
+    def _build_block(self, block_index: int) -> list[int]:
+        first = block_index * _BLOCK_SIZE
+        last = min(first + _BLOCK_SIZE, self._size)
+        start_tick = self.min_tick + first * self.tick_spacing
+        return [
+            get_sqrt_ratio_at_tick(start_tick + i * self.tick_spacing) for i in range(last - first)
+        ]
+
+    def _open_file(self, path: Path) -> mmap.mmap:
+        header = _TABLE_HEADER.pack(_TABLE_MAGIC, self.tick_spacing, self._size)
+        expected_size = _TABLE_HEADER.size + self._size * _ENTRY_SIZE
+        valid = False
+        if path.exists() and path.stat().st_size == expected_size:
+            with path.open("rb") as f:
+                valid = f.read(_TABLE_HEADER.size) == header
+
+        if not valid:
+            # Write to a temporary file and rename, so readers never map a partial table
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with tmp_path.open("wb") as f:
+                f.write(header)
+                for block_index in range(len(self._blocks)):
+                    f.write(
+                        b"".join(
+                            value.to_bytes(_ENTRY_SIZE, "big")
+                            for value in self._build_block(block_index)
+                        )
+                    )
+            os.replace(tmp_path, path)
+
+        with path.open("rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+_TABLES: dict[int, SqrtRatioTable] = {}
+# Snapshot for lock-free iteration, replaced whenever a table is added
+_TABLE_LIST: tuple[SqrtRatioTable, ...] = ()
+_TABLES_LOCK = threading.Lock()
+
+
+def get_sqrt_ratio_table(
+    tick_spacing: int, path: str | os.PathLike[str] | None = None
+) -> SqrtRatioTable:
+    """The process-wide table for ``tick_spacing``; ``path`` applies when it is created.
+
+    Once created, :func:`sqrt_ratio_at_tick` also serves ticks on its grid.
+    """
+    global _TABLE_LIST
+
+    table = _TABLES.get(tick_spacing)
+    if table is None:
+        with _TABLES_LOCK:
+            table = _TABLES.get(tick_spacing)
+            if table is None:
+                table = _TABLES[tick_spacing] = SqrtRatioTable(tick_spacing, path)
+                _TABLE_LIST = tuple(_TABLES.values())
+    return table
+
+
+def clear_sqrt_ratio_tables() -> None:
+    global _TABLE_LIST
+
+    with _TABLES_LOCK:
+        _TABLE_LIST = ()
+        for table in _TABLES.values():
+            table.close()
+        _TABLES.clear()
+
+
+def sqrt_ratio_at_tick(tick: int, tick_spacing: int | None = None) -> int:
+    """:func:`get_sqrt_ratio_at_tick` served from the lookup tables.
+
+    With ``tick_spacing``, that spacing's table is used (and created if needed).
+    Otherwise any existing table whose grid contains ``tick`` is used. Ticks no table
+    covers are computed bit by bit.
+    """
+    if tick_spacing is not None:
+        value = get_sqrt_ratio_table(tick_spacing).get(tick)
+        if value is not None:
+            return value
+    else:
+        for table in _TABLE_LIST:
+            value = table.get(tick)
+            if value is not None:
+                return value
+    return get_sqrt_ratio_at_tick(tick)
+
+
+def get_ticks_at_sqrt_ratios(sqrt_prices_x96: Iterable[int], tick_spacing: int = 1) -> list[int]:
+    """:func:`get_tick_at_sqrt_ratio` for many prices, rounded down to ``tick_spacing``.
+
+    Uses binary search over the shared :class:`SqrtRatioTable`. The first call builds
+    the whole table (about 1.8M entries for a tick spacing of 1); create it with
+    :func:`get_sqrt_ratio_table` and a ``path`` to reuse it across processes.
+    """
+    return get_sqrt_ratio_table(tick_spacing).ticks_at(sqrt_prices_x96)
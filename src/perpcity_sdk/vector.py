@@ -0,0 +1,421 @@
+"""NumPy versions of the :mod:`perpcity_sdk.utils.conversions` functions.
+
+Each function takes an array (or anything ``numpy.asarray`` accepts) and returns an
+array with the same results as calling the scalar function on every element. X96
+values may exceed 64 bits and can be passed as lists or ``object`` arrays of Python
+ints; they are computed in float64 and the few elements whose integer floor the float
+error could change are recomputed exactly. :class:`PositionTable` does the same for
+the position calculations in :mod:`perpcity_sdk.functions.position`.
+
+Requires the ``numpy`` extra: ``pip install perpcity-sdk[numpy]``.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import math
+from collections.abc import Callable, Iterable
+from operator import attrgetter
+from typing import Any
+
+try:
+    import numpy as np
+    import numpy.typing as npt
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError(
+        "perpcity_sdk.vector requires numpy. Install it with: pip install perpcity-sdk[numpy]"
+    ) from e
+
+from .types import OpenMakerPositionParams, PositionRawData
+from .utils import conversions
+from .utils.constants import NUMBER_1E6, Q96
+from .utils.tick_math import get_sqrt_ratio_table
+
+_LOG_TICK_BASE = math.log(1.0001)
+
+# numpy's log may differ from libm's by an ulp. Only results this close to an integer
+# can floor or ceil differently, so those are recomputed with math.log.
+_TICK_ROUNDING_TOLERANCE = 1e-6
+
+# X96 values exceed 64 bits, so their integer floors are first evaluated in float64.
+# Each operation adds at most half an ulp; the bound leaves ample margin over that.
+_SCALE_FROM_X96 = NUMBER_1E6 / Q96
+_PRICE_FROM_SQRT_X96 = NUMBER_1E6 / Q96 / Q96
+_FAST_PATH_LIMIT = 2.0**50
+_FAST_PATH_REL_ERROR = 1e-14
+# Covers the inner floor of sqrt_price_x96_to_price, which moves x by < 1e6 / 2**96
+_FAST_PATH_ABS_ERROR = 1e-20
+
+
+def _float_array(values: Any) -> npt.NDArray[np.float64]:
+    return np.asarray(values, dtype=np.float64)
+
+
+def _int_array(values: Any) -> np.ndarray:
+    array = np.asarray(values)
+    if array.dtype != object and not np.issubdtype(array.dtype, np.integer):
+        raise TypeError(f"Expected integer values, got dtype {array.dtype}")
+    return array
+
+
+def _floor_scaled(
+    approx: np.ndarray, values: np.ndarray, exact: Callable[[int], int]
+) -> np.ndarray:
+    """``floor(x) / 1e6`` for the integer ``x`` that ``exact(value)`` computes.
+
+    ``approx`` is ``x`` evaluated in float64, which is off by at most a few ulp, so its
+    floor is exact unless it lies within that error of an integer. Those elements, and
+    ones too large to hold an integer exactly, are recomputed with Python ints.
+    """
+    floored = np.floor(approx)
+    distance = np.minimum(approx - floored, floored + 1 - approx)
+    fast = (np.abs(approx) < _FAST_PATH_LIMIT) & (
+        distance > np.abs(approx) * _FAST_PATH_REL_ERROR + _FAST_PATH_ABS_ERROR
+    )
+    result = np.asarray(floored / NUMBER_1E6)
+    slow = np.flatnonzero(~fast)
+    if slow.size:
+        flat = result.reshape(-1)
+        flat[slow] = [exact(int(v)) / NUMBER_1E6 for v in values.reshape(-1)[slow].tolist()]
+    return result
+
+
+def scale_6_decimals(amounts: Any) -> np.ndarray:
+    """``int64`` array of ``floor(amount * 1e6)``."""
+    return np.floor(_float_array(amounts) * NUMBER_1E6).astype(np.int64)
+
+
+def scale_from_6_decimals(values: Any) -> np.ndarray:
+    return np.asarray(values) / NUMBER_1E6
+
+
+def price_to_tick(prices: Any, round_down: bool) -> np.ndarray:
+    """``int64`` array of ticks, floored when ``round_down`` and ceiled otherwise."""
+    price_array = _float_array(prices)
+    if np.any(price_array <= 0):
+        raise ValueError("Price must be positive")
+
+    log_prices = np.asarray(np.log(price_array) / _LOG_TICK_BASE)
+    near = np.flatnonzero(np.abs(log_prices - np.rint(log_prices)) < _TICK_ROUNDING_TOLERANCE)
+    if near.size:
+        flat = log_prices.reshape(-1)
+        flat[near] = [math.log(p) / _LOG_TICK_BASE for p in price_array.reshape(-1)[near].tolist()]
+
+    rounded = np.floor(log_prices) if round_down else np.ceil(log_prices)
+    return rounded.astype(np.int64)
+
+
+def sqrt_price_x96_to_tick(
+    sqrt_prices_x96: Any, round_down: bool, tick_spacing: int = 1
+) -> np.ndarray:
+    """``int64`` array of exact ticks, rounded to the ``tick_spacing`` grid.
+
+    Binary search over the shared sqrt ratio table, see
+    :func:`~perpcity_sdk.utils.tick_math.get_ticks_at_sqrt_ratios`.
+    """
+    values = _int_array(sqrt_prices_x96)
+    flat = values.reshape(-1).tolist()
+    table = get_sqrt_ratio_table(tick_spacing)
+    ticks = table.ticks_at(flat)
+    if not round_down:
+        ticks = [
+            tick if table.sqrt_ratio(tick) == price else tick + tick_spacing
+            for tick, price in zip(ticks, flat, strict=True)
+        ]
+    return np.array(ticks, dtype=np.int64).reshape(values.shape)
+
+
+def tick_to_price(ticks: Any) -> np.ndarray:
+    """``float64`` array of ``1.0001 ** tick``.
+
+    numpy's ``power`` is not bit-identical to Python's, so the scalar power is evaluated
+    once per distinct tick and broadcast back; event data repeats ticks heavily.
+    """
+    tick_array = np.asarray(ticks, dtype=np.int64)
+    unique, inverse = np.unique(tick_array, return_inverse=True)
+    prices = np.fromiter((1.0001**t for t in unique.tolist()), np.float64, unique.size)
+    return prices[inverse].reshape(tick_array.shape)
+
+
+def scale_from_x96(values_x96: Any) -> np.ndarray:
+    """``float64`` array of ``floor(value * 1e6 / 2**96) / 1e6`` for integer X96 values."""
+    values = _int_array(values_x96)
+    approx = values.astype(np.float64) * _SCALE_FROM_X96
+    return _floor_scaled(approx, values, lambda v: v * NUMBER_1E6 // Q96)
+
+
+def sqrt_price_x96_to_price(sqrt_prices_x96: Any) -> np.ndarray:
+    """``float64`` prices for 160-bit ``sqrtPriceX96`` values, exact like the scalar version."""
+    values = _int_array(sqrt_prices_x96)
+    sqrt_prices = values.astype(np.float64)
+    approx = sqrt_prices * sqrt_prices * _PRICE_FROM_SQRT_X96
+    return _floor_scaled(approx, values, lambda v: (v * v // Q96) * NUMBER_1E6 // Q96)
+
+
+def margin_ratio_to_leverage(margin_ratios: Any) -> np.ndarray:
+    ratios = np.asarray(margin_ratios, dtype=np.float64)
+    if np.any(ratios <= 0):
+        raise ValueError("Margin ratio must be greater than 0")
+    return NUMBER_1E6 / ratios
+
+
+#: Row layout of :func:`build_liquidity_ladder`. Amounts and debt are in whole units;
+#: ``max_amt0_in`` / ``max_amt1_in`` are 6-decimal scaled like the contract expects.
+LADDER_DTYPE = np.dtype(
+    [
+        ("tick_lower", np.int64),
+        ("tick_upper", np.int64),
+        ("price_lower", np.float64),
+        ("price_upper", np.float64),
+        ("margin", np.float64),
+        ("liquidity", np.int64),
+        ("amount0", np.float64),
+        ("amount1", np.float64),
+        ("debt", np.float64),
+        ("max_amt0_in", np.int64),
+        ("max_amt1_in", np.int64),
+    ]
+)
+
+_MAX_LADDER_LIQUIDITY = 2.0**63
+
+
+def build_liquidity_ladder(
+    current_sqrt_price_x96: int,
+    ranges: Any,
+    margins: Any,
+    target_ratio: Any,
+    tick_spacing: int | None = None,
+    slippage: float = 0.01,
+) -> np.ndarray:
+    """Maker quotes for N tick ranges at once, as a :data:`LADDER_DTYPE` array.
+
+    ``ranges`` is an ``(N, 2)`` array of ``(tick_lower, tick_upper)``, ``margins`` the
+    USDC margin of each rung, and ``target_ratio`` a margin ratio for all rungs or one
+    per rung. ``liquidity`` is what
+    :func:`~perpcity_sdk.utils.liquidity.calculate_liquidity_for_target_ratio` returns
+    for each rung, up to float rounding: tick prices come from ``numpy.power``, which
+    may differ from Python's by an ulp. ``amount0`` / ``amount1`` are what that
+    liquidity deposits at the current price and ``debt`` their value in USDC.
+
+    With ``tick_spacing``, ranges are first widened to the grid as
+    ``open_maker_position`` does. ``price_lower`` / ``price_upper`` sit half a tick
+    inside the range so that ``open_maker_position`` maps them back to exactly these
+    ticks, and the ``max_amt*_in`` limits add ``slippage`` to the amounts. Pass the
+    ladder to :func:`ladder_to_maker_params` for the open parameters.
+    """
+    ranges = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+    tick_lower = ranges[:, 0]
+    tick_upper = ranges[:, 1]
+    if tick_spacing is not None:
+        if tick_spacing <= 0:
+            raise ValueError(f"Invalid tick spacing: {tick_spacing} must be positive")
+        tick_lower = tick_lower // tick_spacing * tick_spacing
+        tick_upper = -(-tick_upper // tick_spacing) * tick_spacing
+    invalid = np.flatnonzero(tick_lower >= tick_upper)
+    if invalid.size:
+        bad = invalid[0]
+        raise ValueError(
+            f"Invalid tick range: tick_lower ({tick_lower[bad]}) "
+            f"must be less than tick_upper ({tick_upper[bad]})"
+        )
+    target_ratio = _float_array(target_ratio)
+    if target_ratio.min() <= 0:
+        raise ValueError(f"Invalid target margin ratio: {target_ratio.min()} must be positive")
+    if slippage < 0:
+        raise ValueError(f"Invalid slippage: {slippage} must not be negative")
+
+    margin_scaled = scale_6_decimals(margins)
+    current_price = conversions.sqrt_price_x96_to_price(current_sqrt_price_x96)
+    sqrt_lower = np.power(1.0001, tick_lower * 0.5)
+    sqrt_upper = np.power(1.0001, tick_upper * 0.5)
+    # Below the range only token0 is deposited, above it only token1
+    sqrt_current = np.clip(math.sqrt(current_price), sqrt_lower, sqrt_upper)
+    amount0_per_l = 1 / sqrt_current - 1 / sqrt_upper
+    amount1_per_l = sqrt_current - sqrt_lower
+    debt_per_l = amount0_per_l * current_price + amount1_per_l
+
+    target_debt = margin_scaled / NUMBER_1E6 / target_ratio
+    liquidity = np.floor(target_debt / debt_per_l)
+    if np.any((liquidity <= 0) & (margin_scaled != 0)):
+        raise ValueError("Calculated liquidity is zero or negative")
+    if liquidity.max() >= _MAX_LADDER_LIQUIDITY:
+        raise ValueError("Calculated liquidity does not fit in 64 bits")
+
+    ladder = np.empty(len(ranges), dtype=LADDER_DTYPE)
+    ladder["tick_lower"] = tick_lower
+    ladder["tick_upper"] = tick_upper
+    ladder["price_lower"] = np.power(1.0001, tick_lower + 0.5)
+    ladder["price_upper"] = np.power(1.0001, tick_upper - 0.5)
+    ladder["margin"] = margin_scaled / NUMBER_1E6
+    ladder["liquidity"] = liquidity
+    ladder["amount0"] = amount0 = liquidity * amount0_per_l
+    ladder["amount1"] = amount1 = liquidity * amount1_per_l
+    ladder["debt"] = liquidity * debt_per_l
+    buffer = NUMBER_1E6 * (1 + slippage)
+    ladder["max_amt0_in"] = np.ceil(amount0 * buffer)
+    ladder["max_amt1_in"] = np.ceil(amount1 * buffer)
+    return ladder
+
+
+def ladder_to_maker_params(ladder: np.ndarray) -> list[OpenMakerPositionParams]:
+    """One :class:`~perpcity_sdk.types.OpenMakerPositionParams` per funded ladder rung."""
+    rows = ladder[[field.name for field in dataclasses.fields(OpenMakerPositionParams)]]
+    return [OpenMakerPositionParams(*row) for row in rows.tolist() if row[3] > 0]
+
+
+def calculate_leverage(position_values: Any, effective_margins: Any) -> np.ndarray:
+    """``position_value / effective_margin``, ``inf`` where the margin is not positive."""
+    position_values = _float_array(position_values)
+    effective_margins = _float_array(effective_margins)
+    funded = effective_margins > 0
+    leverage = np.full(funded.shape, np.inf)
+    np.divide(position_values, effective_margins, out=leverage, where=funded)
+    return leverage
+
+
+#: Row layout of :meth:`PositionTable.mark_to_market`, in USDC except ``leverage``.
+MARK_TO_MARKET_DTYPE = np.dtype(
+    [
+        ("value", np.float64),
+        ("pnl", np.float64),
+        ("effective_margin", np.float64),
+        ("leverage", np.float64),
+        ("is_liquidatable", np.bool_),
+    ]
+)
+
+
+class PositionTable:
+    """Columnar :class:`~perpcity_sdk.types.PositionRawData` for vectorized risk math.
+
+    Every column is a 1-D array with one element per position. The calculations match
+    the scalar ones in :mod:`perpcity_sdk.functions.position` element by element, with
+    ``nan`` where those return ``None``. ``is_long`` defaults to the sign of
+    ``entry_perp_delta``; margin ratios are in millionths like ``MarginRatios``.
+    Indexing with a mask, slice or index array returns the selected rows as a new table::
+
+        table = PositionTable.from_raw_data(raw_positions)
+        at_risk = table[table.mark_to_market(mark)["leverage"] > 10]
+    """
+
+    __slots__ = (
+        "position_id",
+        "margin",
+        "entry_perp_delta",
+        "entry_usd_delta",
+        "min_margin_ratio",
+        "max_margin_ratio",
+        "liq_margin_ratio",
+        "is_long",
+    )
+
+    def __init__(
+        self,
+        position_id: Any,
+        margin: Any,
+        entry_perp_delta: Any,
+        entry_usd_delta: Any,
+        liq_margin_ratio: Any,
+        min_margin_ratio: Any = 0,
+        max_margin_ratio: Any = 0,
+        is_long: Any = None,
+    ) -> None:
+        self.position_id = np.asarray(position_id, dtype=np.int64)
+        size = self.position_id.shape
+        if len(size) != 1:
+            raise ValueError(f"Invalid position ids: expected a 1-D array, got shape {size}")
+
+        def column(values: Any, dtype: Any) -> np.ndarray:
+            return np.array(np.broadcast_to(np.asarray(values, dtype=dtype), size))
+
+        self.margin = column(margin, np.float64)
+        self.entry_perp_delta = column(entry_perp_delta, np.int64)
+        self.entry_usd_delta = column(entry_usd_delta, np.int64)
+        self.liq_margin_ratio = column(liq_margin_ratio, np.int64)
+        self.min_margin_ratio = column(min_margin_ratio, np.int64)
+        self.max_margin_ratio = column(max_margin_ratio, np.int64)
+        self.is_long = column(self.entry_perp_delta > 0 if is_long is None else is_long, np.bool_)
+
+    @classmethod
+    def from_raw_data(cls, raw_data: Iterable[PositionRawData]) -> PositionTable:
+        raw_data = list(raw_data)
+
+        def column(attribute: str, dtype: Any) -> np.ndarray:
+            return np.fromiter(map(attrgetter(attribute), raw_data), dtype, len(raw_data))
+
+        return cls(
+            position_id=column("position_id", np.int64),
+            margin=column("margin", np.float64),
+            entry_perp_delta=column("entry_perp_delta", np.int64),
+            entry_usd_delta=column("entry_usd_delta", np.int64),
+            liq_margin_ratio=column("margin_ratios.liq", np.int64),
+            min_margin_ratio=column("margin_ratios.min", np.int64),
+            max_margin_ratio=column("margin_ratios.max", np.int64),
+        )
+
+    def __len__(self) -> int:
+        return len(self.position_id)
+
+    def __getitem__(self, index: Any) -> PositionTable:
+        table = object.__new__(PositionTable)
+        for name in self.__slots__:
+            setattr(table, name, np.atleast_1d(getattr(self, name)[index]))
+        return table
+
+    def entry_price(self) -> np.ndarray:
+        """``calculate_entry_price`` per position, ``0`` for positions with no size."""
+        perp = np.abs(self.entry_perp_delta).astype(np.float64)
+        usd = np.abs(self.entry_usd_delta).astype(np.float64)
+        prices = np.zeros(len(self))
+        np.divide(usd, perp, out=prices, where=perp != 0)
+        return prices
+
+    def position_size(self) -> npt.NDArray[np.float64]:
+        """Signed size in perp units, as ``calculate_position_size``."""
+        return self.entry_perp_delta.astype(np.float64) / NUMBER_1E6
+
+    def position_value(self, mark_prices: Any) -> np.ndarray:
+        """``abs(size) * mark`` for a mark per position or one for all."""
+        return np.abs(self.position_size()) * _float_array(mark_prices)
+
+    def leverage(self, mark_prices: Any, effective_margins: Any) -> np.ndarray:
+        return calculate_leverage(self.position_value(mark_prices), effective_margins)
+
+    def liquidation_price(self) -> np.ndarray:
+        """``calculate_liquidation_price`` per position and side, ``nan`` where it is ``None``."""
+        entry_price = self.entry_price()
+        position_size = np.abs(self.position_size())
+        valid = (position_size != 0) & (self.margin > 0)
+        size = np.where(valid, position_size, 1.0)
+
+        entry_notional = position_size * entry_price
+        margin_excess = self.margin - self.liq_margin_ratio / NUMBER_1E6 * entry_notional
+        offset = margin_excess / size
+        liquidation_price = np.where(
+            self.is_long, np.maximum(0.0, entry_price - offset), entry_price + offset
+        )
+        return np.where(valid, liquidation_price, np.nan)
+
+    def mark_to_market(self, mark_prices: Any) -> np.ndarray:
+        """Value, PnL, margin and leverage at ``mark_prices``, as :data:`MARK_TO_MARKET_DTYPE`.
+
+        PnL is the price move on the entry size, before funding and fees, and
+        ``effective_margin`` is ``margin + pnl``. ``is_liquidatable`` marks positions whose
+        mark has reached :meth:`liquidation_price`.
+        """
+        mark_prices = _float_array(mark_prices)
+        entry_price = self.entry_price()
+        position_size = np.abs(self.position_size())
+        direction = np.where(self.is_long, 1.0, -1.0)
+
+        result = np.empty(len(self), dtype=MARK_TO_MARKET_DTYPE)
+        result["value"] = value = position_size * mark_prices
+        result["pnl"] = pnl = direction * position_size * (mark_prices - entry_price)
+        result["effective_margin"] = effective_margin = self.margin + pnl
+        result["leverage"] = calculate_leverage(value, effective_margin)
+        maintenance = self.liq_margin_ratio / NUMBER_1E6 * position_size * entry_price
+        result["is_liquidatable"] = (
+            (position_size != 0) & (self.margin > 0) & (effective_margin <= maintenance)
+        )
+        return result
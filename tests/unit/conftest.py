@@ -0,0 +1,17 @@
+import pytest
+
+from perpcity_sdk.utils.module_cache import MODULE_CONSTANTS
+from perpcity_sdk.utils.tick_math import clear_sqrt_ratio_tables
+
+
+@pytest.fixture(autouse=True)
+def _clear_module_constants():
+    MODULE_CONSTANTS.clear()
+    yield
+    MODULE_CONSTANTS.clear()
+
+
+@pytest.fixture(autouse=True)
+def _clear_sqrt_ratio_tables():
+    yield
+    clear_sqrt_ratio_tables()
@@ -0,0 +1,485 @@
+from eth_abi import decode, encode
+from eth_account.typed_transactions import TypedTransaction
+from eth_utils import function_signature_to_4byte_selector, keccak
+from hexbytes import HexBytes
+from web3.providers.async_base import AsyncBaseProvider
+from web3.providers.base import BaseProvider
+
+from perpcity_sdk.async_context import AsyncPerpCityContext
+from perpcity_sdk.context import PerpCityContext
+from perpcity_sdk.utils.constants import MULTICALL3_ADDRESS
+
+PERP_MANAGER = "0x" + "11" * 20
+USDC = "0x" + "22" * 20
+FEES = "0x" + "33" * 20
+MARGIN_RATIOS = "0x" + "44" * 20
+PERP_ID = "0x" + "ab" * 32
+PRIVATE_KEY = "0x" + "01" * 32
+
+
+def selector(signature: str) -> bytes:
+    return function_signature_to_4byte_selector(signature)
+
+
+class RevertError(Exception):
+    def __init__(self, data: bytes) -> None:
+        super().__init__(data.hex())
+        self.data = data
+
+
+def _decode_raw(raw: str) -> dict:
+    return TypedTransaction.from_bytes(HexBytes(raw)).as_dict()
+
+
+_TX_RESULTS = {
+    "eth_estimateGas": hex(100_000),
+    "eth_gasPrice": hex(10**9),
+    "eth_maxPriorityFeePerGas": hex(10**9),
+    "eth_getBlockByNumber": {
+        "number": hex(1234),
+        "hash": "0x" + "00" * 32,
+        "parentHash": "0x" + "00" * 32,
+        "timestamp": hex(1_700_000_000),
+        "baseFeePerGas": hex(10**9),
+        "gasLimit": hex(30_000_000),
+        "gasUsed": "0x0",
+        "transactions": [],
+    },
+}
+
+
+class FakeProvider(BaseProvider):
+    """Answers eth_call from a (target, selector) handler table, including aggregate3."""
+
+    def __init__(self, handlers):
+        super().__init__()
+        self.handlers = {(addr.lower(), sel): fn for (addr, sel), fn in handlers.items()}
+        self.calls: list[tuple[str, object]] = []
+        # Transaction side: pending nonce, raw transactions accepted, queued send errors
+        self.nonce = 7
+        self.block_number = 1234
+        self.mined: dict[str, int] = {}
+        self.sent: list[str] = []
+        self.send_errors: list[str] = []
+        self.receipt_status = 1
+        # Per-calldata-selector receipt behaviour for the transactions sent
+        self.revert_selectors: set[bytes] = set()
+        self.receipt_logs: dict[bytes, list[dict]] = {}
+        self.tx_selectors: dict[str, bytes] = {}
+        # eth_getLogs: raw logs to serve, and the widest block range accepted per request
+        self.logs: list[dict] = []
+        self.max_log_range: int | None = None
+
+    def _dispatch(self, to: str, data: bytes) -> bytes:
+        if to.lower() == MULTICALL3_ADDRESS.lower() and data[:4] == selector(
+            "aggregate3((address,bool,bytes)[])"
+        ):
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = []
+            for target, _allow_failure, call_data in calls:
+                try:
+                    results.append((True, self._dispatch(target, call_data)))
+                except RevertError as e:
+                    results.append((False, e.data))
+            return encode(["(bool,bytes)[]"], [results])
+        if to.lower() == MULTICALL3_ADDRESS.lower() and data[:4] == selector("getBlockNumber()"):
+            return encode(["uint256"], [self.block_number])
+        return self.handlers[(to.lower(), data[:4])](data[4:])
+
+    def make_request(self, method, params):
+        self.calls.append((method, params))
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x14a34"}
+        if method == "eth_blockNumber":
+            # Every poll sees one more block, so confirmation waits terminate
+            self.block_number += 1
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.block_number - 1)}
+        if method == "eth_call":
+            tx = params[0]
+            result = self._dispatch(tx["to"], bytes.fromhex(tx["data"][2:]))
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x" + result.hex()}
+        if method in _TX_RESULTS:
+            return {"jsonrpc": "2.0", "id": 1, "result": _TX_RESULTS[method]}
+        if method == "eth_getTransactionCount":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(self.nonce)}
+        if method == "eth_sendRawTransaction":
+            if self.send_errors:
+                message = self.send_errors.pop(0)
+                return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": message}}
+            self.sent.append(params[0])
+            self.block_number += 1
+            tx_hash = "0x" + f"{len(self.sent):064x}"
+            self.mined[tx_hash] = self.block_number
+            self.tx_selectors[tx_hash] = _decode_raw(params[0])["data"][:4]
+            return {"jsonrpc": "2.0", "id": 1, "result": tx_hash}
+        if method == "eth_getLogs":
+            return self._get_logs(params[0])
+        if method == "eth_getTransactionReceipt":
+            return {"jsonrpc": "2.0", "id": 1, "result": self._receipt(params[0])}
+        raise NotImplementedError(method)
+
+    def _get_logs(self, log_filter: dict) -> dict:
+        from_block, to_block = int(log_filter["fromBlock"], 16), int(log_filter["toBlock"], 16)
+        if self.max_log_range is not None and to_block - from_block + 1 > self.max_log_range:
+            error = {"code": -32005, "message": "block range too large"}
+            return {"jsonrpc": "2.0", "id": 1, "error": error}
+
+        addresses = log_filter.get("address") or []
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {a.lower() for a in addresses}
+        topics = [
+            None if t is None else {x.lower() for x in ([t] if isinstance(t, str) else t)}
+            for t in log_filter.get("topics") or []
+        ]
+
+        result = [
+            log
+            for log in self.logs
+            if from_block <= int(log["blockNumber"], 16) <= to_block
+            and (not addresses or log["address"].lower() in addresses)
+            and len(log["topics"]) >= len(topics)
+            and all(t is None or log["topics"][i].lower() in t for i, t in enumerate(topics))
+        ]
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    def add_log(self, log: dict, block_number: int) -> None:
+        """Serve ``log`` from eth_getLogs as emitted in ``block_number``."""
+        self.logs.append(
+            {
+                "blockNumber": hex(block_number),
+                "blockHash": "0x" + "00" * 32,
+                "transactionHash": "0x" + f"{len(self.logs) + 1:064x}",
+                "transactionIndex": "0x0",
+                "logIndex": hex(len(self.logs)),
+                "removed": False,
+                **log,
+            }
+        )
+
+    def _receipt(self, tx_hash: str) -> dict:
+        tx_selector = self.tx_selectors[tx_hash]
+        reverted = self.receipt_status == 0 or tx_selector in self.revert_selectors
+        logs = [] if reverted else self.receipt_logs.get(tx_selector, [])
+        return {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": "0x" + "00" * 32,
+            "blockNumber": hex(self.mined[tx_hash]),
+            "from": "0x" + "00" * 20,
+            "to": PERP_MANAGER,
+            "cumulativeGasUsed": hex(21000),
+            "gasUsed": hex(21000),
+            "effectiveGasPrice": hex(10**9),
+            "contractAddress": None,
+            "logs": [
+                {
+                    "transactionHash": tx_hash,
+                    "transactionIndex": "0x0",
+                    "blockHash": "0x" + "00" * 32,
+                    "blockNumber": hex(self.mined[tx_hash]),
+                    "logIndex": hex(i),
+                    "removed": False,
+                    **log,
+                }
+                for i, log in enumerate(logs)
+            ],
+            "logsBloom": "0x" + "00" * 256,
+            "status": "0x0" if reverted else "0x1",
+            "type": "0x2",
+        }
+
+    def sent_nonces(self) -> list[int]:
+        return [_decode_raw(raw)["nonce"] for raw in self.sent]
+
+    def sent_transactions(self) -> list[dict]:
+        return [_decode_raw(raw) for raw in self.sent]
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+class AsyncFakeProvider(AsyncBaseProvider):
+    """Async wrapper around FakeProvider for AsyncPerpCityContext tests."""
+
+    def __init__(self, handlers):
+        super().__init__()
+        self.sync = FakeProvider(handlers)
+        self.sessions = []
+
+    @property
+    def calls(self):
+        return self.sync.calls
+
+    async def make_request(self, method, params):
+        return self.sync.make_request(method, params)
+
+    async def cache_async_session(self, session):
+        self.sessions.append(session)
+        return session
+
+    async def is_connected(self, show_traceback=False):
+        return True
+
+
+def uint24(value: int):
+    return lambda _args: encode(["uint24"], [value])
+
+
+def perp_handlers(fee_reverts: bool = False, maker_ratios: bool = True):
+    cfgs_result = encode(
+        [
+            "(address,address,uint24,int24,address)",
+            "address",
+            "address",
+            "address",
+            "address",
+            "address",
+            "address",
+            "address",
+        ],
+        [
+            ("0x" + "aa" * 20, "0x" + "bb" * 20, 3000, 60, "0x" + "cc" * 20),
+            "0x" + "dd" * 20,
+            "0x" + "ee" * 20,
+            "0x" + "ff" * 20,
+            FEES,
+            MARGIN_RATIOS,
+            "0x" + "55" * 20,
+            "0x" + "66" * 20,
+        ],
+    )
+
+    def creator_fee(_args):
+        if fee_reverts:
+            raise RevertError(selector("FeesNotRegistered()"))
+        return encode(["uint24"], [1000])
+
+    def maker_ratio(value):
+        if maker_ratios:
+            return uint24(value)
+
+        def missing(_args):
+            raise RevertError(b"")
+
+        return missing
+
+    return {
+        (PERP_MANAGER, selector("cfgs(bytes32)")): lambda _args: cfgs_result,
+        (PERP_MANAGER, selector("timeWeightedAvgSqrtPriceX96(bytes32,uint32)")): (
+            lambda _args: encode(["uint256"], [2**96 * 10])
+        ),
+        (PERP_MANAGER, selector("takerOpenInterest(bytes32)")): (
+            lambda _args: encode(["uint128", "uint128"], [40, 25])
+        ),
+        (PERP_MANAGER, selector("protocolFee()")): uint24(200),
+        (MARGIN_RATIOS, selector("MIN_TAKER_RATIO()")): uint24(50_000),
+        (MARGIN_RATIOS, selector("MAX_TAKER_RATIO()")): uint24(500_000),
+        (MARGIN_RATIOS, selector("LIQUIDATION_TAKER_RATIO()")): uint24(25_000),
+        (MARGIN_RATIOS, selector("MIN_MAKER_RATIO()")): maker_ratio(100_000),
+        (MARGIN_RATIOS, selector("MAX_MAKER_RATIO()")): maker_ratio(1_000_000),
+        (MARGIN_RATIOS, selector("LIQUIDATION_MAKER_RATIO()")): maker_ratio(50_000),
+        (FEES, selector("CREATOR_FEE()")): creator_fee,
+        (FEES, selector("INSURANCE_FEE()")): uint24(500),
+        (FEES, selector("LP_FEE()")): uint24(3000),
+        (FEES, selector("LIQUIDATION_FEE()")): uint24(10_000),
+    }
+
+
+def position_handlers(closed_ids=(), balance: int = 1_500_000_000, maker_ids=(), owners=None):
+    """quoteClosePosition quotes position N as pnl N, and reverts for ``closed_ids``.
+
+    positions(N) returns a long taker on PERP_ID with N USDC of margin, or a maker for
+    ``maker_ids``. ownerOf(N) returns ``owners[N]`` and reverts for other ids.
+    """
+    owners = owners or {}
+
+    def positions(args):
+        (position_id,) = decode(["uint256"], args)
+        perp_id = bytes(32) if position_id in closed_ids else bytes.fromhex(PERP_ID[2:])
+        return encode(
+            [
+                "bytes32",
+                "uint256",
+                "int256",
+                "int256",
+                "int256",
+                "uint256",
+                "uint256",
+                "(uint24,uint24,uint24)",
+                "(uint32,int24,int24,uint128,int256,int256,int256)",
+            ],
+            [
+                perp_id,
+                position_id * 1_000_000,
+                2_000_000,
+                -100_000_000,
+                0,
+                0,
+                0,
+                (100_000, 500_000, 50_000),
+                (0, -600, 600, 10**18 if position_id in maker_ids else 0, 0, 0, 0),
+            ],
+        )
+
+    def quote_close(args):
+        (position_id,) = decode(["uint256"], args)
+        if position_id in closed_ids:
+            raise RevertError(selector("TokenDoesNotExist()"))
+        return encode(
+            ["bytes", "int256", "int256", "uint256", "bool"],
+            [b"", position_id * 1_000_000, -100_000, 50_000_000, position_id % 2 == 0],
+        )
+
+    def owner_of(args):
+        (position_id,) = decode(["uint256"], args)
+        if position_id not in owners:
+            raise RevertError(selector("TokenDoesNotExist()"))
+        return encode(["address"], [owners[position_id]])
+
+    return {
+        (PERP_MANAGER, selector("ownerOf(uint256)")): owner_of,
+        (PERP_MANAGER, selector("quoteClosePosition(uint256)")): quote_close,
+        (PERP_MANAGER, selector("positions(uint256)")): positions,
+        (USDC, selector("balanceOf(address)")): lambda _args: encode(["uint256"], [balance]),
+    }
+
+
+def make_context(provider, **kwargs) -> PerpCityContext:
+    ctx = PerpCityContext(
+        rpc_url="http://localhost:8545",
+        private_key=PRIVATE_KEY,
+        perp_manager_address=PERP_MANAGER,
+        usdc_address=USDC,
+        **kwargs,
+    )
+    ctx.w3.provider = provider
+    return ctx
+
+
+def make_async_context(provider, **kwargs):
+    ctx = AsyncPerpCityContext(
+        rpc_url="http://localhost:8545",
+        private_key=PRIVATE_KEY,
+        perp_manager_address=PERP_MANAGER,
+        usdc_address=USDC,
+        **kwargs,
+    )
+    ctx.w3.provider = provider
+    ctx._provider = provider
+    return ctx
+
+
+def eth_calls(provider) -> int:
+    return sum(1 for method, _ in provider.calls if method == "eth_call")
+
+
+def position_opened_log(
+    pos_id: int,
+    is_maker: bool = False,
+    perp_id: str = PERP_ID,
+    perp_delta: int = 0,
+    ticks: tuple[int, int] = (0, 0),
+) -> dict:
+    """A PositionOpened log as emitted by the perp manager."""
+    data = encode(
+        [
+            "bytes32",
+            "uint256",
+            "uint256",
+            "uint256",
+            "uint256",
+            "bool",
+            "int256",
+            "int256",
+            "int24",
+            "int24",
+        ],
+        [bytes.fromhex(perp_id[2:]), 2**96 * 10, 0, 0, pos_id, is_maker, perp_delta, 0, *ticks],
+    )
+    topic = keccak(
+        text="PositionOpened(bytes32,uint256,uint256,uint256,uint256,bool,int256,int256,int24,int24)"
+    )
+    return {"address": PERP_MANAGER, "topics": ["0x" + topic.hex()], "data": "0x" + data.hex()}
+
+
+def _address_topic(address: str) -> str:
+    return "0x" + encode(["address"], [address]).hex()
+
+
+def perp_created_log(perp_id: str = PERP_ID) -> dict:
+    data = encode(
+        ["bytes32", "address", "uint256", "uint256"],
+        [bytes.fromhex(perp_id[2:]), "0x" + "55" * 20, 2**96, 2**96 * 2],
+    )
+    topic = keccak(text="PerpCreated(bytes32,address,uint256,uint256)")
+    return {"address": PERP_MANAGER, "topics": ["0x" + topic.hex()], "data": "0x" + data.hex()}
+
+
+def position_closed_log(
+    pos_id: int, was_liquidated: bool = False, perp_id: str = PERP_ID, was_maker: bool = False
+) -> dict:
+    data = encode(
+        [
+            "bytes32",
+            "uint256",
+            "uint256",
+            "uint256",
+            "uint256",
+            "bool",
+            "bool",
+            "bool",
+            "int256",
+            "int256",
+            "int24",
+            "int24",
+        ],
+        [
+            bytes.fromhex(perp_id[2:]),
+            2**96 * 10,
+            0,
+            0,
+            pos_id,
+            was_maker,
+            was_liquidated,
+            False,
+            0,
+            0,
+            0,
+            0,
+        ],
+    )
+    topic = keccak(
+        text="PositionClosed(bytes32,uint256,uint256,uint256,uint256,bool,bool,bool,"
+        "int256,int256,int24,int24)"
+    )
+    return {"address": PERP_MANAGER, "topics": ["0x" + topic.hex()], "data": "0x" + data.hex()}
+
+
+def nft_transfer_log(token_id: int, to: str, from_: str = "0x" + "00" * 20) -> dict:
+    """A position NFT Transfer log; all three arguments are indexed."""
+    return {
+        "address": PERP_MANAGER,
+        "topics": [
+            "0x" + keccak(text="Transfer(address,address,uint256)").hex(),
+            _address_topic(from_),
+            _address_topic(to),
+            "0x" + encode(["uint256"], [token_id]).hex(),
+        ],
+        "data": "0x",
+    }
+
+
+def notional_adjusted_log(
+    pos_id: int,
+    perp_id: str = PERP_ID,
+    long_oi: int = 0,
+    short_oi: int = 0,
+    new_perp_delta: int = 0,
+) -> dict:
+    data = encode(
+        ["bytes32", "uint256", "uint256", "uint256", "uint256", "int256"],
+        [bytes.fromhex(perp_id[2:]), 2**96 * 10, long_oi, short_oi, pos_id, new_perp_delta],
+    )
+    topic = keccak(text="NotionalAdjusted(bytes32,uint256,uint256,uint256,uint256,int256)")
+    return {"address": PERP_MANAGER, "topics": ["0x" + topic.hex()], "data": "0x" + data.hex()}
@@ -0,0 +1,241 @@
+import asyncio
+
+import pytest
+from eth_abi import decode, encode
+
+from perpcity_sdk.functions.perp_manager import OPEN_TAKER_GAS_LIMIT, open_taker_position
+from perpcity_sdk.types import OpenTakerPositionParams
+from perpcity_sdk.utils.approve import (
+    DEFAULT_CONFIRMATIONS,
+    MAX_UINT256,
+    AllowanceManager,
+    ApprovalStrategy,
+    approve_usdc,
+    async_approve_usdc,
+)
+from perpcity_sdk.utils.errors import PerpCityError, PipelinedTransactionError
+
+from .fakes import (
+    PERP_ID,
+    USDC,
+    AsyncFakeProvider,
+    FakeProvider,
+    make_async_context,
+    make_context,
+    perp_handlers,
+    position_opened_log,
+    selector,
+)
+
+_OPEN_TAKER = selector("openTakerPos(bytes32,(address,bool,uint128,uint24,uint128))")
+
+
+def _handlers(allowance: int):
+    return {
+        **perp_handlers(),
+        (USDC, selector("allowance(address,address)")): lambda _: encode(["uint256"], [allowance]),
+    }
+
+
+def _open_provider(allowance: int = 0) -> FakeProvider:
+    provider = FakeProvider(_handlers(allowance))
+    provider.receipt_logs[_OPEN_TAKER] = [position_opened_log(42)]
+    return provider
+
+
+_TAKER_PARAMS = OpenTakerPositionParams(
+    is_long=True, margin=10, leverage=2, unspecified_amount_limit=0
+)
+
+
+def _approved_amounts(provider) -> list[int]:
+    amounts = []
+    for tx in provider.sent_transactions():
+        if tx["data"][:4] == selector("approve(address,uint256)"):
+            amounts.append(decode(["address", "uint256"], tx["data"][4:])[1])
+    return amounts
+
+
+class TestAllowanceManager:
+    def test_budget_covers_spend(self):
+        allowances = AllowanceManager()
+        allowances.sync(100)
+        assert allowances.reserve(60) is None
+        assert allowances.reserve(40) is None
+        assert allowances.reserve(1) == 1
+
+    @pytest.mark.parametrize(
+        ("strategy", "expected"),
+        [
+            (ApprovalStrategy.EXACT, 50),
+            (ApprovalStrategy.BUFFERED, 250),
+            (ApprovalStrategy.MAX, MAX_UINT256),
+        ],
+    )
+    def test_strategies(self, strategy, expected):
+        allowances = AllowanceManager(strategy, buffer_multiple=5)
+        allowances.sync(0)
+        assert allowances.reserve(50) == expected
+
+    def test_approved_records_remaining_budget(self):
+        allowances = AllowanceManager(ApprovalStrategy.BUFFERED, buffer_multiple=3)
+        allowances.sync(0)
+        allowances.approved(allowances.reserve(10), 10)
+        assert allowances.reserve(20) is None
+        assert allowances.reserve(1) == 3
+
+    def test_max_allowance_is_decremented(self):
+        allowances = AllowanceManager(ApprovalStrategy.MAX)
+        allowances.sync(MAX_UINT256)
+        assert allowances.reserve(10**12) is None
+        assert allowances.reserve(MAX_UINT256) == MAX_UINT256
+
+        allowances.sync(0)
+        allowances.approved(allowances.reserve(10), 10)
+        assert allowances.reserve(MAX_UINT256 - 10) is None
+        assert allowances.reserve(1) == MAX_UINT256
+
+    def test_must_sync_first(self):
+        with pytest.raises(ValueError, match="synced"):
+            AllowanceManager().reserve(1)
+
+    def test_invalid_buffer_multiple(self):
+        with pytest.raises(ValueError, match="Invalid buffer multiple"):
+            AllowanceManager(ApprovalStrategy.BUFFERED, buffer_multiple=0)
+
+
+class TestApproveUsdc:
+    def test_skips_approval_when_allowance_covers(self):
+        provider = FakeProvider(_handlers(allowance=10**9))
+        ctx = make_context(provider)
+
+        approve_usdc(ctx, 100)
+        approve_usdc(ctx, 100)
+        assert provider.sent == []
+        # The on-chain allowance is read once
+        assert sum(1 for m, _ in provider.calls if m == "eth_call") == 1
+
+    def test_buffered_top_up_serves_later_opens(self):
+        provider = FakeProvider(_handlers(allowance=0))
+        ctx = make_context(provider, approval_strategy=ApprovalStrategy.BUFFERED)
+
+        for _ in range(10):
+            approve_usdc(ctx, 100, confirmations=1)
+        approve_usdc(ctx, 100, confirmations=1)
+        assert _approved_amounts(provider) == [1000, 1000]
+
+    def test_exact_approves_every_time(self):
+        provider = FakeProvider(_handlers(allowance=0))
+        ctx = make_context(provider)
+
+        approve_usdc(ctx, 100, confirmations=1)
+        approve_usdc(ctx, 70, confirmations=1)
+        assert _approved_amounts(provider) == [100, 70]
+
+    def test_waits_for_confirmations(self):
+        provider = FakeProvider(_handlers(allowance=0))
+        ctx = make_context(provider)
+
+        approve_usdc(ctx, 100, confirmations=3)
+        (mined,) = provider.mined.values()
+        assert provider.block_number >= mined + 2
+
+    def test_failed_approval_invalidates_budget(self):
+        provider = FakeProvider(_handlers(allowance=0))
+        provider.receipt_status = 0
+        ctx = make_context(provider)
+
+        with pytest.raises(PerpCityError, match="Transaction reverted"):
+            approve_usdc(ctx, 100, confirmations=1)
+        assert not ctx.allowances.synced
+
+    def test_async(self):
+        provider = AsyncFakeProvider(_handlers(allowance=0))
+        ctx = make_async_context(provider, approval_strategy=ApprovalStrategy.MAX)
+
+        async def run():
+            await async_approve_usdc(ctx, 100)
+            await async_approve_usdc(ctx, 100)
+            await ctx.close()
+
+        asyncio.run(run())
+        assert _approved_amounts(provider.sync) == [MAX_UINT256]
+
+
+class TestPipelinedOpen:
+    def _methods(self, provider) -> list[str]:
+        tx_methods = {"eth_sendRawTransaction", "eth_getTransactionReceipt"}
+        return [m for m, _ in provider.calls if m in tx_methods]
+
+    def test_sequential_by_default(self):
+        provider = _open_provider()
+        ctx = make_context(provider)
+
+        position = open_taker_position(ctx, PERP_ID, _TAKER_PARAMS)
+        assert position.position_id == 42
+        assert self._methods(provider) == [
+            "eth_sendRawTransaction",
+            "eth_getTransactionReceipt",
+            "eth_sendRawTransaction",
+            "eth_getTransactionReceipt",
+        ]
+
+    def test_broadcasts_approve_and_open_together(self):
+        provider = _open_provider()
+        ctx = make_context(provider)
+
+        position = open_taker_position(ctx, PERP_ID, _TAKER_PARAMS, pipelined=True)
+        assert position.position_id == 42
+        assert self._methods(provider)[:2] == ["eth_sendRawTransaction"] * 2
+
+        approve_tx, open_tx = provider.sent_transactions()
+        assert open_tx["nonce"] == approve_tx["nonce"] + 1
+        assert open_tx["gas"] == OPEN_TAKER_GAS_LIMIT
+        # Only the approve is estimated
+        assert sum(1 for m, _ in provider.calls if m == "eth_estimateGas") == 1
+
+    def test_approve_waits_as_deep_as_sequential(self):
+        provider = _open_provider()
+        ctx = make_context(provider)
+        wait_for_transaction = ctx.wait_for_transaction
+        depths = []
+
+        def record_depth(tx_hash, confirmations=1, **kwargs):
+            depths.append(confirmations)
+            return wait_for_transaction(tx_hash, confirmations, **kwargs)
+
+        ctx.wait_for_transaction = record_depth
+        open_taker_position(ctx, PERP_ID, _TAKER_PARAMS, pipelined=True)
+        assert depths == [DEFAULT_CONFIRMATIONS, 1]
+
+    def test_no_approval_needed(self):
+        provider = _open_provider(allowance=10**12)
+        ctx = make_context(provider)
+
+        open_taker_position(ctx, PERP_ID, _TAKER_PARAMS, pipelined=True)
+        assert len(provider.sent) == 1
+        assert _approved_amounts(provider) == []
+
+    def test_reports_failures_per_transaction(self):
+        provider = _open_provider()
+        provider.revert_selectors.add(_OPEN_TAKER)
+        ctx = make_context(provider)
+
+        with pytest.raises(PipelinedTransactionError, match="open: Transaction reverted") as exc:
+            open_taker_position(ctx, PERP_ID, _TAKER_PARAMS, pipelined=True)
+        assert exc.value.results["approve"]["status"] == 1
+        assert isinstance(exc.value.results["open"], PerpCityError)
+        assert not ctx.allowances.synced
+
+    def test_async(self):
+        provider = AsyncFakeProvider({})
+        provider.sync = _open_provider()
+        ctx = make_async_context(provider)
+
+        async def run():
+            position = await ctx.open_taker_position(PERP_ID, _TAKER_PARAMS, pipelined=True)
+            await ctx.close()
+            return position
+
+        assert asyncio.run(run()).position_id == 42
+        assert self._methods(provider.sync)[:2] == ["eth_sendRawTransaction"] * 2
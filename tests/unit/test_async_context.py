@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from perpcity_sdk.types import OpenTakerPositionParams
+from perpcity_sdk.utils.errors import PerpCityError
+
+from .fakes import (
+    PERP_ID,
+    AsyncFakeProvider,
+    eth_calls,
+    make_async_context,
+    perp_handlers,
+    position_handlers,
+)
+
+
+def _provider(closed_ids=()):
+    return AsyncFakeProvider({**perp_handlers(), **position_handlers(closed_ids)})
+
+
+class TestAsyncPerpCityContext:
+    def test_get_perp_data(self):
+        provider = _provider()
+
+        async def run():
+            async with make_async_context(provider) as ctx:
+                return await ctx.get_perp_data(PERP_ID)
+
+        perp = asyncio.run(run())
+        assert perp.tick_spacing == 60
+        assert perp.mark == pytest.approx(100.0)
+        assert perp.fees.insurance_fee == 0.0005
+        assert eth_calls(provider) == 2
+
+    def test_concurrent_reads_share_one_session(self):
+        provider = _provider()
+
+        async def run():
+            async with make_async_context(provider) as ctx:
+                await ctx.get_perp_config(PERP_ID)
+                return await asyncio.gather(*(ctx.get_perp_data(PERP_ID) for _ in range(20)))
+
+        results = asyncio.run(run())
+        assert len(results) == 20
+        assert len(provider.sessions) == 1
+        assert provider.sessions[0].closed
+
+    def test_get_user_data(self):
+        provider = _provider(closed_ids={2})
+
+        async def run():
+            async with make_async_context(provider, multicall_chunk_size=2) as ctx:
+                return await ctx.get_user_data(
+                    "0x" + "99" * 20,
+                    [{"perp_id": PERP_ID, "position_id": i, "is_long": True} for i in (1, 2, 3)],
+                )
+
+        user = asyncio.run(run())
+        assert user.usdc_balance == 1500.0
+        assert [p.position_id for p in user.open_positions] == [1, 3]
+        assert list(user.failed_positions) == [2]
+
+    def test_get_position_raw_data(self):
+        provider = _provider(closed_ids={9})
+
+        async def run():
+            async with make_async_context(provider) as ctx:
+                raw = await ctx.get_position_raw_data(5)
+                with pytest.raises(PerpCityError, match="Position 9 does not exist"):
+                    await ctx.get_position_raw_data(9)
+                return raw
+
+        raw = asyncio.run(run())
+        assert raw.perp_id == PERP_ID
+        assert raw.margin == 5.0
+        assert raw.margin_ratios.liq == 50_000
+
+    def test_open_taker_validates_before_rpc(self):
+        provider = _provider()
+
+        async def run():
+            async with make_async_context(provider) as ctx:
+                await ctx.open_taker_position(
+                    PERP_ID,
+                    OpenTakerPositionParams(
+                        is_long=True, margin=0, leverage=2, unspecified_amount_limit=0
+                    ),
+                )
+
+        with pytest.raises(PerpCityError, match="Margin must be greater than 0"):
+            asyncio.run(run())
+        assert provider.calls == []
@@ -0,0 +1,168 @@
+import pytest
+from eth_abi import decode, encode
+
+from perpcity_sdk.book import LiquidityBook
+from perpcity_sdk.functions.perp_manager import quote_open_taker_position
+from perpcity_sdk.types import OpenTakerPositionParams
+from perpcity_sdk.utils.constants import Q96
+from perpcity_sdk.utils.errors import PerpCityError
+from perpcity_sdk.utils.events import PERP_MANAGER_EVENTS
+from perpcity_sdk.utils.tick_math import get_sqrt_ratio_at_tick
+
+from .fakes import (
+    PERP_ID,
+    PERP_MANAGER,
+    FakeProvider,
+    make_context,
+    perp_handlers,
+    position_closed_log,
+    position_handlers,
+    position_opened_log,
+    selector,
+)
+
+LIQUIDITY = 10**15
+
+
+def _event(log: dict, block_number: int):
+    return PERP_MANAGER_EVENTS.decode_log({**log, "blockNumber": block_number, "logIndex": 0})
+
+
+class TestSimulateSwap:
+    def setup_method(self):
+        self.book = LiquidityBook(PERP_ID, 60, Q96)
+        self.book.add_position(1, -600, 600, LIQUIDITY)
+
+    def test_within_one_range(self):
+        fill = self.book.simulate_swap(False, 1_000_000)
+        assert fill.filled
+        assert fill.ticks_crossed == 0
+        assert fill.sqrt_price_x96 == Q96 + 1_000_000 * Q96 // LIQUIDITY
+        assert fill.usd_delta == -1_000_000
+        assert 0 < fill.perp_delta < 1_000_000
+        assert fill.price_impact > 0
+        # the book itself does not move
+        assert self.book.sqrt_price_x96 == Q96
+
+    def test_crosses_initialized_ticks(self):
+        self.book.add_position(2, 0, 1200, LIQUIDITY)
+        assert self.book.liquidity == 2 * LIQUIDITY
+
+        fill = self.book.simulate_swap(False, 8 * 10**13)
+        assert fill.ticks_crossed == 1
+        assert 600 <= fill.tick < 1200
+        assert fill.liquidity == LIQUIDITY
+
+    def test_runs_out_of_liquidity(self):
+        fill = self.book.simulate_swap(True, 10**18)
+        assert not fill.filled
+        assert fill.liquidity == 0
+        assert fill.perp_delta == -(fill.amount_in)
+
+    def test_price_limit(self):
+        limit = get_sqrt_ratio_at_tick(-60)
+        fill = self.book.simulate_swap(True, 10**18, sqrt_price_limit_x96=limit)
+        assert not fill.filled
+        assert fill.sqrt_price_x96 == limit
+        with pytest.raises(ValueError, match="Invalid price limit"):
+            self.book.simulate_swap(True, 1, sqrt_price_limit_x96=Q96 + 1)
+
+    def test_exact_output_inverts_exact_input(self):
+        book = LiquidityBook(PERP_ID, 60, Q96, fee=0.003)
+        book.add_position(1, -600, 600, LIQUIDITY)
+        exact_in = book.simulate_swap(True, 5_000_000)
+        exact_out = book.simulate_swap(True, exact_in.amount_out, exact_input=False)
+        assert exact_out.amount_out == exact_in.amount_out
+        assert exact_out.amount_in <= exact_in.amount_in
+        assert exact_in.fee_amount == pytest.approx(15_000, abs=1)
+
+    def test_simulate_taker(self):
+        long = self.book.simulate_taker(True, margin=100, leverage=5)
+        assert long.usd_delta == -500_000_000
+        short = self.book.simulate_taker(False, margin=100, leverage=5)
+        assert short.usd_delta == 500_000_000
+        assert short.perp_delta < 0
+        assert short.price_impact < 0 < long.price_impact
+
+
+class TestBookPositions:
+    def test_shared_ticks(self):
+        book = LiquidityBook(PERP_ID, 60, Q96)
+        book.add_position(1, -600, 600, 5)
+        book.add_position(2, 600, 1200, 7)
+        assert book._tick_liquidity[600] == [12, 2]
+        assert book.remove_position(2)
+        assert book._ticks == [-600, 600]
+        assert not book.remove_position(2)
+
+    def test_rejects_off_grid_ticks(self):
+        book = LiquidityBook(PERP_ID, 60, Q96)
+        with pytest.raises(ValueError, match="tick spacing 60 grid"):
+            book.add_position(1, -600, 610, 5)
+
+    def test_apply_events(self):
+        book = LiquidityBook(PERP_ID, 60, Q96)
+        assert book.apply(_event(position_opened_log(1, is_maker=True), 10))
+        assert book.pending == {1}
+        assert book.sqrt_price_x96 == 2**96 * 10
+
+        opened = position_opened_log(2, is_maker=True, ticks=(-60, 60))
+        book.apply(_event(opened, 11), liquidity=5)
+        assert book.positions[2] == (-60, 60, 5)
+        book.apply(_event(position_closed_log(2, was_maker=True), 12))
+        assert 2 not in book.positions
+        assert not book.apply(_event(position_opened_log(3, perp_id="0x" + "77" * 32), 13))
+
+
+class TestFromChain:
+    def setup_method(self):
+        self.provider = FakeProvider({**perp_handlers(), **position_handlers(maker_ids={5, 6})})
+        self.ctx = make_context(self.provider)
+
+    def test_reads_maker_liquidity(self):
+        self.provider.add_log(position_opened_log(5, is_maker=True), 10)
+        self.provider.add_log(position_opened_log(6, is_maker=True), 11)
+        self.provider.add_log(position_opened_log(7), 12)
+        self.provider.add_log(position_closed_log(6, was_maker=True), 13)
+
+        book = LiquidityBook.from_chain(self.ctx, PERP_ID, from_block=5)
+        assert book.positions == {5: (-600, 600, 10**18)}
+        assert book.fee_pips == 3000
+        assert book.tick_spacing == 60
+        assert not book.pending
+
+        # later syncs only read new makers
+        self.provider.add_log(position_closed_log(5, was_maker=True), book.synced_block + 1)
+        book.sync(self.ctx, to_block=book.synced_block + 2)
+        assert book.positions == {}
+
+
+class TestQuoteOpenTakerPosition:
+    def setup_method(self):
+        self.provider = FakeProvider(perp_handlers())
+        self.ctx = make_context(self.provider)
+        self.reason = b""
+
+        def quote(args):
+            _, (_, is_long, margin, margin_ratio, _) = decode(
+                ["bytes32", "(address,bool,uint128,uint24,uint128)"], args
+            )
+            notional = margin * 1_000_000 // margin_ratio
+            sign = 1 if is_long else -1
+            return encode(
+                ["bytes", "int256", "int256"],
+                [self.reason, sign * notional // 100, -sign * notional],
+            )
+
+        signature = "quoteOpenTakerPosition(bytes32,(address,bool,uint128,uint24,uint128))"
+        self.provider.handlers[(PERP_MANAGER, selector(signature))] = quote
+
+    def test_quote(self):
+        params = OpenTakerPositionParams(True, 100, 5, 0)
+        quote = quote_open_taker_position(self.ctx, PERP_ID, params)
+        assert (quote.perp_delta, quote.usd_delta) == (5_000_000, -500_000_000)
+
+    def test_unexpected_reason_raises(self):
+        self.reason = selector("InvalidMargin()")
+        with pytest.raises(PerpCityError):
+            quote_open_taker_position(self.ctx, PERP_ID, OpenTakerPositionParams(True, 100, 5, 0))
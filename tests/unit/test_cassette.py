@@ -0,0 +1,246 @@
+import asyncio
+import time
+
+import pytest
+from web3 import HTTPProvider, Web3
+from web3.providers.base import BaseProvider
+
+from perpcity_sdk import (
+    CassetteMissError,
+    ClosePositionParams,
+    OpenTakerPositionParams,
+    RPCError,
+    open_taker_position,
+)
+from perpcity_sdk.cassette import (
+    CASSETTE_MIDDLEWARE,
+    Cassette,
+    Interaction,
+    record,
+    replay,
+    request_key,
+)
+from perpcity_sdk.standin import StandInChain, StandInServer
+from perpcity_sdk.utils.module_cache import MODULE_CONSTANTS
+
+KEY = "0x" + "01" * 32
+ADDRESS = "0x" + "ab" * 20
+
+_OPEN = OpenTakerPositionParams(is_long=True, margin=10, leverage=2, unspecified_amount_limit=0)
+_CLOSE = ClosePositionParams(min_amt0_out=0, min_amt1_out=0, max_amt1_in=0)
+
+
+class OfflineProvider(BaseProvider):
+    def make_request(self, method, params):
+        raise AssertionError(f"replay reached the provider with {method}")
+
+
+def _offline_w3() -> Web3:
+    return Web3(OfflineProvider())
+
+
+def _offline_http_w3() -> Web3:
+    # Batches need a JSON provider; nothing listens on the discard port
+    return Web3(HTTPProvider("http://127.0.0.1:9"))
+
+
+def _result(value) -> dict:
+    return {"jsonrpc": "2.0", "id": 1, "result": value}
+
+
+def _workload(ctx, perp_id) -> int:
+    # A fresh process would not have the fee and margin constants cached
+    MODULE_CONSTANTS.clear()
+    ctx.get_perp_data(perp_id)
+    position = open_taker_position(ctx, perp_id, _OPEN)
+    position.live_details()
+    position.close_position(_CLOSE)
+    return position.position_id
+
+
+@pytest.fixture
+def recorded():
+    chain = StandInChain()
+    perp_id = chain.create_perp(price=10.0)
+    ctx = chain.connect(KEY)
+    chain.mint_usdc(ctx.account.address, 100)
+    cassette = record(ctx.w3)
+    position_id = _workload(ctx, perp_id)
+    ctx.w3.middleware_onion.remove(CASSETTE_MIDDLEWARE)
+    return chain, perp_id, cassette, position_id
+
+
+class TestRequestKey:
+    def test_normalizes_encoding(self):
+        checksummed = Web3.to_checksum_address(ADDRESS)
+
+        assert request_key("eth_getBalance", [checksummed, "latest"]) == request_key(
+            "eth_getBalance", (ADDRESS, "latest")
+        )
+        assert request_key("eth_call", [{"data": b"\x12", "to": ADDRESS}]) == request_key(
+            "eth_call", [{"to": ADDRESS, "data": "0x12"}]
+        )
+
+    def test_distinguishes_params(self):
+        assert request_key("eth_getBalance", [ADDRESS, "0x1"]) != request_key(
+            "eth_getBalance", [ADDRESS, "0x2"]
+        )
+
+
+class TestRecordReplay:
+    def test_session_replays_offline(self, recorded):
+        chain, perp_id, cassette, position_id = recorded
+        ctx = chain.connect(KEY)
+        ctx.w3.provider = OfflineProvider()
+
+        player = replay(ctx.w3, cassette)
+
+        assert _workload(ctx, perp_id) == position_id
+        assert player.requests == cassette.method_counts()
+        assert player.unused == 0
+        assert not player.misses
+
+    def test_recorded_latency(self):
+        cassette = Cassette([Interaction("eth_blockNumber", [], _result("0x1"), 0.05)])
+        w3 = _offline_w3()
+        replay(w3, cassette, recorded_latency=True)
+
+        start = time.perf_counter()
+        assert w3.eth.block_number == 1
+        assert time.perf_counter() - start >= 0.05
+
+    def test_repeated_requests_replay_in_order(self):
+        cassette = Cassette(
+            [Interaction("eth_blockNumber", [], _result(hex(n)), 0.0) for n in (5, 6, 7)]
+        )
+        w3 = _offline_w3()
+        replay(w3, cassette)
+
+        assert [w3.eth.block_number for _ in range(5)] == [5, 6, 7, 7, 7]
+
+    def test_strict_replays_each_response_once(self):
+        cassette = Cassette([Interaction("eth_blockNumber", [], _result("0x5"), 0.0)])
+        w3 = _offline_w3()
+        player = replay(w3, cassette, strict=True)
+
+        assert w3.eth.block_number == 5
+        with pytest.raises(CassetteMissError):
+            w3.eth.get_block_number()
+        assert player.misses["eth_blockNumber"] == 1
+
+    def test_miss(self):
+        cassette = Cassette([Interaction("eth_getBalance", [ADDRESS, "latest"], _result("0x1"), 0)])
+        w3 = _offline_w3()
+        player = replay(w3, cassette)
+
+        assert w3.eth.get_balance(Web3.to_checksum_address(ADDRESS)) == 1
+        with pytest.raises(CassetteMissError) as excinfo:
+            w3.eth.get_balance(Web3.to_checksum_address(ADDRESS), "pending")
+
+        assert isinstance(excinfo.value, RPCError)
+        assert excinfo.value.method == "eth_getBalance"
+        assert player.misses == {"eth_getBalance": 1}
+
+    def test_changed_transaction_replays_in_order(self):
+        tx_hash = "0x" + "cd" * 32
+        cassette = Cassette(
+            [Interaction("eth_sendRawTransaction", ["0x01"], _result(tx_hash), 0.0)]
+        )
+        w3 = _offline_w3()
+        replay(w3, cassette)
+
+        assert w3.eth.send_raw_transaction("0x02").hex() == tx_hash[2:]
+
+
+class TestBatches:
+    def test_batch_replays_whole_and_by_element(self):
+        chain = StandInChain()
+        chain.mint_usdc(ADDRESS, 1)
+        with StandInServer(chain) as server:
+            w3 = Web3(HTTPProvider(server.url))
+            cassette = record(w3)
+            with w3.batch_requests() as batch:
+                batch.add(w3.eth.get_block_number())
+                batch.add(w3.eth.get_transaction_count(Web3.to_checksum_address(ADDRESS)))
+                recorded = batch.execute()
+
+        assert cassette.method_counts() == {"eth_blockNumber": 1, "eth_getTransactionCount": 1}
+
+        w3 = _offline_http_w3()
+        player = replay(w3, cassette)
+        with w3.batch_requests() as batch:
+            batch.add(w3.eth.get_block_number())
+            batch.add(w3.eth.get_transaction_count(Web3.to_checksum_address(ADDRESS)))
+            assert batch.execute() == recorded
+        assert w3.eth.get_transaction_count(Web3.to_checksum_address(ADDRESS)) == recorded[1]
+        assert player.requests == {"eth_blockNumber": 1, "eth_getTransactionCount": 2}
+
+    def test_unrecorded_batch_answers_per_element(self):
+        cassette = Cassette(
+            [
+                Interaction("eth_blockNumber", [], _result("0x5"), 0.0),
+                Interaction("eth_chainId", [], _result("0x1"), 0.0),
+            ]
+        )
+        w3 = _offline_http_w3()
+        replay(w3, cassette)
+
+        with w3.batch_requests() as batch:
+            batch.add(w3.eth.get_block_number())
+            batch.add(w3.eth.chain_id)
+            assert batch.execute() == [5, 1]
+
+
+class TestFiles:
+    @pytest.mark.parametrize("name", ["session.jsonl", "session.jsonl.gz"])
+    def test_round_trip(self, recorded, tmp_path, name):
+        _chain, _perp_id, cassette, _position_id = recorded
+        cassette.metadata["sdk"] = "test"
+        path = tmp_path / name
+
+        cassette.save(path)
+        loaded = Cassette.load(path)
+
+        assert loaded.metadata == {"sdk": "test"}
+        assert len(loaded) == len(cassette)
+        assert loaded.method_counts() == cassette.method_counts()
+        assert loaded.interactions[0].response == cassette.interactions[0].response
+
+    def test_gzip_is_smaller(self, recorded, tmp_path):
+        cassette = recorded[2]
+        cassette.save(tmp_path / "plain.jsonl")
+        cassette.save(tmp_path / "small.jsonl.gz")
+
+        plain = (tmp_path / "plain.jsonl").stat().st_size
+        assert (tmp_path / "small.jsonl.gz").stat().st_size < plain / 2
+
+    def test_unknown_version(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        path.write_text('{"version": 99}\n')
+
+        with pytest.raises(ValueError, match="Unsupported cassette version 99"):
+            Cassette.load(path)
+
+
+class TestAsync:
+    def test_async_session_replays_offline(self):
+        chain = StandInChain()
+        perp_id = chain.create_perp(price=10.0)
+        ctx = chain.connect_async(KEY)
+        chain.mint_usdc(ctx.account.address, 100)
+        cassette = record(ctx.w3)
+
+        async def run(ctx):
+            MODULE_CONSTANTS.clear()
+            async with ctx:
+                await ctx.get_perp_data(perp_id)
+                position = await ctx.open_taker_position(perp_id, _OPEN)
+            return position.position_id
+
+        position_id = asyncio.run(run(ctx))
+        offline = chain.connect_async(KEY)
+        offline._provider.chain = None  # any request reaching the stand-in would fail
+        player = replay(offline.w3, cassette)
+
+        assert asyncio.run(run(offline)) == position_id
+        assert player.requests == cassette.method_counts()
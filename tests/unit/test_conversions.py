@@ -10,7 +10,9 @@ from perpcity_sdk.utils.conversions import (
     scale_from_x96,
     scale_to_x96,
     sqrt_price_x96_to_price,
+    sqrt_price_x96_to_tick,
 )
+from perpcity_sdk.utils.tick_math import get_sqrt_ratio_at_tick
 
 
 class TestPriceToSqrtPriceX96:
@@ -219,3 +221,19 @@ class TestRoundTrips:
             assert abs(result_tick - tick) <= 1, (
                 f"Round trip failed for tick {tick}: got {result_tick}"
             )
+
+
+class TestSqrtPriceX96ToTick:
+    def test_exact_tick(self):
+        sqrt_price = get_sqrt_ratio_at_tick(-4321)
+        assert sqrt_price_x96_to_tick(sqrt_price, True) == -4321
+        assert sqrt_price_x96_to_tick(sqrt_price, False) == -4321
+
+    def test_between_ticks(self):
+        sqrt_price = get_sqrt_ratio_at_tick(100) + 1
+        assert sqrt_price_x96_to_tick(sqrt_price, True) == 100
+        assert sqrt_price_x96_to_tick(sqrt_price, False) == 101
+
+    def test_agrees_with_price_to_tick(self):
+        sqrt_price = price_to_sqrt_price_x96(2500)
+        assert sqrt_price_x96_to_tick(sqrt_price, True) == price_to_tick(2500, True)
@@ -0,0 +1,94 @@
+from web3 import Web3
+
+from .fakes import (
+    PERP_ID,
+    FakeProvider,
+    eth_calls,
+    make_context,
+    nft_transfer_log,
+    position_handlers,
+)
+
+ALICE = Web3.to_checksum_address("0x" + "a1" * 20)
+BOB = Web3.to_checksum_address("0x" + "b2" * 20)
+
+
+def _get_logs_ranges(provider) -> list[tuple[int, int]]:
+    return [
+        (int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16))
+        for method, params in provider.calls
+        if method == "eth_getLogs"
+    ]
+
+
+def _position_reads(provider) -> int:
+    selector = Web3.keccak(text="positions(uint256)")[:4].hex()
+    return sum(
+        params[0]["data"].count(selector)
+        for method, params in provider.calls
+        if method == "eth_call"
+    )
+
+
+class TestDiscoverUserPositions:
+    def setup_method(self):
+        self.owners = {1: ALICE, 2: ALICE, 3: BOB}
+        self.provider = FakeProvider(position_handlers(maker_ids={2}, owners=self.owners))
+        self.provider.add_log(nft_transfer_log(1, ALICE), 10)
+        self.provider.add_log(nft_transfer_log(2, ALICE), 20)
+        self.provider.add_log(nft_transfer_log(3, BOB), 30)
+        self.ctx = make_context(self.provider)
+
+    def test_finds_owned_positions(self):
+        positions = self.ctx.discover_user_positions(ALICE)
+        assert positions == [
+            {"perp_id": PERP_ID, "position_id": 1, "is_long": True, "is_maker": False},
+            {"perp_id": PERP_ID, "position_id": 2, "is_long": None, "is_maker": True},
+        ]
+        # ownerOf and positions() for every id share a single multicall
+        assert eth_calls(self.provider) == 1
+
+    def test_later_calls_are_incremental(self):
+        self.ctx.discover_user_positions(ALICE)
+        first_scan_end = _get_logs_ranges(self.provider)[-1][1]
+
+        self.provider.add_log(nft_transfer_log(3, ALICE, from_=BOB), first_scan_end + 1)
+        self.owners[3] = ALICE
+        self.provider.calls.clear()
+
+        positions = self.ctx.discover_user_positions(ALICE)
+        assert [p["position_id"] for p in positions] == [1, 2, 3]
+        assert all(start == first_scan_end + 1 for start, _ in _get_logs_ranges(self.provider))
+        # only the new id needs its positions() read
+        assert _position_reads(self.provider) == 1
+
+    def test_drops_transferred_and_burned_positions(self):
+        self.ctx.discover_user_positions(ALICE)
+        block = self.provider.block_number
+        self.provider.add_log(nft_transfer_log(1, BOB, from_=ALICE), block)
+        self.owners[1] = BOB
+        # position 2 was closed: the token is burned without a log in the scanned range
+        del self.owners[2]
+
+        assert self.ctx.discover_user_positions(ALICE) == []
+
+    def test_get_user_data_discovers_positions(self):
+        user = self.ctx.get_user_data(ALICE)
+        assert [p.position_id for p in user.open_positions] == [1, 2]
+        assert user.open_positions[1].is_maker is True
+        assert user.usdc_balance == 1500.0
+
+    def test_first_scan_starts_at_deployment_block(self):
+        ctx = make_context(self.provider, deployment_block=15)
+
+        positions = ctx.discover_user_positions(ALICE)
+        # position 1 was minted before the deployment block the context was given
+        assert [p["position_id"] for p in positions] == [2]
+        assert {start for start, _ in _get_logs_ranges(self.provider)} == {15}
+
+    def test_get_user_data_forwards_from_block(self):
+        ctx = make_context(self.provider, deployment_block=15)
+
+        user = ctx.get_user_data(ALICE, from_block=5)
+        assert [p.position_id for p in user.open_positions] == [1, 2]
+        assert {start for start, _ in _get_logs_ranges(self.provider)} == {5}
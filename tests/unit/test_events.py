@@ -0,0 +1,151 @@
+from eth_abi import encode
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import Web3
+
+from perpcity_sdk.abis import PERP_MANAGER_ABI
+from perpcity_sdk.functions.perp_manager import _find_opened_position_id, _find_perp_created
+from perpcity_sdk.functions.position import _find_reopened_position_id
+from perpcity_sdk.types import PerpCreatedEvent, PositionOpenedEvent, TransferEvent
+from perpcity_sdk.utils.events import PERP_MANAGER_EVENTS
+
+from .fakes import (
+    PERP_ID,
+    PERP_MANAGER,
+    USDC,
+    nft_transfer_log,
+    perp_created_log,
+    position_opened_log,
+)
+
+OWNER = "0x" + "99" * 20
+
+
+def _topic(signature: str) -> str:
+    return "0x" + keccak(text=signature).hex()
+
+
+def _address_topic(address: str) -> str:
+    return "0x" + encode(["address"], [address]).hex()
+
+
+def _receipt_log(log: dict, log_index: int = 0) -> dict:
+    """The same log as web3 returns it inside a receipt (bytes instead of hex strings)."""
+    return {
+        "address": Web3.to_checksum_address(log["address"]),
+        "topics": [HexBytes(t) for t in log["topics"]],
+        "data": HexBytes(log["data"]),
+        "blockNumber": 1235,
+        "blockHash": HexBytes("0x" + "00" * 32),
+        "transactionHash": HexBytes("0x" + "cd" * 32),
+        "transactionIndex": 0,
+        "logIndex": log_index,
+    }
+
+
+def _receipt(*logs: dict) -> dict:
+    return {
+        "transactionHash": HexBytes("0x" + "cd" * 32),
+        "logs": [_receipt_log(log, i) for i, log in enumerate(logs)],
+    }
+
+
+def _erc20_transfer_log() -> dict:
+    return {
+        "address": USDC,
+        "topics": [
+            _topic("Transfer(address,address,uint256)"),
+            _address_topic(OWNER),
+            _address_topic(PERP_MANAGER),
+        ],
+        "data": "0x" + encode(["uint256"], [10**6]).hex(),
+    }
+
+
+class TestEventDecoder:
+    def test_decodes_position_opened(self):
+        (event,) = PERP_MANAGER_EVENTS.decode_receipt(_receipt(position_opened_log(7, True)))
+        assert isinstance(event, PositionOpenedEvent)
+        assert event.perp_id == PERP_ID
+        assert event.position_id == 7
+        assert event.is_maker is True
+        assert event.sqrt_price_x96 == 2**96 * 10
+        assert event.address == Web3.to_checksum_address(PERP_MANAGER)
+        assert event.block_number == 1235
+        assert event.transaction_hash == "0x" + "cd" * 32
+        assert event.log_index == 0
+
+    def test_matches_web3_process_log(self):
+        log = _receipt_log(position_opened_log(7, True))
+        contract = Web3().eth.contract(abi=PERP_MANAGER_ABI)
+        args = contract.events.PositionOpened().process_log(log)["args"]
+
+        event = PERP_MANAGER_EVENTS.decode_log(log)
+        assert event.position_id == args["posId"]
+        assert event.perp_delta == args["perpDelta"]
+        assert event.perp_id == "0x" + args["perpId"].hex()
+
+    def test_raw_get_logs_format(self):
+        log = {
+            **position_opened_log(3),
+            "blockNumber": hex(99),
+            "transactionHash": "0x" + "ef" * 32,
+            "logIndex": "0x2",
+        }
+        event = PERP_MANAGER_EVENTS.decode_log(log)
+        assert event.block_number == 99
+        assert event.log_index == 2
+
+    def test_indexed_arguments(self):
+        (event,) = PERP_MANAGER_EVENTS.decode_logs([nft_transfer_log(12, OWNER)])
+        assert event == TransferEvent(
+            from_address="0x" + "00" * 20,
+            to_address=Web3.to_checksum_address(OWNER),
+            token_id=12,
+            address=Web3.to_checksum_address(PERP_MANAGER),
+        )
+
+    def test_skips_erc20_transfer_with_same_signature(self):
+        assert PERP_MANAGER_EVENTS.decode_log(_erc20_transfer_log()) is None
+
+    def test_filters_by_record_and_address(self):
+        logs = [
+            _erc20_transfer_log(),
+            perp_created_log(),
+            position_opened_log(5),
+            {**position_opened_log(6), "address": USDC},
+        ]
+        events = PERP_MANAGER_EVENTS.decode_logs(logs, PositionOpenedEvent, PERP_MANAGER)
+        assert [e.position_id for e in events] == [5]
+
+    def test_topic(self):
+        contract = Web3().eth.contract(abi=PERP_MANAGER_ABI)
+        topic = contract.events.PerpCreated().topic
+        assert PERP_MANAGER_EVENTS.topic(PerpCreatedEvent) == HexBytes(topic).to_0x_hex()
+
+    def test_records_use_slots(self):
+        event = PERP_MANAGER_EVENTS.decode_log(position_opened_log(1))
+        assert not hasattr(event, "__dict__")
+
+
+class TestReceiptHelpers:
+    def setup_method(self):
+        self.perp_manager = Web3().eth.contract(
+            address=Web3.to_checksum_address(PERP_MANAGER), abi=PERP_MANAGER_ABI
+        )
+
+    def test_find_perp_created(self):
+        receipt = _receipt(_erc20_transfer_log(), perp_created_log())
+        assert _find_perp_created(self.perp_manager, receipt) == PERP_ID
+
+    def test_find_opened_position_id(self):
+        receipt = _receipt(
+            _erc20_transfer_log(), position_opened_log(8, is_maker=True), position_opened_log(9)
+        )
+        assert _find_opened_position_id(self.perp_manager, receipt, PERP_ID, False) == 9
+        assert _find_opened_position_id(self.perp_manager, receipt, PERP_ID, True) == 8
+
+    def test_find_reopened_position_id(self):
+        receipt = _receipt(position_opened_log(4), position_opened_log(11))
+        assert _find_reopened_position_id(self.perp_manager, receipt, PERP_ID, 4) == 11
+        assert _find_reopened_position_id(self.perp_manager, _receipt(), PERP_ID, 4) is None
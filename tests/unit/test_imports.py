@@ -0,0 +1,93 @@
+import subprocess
+import sys
+
+import pytest
+
+import perpcity_sdk
+from perpcity_sdk import abis, utils
+from perpcity_sdk.abis import _generate, selectors
+
+
+def _loaded_after(statement: str) -> set[str]:
+    output = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{statement}\nprint(*sys.modules)"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return set(output.split())
+
+
+class TestLazyExports:
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "import perpcity_sdk",
+            "from perpcity_sdk import PerpData, tick_to_price",
+            "from perpcity_sdk.utils.conversions import price_to_tick",
+            "from perpcity_sdk.utils.liquidity import estimate_liquidity",
+        ],
+    )
+    def test_light_imports_skip_web3(self, statement):
+        loaded = _loaded_after(statement)
+        assert "web3" not in loaded
+        assert "eth_account" not in loaded
+
+    @pytest.mark.parametrize("package", [perpcity_sdk, utils], ids=lambda p: p.__name__)
+    def test_all_names_resolve(self, package):
+        for name in package.__all__:
+            assert getattr(package, name) is not None
+        assert set(package.__all__) <= set(dir(package))
+
+    def test_export_is_the_defining_object(self):
+        from perpcity_sdk.context import PerpCityContext
+        from perpcity_sdk.utils.conversions import price_to_tick
+
+        assert perpcity_sdk.PerpCityContext is PerpCityContext
+        assert perpcity_sdk.price_to_tick is price_to_tick
+        assert utils.price_to_tick is price_to_tick
+
+    def test_unknown_name(self):
+        with pytest.raises(AttributeError, match="no_such_name"):
+            perpcity_sdk.no_such_name  # noqa: B018
+        with pytest.raises(ImportError):
+            from perpcity_sdk import no_such_name  # noqa: F401
+
+
+class TestLazyAbis:
+    def test_abi_parsed_on_first_access(self):
+        code = (
+            "import perpcity_sdk.abis as a\n"
+            "print('PERP_MANAGER_ABI' in vars(a))\n"
+            "a.PERP_MANAGER_ABI\n"
+            "print('PERP_MANAGER_ABI' in vars(a), 'ERC20_ABI' in vars(a))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], check=True, capture_output=True, text=True
+        ).stdout
+        assert output.split() == ["False", "True", "False"]
+
+    def test_cached_after_first_access(self):
+        assert isinstance(abis.PERP_MANAGER_ABI, list)
+        assert abis.PERP_MANAGER_ABI is abis.PERP_MANAGER_ABI
+        assert set(abis.__all__) <= set(dir(abis))
+
+    def test_unknown_abi(self):
+        with pytest.raises(AttributeError):
+            abis.NO_SUCH_ABI  # noqa: B018
+
+
+class TestGeneratedSelectors:
+    def test_up_to_date(self):
+        assert _generate.SELECTORS_PATH.read_text() == _generate.render(), (
+            "abis/selectors.py is stale; run `make abis`"
+        )
+
+    def test_known_values(self):
+        assert selectors.ERC20_SELECTORS["approve(address,uint256)"] == bytes.fromhex("095ea7b3")
+        assert selectors.ERC20_TOPICS["Transfer"] == (
+            "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+        )
+        assert selectors.MULTICALL3_SELECTORS[
+            "aggregate3((address,bool,bytes)[])"
+        ] == bytes.fromhex("82ad56cb")
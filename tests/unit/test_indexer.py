@@ -0,0 +1,170 @@
+import pytest
+from web3 import Web3
+from web3.exceptions import Web3RPCError
+
+from perpcity_sdk.indexer import DEFAULT_INDEX_CONFIRMATIONS, PerpCityIndexer
+from perpcity_sdk.utils.logs import is_range_error, iter_log_chunks
+
+from .fakes import (
+    PERP_ID,
+    PERP_MANAGER,
+    FakeProvider,
+    make_context,
+    nft_transfer_log,
+    notional_adjusted_log,
+    perp_created_log,
+    position_closed_log,
+    position_opened_log,
+)
+
+ALICE = Web3.to_checksum_address("0x" + "a1" * 20)
+BOB = Web3.to_checksum_address("0x" + "b2" * 20)
+
+
+def _get_logs_ranges(provider) -> list[tuple[int, int]]:
+    return [
+        (int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16))
+        for method, params in provider.calls
+        if method == "eth_getLogs"
+    ]
+
+
+def _provider() -> FakeProvider:
+    provider = FakeProvider({})
+    provider.add_log(perp_created_log(), 10)
+    provider.add_log(nft_transfer_log(1, ALICE), 20)
+    provider.add_log(position_opened_log(1, perp_delta=5), 20)
+    provider.add_log(nft_transfer_log(2, ALICE), 30)
+    provider.add_log(position_opened_log(2, is_maker=True), 30)
+    provider.add_log(nft_transfer_log(3, BOB), 40)
+    provider.add_log(position_opened_log(3, perp_delta=-5), 40)
+    provider.add_log(position_closed_log(2), 50)
+    provider.add_log(nft_transfer_log(3, ALICE, from_=BOB), 60)
+    return provider
+
+
+class TestIterLogChunks:
+    def test_splits_on_range_errors_and_grows_back(self):
+        provider = _provider()
+        provider.max_log_range = 25
+        w3 = Web3(provider)
+
+        chunks = list(iter_log_chunks(w3, PERP_MANAGER, [], 0, 99, block_range=40))
+        assert [(start, end) for start, end, _ in chunks] == [
+            (0, 19),
+            (20, 39),
+            (40, 59),
+            (60, 79),
+            (80, 99),
+        ]
+        assert sum(len(logs) for _, _, logs in chunks) == 9
+        # 40 blocks failed, 20 succeeded, doubling to 40 failed again, ...
+        assert _get_logs_ranges(provider)[:3] == [(0, 39), (0, 19), (20, 59)]
+
+    def test_other_errors_are_raised(self):
+        provider = FakeProvider({})
+        provider.max_log_range = 0
+        with pytest.raises(Web3RPCError, match="block range"):
+            list(iter_log_chunks(Web3(provider), PERP_MANAGER, [], 5, 5))
+
+    def test_is_range_error(self):
+        assert is_range_error(Exception("query returned more than 10000 results"))
+        assert is_range_error(Exception("Log response size exceeded"))
+        assert not is_range_error(Exception("connection reset"))
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "429 Client Error: Too Many Requests for url: https://rpc.example",
+            "too many requests, please slow down",
+            "limit exceeded",
+            "project ID request rate exceeded",
+        ],
+    )
+    def test_rate_limits_are_not_range_errors(self, message):
+        assert not is_range_error(Exception(message))
+
+    def test_rate_limits_are_raised_without_splitting(self):
+        provider = _provider()
+        make_request = provider.make_request
+
+        def throttled(method, params):
+            if method == "eth_getLogs":
+                provider.calls.append((method, params))
+                error = {"code": -32005, "message": "limit exceeded"}
+                return {"jsonrpc": "2.0", "id": 1, "error": error}
+            return make_request(method, params)
+
+        provider.make_request = throttled
+        with pytest.raises(Web3RPCError, match="limit exceeded"):
+            list(iter_log_chunks(Web3(provider), PERP_MANAGER, [], 0, 99, block_range=40))
+        assert _get_logs_ranges(provider) == [(0, 39)]
+
+    def test_invalid_block_range(self):
+        with pytest.raises(ValueError, match="Invalid block range"):
+            list(iter_log_chunks(Web3(FakeProvider({})), PERP_MANAGER, [], 0, 10, block_range=0))
+
+
+class TestPerpCityIndexer:
+    def setup_method(self):
+        self.provider = _provider()
+        self.ctx = make_context(self.provider)
+
+    def test_indexes_perps_and_positions(self):
+        with PerpCityIndexer(self.ctx) as indexer:
+            assert indexer.sync(to_block=100) == 9
+            assert indexer.checkpoint == 100
+
+            (perp,) = indexer.perps()
+            assert perp.perp_id == PERP_ID
+            assert perp.created_block == 10
+
+            positions = indexer.open_positions(owner=ALICE)
+            assert [p.position_id for p in positions] == [1, 3]
+            assert positions[0].is_long is True
+            assert positions[1].is_long is False
+
+            assert indexer.open_positions(owner=BOB) == []
+            assert indexer.closed_position_ids() == {2}
+            closed = indexer.position(2)
+            assert closed.is_maker is True
+            assert closed.is_long is None
+            assert closed.closed_block == 50
+
+    def test_resumes_from_checkpoint(self, tmp_path):
+        db = tmp_path / "perpcity.db"
+        with PerpCityIndexer(self.ctx, db, block_range=1000) as indexer:
+            indexer.sync(to_block=45)
+
+        self.provider.add_log(position_closed_log(1, was_liquidated=True), 70)
+        self.provider.calls.clear()
+        with PerpCityIndexer(self.ctx, db, block_range=1000) as indexer:
+            assert indexer.sync(to_block=100) == 3
+            assert _get_logs_ranges(self.provider) == [(46, 100)]
+            assert [p.position_id for p in indexer.open_positions()] == [3]
+            assert indexer.position(1).was_liquidated is True
+
+    def test_resync_is_idempotent(self):
+        with PerpCityIndexer(self.ctx) as indexer:
+            indexer.sync(to_block=100)
+            assert indexer.sync(to_block=100) == 0
+            assert indexer.open_positions(perp_id=PERP_ID.upper().replace("0X", "0x"))
+
+    def test_sync_defaults_to_latest_block(self):
+        with PerpCityIndexer(self.ctx, confirmations=3) as indexer:
+            indexer.sync()
+            assert indexer.checkpoint == self.provider.block_number - 1 - 2
+
+    def test_default_confirmations_leave_reorg_depth(self):
+        with PerpCityIndexer(self.ctx) as indexer:
+            indexer.sync()
+            head = self.provider.block_number - 1
+            assert indexer.checkpoint == head - DEFAULT_INDEX_CONFIRMATIONS + 1
+
+    def test_notional_adjusted_flips_side(self):
+        self.provider.add_log(notional_adjusted_log(1, new_perp_delta=-3), 70)
+        self.provider.add_log(notional_adjusted_log(3, new_perp_delta=0), 70)
+        with PerpCityIndexer(self.ctx) as indexer:
+            indexer.sync(to_block=100)
+            assert indexer.position(1).is_long is False
+            assert indexer.position(3).is_long is False
@@ -0,0 +1,250 @@
+import asyncio
+
+import pytest
+from web3 import HTTPProvider, Web3
+from web3.exceptions import Web3RPCError
+
+from perpcity_sdk import (
+    ClosePositionParams,
+    InMemoryExporter,
+    LiquidationScanner,
+    OpenTakerPositionParams,
+    PerpCityError,
+    PerpCityMetrics,
+    PrometheusExporter,
+    open_taker_position,
+)
+from perpcity_sdk.metrics import METRICS_MIDDLEWARE, MetricsSnapshot, prometheus_text
+from perpcity_sdk.standin import NetworkConditions, StandInChain, StandInServer
+from perpcity_sdk.utils.module_cache import MODULE_CONSTANTS
+
+KEY = "0x" + "01" * 32
+ADDRESS = "0x" + "ab" * 20
+
+_OPEN = OpenTakerPositionParams(is_long=True, margin=10, leverage=2, unspecified_amount_limit=0)
+_CLOSE = ClosePositionParams(min_amt0_out=0, min_amt1_out=0, max_amt1_in=0)
+
+
+@pytest.fixture
+def chain():
+    return StandInChain()
+
+
+@pytest.fixture
+def perp_id(chain):
+    return chain.create_perp(price=10.0)
+
+
+def _connect(chain, conditions=None, metrics=None):
+    ctx = chain.connect(KEY, conditions, metrics=metrics or PerpCityMetrics())
+    chain.mint_usdc(ctx.account.address, 100)
+    MODULE_CONSTANTS.clear()
+    return ctx
+
+
+class TestRequests:
+    def test_counts_by_method(self, chain):
+        ctx = _connect(chain)
+
+        for _ in range(3):
+            ctx.w3.eth.get_block_number()
+
+        snapshot = ctx.metrics.snapshot()
+        assert snapshot.rpc_methods["eth_blockNumber"].count == 3
+        assert snapshot.rpc_methods["eth_blockNumber"].errors == 0
+
+    def test_latency_histogram(self, chain):
+        ctx = _connect(chain, NetworkConditions(method_latency={"eth_blockNumber": 0.02}))
+
+        ctx.w3.eth.get_block_number()
+
+        series = ctx.metrics.snapshot().rpc_methods["eth_blockNumber"]
+        buckets = dict(zip(ctx.metrics.buckets, series.bucket_counts, strict=True))
+        assert buckets[0.01] == 0
+        assert buckets[0.025] == buckets[10.0] == 1
+        assert 0.02 <= series.mean_seconds < 0.025
+
+    def test_rpc_errors(self, chain):
+        conditions = NetworkConditions()
+        ctx = _connect(chain, conditions)
+        conditions.fail_next("eth_blockNumber", "boom")
+
+        with pytest.raises(Web3RPCError, match="boom"):
+            ctx.w3.eth.get_block_number()
+        ctx.w3.eth.get_block_number()
+
+        series = ctx.metrics.snapshot().rpc_methods["eth_blockNumber"]
+        assert (series.count, series.errors) == (2, 1)
+
+    def test_batch_elements(self, chain):
+        metrics = PerpCityMetrics()
+        with StandInServer(chain) as server:
+            w3 = Web3(HTTPProvider(server.url))
+            metrics.install(w3)
+            with w3.batch_requests() as batch:
+                batch.add(w3.eth.get_block_number())
+                batch.add(w3.eth.get_transaction_count(Web3.to_checksum_address(ADDRESS)))
+                batch.execute()
+
+        snapshot = metrics.snapshot()
+        assert snapshot.rpc_methods["eth_blockNumber"].count == 1
+        assert snapshot.rpc_methods["eth_getTransactionCount"].count == 1
+
+    def test_disabled(self, chain):
+        ctx = _connect(chain)
+        ctx.metrics.enabled = False
+
+        ctx.w3.eth.get_block_number()
+
+        assert ctx.metrics.snapshot().rpc_methods == {}
+
+
+class TestContractFunctions:
+    def test_multicall_reads_by_function(self, chain, perp_id):
+        ctx = _connect(chain)
+
+        ctx.get_perp_data(perp_id)
+
+        functions = ctx.metrics.snapshot().contract_functions
+        assert functions[("cfgs", "eth_call")].count == 1
+        assert functions[("timeWeightedAvgSqrtPriceX96", "eth_call")].count == 1
+        assert ("aggregate3", "eth_call") in functions
+
+    def test_gas_estimates_and_transactions(self, chain, perp_id):
+        ctx = _connect(chain)
+
+        open_taker_position(ctx, perp_id, _OPEN).live_details()
+
+        functions = ctx.metrics.snapshot().contract_functions
+        assert functions[("openTakerPos", "eth_estimateGas")].count == 1
+        assert functions[("openTakerPos", "eth_sendRawTransaction")].count == 1
+        assert functions[("quoteClosePosition", "eth_call")].count == 1
+
+
+class TestEntryPoints:
+    def test_requests_attributed_to_outermost_entry_point(self, chain, perp_id):
+        ctx = _connect(chain)
+
+        position = open_taker_position(ctx, perp_id, _OPEN)
+        position.close_position(_CLOSE)
+
+        snapshot = ctx.metrics.snapshot()
+        # send_transaction and get_perp_data ran inside the open and are not observed
+        assert set(snapshot.entry_points) == {"open_taker_position", "close_position"}
+        assert snapshot.entry_points["open_taker_position"].count == 1
+        assert snapshot.entry_point_requests[("open_taker_position", "eth_estimateGas")] == 2
+        assert snapshot.entry_point_requests[("close_position", "eth_sendRawTransaction")] == 1
+        assert sum(snapshot.entry_point_requests.values()) == sum(
+            series.count for series in snapshot.rpc_methods.values()
+        )
+
+    def test_failed_entry_point(self, chain):
+        ctx = _connect(chain)
+
+        with pytest.raises(PerpCityError):
+            ctx.get_perp_data("0x" + "00" * 32)
+
+        series = ctx.metrics.snapshot().entry_points["get_perp_data"]
+        assert (series.count, series.errors) == (1, 1)
+
+    def test_scanner_workers_attributed(self, chain, perp_id):
+        ctx = _connect(chain)
+        open_taker_position(ctx, perp_id, _OPEN)
+        ctx.metrics.reset()
+
+        LiquidationScanner(ctx, batch_size=1, max_workers=2).scan()
+
+        snapshot = ctx.metrics.snapshot()
+        assert set(snapshot.entry_points) == {"scan_liquidatable_positions"}
+        assert sum(snapshot.entry_point_requests.values()) == sum(
+            series.count for series in snapshot.rpc_methods.values()
+        )
+
+    def test_without_metrics(self, chain, perp_id):
+        ctx = chain.connect(KEY)
+
+        ctx.get_perp_data(perp_id)
+
+        assert ctx.metrics is None
+        assert METRICS_MIDDLEWARE not in [name for _, name in ctx.w3.middleware_onion.middleware]
+
+
+class TestExporters:
+    def test_in_memory(self, chain):
+        exporter = InMemoryExporter(keep=2)
+        ctx = _connect(chain, metrics=PerpCityMetrics(exporters=[exporter]))
+
+        for _ in range(3):
+            ctx.w3.eth.get_block_number()
+            ctx.metrics.export()
+
+        assert len(exporter.snapshots) == 2
+        assert exporter.latest.rpc_methods["eth_blockNumber"].count == 3
+        with pytest.raises(ValueError):
+            InMemoryExporter(keep=0)
+
+    def test_prometheus_text(self, chain, perp_id):
+        ctx = _connect(chain, metrics=PerpCityMetrics(buckets=(0.1, 1.0)))
+        ctx.get_perp_data(perp_id)
+
+        text = prometheus_text(ctx.metrics.snapshot(), namespace="pc")
+
+        assert "# TYPE pc_rpc_requests_total counter" in text
+        assert "# TYPE pc_rpc_request_duration_seconds histogram" in text
+        assert 'pc_contract_calls_total{function="cfgs",method="eth_call"} 1' in text
+        assert (
+            'pc_entry_point_call_duration_seconds_bucket{entry_point="get_perp_data",le="+Inf"} 1'
+            in text
+        )
+        assert (
+            'pc_entry_point_rpc_requests_total{entry_point="get_perp_data",method="eth_call"}'
+            in text
+        )
+        assert 'le="0.1"' in text and 'le="1.0"' in text
+
+    def test_prometheus_escapes_labels(self):
+        snapshot = MetricsSnapshot(
+            buckets=(),
+            rpc_methods={},
+            contract_functions={},
+            entry_points={},
+            entry_point_requests={('a"b\\c', "eth_call"): 1},
+        )
+
+        assert 'entry_point="a\\"b\\\\c"' in prometheus_text(snapshot)
+
+    def test_prometheus_file(self, chain, tmp_path):
+        path = tmp_path / "perpcity.prom"
+        exporter = PrometheusExporter(path)
+        ctx = _connect(chain, metrics=PerpCityMetrics(exporters=[exporter]))
+        ctx.w3.eth.get_block_number()
+
+        ctx.metrics.export()
+
+        assert path.read_text() == exporter.text
+        assert 'perpcity_rpc_requests_total{method="eth_blockNumber"} 1' in exporter.text
+
+
+class TestAsync:
+    def test_async_context(self, chain, perp_id):
+        metrics = PerpCityMetrics()
+        ctx = chain.connect_async(KEY, metrics=metrics)
+        chain.mint_usdc(ctx.account.address, 100)
+        MODULE_CONSTANTS.clear()
+
+        async def run():
+            async with ctx:
+                await asyncio.gather(ctx.get_perp_data(perp_id), ctx.get_perp_data(perp_id))
+                position = await ctx.open_taker_position(perp_id, _OPEN)
+                await position.live_details()
+
+        asyncio.run(run())
+
+        snapshot = metrics.snapshot()
+        assert snapshot.entry_points["get_perp_data"].count == 2
+        assert snapshot.entry_points["open_taker_position"].count == 1
+        assert snapshot.entry_points["live_details"].count == 1
+        assert snapshot.contract_functions[("openTakerPos", "eth_estimateGas")].count == 1
+        assert sum(snapshot.entry_point_requests.values()) == sum(
+            series.count for series in snapshot.rpc_methods.values()
+        )
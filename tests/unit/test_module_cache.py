@@ -0,0 +1,74 @@
+import pytest
+
+from perpcity_sdk.types import Bounds, Fees
+from perpcity_sdk.utils.module_cache import MODULE_CONSTANTS, ModuleConstantsCache
+
+from .fakes import (
+    FEES,
+    MARGIN_RATIOS,
+    PERP_ID,
+    FakeProvider,
+    eth_calls,
+    make_context,
+    perp_handlers,
+)
+
+FEES_VALUE = Fees(creator_fee=0.001, insurance_fee=0.0005, lp_fee=0.003, liquidation_fee=0.01)
+
+
+class TestModuleConstantsCache:
+    def test_keyed_by_chain_and_address(self):
+        cache = ModuleConstantsCache()
+        cache.set_fees(1, FEES.upper().replace("0X", "0x"), FEES_VALUE)
+        assert cache.get_fees(1, FEES) == FEES_VALUE
+        assert cache.get_fees(2, FEES) is None
+
+    def test_clear(self):
+        cache = ModuleConstantsCache()
+        cache.set_bounds(1, MARGIN_RATIOS, Bounds(10, 1.0, 10.0, 0.05))
+        cache.clear()
+        assert cache.get_bounds(1, MARGIN_RATIOS) is None
+
+
+class TestPerpDataUsesModuleCache:
+    def test_refresh_reads_only_mark(self):
+        provider = FakeProvider(perp_handlers())
+        ctx = make_context(provider, multicall_address=None)
+
+        first = ctx.get_perp_data(PERP_ID)
+        calls_before = eth_calls(provider)
+        second = ctx.get_perp_data(PERP_ID)
+
+        assert eth_calls(provider) == calls_before + 1
+        assert second == first
+
+    def test_cache_is_shared_across_contexts(self):
+        make_context(FakeProvider(perp_handlers()), multicall_address=None).get_perp_data(PERP_ID)
+
+        provider = FakeProvider(perp_handlers())
+        make_context(provider, multicall_address=None).get_perp_data(PERP_ID)
+        # cfgs, mark
+        assert eth_calls(provider) == 2
+
+    def test_maker_ratios(self):
+        ctx = make_context(FakeProvider(perp_handlers()))
+        bounds = ctx.get_perp_data(PERP_ID).bounds
+
+        assert bounds.min_maker_leverage == 1.0
+        assert bounds.max_maker_leverage == 10.0
+        assert bounds.liquidation_maker_ratio == pytest.approx(0.05)
+        assert MODULE_CONSTANTS.get_bounds(ctx._chain_id, MARGIN_RATIOS) == bounds
+
+    def test_module_without_maker_ratios(self):
+        ctx = make_context(FakeProvider(perp_handlers(maker_ratios=False)))
+        bounds = ctx.get_perp_data(PERP_ID).bounds
+
+        assert bounds.max_taker_leverage == 20.0
+        assert bounds.min_maker_leverage is None
+        assert bounds.liquidation_maker_ratio is None
+
+    def test_failed_read_is_not_cached(self):
+        ctx = make_context(FakeProvider(perp_handlers(fee_reverts=True)))
+        with pytest.raises(Exception, match="Fees module has not been registered"):
+            ctx.get_perp_data(PERP_ID)
+        assert MODULE_CONSTANTS.get_fees(ctx._chain_id, FEES) is None
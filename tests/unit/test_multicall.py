@@ -0,0 +1,247 @@
+import pytest
+from eth_abi import decode, encode
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+
+from perpcity_sdk.abis import FEES_ABI, MULTICALL3_ABI, PERP_MANAGER_ABI
+from perpcity_sdk.utils.constants import MULTICALL3_ADDRESS
+from perpcity_sdk.utils.errors import PerpCityError
+from perpcity_sdk.utils.multicall import (
+    aggregate3,
+    aggregate3_chunked,
+    aggregate3_encoded,
+    decode_revert_data,
+)
+
+from .fakes import (
+    FEES,
+    PERP_ID,
+    PERP_MANAGER,
+    FakeProvider,
+    eth_calls,
+    make_context,
+    perp_handlers,
+    position_handlers,
+    selector,
+)
+
+
+class TestDecodeRevertData:
+    def test_error_string(self):
+        data = selector("Error(string)") + encode(["string"], ["boom"])
+        err = decode_revert_data(data)
+        assert isinstance(err, ContractLogicError)
+        assert err.message == "execution reverted: boom"
+
+    def test_panic(self):
+        data = selector("Panic(uint256)") + encode(["uint256"], [0x11])
+        assert decode_revert_data(data).message == "execution reverted: Panic(0x11)"
+
+    def test_custom_error_from_abi(self):
+        data = selector("InvalidAction(uint8)") + encode(["uint8"], [3])
+        assert decode_revert_data(data).message == "execution reverted: InvalidAction(3)"
+
+    def test_unknownselector(self):
+        err = decode_revert_data(bytes.fromhex("deadbeef"))
+        assert err.message == "execution reverted: 0xdeadbeef"
+
+    def test_empty(self):
+        assert decode_revert_data(b"").message == "execution reverted"
+
+
+class TestAggregate3:
+    def setup_method(self):
+        self.provider = FakeProvider(perp_handlers(fee_reverts=True))
+        self.w3 = Web3(self.provider)
+        self.multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        self.fees = self.w3.eth.contract(address=Web3.to_checksum_address(FEES), abi=FEES_ABI)
+        self.pm = self.w3.eth.contract(
+            address=Web3.to_checksum_address(PERP_MANAGER), abi=PERP_MANAGER_ABI
+        )
+
+    def test_single_round_trip(self):
+        results = aggregate3(
+            self.multicall,
+            [self.fees.functions.LP_FEE(), self.fees.functions.INSURANCE_FEE()],
+        )
+        assert [r.unwrap() for r in results] == [3000, 500]
+        assert eth_calls(self.provider) == 1
+
+    def test_failure_is_isolated(self):
+        lp, creator = aggregate3(
+            self.multicall, [self.fees.functions.LP_FEE(), self.fees.functions.CREATOR_FEE()]
+        )
+        assert lp.success and lp.value == 3000
+        assert not creator.success
+        with pytest.raises(ContractLogicError, match="FeesNotRegistered"):
+            creator.unwrap()
+
+    def test_outputs_match_contract_call(self):
+        (result,) = aggregate3(self.multicall, [self.pm.functions.cfgs(PERP_ID)])
+        assert result.unwrap() == self.pm.functions.cfgs(PERP_ID).call()
+
+    def test_sequential_fallback(self):
+        results = aggregate3(
+            None, [self.fees.functions.LP_FEE(), self.fees.functions.INSURANCE_FEE()]
+        )
+        assert [r.unwrap() for r in results] == [3000, 500]
+        assert eth_calls(self.provider) == 2
+
+    def test_empty(self):
+        assert aggregate3(self.multicall, []) == []
+        assert eth_calls(self.provider) == 0
+
+    def test_encoded_calls_return_raw_data(self):
+        lp, creator = aggregate3_encoded(
+            self.multicall,
+            [
+                (self.fees.address, selector("LP_FEE()")),
+                (self.fees.address, selector("CREATOR_FEE()")),
+            ],
+        )
+        assert lp == (True, encode(["uint24"], [3000]))
+        assert creator[0] is False
+        assert creator[1] == selector("FeesNotRegistered()")
+        assert eth_calls(self.provider) == 1
+        assert aggregate3_encoded(self.multicall, []) == []
+
+
+class TestContextMulticall:
+    def test_get_perp_data_batches_reads(self):
+        provider = FakeProvider(perp_handlers())
+        ctx = make_context(provider)
+
+        perp = ctx.get_perp_data(PERP_ID)
+        # cfgs + block number, then mark + module constants
+        assert eth_calls(provider) == 2
+        assert perp.tick_spacing == 60
+        assert perp.mark == pytest.approx(100.0)
+        assert perp.fees.lp_fee == 0.003
+        assert perp.bounds.max_taker_leverage == 20.0
+        assert perp.bounds.min_taker_leverage == 2.0
+
+        ctx.get_perp_data(PERP_ID)
+        assert eth_calls(provider) == 3
+
+    def test_module_reads_pinned_to_config_block(self):
+        provider = FakeProvider(perp_handlers())
+        ctx = make_context(provider)
+        ctx.get_perp_data(PERP_ID)
+
+        eth_calls = [params for method, params in provider.calls if method == "eth_call"]
+        assert eth_calls[0][1] == "latest"
+        assert eth_calls[1][1] == hex(1234)
+
+    def test_extra_calls_share_the_batch(self):
+        provider = FakeProvider(perp_handlers())
+        ctx = make_context(provider)
+        ctx.get_perp_config(PERP_ID)
+        calls_before = eth_calls(provider)
+
+        _, (protocol_fee,) = ctx._fetch_perp_data(
+            PERP_ID, [ctx._perp_manager.functions.protocolFee()]
+        )
+        assert protocol_fee == 200
+        assert eth_calls(provider) == calls_before + 1
+
+    def test_revert_is_decoded_through_error_handling(self):
+        provider = FakeProvider(perp_handlers(fee_reverts=True))
+        ctx = make_context(provider)
+
+        with pytest.raises(PerpCityError, match="Fees module has not been registered") as exc_info:
+            ctx.get_perp_data(PERP_ID)
+        assert isinstance(exc_info.value.cause, ContractLogicError)
+
+    def test_without_multicall(self):
+        provider = FakeProvider(perp_handlers())
+        ctx = make_context(provider, multicall_address=None)
+
+        perp = ctx.get_perp_data(PERP_ID)
+        assert perp.fees.creator_fee == 0.001
+        # cfgs, mark, 4 fees, 6 margin ratios
+        assert eth_calls(provider) == 12
+
+
+class TestAggregate3Chunked:
+    def setup_method(self):
+        self.provider = FakeProvider(perp_handlers())
+        self.w3 = Web3(self.provider)
+        self.multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        self.fees = self.w3.eth.contract(address=Web3.to_checksum_address(FEES), abi=FEES_ABI)
+
+    def test_single_chunk(self):
+        results = aggregate3_chunked(self.multicall, [self.fees.functions.LP_FEE()] * 3, 5)
+        assert [r.unwrap() for r in results] == [3000] * 3
+        assert eth_calls(self.provider) == 1
+
+    def test_later_chunks_pinned_to_first_block(self):
+        results = aggregate3_chunked(self.multicall, [self.fees.functions.LP_FEE()] * 7, 3)
+        assert len(results) == 7
+        requests = [params for method, params in self.provider.calls if method == "eth_call"]
+        assert [block for _, block in requests] == ["latest", hex(1234), hex(1234)]
+        # The block number read in the first request counts towards its cap
+        sizes = [
+            len(decode(["(address,bool,bytes)[]"], bytes.fromhex(tx["data"][10:]))[0])
+            for tx, _ in requests
+        ]
+        assert sizes == [3, 3, 2]
+
+    def test_invalid_chunk_size(self):
+        with pytest.raises(ValueError, match="Invalid chunk size"):
+            aggregate3_chunked(self.multicall, [self.fees.functions.LP_FEE()], 0)
+
+
+class TestBatchedLiveDetails:
+    def test_get_positions_live_details(self):
+        provider = FakeProvider(position_handlers(closed_ids={3}))
+        ctx = make_context(provider)
+
+        details = ctx.get_positions_live_details([1, 2, 3, 4])
+        assert eth_calls(provider) == 1
+        assert details[1].pnl == 1.0
+        assert details[2].is_liquidatable is True
+        assert details[4].effective_margin == 50.0
+        assert isinstance(details[3], PerpCityError)
+        assert "position 3" in str(details[3])
+
+    def test_chunk_size(self):
+        provider = FakeProvider(position_handlers())
+        ctx = make_context(provider, multicall_chunk_size=2)
+
+        details = ctx.get_positions_live_details(list(range(1, 6)))
+        assert len(details) == 5
+        assert eth_calls(provider) == 3
+
+        ctx.get_positions_live_details(list(range(1, 6)), chunk_size=10)
+        assert eth_calls(provider) == 4
+
+    def test_get_user_data_skips_closed_positions(self):
+        provider = FakeProvider(position_handlers(closed_ids={2}))
+        ctx = make_context(provider)
+
+        user = ctx.get_user_data(
+            "0x" + "99" * 20,
+            [
+                {"perp_id": PERP_ID, "position_id": 1, "is_long": True},
+                {"perp_id": PERP_ID, "position_id": 2, "is_long": False},
+                {"perp_id": PERP_ID, "position_id": 3, "is_maker": True},
+            ],
+        )
+        assert eth_calls(provider) == 1
+        assert user.usdc_balance == 1500.0
+        assert [p.position_id for p in user.open_positions] == [1, 3]
+        assert user.open_positions[0].is_long is True
+        assert user.open_positions[1].is_maker is True
+        assert user.open_positions[1].live_details.pnl == 3.0
+        assert list(user.failed_positions) == [2]
+        assert isinstance(user.failed_positions[2], PerpCityError)
+        assert "position 2" in str(user.failed_positions[2])
+
+    def test_get_user_data_without_positions(self):
+        provider = FakeProvider(position_handlers())
+        ctx = make_context(provider)
+
+        user = ctx.get_user_data("0x" + "99" * 20, [])
+        assert user.usdc_balance == 1500.0
+        assert user.open_positions == []
+        assert user.failed_positions == {}
@@ -0,0 +1,217 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from web3.exceptions import Web3RPCError
+
+from perpcity_sdk.utils.errors import PerpCityError
+from perpcity_sdk.utils.nonce import (
+    AsyncNonceManager,
+    NonceManager,
+    is_nonce_error,
+    is_rejected_transaction,
+)
+
+from .fakes import (
+    PERP_MANAGER,
+    AsyncFakeProvider,
+    FakeProvider,
+    make_async_context,
+    make_context,
+    perp_handlers,
+)
+
+
+def _count(provider, method: str) -> int:
+    return sum(1 for m, _ in provider.calls if m == method)
+
+
+class TestNonceManager:
+    def setup_method(self):
+        self.fetches = 0
+
+    def _fetch(self) -> int:
+        self.fetches += 1
+        return 5
+
+    def test_allocates_sequentially_after_one_fetch(self):
+        nonces = NonceManager(self._fetch)
+        assert [nonces.allocate() for _ in range(3)] == [5, 6, 7]
+        assert self.fetches == 1
+
+    def test_resync_refetches(self):
+        nonces = NonceManager(self._fetch)
+        nonces.allocate()
+        nonces.allocate()
+        nonces.resync()
+        assert nonces.allocate() == 5
+        assert self.fetches == 2
+
+    def test_release_only_latest(self):
+        nonces = NonceManager(self._fetch)
+        first = nonces.allocate()
+        second = nonces.allocate()
+
+        assert not nonces.release(first)
+        assert nonces.release(second)
+        assert nonces.allocate() == 6
+        assert self.fetches == 1
+
+    def test_thread_safe(self):
+        nonces = NonceManager(self._fetch)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            allocated = list(pool.map(lambda _: nonces.allocate(), range(200)))
+        assert sorted(allocated) == list(range(5, 205))
+        assert self.fetches == 1
+
+    def test_async(self):
+        async def fetch() -> int:
+            self.fetches += 1
+            return 9
+
+        async def run():
+            nonces = AsyncNonceManager(fetch)
+            return await asyncio.gather(*(nonces.allocate() for _ in range(10)))
+
+        assert sorted(asyncio.run(run())) == list(range(9, 19))
+        assert self.fetches == 1
+
+
+class TestIsNonceError:
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "nonce too low: next nonce 8, tx nonce 7",
+            "replacement transaction underpriced",
+            "Invalid nonce",
+        ],
+    )
+    def test_matches(self, message):
+        assert is_nonce_error(Exception(message))
+
+    def test_other_errors(self):
+        assert not is_nonce_error(Exception("insufficient funds for gas * price + value"))
+
+
+class TestIsRejectedTransaction:
+    def test_rpc_errors(self):
+        assert is_rejected_transaction(Web3RPCError("insufficient funds for gas * price + value"))
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            Web3RPCError("request timed out"),
+            TimeoutError("read timeout"),
+            ConnectionError("connection reset by peer"),
+        ],
+    )
+    def test_unknown_outcomes(self, error):
+        assert not is_rejected_transaction(error)
+
+
+class TestContextNonces:
+    def setup_method(self):
+        self.provider = FakeProvider(perp_handlers())
+        self.ctx = make_context(self.provider)
+
+    def _approve(self):
+        return self.ctx._usdc.functions.approve(PERP_MANAGER, 1)
+
+    def test_back_to_back_sends_use_local_nonces(self):
+        self.ctx.send_transaction(self._approve())
+        self.ctx.send_transaction(self._approve())
+        self.ctx.execute_transaction(self._approve())
+        assert self.provider.sent_nonces() == [7, 8, 9]
+        assert _count(self.provider, "eth_getTransactionCount") == 1
+
+    def test_gas_is_estimated_once(self):
+        self.ctx.execute_transaction(self._approve())
+        assert _count(self.provider, "eth_estimateGas") == 1
+
+        self.ctx.execute_transaction(self._approve(), gas=50_000)
+        assert _count(self.provider, "eth_estimateGas") == 1
+
+    def test_nonce_error_resyncs_and_retries(self):
+        self.ctx.send_transaction(self._approve())
+        # Another sender used nonces 8 and 9
+        self.provider.nonce = 10
+        self.provider.send_errors.append("nonce too low")
+
+        self.ctx.send_transaction(self._approve())
+        assert self.provider.sent_nonces() == [7, 10]
+        assert _count(self.provider, "eth_getTransactionCount") == 2
+
+    def test_other_errors_release_the_nonce(self):
+        self.provider.send_errors.append("insufficient funds for gas * price + value")
+        with pytest.raises(Web3RPCError, match="insufficient funds"):
+            self.ctx.send_transaction(self._approve())
+
+        self.ctx.send_transaction(self._approve())
+        assert self.provider.sent_nonces() == [7]
+        assert _count(self.provider, "eth_getTransactionCount") == 1
+
+    def test_other_errors_keep_nonces_in_flight(self):
+        make_request = self.provider.make_request
+        in_flight = []
+
+        def allocate_during_send(method, params):
+            # Another thread allocates while this send is on the wire
+            if method == "eth_sendRawTransaction" and not in_flight:
+                in_flight.append(self.ctx._nonces.allocate())
+            return make_request(method, params)
+
+        self.provider.make_request = allocate_during_send
+        self.provider.send_errors.append("insufficient funds for gas * price + value")
+        with pytest.raises(Web3RPCError, match="insufficient funds"):
+            self.ctx.send_transaction(self._approve())
+        self.ctx.send_transaction(self._approve())
+
+        assert in_flight == [8]
+        assert self.provider.sent_nonces() == [9]
+        assert _count(self.provider, "eth_getTransactionCount") == 1
+
+    @pytest.mark.parametrize(
+        "error", [TimeoutError("read timeout"), Web3RPCError("request timed out")]
+    )
+    def test_timeouts_do_not_reuse_the_nonce(self, error):
+        make_request = self.provider.make_request
+
+        def accept_then_time_out(method, params):
+            response = make_request(method, params)
+            if method == "eth_sendRawTransaction" and len(self.provider.sent) == 1:
+                # The node accepted the transaction, but the response never arrived
+                self.provider.nonce += 1
+                raise error
+            return response
+
+        self.provider.make_request = accept_then_time_out
+        with pytest.raises(type(error)):
+            self.ctx.send_transaction(self._approve())
+        self.ctx.send_transaction(self._approve())
+
+        assert self.provider.sent_nonces() == [7, 8]
+        assert _count(self.provider, "eth_getTransactionCount") == 2
+
+    def test_retries_are_bounded(self):
+        self.provider.send_errors.extend(["nonce too low"] * 5)
+        with pytest.raises(Web3RPCError, match="nonce too low"):
+            self.ctx.send_transaction(self._approve())
+        assert self.provider.sent == []
+
+    def test_reverted_receipt(self):
+        self.provider.receipt_status = 0
+        with pytest.raises(PerpCityError, match="Transaction reverted"):
+            self.ctx.execute_transaction(self._approve())
+
+    def test_async_context(self):
+        provider = AsyncFakeProvider(perp_handlers())
+        ctx = make_async_context(provider)
+
+        async def run():
+            fn = ctx._usdc.functions.approve(PERP_MANAGER, 1)
+            await asyncio.gather(*(ctx.send_transaction(fn) for _ in range(3)))
+            await ctx.close()
+
+        asyncio.run(run())
+        assert sorted(provider.sync.sent_nonces()) == [7, 8, 9]
+        assert _count(provider, "eth_getTransactionCount") == 1
@@ -0,0 +1,101 @@
+import pytest
+from eth_abi import encode
+
+from perpcity_sdk.indexer import PerpCityIndexer
+from perpcity_sdk.scanner import LiquidationScanner
+
+from .fakes import (
+    PERP_ID,
+    PERP_MANAGER,
+    FakeProvider,
+    eth_calls,
+    make_context,
+    perp_handlers,
+    position_closed_log,
+    position_handlers,
+    position_opened_log,
+    selector,
+)
+
+
+def _provider(next_pos_id: int = 8, closed_ids=(2,), maker_ids=(6,)) -> FakeProvider:
+    return FakeProvider(
+        {
+            **perp_handlers(),
+            **position_handlers(closed_ids=closed_ids, maker_ids=maker_ids),
+            (PERP_MANAGER, selector("nextPosId()")): lambda _args: encode(
+                ["uint256"], [next_pos_id]
+            ),
+        }
+    )
+
+
+def _position_calls(provider) -> int:
+    positions = selector("positions(uint256)").hex()
+    return sum(
+        str(params[0]["data"]).count(positions)
+        for method, params in provider.calls
+        if method == "eth_call"
+    )
+
+
+class TestLiquidationScanner:
+    def setup_method(self):
+        self.provider = _provider()
+        self.ctx = make_context(self.provider)
+
+    def test_returns_liquidatable_positions_in_id_order(self):
+        scanner = LiquidationScanner(self.ctx, batch_size=2, max_workers=3)
+        found = scanner.scan()
+
+        assert [p.position_id for p in found] == [4, 6]
+        assert all(p.perp_id == PERP_ID for p in found)
+        assert [p.is_maker for p in found] == [False, True]
+        assert found[0].live_details.pnl == 4.0
+        assert found[0].live_details.is_liquidatable is True
+        assert scanner.closed == {2}
+
+    def test_one_multicall_per_batch(self):
+        LiquidationScanner(self.ctx, batch_size=3).scan()
+        # nextPosId plus ceil(7 / 3) batches
+        assert eth_calls(self.provider) == 1 + 3
+
+    def test_skips_known_closed_ids(self):
+        scanner = LiquidationScanner(self.ctx, batch_size=100)
+        scanner.scan()
+        assert _position_calls(self.provider) == 7
+
+        self.provider.calls.clear()
+        assert [p.position_id for p in scanner.scan()] == [4, 6]
+        assert _position_calls(self.provider) == 6
+
+    def test_skips_ids_closed_in_indexer(self):
+        self.provider.add_log(position_opened_log(4, perp_delta=5), 5)
+        self.provider.add_log(position_closed_log(4, was_liquidated=True), 10)
+        with PerpCityIndexer(self.ctx) as indexer:
+            indexer.sync(to_block=20)
+            self.provider.calls.clear()
+
+            found = LiquidationScanner(self.ctx, indexer=indexer).scan()
+        assert [p.position_id for p in found] == [6]
+        assert _position_calls(self.provider) == 6
+
+    def test_explicit_id_range(self):
+        found = LiquidationScanner(self.ctx).scan(start_id=5, end_id=6)
+        assert [p.position_id for p in found] == [6]
+        assert eth_calls(self.provider) == 1
+
+    def test_without_multicall(self):
+        ctx = make_context(self.provider, multicall_address=None)
+        found = LiquidationScanner(ctx, batch_size=3).scan()
+        assert [p.position_id for p in found] == [4, 6]
+        assert found[1].is_maker is True
+
+    def test_no_positions(self):
+        ctx = make_context(_provider(next_pos_id=1))
+        assert LiquidationScanner(ctx).scan() == []
+
+    @pytest.mark.parametrize("kwargs", [{"batch_size": 0}, {"max_workers": 0}])
+    def test_invalid_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            LiquidationScanner(self.ctx, **kwargs)
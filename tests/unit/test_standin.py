@@ -0,0 +1,266 @@
+import asyncio
+import json
+import urllib.request
+
+import pytest
+
+from perpcity_sdk import (
+    ClosePositionParams,
+    LiquidationScanner,
+    OpenMakerPositionParams,
+    OpenTakerPositionParams,
+    PerpCityContext,
+    PerpCityError,
+    close_position,
+    open_maker_position,
+    open_taker_position,
+)
+from perpcity_sdk.abis.selectors import PERP_MANAGER_ERRORS
+from perpcity_sdk.indexer import PerpCityIndexer
+from perpcity_sdk.standin import (
+    STANDIN_PERP_MANAGER,
+    STANDIN_USDC,
+    NetworkConditions,
+    StandInChain,
+    StandInServer,
+)
+
+KEY = "0x" + "01" * 32
+OTHER_KEY = "0x" + "02" * 32
+
+_CLOSE = ClosePositionParams(min_amt0_out=0, min_amt1_out=0, max_amt1_in=0)
+
+
+def _taker(margin: float = 100, leverage: float = 5, is_long: bool = True):
+    return OpenTakerPositionParams(
+        is_long=is_long, margin=margin, leverage=leverage, unspecified_amount_limit=0
+    )
+
+
+@pytest.fixture
+def chain():
+    return StandInChain()
+
+
+@pytest.fixture
+def perp_id(chain):
+    return chain.create_perp(price=10.0)
+
+
+@pytest.fixture
+def ctx(chain):
+    ctx = chain.connect(KEY)
+    chain.mint_usdc(ctx.account.address, 1_000)
+    return ctx
+
+
+class TestReads:
+    def test_perp_data(self, ctx, perp_id):
+        perp = ctx.get_perp_data(perp_id)
+
+        assert perp.mark == pytest.approx(10.0)
+        assert perp.fees.lp_fee == pytest.approx(0.003)
+        assert perp.bounds.max_taker_leverage == pytest.approx(20.0)
+
+    def test_usdc_balance(self, ctx):
+        assert ctx.get_user_data(ctx.account.address).usdc_balance == pytest.approx(1_000)
+
+
+class TestTakerPositions:
+    def test_open_track_and_close(self, chain, ctx, perp_id):
+        position = open_taker_position(ctx, perp_id, _taker())
+
+        assert position.position_id == 1
+        balance = ctx.get_user_data(ctx.account.address).usdc_balance
+        assert balance < 900
+        assert position.live_details().pnl == pytest.approx(0, abs=1e-6)
+
+        chain.set_mark(perp_id, 11.0)
+        assert position.live_details().pnl == pytest.approx(50, rel=1e-3)
+
+        result = position.close_position(_CLOSE)
+        assert result.position is None
+        assert ctx.get_user_data(ctx.account.address).usdc_balance > balance + 140
+        assert ctx.discover_user_positions(ctx.account.address) == []
+
+    def test_over_leverage_reverts_with_custom_error(self, ctx, perp_id):
+        (selector,) = (
+            s for s, (name, _) in PERP_MANAGER_ERRORS.items() if name == "InvalidMarginRatio"
+        )
+
+        with pytest.raises(PerpCityError, match="0x" + selector.hex()):
+            open_taker_position(ctx, perp_id, _taker(margin=10, leverage=50))
+
+    def test_revert_leaves_no_state(self, chain, ctx, perp_id):
+        with pytest.raises(PerpCityError, match="exceeds balance"):
+            open_taker_position(ctx, perp_id, _taker(margin=5_000, leverage=2))
+
+        assert ctx.get_user_data(ctx.account.address).usdc_balance == pytest.approx(1_000)
+        assert open_taker_position(ctx, perp_id, _taker()).position_id == 1
+
+    def test_only_owner_closes_healthy_position(self, chain, ctx, perp_id):
+        position = open_taker_position(ctx, perp_id, _taker())
+        other = chain.connect(OTHER_KEY)
+
+        with pytest.raises(PerpCityError):
+            close_position(other, perp_id, position.position_id, _CLOSE)
+
+        assert position.live_details().pnl == pytest.approx(0, abs=1e-6)
+
+    def test_liquidation(self, chain, ctx, perp_id):
+        position = open_taker_position(ctx, perp_id, _taker(leverage=10, is_long=False))
+        other = chain.connect(OTHER_KEY)
+        chain.set_mark(perp_id, 10.8)
+
+        (found,) = LiquidationScanner(other).scan()
+        assert found.position_id == position.position_id
+
+        close_position(other, perp_id, position.position_id, _CLOSE)
+
+        assert other.get_user_data(other.account.address).usdc_balance > 0
+        assert LiquidationScanner(other).scan() == []
+
+
+class TestMakerPositions:
+    def test_open_and_discover(self, ctx, perp_id):
+        position = open_maker_position(
+            ctx,
+            perp_id,
+            OpenMakerPositionParams(
+                margin=100,
+                price_lower=9,
+                price_upper=11,
+                liquidity=10**12,
+                max_amt0_in=10**18,
+                max_amt1_in=10**18,
+            ),
+        )
+
+        (discovered,) = ctx.discover_user_positions(ctx.account.address)
+        assert discovered["position_id"] == position.position_id
+        assert discovered["is_maker"]
+
+
+class TestLogs:
+    def test_indexer_follows_positions(self, chain, ctx, perp_id):
+        chain.max_log_block_range = 3
+        first = open_taker_position(ctx, perp_id, _taker())
+        open_taker_position(ctx, perp_id, _taker(is_long=False))
+        first.close_position(_CLOSE)
+
+        indexer = PerpCityIndexer(ctx, confirmations=0)
+        indexer.sync()
+
+        assert [p.perp_id for p in indexer.perps()] == [perp_id]
+        assert [p.position_id for p in indexer.open_positions()] == [2]
+        assert indexer.closed_position_ids() == {1}
+
+    def test_log_range_limit(self, chain, ctx):
+        chain.max_log_block_range = 10
+        chain.mine(50)
+
+        response = chain.request("eth_getLogs", [{"fromBlock": "0x0", "toBlock": "0x20"}])
+
+        assert response["error"]["code"] == -32005
+
+
+class TestTransactions:
+    def test_nonce_too_low(self, chain, ctx, perp_id):
+        open_taker_position(ctx, perp_id, _taker())
+        tx = ctx.account.sign_transaction(
+            {
+                "chainId": chain.chain_id,
+                "nonce": 0,
+                "to": STANDIN_USDC,
+                "value": 0,
+                "gas": 100_000,
+                "maxFeePerGas": 10**9,
+                "maxPriorityFeePerGas": 0,
+                "data": b"",
+            }
+        )
+
+        response = chain.request("eth_sendRawTransaction", ["0x" + tx.raw_transaction.hex()])
+
+        assert "nonce too low" in response["error"]["message"]
+
+    def test_unknown_method(self, chain):
+        assert chain.request("eth_foo", [])["error"]["code"] == -32601
+
+
+class TestNetworkConditions:
+    def test_fail_next(self, chain, perp_id):
+        conditions = NetworkConditions()
+        conditions.fail_next("eth_call", "boom")
+        ctx = chain.connect(KEY, conditions)
+
+        with pytest.raises(PerpCityError, match="boom"):
+            ctx.get_perp_data(perp_id)
+        assert ctx.get_perp_data(perp_id).mark == pytest.approx(10.0)
+        assert ctx.w3.provider.requests["eth_call"] >= 2
+
+    def test_error_rate_is_seeded(self):
+        def faults(seed):
+            conditions = NetworkConditions(error_rate=0.3, seed=seed)
+            return [conditions.fault("eth_call") is not None for _ in range(100)]
+
+        assert faults(7) == faults(7)
+        assert 10 < sum(faults(7)) < 50
+
+    def test_delay(self):
+        conditions = NetworkConditions(latency=0.05, jitter=0.01, method_latency={"eth_call": 0})
+
+        assert conditions.delay("eth_call") <= 0.01
+        assert 0.05 <= conditions.delay("eth_chainId") <= 0.06
+
+    def test_invalid_error_rate(self):
+        with pytest.raises(ValueError, match="Invalid error rate"):
+            NetworkConditions(error_rate=2)
+
+
+class TestServer:
+    def test_batch_request(self, chain):
+        with StandInServer(chain) as server:
+            body = json.dumps(
+                [
+                    {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId", "params": []},
+                    {"jsonrpc": "2.0", "id": 2, "method": "eth_foo", "params": []},
+                ]
+            ).encode()
+            request = urllib.request.Request(server.url, body, {"Content-Type": "application/json"})
+            with urllib.request.urlopen(request) as response:
+                answers = json.loads(response.read())
+
+        assert answers[0] == {"jsonrpc": "2.0", "id": 1, "result": hex(chain.chain_id)}
+        assert answers[1]["error"]["code"] == -32601
+
+    def test_context_over_http(self, chain, perp_id):
+        with StandInServer(chain) as server:
+            ctx = PerpCityContext(
+                rpc_url=server.url,
+                private_key=KEY,
+                perp_manager_address=STANDIN_PERP_MANAGER,
+                usdc_address=STANDIN_USDC,
+            )
+            chain.mint_usdc(ctx.account.address, 100)
+
+            position = open_taker_position(ctx, perp_id, _taker(margin=10, leverage=2))
+
+            assert position.live_details().pnl == pytest.approx(0, abs=1e-6)
+
+
+class TestAsync:
+    def test_open_position(self, chain, perp_id):
+        ctx = chain.connect_async(KEY)
+        chain.mint_usdc(ctx.account.address, 100)
+
+        async def run():
+            async with ctx:
+                perp = await ctx.get_perp_data(perp_id)
+                position = await ctx.open_taker_position(perp_id, _taker(margin=10, leverage=2))
+                return perp, position
+
+        perp, position = asyncio.run(run())
+
+        assert perp.mark == pytest.approx(10.0)
+        assert position.position_id == 1
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+from perpcity_sdk import state as state_module
+from perpcity_sdk.state import PerpStateCache
+from perpcity_sdk.utils.events import PERP_MANAGER_EVENTS
+
+from .fakes import (
+    PERP_ID,
+    FakeProvider,
+    eth_calls,
+    make_context,
+    notional_adjusted_log,
+    perp_handlers,
+    position_opened_log,
+)
+
+OTHER_PERP_ID = "0x" + "77" * 32
+
+
+def _event(log: dict, block_number: int, log_index: int = 0):
+    return PERP_MANAGER_EVENTS.decode_log(
+        {**log, "blockNumber": block_number, "logIndex": log_index}
+    )
+
+
+class TestPerpStateCache:
+    def setup_method(self):
+        self.provider = FakeProvider(perp_handlers())
+        self.ctx = make_context(self.provider)
+        self.cache = PerpStateCache(self.ctx, max_staleness_blocks=5)
+
+    def test_refresh_seeds_state(self):
+        perp = self.cache.get_perp_data(PERP_ID)
+        assert perp.mark == pytest.approx(100.0)
+
+        state = self.cache.state(PERP_ID)
+        assert (state.long_oi, state.short_oi) == (40, 25)
+        assert state.block_number == self.provider.block_number
+        assert state.log_index is None
+
+    def test_unfed_cache_always_reads(self):
+        self.cache.get_perp_data(PERP_ID)
+        calls = eth_calls(self.provider)
+        self.cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls + 1
+
+    def test_serves_synced_state_from_memory(self):
+        self.cache.get_perp_data(PERP_ID)
+        seeded = self.cache.state(PERP_ID).block_number
+        self.provider.add_log(notional_adjusted_log(1, long_oi=50, short_oi=20), seeded + 2)
+        self.provider.add_log(position_opened_log(2, perp_id=OTHER_PERP_ID), seeded + 3)
+
+        assert self.cache.sync(to_block=seeded + 5) == 2
+        calls = eth_calls(self.provider)
+        perp = self.cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls
+        assert perp.tick_spacing == 60
+
+        state = self.cache.state(PERP_ID)
+        assert (state.long_oi, state.short_oi) == (50, 20)
+        assert state.block_number == seeded + 2
+        assert self.cache.state(OTHER_PERP_ID).mark == pytest.approx(100.0)
+
+    def test_stale_state_falls_back_to_rpc(self):
+        self.cache.get_perp_data(PERP_ID)
+        self.cache.sync()
+        self.cache.apply(_event(position_opened_log(3, perp_id=OTHER_PERP_ID), 10_000))
+
+        calls = eth_calls(self.provider)
+        self.cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls + 1
+        # a looser bound accepts the same state
+        self.cache.head = self.cache.synced_block + 6
+        self.cache.get_perp_data(PERP_ID, max_staleness_blocks=10)
+        assert eth_calls(self.provider) == calls + 1
+
+    def test_cache_no_longer_fed_reads_again(self, monkeypatch):
+        self.cache.get_perp_data(PERP_ID)
+        self.cache.sync()
+        calls = eth_calls(self.provider)
+        self.cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls
+
+        # Nothing has fed the cache for longer than max_feed_age; its head cannot be trusted
+        fed_at = time.monotonic()
+        monkeypatch.setattr(state_module.time, "monotonic", lambda: fed_at + 31)
+        self.cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls + 1
+
+        self.cache.sync()
+        self.cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls + 1
+
+    def test_without_feed_age_limit(self, monkeypatch):
+        cache = PerpStateCache(self.ctx, max_feed_age=None)
+        cache.get_perp_data(PERP_ID)
+        cache.sync()
+        fed_at = time.monotonic()
+        monkeypatch.setattr(state_module.time, "monotonic", lambda: fed_at + 3600)
+
+        calls = eth_calls(self.provider)
+        cache.get_perp_data(PERP_ID)
+        assert eth_calls(self.provider) == calls
+
+    def test_older_events_are_ignored(self):
+        assert self.cache.apply(_event(notional_adjusted_log(1, long_oi=7), 100, 2))
+        assert not self.cache.apply(_event(notional_adjusted_log(1, long_oi=8), 100, 1))
+        assert not self.cache.apply(_event(notional_adjusted_log(1, long_oi=9), 99, 5))
+        assert self.cache.apply(_event(notional_adjusted_log(1, long_oi=10), 101))
+        assert self.cache.state(PERP_ID).long_oi == 10
+
+    def test_rpc_read_supersedes_events_of_its_block(self):
+        block = self.provider.block_number
+        self.cache.apply(_event(notional_adjusted_log(1, long_oi=7), block, 3))
+        self.cache.refresh(PERP_ID)
+        assert self.cache.state(PERP_ID).long_oi == 40
+        assert not self.cache.apply(_event(notional_adjusted_log(1, long_oi=8), block, 4))
+
+    def test_invalid_staleness(self):
+        with pytest.raises(ValueError, match="Invalid max staleness"):
+            PerpStateCache(self.ctx, max_staleness_blocks=-1)
+        with pytest.raises(ValueError, match="Invalid max feed age"):
+            PerpStateCache(self.ctx, max_feed_age=-1)
@@ -0,0 +1,151 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from web3 import AsyncWeb3
+
+from perpcity_sdk.stream import PerpEventStream
+from perpcity_sdk.types import NotionalAdjustedEvent, PositionClosedEvent, PositionOpenedEvent
+
+from .fakes import (
+    PERP_ID,
+    PERP_MANAGER,
+    AsyncFakeProvider,
+    make_async_context,
+    nft_transfer_log,
+    notional_adjusted_log,
+    position_closed_log,
+    position_opened_log,
+)
+
+OTHER_PERP_ID = "0x" + "77" * 32
+
+
+async def _take(stream, count: int) -> list:
+    events = []
+    async for event in stream:
+        events.append(event)
+        if len(events) == count:
+            break
+    return events
+
+
+def _take_events(stream, count: int) -> list:
+    return asyncio.run(asyncio.wait_for(_take(stream, count), timeout=5))
+
+
+class _FakeSocketW3:
+    """Stand-in for an AsyncWeb3 on a WebSocketProvider that replays subscription messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.unsubscribed = []
+        self.eth = SimpleNamespace(subscribe=self._subscribe, unsubscribe=self._unsubscribe)
+        self.socket = SimpleNamespace(process_subscriptions=self._messages)
+        self.provider = None
+
+    async def _subscribe(self, kind, params):
+        self.subscribed = (kind, params)
+        return "0xsub"
+
+    async def _unsubscribe(self, subscription_id):
+        self.unsubscribed.append(subscription_id)
+        return True
+
+    async def _messages(self):
+        for message in self.messages:
+            yield message
+
+
+def _pushed(log: dict, block_number: int = 1300, removed: bool = False) -> dict:
+    return {**log, "blockNumber": block_number, "removed": removed}
+
+
+class TestPerpEventStream:
+    def setup_method(self):
+        self.provider = AsyncFakeProvider({})
+        self.provider.sync.add_log(position_opened_log(1), 10)
+        self.provider.sync.add_log(nft_transfer_log(1, "0x" + "a1" * 20), 10)
+        self.provider.sync.add_log(position_opened_log(2, perp_id=OTHER_PERP_ID), 20)
+        self.provider.sync.add_log(notional_adjusted_log(1, long_oi=5, short_oi=3), 30)
+        self.w3 = AsyncWeb3(self.provider)
+
+    def test_polls_and_filters_perps(self):
+        stream = PerpEventStream(self.w3, PERP_MANAGER, [PERP_ID], from_block=0, poll_interval=0.01)
+        assert stream.uses_subscription is False
+
+        events = _take_events(stream, 2)
+        assert [type(e) for e in events] == [PositionOpenedEvent, NotionalAdjustedEvent]
+        assert stream.latest[PERP_ID].long_oi == 5
+        assert OTHER_PERP_ID not in stream.latest
+
+    def test_polling_picks_up_new_blocks(self):
+        stream = PerpEventStream(self.w3, PERP_MANAGER, poll_interval=0.001)
+        self.provider.sync.add_log(position_closed_log(1), self.provider.sync.block_number + 5)
+
+        (event,) = _take_events(stream, 1)
+        assert isinstance(event, PositionClosedEvent)
+        ranges = [
+            (int(p[0]["fromBlock"], 16), int(p[0]["toBlock"], 16))
+            for method, p in self.provider.calls
+            if method == "eth_getLogs"
+        ]
+        # consecutive polls cover each block exactly once
+        assert all(b[0] == a[1] + 1 for a, b in zip(ranges, ranges[1:], strict=False))
+
+    def test_callbacks(self):
+        stream = PerpEventStream(self.w3, PERP_MANAGER, from_block=0, poll_interval=0.01)
+        seen = []
+
+        @stream.on_event
+        def record(event):
+            seen.append(("sync", event.position_id))
+
+        async def record_async(event):
+            seen.append(("async", event.position_id))
+
+        stream.on_event(record_async)
+        _take_events(stream, 3)
+        assert seen == [
+            ("sync", 1),
+            ("async", 1),
+            ("sync", 2),
+            ("async", 2),
+            ("sync", 1),
+            ("async", 1),
+        ]
+
+    def test_subscription(self):
+        w3 = _FakeSocketW3(
+            [
+                {"subscription": "0xother", "result": _pushed(position_opened_log(9))},
+                {"subscription": "0xsub", "result": _pushed(position_opened_log(3), removed=True)},
+                {"subscription": "0xsub", "result": _pushed(position_opened_log(4))},
+                {"subscription": "0xsub", "result": _pushed(notional_adjusted_log(4))},
+            ]
+        )
+        stream = PerpEventStream(w3, PERP_MANAGER, subscribe=True)
+        assert stream.uses_subscription is True
+
+        async def run():
+            return [event async for event in stream]
+
+        events = asyncio.run(run())
+        assert [e.position_id for e in events] == [4, 4]
+        assert w3.subscribed[0] == "logs"
+        assert w3.unsubscribed == ["0xsub"]
+
+    def test_invalid_poll_interval(self):
+        with pytest.raises(ValueError, match="Invalid poll interval"):
+            PerpEventStream(self.w3, PERP_MANAGER, poll_interval=0)
+
+    def test_context_event_stream(self):
+        provider = AsyncFakeProvider({})
+        provider.sync.add_log(position_opened_log(1), 10)
+
+        async def run():
+            async with make_async_context(provider) as ctx:
+                return await _take(ctx.event_stream(from_block=0, poll_interval=0.01), 1)
+
+        (event,) = asyncio.run(run())
+        assert event.position_id == 1
@@ -0,0 +1,158 @@
+import random
+
+import pytest
+
+from perpcity_sdk.utils.constants import MAX_SQRT_PRICE, MAX_TICK, MIN_SQRT_PRICE, MIN_TICK, Q96
+from perpcity_sdk.utils.liquidity import estimate_liquidity
+from perpcity_sdk.utils.tick_math import (
+    SqrtRatioTable,
+    get_sqrt_ratio_at_tick,
+    get_sqrt_ratio_table,
+    get_tick_at_sqrt_ratio,
+    get_ticks_at_sqrt_ratios,
+    sqrt_ratio_at_tick,
+)
+
+
+class TestTickMath:
+    def test_matches_tick_math_constants(self):
+        assert get_sqrt_ratio_at_tick(MIN_TICK) == MIN_SQRT_PRICE
+        assert get_sqrt_ratio_at_tick(MAX_TICK) == MAX_SQRT_PRICE
+        assert get_sqrt_ratio_at_tick(0) == Q96
+
+    def test_invalid_tick(self):
+        with pytest.raises(ValueError, match="Invalid tick"):
+            get_sqrt_ratio_at_tick(MAX_TICK + 1)
+        with pytest.raises(ValueError, match="Invalid tick"):
+            get_sqrt_ratio_at_tick(MIN_TICK - 1)
+
+    def test_inverts_get_sqrt_ratio_at_tick(self):
+        rng = random.Random(11)
+        ticks = [
+            MIN_TICK,
+            MAX_TICK - 1,
+            -1,
+            0,
+            1,
+            *(rng.randint(MIN_TICK, MAX_TICK - 1) for _ in range(2_000)),
+        ]
+        for tick in ticks:
+            sqrt_price = get_sqrt_ratio_at_tick(tick)
+            assert get_tick_at_sqrt_ratio(sqrt_price) == tick
+            assert get_tick_at_sqrt_ratio(sqrt_price + 1) == tick
+            if tick > MIN_TICK:
+                assert get_tick_at_sqrt_ratio(sqrt_price - 1) == tick - 1
+
+    def test_price_bounds(self):
+        assert get_tick_at_sqrt_ratio(MIN_SQRT_PRICE) == MIN_TICK
+        assert get_tick_at_sqrt_ratio(MAX_SQRT_PRICE - 1) == MAX_TICK - 1
+        for sqrt_price in (MIN_SQRT_PRICE - 1, MAX_SQRT_PRICE):
+            with pytest.raises(ValueError, match="Invalid sqrt price"):
+                get_tick_at_sqrt_ratio(sqrt_price)
+
+
+class TestSqrtRatioTable:
+    def test_grid_bounds(self):
+        table = SqrtRatioTable(60)
+        assert table.min_tick == -887220
+        assert table.max_tick == 887220
+        assert len(table) == 887220 * 2 // 60 + 1
+
+        full = SqrtRatioTable(1)
+        assert (full.min_tick, full.max_tick) == (MIN_TICK, MAX_TICK)
+
+    def test_matches_bit_by_bit(self):
+        table = SqrtRatioTable(10)
+        rng = random.Random(3)
+        ticks = [
+            table.min_tick,
+            table.max_tick,
+            0,
+            *(rng.randrange(-88727, 88727) * 10 for _ in range(500)),
+        ]
+        assert table.sqrt_ratios(ticks) == [get_sqrt_ratio_at_tick(t) for t in ticks]
+
+    def test_builds_blocks_lazily(self):
+        table = SqrtRatioTable(1)
+        table.sqrt_ratio(0)
+        assert sum(block is not None for block in table._blocks) == 1
+
+    def test_off_grid_ticks(self):
+        table = SqrtRatioTable(60)
+        assert 120 in table
+        assert 125 not in table
+        assert 887280 not in table
+        assert table.get(125) is None
+        with pytest.raises(ValueError, match="not on the tick spacing 60 grid"):
+            table.sqrt_ratio(125)
+
+    def test_invalid_tick_spacing(self):
+        with pytest.raises(ValueError, match="Invalid tick spacing"):
+            SqrtRatioTable(0)
+
+    def test_memory_mapped_file(self, tmp_path):
+        path = tmp_path / "sqrt_200.bin"
+        table = SqrtRatioTable(200, path)
+        assert path.stat().st_size == 16 + len(table) * 20
+        assert table.sqrt_ratio(-600) == get_sqrt_ratio_at_tick(-600)
+        table.close()
+
+        mtime = path.stat().st_mtime_ns
+        reopened = SqrtRatioTable(200, path)
+        assert path.stat().st_mtime_ns == mtime
+        assert reopened.sqrt_ratio(reopened.max_tick) == get_sqrt_ratio_at_tick(reopened.max_tick)
+        reopened.close()
+
+    def test_rebuilds_mismatched_file(self, tmp_path):
+        path = tmp_path / "sqrt.bin"
+        SqrtRatioTable(200, path).close()
+        table = SqrtRatioTable(100, path)
+        assert path.stat().st_size == 16 + len(table) * 20
+        assert table.sqrt_ratio(100) == get_sqrt_ratio_at_tick(100)
+        table.close()
+
+
+class TestSqrtRatioAtTick:
+    def test_uses_existing_tables(self):
+        assert sqrt_ratio_at_tick(120) == get_sqrt_ratio_at_tick(120)
+        table = get_sqrt_ratio_table(60)
+        assert get_sqrt_ratio_table(60) is table
+
+        sqrt_ratio_at_tick(120)
+        assert any(block is not None for block in table._blocks)
+        # off-grid ticks are computed directly
+        assert sqrt_ratio_at_tick(121) == get_sqrt_ratio_at_tick(121)
+
+    def test_estimate_liquidity_with_tick_spacing(self):
+        expected = estimate_liquidity(-600, 600, 1_000_000_000)
+        assert estimate_liquidity(-600, 600, 1_000_000_000, tick_spacing=60) == expected
+        assert get_sqrt_ratio_table(60).get(-600) is not None
+
+
+class TestTicksAtSqrtRatios:
+    def test_rounds_down_to_grid(self):
+        table = SqrtRatioTable(60)
+        assert table.tick_at(get_sqrt_ratio_at_tick(120)) == 120
+        assert table.tick_at(get_sqrt_ratio_at_tick(120) - 1) == 60
+        assert table.tick_at(get_sqrt_ratio_at_tick(179)) == 120
+        assert table.tick_at(get_sqrt_ratio_at_tick(-61)) == -120
+        assert table.tick_at(MAX_SQRT_PRICE - 1) == table.max_tick
+
+    def test_matches_scalar(self):
+        rng = random.Random(5)
+        sqrt_prices = [rng.randrange(MIN_SQRT_PRICE, MAX_SQRT_PRICE) for _ in range(200)]
+        sqrt_prices += [rng.randrange(Q96 // 4, Q96 * 4) for _ in range(500)]
+        expected = [get_tick_at_sqrt_ratio(s) // 200 * 200 for s in sqrt_prices]
+        assert get_ticks_at_sqrt_ratios(sqrt_prices, tick_spacing=200) == expected
+
+    def test_memory_mapped_table(self, tmp_path):
+        table = get_sqrt_ratio_table(200, tmp_path / "sqrt.bin")
+        sqrt_prices = [get_sqrt_ratio_at_tick(t) for t in (-400, 0, 199, 200)]
+        assert table.ticks_at(sqrt_prices) == [-400, 0, 0, 200]
+
+    def test_invalid_prices(self):
+        table = SqrtRatioTable(60)
+        with pytest.raises(ValueError, match="Invalid sqrt price"):
+            table.tick_at(MAX_SQRT_PRICE)
+        with pytest.raises(ValueError, match="below tick -887220"):
+            table.tick_at(MIN_SQRT_PRICE)
@@ -0,0 +1,57 @@
+import dataclasses
+import inspect
+import pickle
+
+import pytest
+
+from perpcity_sdk import types
+from perpcity_sdk.context import _parse_discovered_position, _parse_position_raw_data
+from perpcity_sdk.types import LiveDetails, OpenPositionData, OpenTakerPositionParams, UserData
+
+DATACLASSES = [
+    cls
+    for _, cls in inspect.getmembers(types, inspect.isclass)
+    if cls.__module__ == types.__name__ and dataclasses.is_dataclass(cls)
+]
+
+LIVE = LiveDetails(pnl=1.5, funding_payment=-0.1, effective_margin=20.0, is_liquidatable=False)
+
+
+def _position_result(perp_id: bytes) -> tuple:
+    return (perp_id, 10**7, 10**6, -(10**8), 0, 0, 0, (1, 2, 3), (0, 0, 0, 0, 0, 0, 0))
+
+
+class TestSlottedTypes:
+    @pytest.mark.parametrize("cls", DATACLASSES, ids=lambda cls: cls.__name__)
+    def test_no_instance_dict(self, cls):
+        assert "__slots__" in cls.__dict__
+        assert "__dict__" not in cls.__dict__
+
+    def test_frozen_and_constructors_unchanged(self):
+        position = OpenPositionData("0xab", 7, LIVE, is_long=True)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            position.position_id = 8
+        assert dataclasses.replace(position, position_id=8).position_id == 8
+        assert UserData("0x1", 10.0).open_positions == []
+
+    def test_mutable_params(self):
+        params = OpenTakerPositionParams(
+            is_long=True, margin=10, leverage=2, unspecified_amount_limit=0
+        )
+        params.margin = 20
+        assert params.margin == 20
+        with pytest.raises(AttributeError):
+            params.extra = 1
+
+    def test_pickle_round_trip(self):
+        snapshot = UserData("0x1", 10.0, [OpenPositionData("0xab", 7, LIVE)])
+        assert pickle.loads(pickle.dumps(snapshot)) == snapshot
+
+
+class TestInternedPerpIds:
+    def test_parsed_positions_share_perp_id(self):
+        first = _parse_position_raw_data(1, _position_result(bytes([0xAB]) * 32))
+        second = _parse_position_raw_data(2, _position_result(bytes([0xAB]) * 32))
+        discovered = _parse_discovered_position(3, _position_result(bytes([0xAB]) * 32))
+        assert first.perp_id is second.perp_id
+        assert discovered["perp_id"] is first.perp_id
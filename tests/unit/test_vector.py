@@ -0,0 +1,237 @@
+import math
+import random
+
+import pytest
+
+from perpcity_sdk.functions.position import (
+    calculate_entry_price,
+    calculate_leverage,
+    calculate_liquidation_price,
+    calculate_position_size,
+    calculate_position_value,
+)
+from perpcity_sdk.types import MarginRatios, PositionRawData
+from perpcity_sdk.utils import conversions
+from perpcity_sdk.utils.constants import Q96
+from perpcity_sdk.utils.liquidity import calculate_liquidity_for_target_ratio
+from perpcity_sdk.utils.tick_math import get_sqrt_ratio_at_tick
+
+np = pytest.importorskip("numpy")
+vector = pytest.importorskip("perpcity_sdk.vector")
+
+
+class TestVectorConversions:
+    def setup_method(self):
+        self.rng = random.Random(7)
+
+    def test_price_to_tick_matches_scalar(self):
+        prices = [self.rng.uniform(1e-6, 1e6) for _ in range(20_000)]
+        # exact tick prices sit on the floor/ceil boundary
+        prices += [1.0001**t for t in range(-2000, 2000, 13)]
+        for round_down in (True, False):
+            expected = [conversions.price_to_tick(p, round_down) for p in prices]
+            result = vector.price_to_tick(np.array(prices), round_down)
+            assert result.dtype == np.int64
+            assert result.tolist() == expected
+
+    def test_price_to_tick_rejects_non_positive(self):
+        with pytest.raises(ValueError, match="Price must be positive"):
+            vector.price_to_tick([1.0, 0.0], True)
+
+    def test_sqrt_price_x96_to_tick_matches_scalar(self):
+        sqrt_prices = [get_sqrt_ratio_at_tick(t) + d for t in (-600, 0, 59, 60) for d in (0, 1)]
+        for round_down in (True, False):
+            expected = [conversions.sqrt_price_x96_to_tick(s, round_down) for s in sqrt_prices]
+            result = vector.sqrt_price_x96_to_tick(sqrt_prices, round_down, tick_spacing=60)
+            assert result.dtype == np.int64
+            assert result.tolist() == [
+                (t // 60 if round_down else -(-t // 60)) * 60 for t in expected
+            ]
+
+    def test_tick_to_price_matches_scalar(self):
+        ticks = [self.rng.randint(-887_272, 887_272) for _ in range(5_000)] * 3
+        assert vector.tick_to_price(ticks).tolist() == [conversions.tick_to_price(t) for t in ticks]
+
+    def test_tick_to_price_keeps_shape(self):
+        assert vector.tick_to_price(np.zeros((2, 3), dtype=np.int64)).shape == (2, 3)
+        assert vector.tick_to_price(60).shape == ()
+
+    def test_sqrt_price_x96_to_price_matches_scalar(self):
+        sqrt_prices = [self.rng.getrandbits(bits) + 1 for bits in range(40, 161) for _ in range(20)]
+        # prices exactly on, and one unit below, a 1e-6 step
+        sqrt_prices += [2**96 * k + d for k in range(1, 50) for d in (-1, 0, 1)]
+        expected = [conversions.sqrt_price_x96_to_price(s) for s in sqrt_prices]
+        assert vector.sqrt_price_x96_to_price(sqrt_prices).tolist() == expected
+
+    def test_sqrt_price_x96_to_price_int64_input(self):
+        sqrt_prices = np.array([2**60, 2**62 + 12345], dtype=np.int64)
+        expected = [conversions.sqrt_price_x96_to_price(int(s)) for s in sqrt_prices]
+        assert vector.sqrt_price_x96_to_price(sqrt_prices).tolist() == expected
+
+    def test_scale_from_x96_matches_scalar(self):
+        values = [self.rng.getrandbits(200) for _ in range(1_000)]
+        assert vector.scale_from_x96(values).tolist() == [
+            conversions.scale_from_x96(v) for v in values
+        ]
+
+    def test_x96_rejects_floats(self):
+        with pytest.raises(TypeError, match="integer"):
+            vector.sqrt_price_x96_to_price(np.array([1.5]))
+
+    def test_scale_6_decimals_matches_scalar(self):
+        amounts = [self.rng.uniform(-1e6, 1e6) for _ in range(10_000)] + [0.1, 0.3, 1.005]
+        assert vector.scale_6_decimals(amounts).tolist() == [
+            conversions.scale_6_decimals(a) for a in amounts
+        ]
+
+    def test_margin_ratio_to_leverage_matches_scalar(self):
+        ratios = [self.rng.randint(1, 1_000_000) for _ in range(10_000)]
+        assert vector.margin_ratio_to_leverage(ratios).tolist() == [
+            conversions.margin_ratio_to_leverage(r) for r in ratios
+        ]
+        with pytest.raises(ValueError, match="greater than 0"):
+            vector.margin_ratio_to_leverage([100, 0])
+
+
+class TestLiquidityLadder:
+    def setup_method(self):
+        self.sqrt_price = conversions.price_to_sqrt_price_x96(100)
+        # below, straddling and above the current tick (~46054)
+        self.ranges = [(40_020, 42_000), (45_000, 47_040), (48_000, 50_040)]
+
+    def test_matches_scalar_liquidity(self):
+        ladder = vector.build_liquidity_ladder(self.sqrt_price, self.ranges, [100, 250, 50], 0.1)
+        assert ladder.dtype == vector.LADDER_DTYPE
+        assert ladder["liquidity"].tolist() == [
+            calculate_liquidity_for_target_ratio(scale, lower, upper, self.sqrt_price, 0.1)
+            for (lower, upper), scale in zip(self.ranges, (100e6, 250e6, 50e6), strict=True)
+        ]
+
+    def test_amounts_and_debt(self):
+        ladder = vector.build_liquidity_ladder(self.sqrt_price, self.ranges, 100, [0.1, 0.2, 0.5])
+        below, inside, above = ladder
+        assert below["amount0"] == 0 and below["amount1"] > 0
+        assert inside["amount0"] > 0 and inside["amount1"] > 0
+        assert above["amount0"] > 0 and above["amount1"] == 0
+        assert ladder["debt"] == pytest.approx([1000, 500, 200], rel=1e-2)
+        assert ladder["max_amt1_in"][0] == math.ceil(below["amount1"] * 1e6 * 1.01)
+
+    def test_tick_spacing_widens_ranges(self):
+        ladder = vector.build_liquidity_ladder(self.sqrt_price, [(45_010, 47_030)], 100, 0.1, 60)
+        assert (ladder["tick_lower"][0], ladder["tick_upper"][0]) == (45_000, 47_040)
+
+    def test_maker_params_map_back_to_ticks(self):
+        ranges = [(t, t + 60) for t in range(-6_000, 6_000, 60)]
+        ladder = vector.build_liquidity_ladder(Q96, ranges, 10, 0.5)
+        params = vector.ladder_to_maker_params(ladder)
+        assert len(params) == len(ranges)
+        assert params[0].liquidity == int(ladder["liquidity"][0])
+        for (lower, upper), p in zip(ranges, params, strict=True):
+            assert conversions.price_to_tick(p.price_lower, True) == lower
+            assert conversions.price_to_tick(p.price_upper, False) == upper
+
+    def test_unfunded_rungs_are_skipped(self):
+        ladder = vector.build_liquidity_ladder(self.sqrt_price, self.ranges, [100, 0, 50], 0.1)
+        assert ladder["liquidity"][1] == 0
+        assert len(vector.ladder_to_maker_params(ladder)) == 2
+
+    def test_invalid_inputs(self):
+        with pytest.raises(ValueError, match="Invalid tick range"):
+            vector.build_liquidity_ladder(self.sqrt_price, [(0, 60), (60, 60)], 100, 0.1)
+        with pytest.raises(ValueError, match="Invalid target margin ratio"):
+            vector.build_liquidity_ladder(self.sqrt_price, self.ranges, 100, [0.1, 0, 0.1])
+
+
+def _random_positions(count: int, seed: int = 0) -> list[PositionRawData]:
+    rng = random.Random(seed)
+    positions = []
+    for position_id in range(count):
+        perp_delta = rng.choice([0, rng.randint(-(10**10), 10**10)])
+        positions.append(
+            PositionRawData(
+                perp_id="0x123",
+                position_id=position_id,
+                margin=rng.choice([0.0, rng.uniform(1, 10_000)]),
+                entry_perp_delta=perp_delta,
+                entry_usd_delta=-perp_delta * rng.randint(1, 200),
+                margin_ratios=MarginRatios(min=100_000, max=1_000_000, liq=rng.randint(0, 100_000)),
+            )
+        )
+    return positions
+
+
+class TestPositionTable:
+    def setup_method(self):
+        self.raw = _random_positions(500)
+        self.table = vector.PositionTable.from_raw_data(self.raw)
+
+    def test_columns(self):
+        assert len(self.table) == 500
+        assert self.table.position_id.tolist() == list(range(500))
+        assert self.table.is_long.tolist() == [r.entry_perp_delta > 0 for r in self.raw]
+        assert self.table.max_margin_ratio.tolist() == [1_000_000] * 500
+
+    def test_matches_scalar_calculations(self):
+        marks = np.linspace(1, 300, 500)
+        assert self.table.entry_price().tolist() == [calculate_entry_price(r) for r in self.raw]
+        assert self.table.position_size().tolist() == [calculate_position_size(r) for r in self.raw]
+        assert self.table.position_value(marks).tolist() == [
+            calculate_position_value(r, m) for r, m in zip(self.raw, marks.tolist(), strict=True)
+        ]
+
+    def test_matches_scalar_liquidation_price(self):
+        expected = [calculate_liquidation_price(r, r.entry_perp_delta > 0) for r in self.raw]
+        actual = self.table.liquidation_price().tolist()
+        assert [math.isnan(a) for a in actual] == [e is None for e in expected]
+        assert [a for a in actual if not math.isnan(a)] == [e for e in expected if e is not None]
+
+    def test_explicit_side(self):
+        table = vector.PositionTable.from_raw_data(self.raw[:50])
+        table.is_long[:] = True
+        expected = [calculate_liquidation_price(r, True) for r in self.raw[:50]]
+        assert np.nan_to_num(table.liquidation_price(), nan=-1).tolist() == [
+            -1 if e is None else e for e in expected
+        ]
+
+    def test_leverage_matches_scalar(self):
+        values, margins = [10.0, 10.0, 10.0], [5.0, 0.0, -1.0]
+        assert vector.calculate_leverage(values, margins).tolist() == [
+            calculate_leverage(v, m) for v, m in zip(values, margins, strict=True)
+        ]
+
+    def test_mark_to_market(self):
+        table = vector.PositionTable(
+            position_id=[1, 2],
+            margin=[10.0, 10.0],
+            entry_perp_delta=[2_000_000, -2_000_000],
+            entry_usd_delta=[-100_000_000, 100_000_000],
+            liq_margin_ratio=50_000,
+        )
+        result = table.mark_to_market([55.0, 55.0])
+        assert result.dtype == vector.MARK_TO_MARKET_DTYPE
+        assert result["value"].tolist() == [110.0, 110.0]
+        assert result["pnl"].tolist() == [10.0, -10.0]
+        assert result["effective_margin"].tolist() == [20.0, 0.0]
+        assert result["leverage"].tolist() == [5.5, math.inf]
+        assert result["is_liquidatable"].tolist() == [False, True]
+
+    def test_liquidatable_at_liquidation_price(self):
+        liquidation_price = self.table.liquidation_price()
+        valid = ~np.isnan(liquidation_price)
+        table = self.table[valid]
+        direction = np.where(table.is_long, 1.0, -1.0)
+        inside = table.mark_to_market(liquidation_price[valid] + direction * 1e-3)
+        beyond = table.mark_to_market(liquidation_price[valid] - direction * 1e-3)
+        assert not inside["is_liquidatable"][liquidation_price[valid] > 1e-3].any()
+        assert beyond["is_liquidatable"][liquidation_price[valid] > 1e-3].all()
+
+    def test_select_rows(self):
+        longs = self.table[self.table.is_long]
+        assert len(longs) == sum(r.entry_perp_delta > 0 for r in self.raw)
+        assert longs.is_long.all()
+        assert len(self.table[3]) == 1
+
+    def test_empty(self):
+        table = vector.PositionTable.from_raw_data([])
+        assert len(table) == 0
+        assert table.liquidation_price().tolist() == []